@@ -4,6 +4,7 @@ from datetime import datetime
 from datetime import timedelta
 from django.contrib.messages.storage.fallback import FallbackStorage
 from django.core import mail
+from django.core.cache import cache
 from django.http import HttpRequest
 from django.urls import reverse_lazy
 from licenses.models import default_category
@@ -25,6 +26,12 @@ import pytest
 import zope.testbrowser.browser
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start every test with an empty cache."""
+    cache.clear()
+
+
 @pytest.fixture(scope="function")
 def browser(db, admin_user):
     """Get a ``zope.testbrowser`` Browser instance.
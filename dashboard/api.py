@@ -2,10 +2,11 @@ from .widgets.filters import DashboardFilters
 from .widgets.media_data import MediaDataWidget
 from .widgets.inventory import InventoryWidget
 from .widgets.notifications import NotificationsWidget
+from .widgets.users import registration_trend
+from .widgets.users import user_demographics
 from contributions.models import Contribution
 from datetime import datetime
 from datetime import timedelta
-from dateutil.relativedelta import relativedelta
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.decorators import user_passes_test
 from django.db.models import Count
@@ -38,18 +39,8 @@ def api_users_statistics(request):
         # Apply filters
         filtered_queryset = filters.apply_filters_to_queryset(queryset, 'profile')
 
-        # Calculate basic statistics
-        total_users = filtered_queryset.count()
-
-        # Gender distribution
-        male_users = filtered_queryset.filter(gender='m').count()
-        female_users = filtered_queryset.filter(gender='f').count()
-        diverse_users = filtered_queryset.filter(gender='d').count()
-
-        # Verification and membership
-        verified_users = filtered_queryset.filter(verified=True).count()
-        member_users = filtered_queryset.filter(member=True).count()
-
+        # Gender, age, verification and membership counts
+        demographics = user_demographics(filtered_queryset, filters.date_range['end_date'])
 
         # Users by media authority
         try:
@@ -61,166 +52,15 @@ def api_users_statistics(request):
         except Exception:
             users_by_authority = []
 
-        # Age groups
-        age_groups = {
-            'up_to_34': 0,
-            '35_50': 0,
-            '51_65': 0,
-            'over_65': 0,
-            'unknown': 0
-        }
-
-        try:
-            for profile in filtered_queryset:
-                if profile.birthday:
-                    # Check if birthday is the default unknown date (01.01.1800)
-                    if profile.birthday.year == 1800 and profile.birthday.month == 1 and profile.birthday.day == 1:
-                        age_groups['unknown'] += 1
-                    else:
-                        age = relativedelta(filters.date_range['end_date'], profile.birthday).years
-                        if age <= 34:
-                            age_groups['up_to_34'] += 1
-                        elif age <= 50:
-                            age_groups['35_50'] += 1
-                        elif age <= 65:
-                            age_groups['51_65'] += 1
-                        else:
-                            age_groups['over_65'] += 1
-                else:
-                    age_groups['unknown'] += 1
-        except Exception:
-            # If there's an error calculating ages, keep default values
-            pass
-
         # Registration trend based on selected period
         try:
-            start_date = filters.date_range['start_date']
-            end_date = filters.date_range['end_date']
-            registration_trend = []
-
-            # Calculate number of days in the period
-            days_diff = (end_date - start_date).days
-
-            # For periods longer than 30 days, group by weeks
-            if days_diff > 30:
-                # Group by weeks
-                current_date = start_date
-                while current_date <= end_date:
-                    week_end = min(current_date + timedelta(days=6), end_date)
-                    try:
-                        if hasattr(filtered_queryset.model, 'created_at'):
-                            count = filtered_queryset.filter(
-                                created_at__date__gte=current_date,
-                                created_at__date__lte=week_end
-                            ).count()
-                        else:
-                            count = 0
-                    except Exception:
-                        count = 0
-
-                    registration_trend.append({
-                        'date': f"{current_date.strftime('%Y-%m-%d')} - {week_end.strftime('%Y-%m-%d')}",
-                        'count': count
-                    })
-
-                    current_date = week_end + timedelta(days=1)
-            else:
-                # For shorter periods, show daily data
-                current_date = start_date
-                while current_date <= end_date:
-                    try:
-                        if hasattr(filtered_queryset.model, 'created_at'):
-                            count = filtered_queryset.filter(
-                                created_at__date=current_date
-                            ).count()
-                        else:
-                            count = 0
-                    except Exception:
-                        count = 0
-
-                    registration_trend.append({
-                        'date': current_date.strftime('%Y-%m-%d'),
-                        'count': count
-                    })
-
-                    current_date += timedelta(days=1)
-
-        except Exception as e:
-            registration_trend = []
-
-        # Member distribution
-        member_distribution = {
-            'members': member_users,
-            'non_members': total_users - member_users
-        }
-
-        # Age-Gender distribution
-        age_gender_distribution = {
-            'female': {
-                'up_to_34': 0,
-                '35_50': 0,
-                '51_65': 0,
-                'over_65': 0,
-                'unknown': 0
-            },
-            'male': {
-                'up_to_34': 0,
-                '35_50': 0,
-                '51_65': 0,
-                'over_65': 0,
-                'unknown': 0
-            },
-            'diverse': {
-                'up_to_34': 0,
-                '35_50': 0,
-                '51_65': 0,
-                'over_65': 0,
-                'unknown': 0
-            },
-            'unspecified': {
-                'up_to_34': 0,
-                '35_50': 0,
-                '51_65': 0,
-                'over_65': 0,
-                'unknown': 0
-            }
-        }
-
-        try:
-            for profile in filtered_queryset:
-                # Determine gender category
-                gender_key = 'unspecified'
-                if profile.gender == 'f':
-                    gender_key = 'female'
-                elif profile.gender == 'm':
-                    gender_key = 'male'
-                elif profile.gender == 'd':
-                    gender_key = 'diverse'
-
-                # Determine age group
-                age_group_key = 'unknown'
-                if profile.birthday:
-                    # Check if birthday is the default unknown date (01.01.1800)
-                    if profile.birthday.year == 1800 and profile.birthday.month == 1 and profile.birthday.day == 1:
-                        age_group_key = 'unknown'
-                    else:
-                        age = relativedelta(filters.date_range['end_date'], profile.birthday).years
-                        if age <= 34:
-                            age_group_key = 'up_to_34'
-                        elif age <= 50:
-                            age_group_key = '35_50'
-                        elif age <= 65:
-                            age_group_key = '51_65'
-                        else:
-                            age_group_key = 'over_65'
-                else:
-                    age_group_key = 'unknown'
-
-                # Increment the count
-                age_gender_distribution[gender_key][age_group_key] += 1
+            trend = registration_trend(
+                filtered_queryset,
+                filters.date_range['start_date'],
+                filters.date_range['end_date'],
+            )
         except Exception:
-            # If there's an error, keep default values
-            pass
+            trend = []
 
         # Get filters data with error handling
         try:
@@ -229,19 +69,12 @@ def api_users_statistics(request):
             filters_data = {}
 
         data = {
-            'basic_stats': {
-                'total_users': total_users,
-                'male_users': male_users,
-                'female_users': female_users,
-                'diverse_users': diverse_users,
-                'verified_users': verified_users,
-                'member_users': member_users,
-            },
+            'basic_stats': demographics['basic_stats'],
             'users_by_authority': users_by_authority,
-            'age_groups': age_groups,
-            'age_gender_distribution': age_gender_distribution,
-            'registration_trend': registration_trend,
-            'member_distribution': member_distribution,
+            'age_groups': demographics['age_groups'],
+            'age_gender_distribution': demographics['age_gender_distribution'],
+            'registration_trend': trend,
+            'member_distribution': demographics['member_distribution'],
             'filters': filters_data,
         }
 
@@ -0,0 +1,168 @@
+"""
+Shared cache of dashboard widget data.
+
+Widget results are stored in the Django cache, so all worker processes
+and requests share them. Keys are built from the widget, the method, the
+normalized filter state and the active language. Each widget has a
+generation token that is replaced when the data behind it changes, which
+invalidates all of its cached filter combinations at once.
+"""
+
+from .widgets.filters import DashboardFilters
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db import connections
+from django.utils import translation
+from functools import wraps
+from ok_tools.on_commit import CommitBatch
+from ok_tools.on_commit import current_batch
+from uuid import uuid4
+import hashlib
+import json
+import threading
+import time
+
+
+# Seconds a caller computing a result holds the lock, and how often the
+# callers waiting for it check for the result
+LOCK_TIMEOUT = 60
+LOCK_POLL_INTERVAL = 0.1
+
+_MISSING = object()
+
+# Results being computed by the current thread, innermost last
+_computing = threading.local()
+
+
+def filters_state(filters):
+    """
+    Return the filter state that determines a widget result.
+
+    Accepts DashboardFilters or the filter dict of InventoryWidget. Empty
+    values are dropped, so an unset filter and an empty one share a key.
+    """
+    if isinstance(filters, DashboardFilters):
+        state = {
+            'start_date': filters.date_range['start_date'],
+            'end_date': filters.date_range['end_date'],
+            **filters.filters,
+        }
+    else:
+        state = dict(filters or {})
+    return {key: str(value) for key, value in state.items() if value not in ('', None)}
+
+
+def _generation(scope):
+    """Return the current generation token of a widget."""
+    key = f'dashboard:{scope}:generation'
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid4().hex, None)
+        generation = cache.get(key)
+    return generation
+
+
+def _bump(scope):
+    """Replace the generation token of a widget."""
+    cache.set(f'dashboard:{scope}:generation', uuid4().hex, None)
+
+
+class _Invalidation(CommitBatch):
+    """Widgets whose cached results are dropped after a commit."""
+
+    def __init__(self):
+        """Collect the changed widgets of one transaction."""
+        super().__init__()
+        self.scopes = set()
+
+    def execute(self):
+        """Replace the generation tokens of all collected widgets."""
+        for scope in self.scopes:
+            _bump(scope)
+
+
+def invalidate_widget_cache(scope, using=DEFAULT_DB_ALIAS):
+    """
+    Drop all cached results of a widget once the current transaction commits.
+
+    Invalidating before the commit would let a concurrent request cache
+    the old data again under the new generation. All widgets changed in
+    a transaction are invalidated together; outside of transactions the
+    widget is invalidated at once.
+    """
+    if not connections[using].in_atomic_block:
+        _bump(scope)
+        return
+    current_batch('dashboard_cache', _Invalidation, using=using).scopes.add(scope)
+
+
+def skip_cache():
+    """
+    Keep the result being computed out of the cache.
+
+    Called by widget methods returning a fallback after an error, so the
+    next request computes the result again. Cached methods including the
+    fallback in their own result are not cached either.
+    """
+    stack = getattr(_computing, 'stack', [])
+    stack[:] = [True] * len(stack)
+
+
+def get_or_compute(scope, name, filters, compute):
+    """
+    Return the cached result of a widget method, computing it on a miss.
+
+    Only one caller computes a missing result: it takes a lock with
+    ``cache.add`` while the others wait for the result to appear, up to
+    LOCK_TIMEOUT, before computing it themselves. Results marked with
+    skip_cache are returned without being stored.
+
+    Args:
+        scope: Widget name used for invalidation, e.g. 'inventory'
+        name: Name of the cached method
+        filters: DashboardFilters or filter dict of the widget
+        compute: Callable returning the result
+    """
+    state = json.dumps(
+        [filters_state(filters), translation.get_language()], sort_keys=True
+    )
+    digest = hashlib.md5(state.encode()).hexdigest()
+    key = f'dashboard:{scope}:{_generation(scope)}:{name}:{digest}'
+
+    result = cache.get(key, _MISSING)
+    if result is not _MISSING:
+        return result
+
+    lock = f'{key}:lock'
+    if not cache.add(lock, True, LOCK_TIMEOUT):
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < deadline and cache.get(lock):
+            time.sleep(LOCK_POLL_INTERVAL)
+            result = cache.get(key, _MISSING)
+            if result is not _MISSING:
+                return result
+        # The computing caller failed or took too long
+        cache.add(lock, True, LOCK_TIMEOUT)
+    stack = _computing.__dict__.setdefault('stack', [])
+    try:
+        stack.append(False)
+        try:
+            result = compute()
+        finally:
+            skipped = stack.pop()
+        if not skipped:
+            cache.set(key, result, getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300))
+    finally:
+        cache.delete(lock)
+    return result
+
+
+def cached_widget_data(scope):
+    """Cache the result of a widget method without arguments by its filters."""
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self):
+            return get_or_compute(scope, method.__name__, self.filters, lambda: method(self))
+        return wrapper
+    return decorator
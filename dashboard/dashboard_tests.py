@@ -0,0 +1,177 @@
+from .cache import get_or_compute
+from .cache import invalidate_widget_cache
+from .cache import skip_cache
+from .utils import FunnelTracker
+from .widgets.contributions import ContributionsWidget
+from .widgets.inventory import InventoryWidget
+from .widgets.users import registration_trend
+from .widgets.users import user_demographics
+from datetime import date
+from datetime import timedelta
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from ok_tools.testing import create_contribution
+from ok_tools.testing import create_license
+from ok_tools.testing import create_user
+from registration.models import Profile
+from rental.models import RentalRequest
+from unittest.mock import patch
+import threading
+import time
+
+
+def test__cache__get_or_compute__1(
+        db, user_dict, django_capture_on_commit_callbacks):
+    """Widget data is shared between instances until the data changes."""
+    # The test transaction never commits, so the later changes would join
+    # the invalidation scheduled when the user is created
+    with django_capture_on_commit_callbacks(execute=True):
+        user = create_user(user_dict)
+
+    def load():
+        with CaptureQueriesContext(connection) as queries:
+            data = InventoryWidget({'days': '30', 'gender': ''}).get_all_data()
+        return data, len(queries)
+
+    data, queries = load()
+    assert queries > 0
+    assert data['basic_stats']['total_rentals'] == 0
+    assert load() == (data, 0)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        RentalRequest.objects.create(
+            user=user, created_by=user, project_name='Project', purpose='-',
+            requested_start_date='2030-05-01T10:00:00+02:00',
+            requested_end_date='2030-05-01T12:00:00+02:00')
+    data, queries = load()
+    assert queries > 0
+    assert data['basic_stats']['total_rentals'] == 1
+
+
+def test__cache__get_or_compute__2():
+    """Concurrent callers missing the same result compute it once."""
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.3)
+        return {'total': 42}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(
+            get_or_compute('test', 'stats', {'days': '7'}, compute)))
+        for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [{'total': 42}] * 10
+    assert len(calls) == 1
+
+
+def test__cache__invalidate_widget_cache__1():
+    """Outside of transactions a widget is invalidated at once."""
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'total': len(calls)}
+
+    assert get_or_compute('test', 'stats', {}, compute) == {'total': 1}
+    assert get_or_compute('test', 'stats', {}, compute) == {'total': 1}
+    invalidate_widget_cache('test')
+    assert get_or_compute('test', 'stats', {}, compute) == {'total': 2}
+
+
+def test__cache__skip_cache__1():
+    """Results marked with skip_cache are not cached, nor those including them."""
+    calls = []
+
+    def inner():
+        calls.append('inner')
+        skip_cache()
+        return 0
+
+    def outer():
+        calls.append('outer')
+        return get_or_compute('test', 'inner', {}, inner)
+
+    assert get_or_compute('test', 'outer', {}, outer) == 0
+    assert get_or_compute('test', 'outer', {}, outer) == 0
+    assert calls == ['outer', 'inner'] * 2
+
+
+def test__contributions__get_unified_metrics__1(
+        db, user_dict, license_dict, contribution_dict):
+    """The fallback returned after an error is not cached."""
+    widget = ContributionsWidget(RequestFactory().get('/', {'days': '30'}))
+    with patch.object(
+            widget.filters, 'apply_filters_to_queryset', side_effect=RuntimeError):
+        assert widget.get_unified_metrics()['total_contributions'] == 0
+    user = create_user(user_dict)
+    create_contribution(create_license(user.profile, license_dict), {
+        **contribution_dict, 'broadcast_date': timezone.now() - timedelta(days=1)})
+    assert widget.get_unified_metrics()['total_contributions'] == 1
+
+
+def test__users__user_demographics__1(db, user_dict):
+    """Profiles are counted by gender and age at the end of the period."""
+    create_user(user_dict, verified=True)
+    birthdays = [
+        date(2000, 2, 29), date(1984, 3, 1), date(1969, 3, 1), date(1969, 2, 28), date(1800, 1, 1), None]
+    for i, birthday in enumerate(birthdays):
+        user = create_user({**user_dict, 'email': f'user{i}@example.com', 'gender': 'f'}, member=True)
+        Profile.objects.filter(okuser=user).update(birthday=birthday)
+
+    stats = user_demographics(Profile.objects.all(), date(2035, 2, 28))
+    assert stats['basic_stats'] == {
+        'total_users': 7, 'male_users': 1, 'female_users': 6, 'diverse_users': 0,
+        'verified_users': 1, 'member_users': 6,
+    }
+    # relativedelta counts 29 February birthdays as reached on 28 February
+    assert stats['age_gender_distribution']['female'] == {
+        'up_to_34': 0, '35_50': 2, '51_65': 1, 'over_65': 1, 'unknown': 2}
+    assert stats['age_groups'] == {
+        'up_to_34': 0, '35_50': 3, '51_65': 1, 'over_65': 1, 'unknown': 2}
+    assert stats['member_distribution'] == {'members': 6, 'non_members': 1}
+
+
+def test__users__registration_trend__1(db, user):
+    """Registrations are summed into weeks starting at the period start."""
+    today = timezone.localdate()
+    trend = registration_trend(Profile.objects.all(), today - timedelta(days=40), today)
+    assert len(trend) == 6
+    assert trend[0]['date'] == (
+        f'{today - timedelta(days=40):%Y-%m-%d} - {today - timedelta(days=34):%Y-%m-%d}')
+    assert trend[-1] == {'date': f'{today - timedelta(days=5):%Y-%m-%d} - {today:%Y-%m-%d}', 'count': 1}
+    assert sum(week['count'] for week in trend) == 1
+
+
+def test__utils__FunnelTracker__1(
+        db, user_dict, license_dict, contribution_dict,
+        django_assert_max_num_queries):
+    """The funnel runs a fixed number of queries regardless of the users."""
+    for i in range(5):
+        user = create_user({**user_dict, 'email': f'user{i}@example.com'})
+        for day in range(i):
+            create_contribution(create_license(user.profile, license_dict), {
+                **contribution_dict,
+                'broadcast_date': timezone.now() - timedelta(days=day + 1),
+            })
+    tracker = FunnelTracker()
+    start_date = timezone.localdate() - timedelta(days=30)
+    end_date = timezone.localdate()
+
+    with django_assert_max_num_queries(11):
+        metrics = tracker.get_funnel_metrics(start_date, end_date)
+    assert metrics['metrics']['first_broadcasts'] == 10
+    assert metrics['metrics']['multiple_broadcasts'] == 3
+
+    with django_assert_max_num_queries(10):
+        breakdown = tracker.get_stage_breakdown(start_date, end_date)
+    assert breakdown['first_broadcast']['count'] == 4
+    assert breakdown['multiple_broadcasts']['count'] == 3
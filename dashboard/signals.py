@@ -1,16 +1,22 @@
+from .cache import invalidate_widget_cache
 from .models import UserJourney
 from .models import UserJourneyStage
 from .utils import AlertManager
 from .utils import FunnelTracker
 from contributions.models import Contribution
+from django.db import DEFAULT_DB_ALIAS
 from django.db.models.signals import post_delete
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
+from inventory.models import InventoryItem
 from licenses.models import License
 from registration.models import OKUser
 from registration.models import Profile
+from rental.models import EquipmentSet
+from rental.models import RentalItem
 from rental.models import RentalRequest
+from rental.models import RoomRental
 import logging
 
 
@@ -168,3 +174,29 @@ def check_daily_alerts(sender, instance, **kwargs):
 
     except Exception as e:
         logger.error(f"Error checking daily alerts: {e}")
+
+
+# Cached dashboard widgets showing data of each model. Bulk writes sending
+# no signals (bookings, inventory counters, room expiry, reconciliation)
+# call invalidate_widget_cache themselves
+WIDGET_CACHE_SCOPES = {
+    Contribution: ('contributions', 'licenses'),
+    License: ('contributions', 'licenses'),
+    Profile: ('contributions', 'licenses', 'inventory'),
+    InventoryItem: ('inventory',),
+    RentalRequest: ('inventory',),
+    RentalItem: ('inventory',),
+    RoomRental: ('inventory',),
+    EquipmentSet: ('inventory',),
+}
+
+
+def invalidate_widget_caches(sender, **kwargs):
+    """Drop the cached dashboard widgets showing the changed model."""
+    for scope in WIDGET_CACHE_SCOPES[sender]:
+        invalidate_widget_cache(scope, using=kwargs.get('using') or DEFAULT_DB_ALIAS)
+
+
+for model in WIDGET_CACHE_SCOPES:
+    post_save.connect(invalidate_widget_caches, sender=model)
+    post_delete.connect(invalidate_widget_caches, sender=model)
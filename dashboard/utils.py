@@ -8,6 +8,7 @@ from datetime import timedelta
 from django.db import models
 from django.db.models import Count
 from django.db.models import F
+from django.db.models import Min
 from django.db.models import Q
 from django.utils import timezone
 from licenses.models import License
@@ -56,6 +57,32 @@ class FunnelTracker:
             logger.error(f"Error tracking user stage: {e}")
             raise
 
+    def track_rental_completions(self, rental_requests) -> None:
+        """
+        Track the rental completion of many returned requests at once.
+
+        For bulk updates, which send no post_save signal. Stages already
+        reached are updated like in track_user_stage, all with one upsert;
+        a user with several requests keeps the last one.
+        """
+        now = timezone.now()
+        journeys = {
+            rental_request.user_id: UserJourney(
+                user_id=rental_request.user_id,
+                stage=UserJourneyStage.RENTAL_COMPLETED,
+                achieved_at=now,
+                rental_request=rental_request,
+                metadata={'source': 'rental_completion'},
+            )
+            for rental_request in sorted(rental_requests, key=lambda rental_request: rental_request.pk)
+        }
+        UserJourney.objects.bulk_create(
+            list(journeys.values()),
+            update_conflicts=True,
+            unique_fields=['user', 'stage'],
+            update_fields=['achieved_at', 'rental_request', 'metadata'],
+        )
+
     def get_user_journey(self, user: OKUser) -> List[UserJourney]:
         """Get complete journey for a user."""
         return UserJourney.objects.filter(user=user).order_by('achieved_at')
@@ -233,50 +260,29 @@ class FunnelTracker:
 
     def _get_first_broadcasts(self, profiles, start_date, end_date) -> int:
         """Get count of licenses with their first broadcast in the period."""
-        # Get all contributions by these profiles
-        all_contributions = Contribution.objects.filter(
+        first_broadcasts = Contribution.objects.filter(
             license__profile__in=profiles
-        )
-
-        # Find first broadcast for each license
-        first_broadcast_licenses = set()
-        license_ids = all_contributions.values_list('license_id', flat=True).distinct()
-
-        for license_id in license_ids:
-            first_contribution = all_contributions.filter(
-                license_id=license_id
-            ).order_by('broadcast_date').first()
-
-            if first_contribution:
-                # If no date range specified (days=all), include all first broadcasts
-                if not start_date or not end_date:
-                    first_broadcast_licenses.add(license_id)
-                elif start_date <= first_contribution.broadcast_date.date() <= end_date:
-                    first_broadcast_licenses.add(license_id)
+        ).values('license_id').annotate(
+            first_broadcast=Min('broadcast_date')
+        ).order_by()
 
-        return len(first_broadcast_licenses)
+        # If no date range specified (days=all), include all first broadcasts
+        if start_date and end_date:
+            first_broadcasts = first_broadcasts.filter(
+                first_broadcast__date__range=[start_date, end_date]
+            )
+        return first_broadcasts.count()
 
     def _get_multiple_broadcasts(self, profiles, start_date, end_date) -> int:
         """Get count of profiles with multiple broadcasts in the period."""
-        multiple_broadcast_profiles = set()
-
-        for profile in profiles:
-            # Count profile's contributions in the period
-            if start_date and end_date:
-                contribution_count = Contribution.objects.filter(
-                    license__profile=profile,
-                    broadcast_date__date__range=[start_date, end_date]
-                ).count()
-            else:
-                # For 'all' time, count all contributions
-                contribution_count = Contribution.objects.filter(
-                    license__profile=profile
-                ).count()
-
-            if contribution_count > 1:
-                multiple_broadcast_profiles.add(profile.id)
-
-        return len(multiple_broadcast_profiles)
+        contributions = Contribution.objects.filter(license__profile__in=profiles)
+        if start_date and end_date:
+            contributions = contributions.filter(
+                broadcast_date__date__range=[start_date, end_date]
+            )
+        return contributions.values('license__profile_id').annotate(
+            broadcasts=Count('id')
+        ).filter(broadcasts__gt=1).order_by().count()
 
     def get_stage_breakdown(self, start_date=None, end_date=None, filters=None) -> Dict:
         """Get detailed breakdown of users at each stage."""
@@ -415,32 +421,30 @@ class FunnelTracker:
 
     def _get_first_broadcast_profiles(self, profiles, start_date, end_date) -> List[int]:
         """Get list of profile IDs with their first broadcast in the period."""
-        first_broadcast_profiles = []
+        if not (start_date and end_date):
+            return []
 
-        for profile in profiles:
-            first_contribution = Contribution.objects.filter(
-                license__profile=profile
-            ).order_by('broadcast_date').first()
-
-            if first_contribution and start_date and end_date and start_date <= first_contribution.broadcast_date.date() <= end_date:
-                first_broadcast_profiles.append(profile.id)
-
-        return first_broadcast_profiles
+        return list(Contribution.objects.filter(
+            license__profile__in=profiles
+        ).values('license__profile_id').annotate(
+            first_broadcast=Min('broadcast_date')
+        ).filter(
+            first_broadcast__date__range=[start_date, end_date]
+        ).order_by('license__profile_id').values_list('license__profile_id', flat=True))
 
     def _get_multiple_broadcast_profiles(self, profiles, start_date, end_date) -> List[int]:
         """Get list of profile IDs with multiple broadcasts in the period."""
-        multiple_broadcast_profiles = []
-
-        for profile in profiles:
-            contribution_count = Contribution.objects.filter(
-                license__profile=profile,
-                broadcast_date__date__range=[start_date, end_date]
-            ).count()
-
-            if contribution_count > 1:
-                multiple_broadcast_profiles.append(profile.id)
-
-        return multiple_broadcast_profiles
+        if not (start_date and end_date):
+            return []
+
+        return list(Contribution.objects.filter(
+            license__profile__in=profiles,
+            broadcast_date__date__range=[start_date, end_date]
+        ).values('license__profile_id').annotate(
+            broadcasts=Count('id')
+        ).filter(
+            broadcasts__gt=1
+        ).order_by('license__profile_id').values_list('license__profile_id', flat=True))
 
     def cache_funnel_metrics(self, date=None) -> FunnelMetrics:
         """Cache funnel metrics for a specific date."""
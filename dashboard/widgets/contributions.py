@@ -1,3 +1,5 @@
+from ..cache import cached_widget_data
+from ..cache import skip_cache
 from .filters import DashboardFilters
 from contributions.models import Contribution
 from datetime import timedelta
@@ -14,38 +16,10 @@ class ContributionsWidget:
     def __init__(self, request):
         self.request = request
         self.filters = DashboardFilters(request)
-        self._cache = {}
-        self._cache_timeout = 300  # 5 minutes
-
-    def _get_cache_key(self, method_name):
-        """Generate cache key based on filters and method name."""
-        import hashlib
-        filter_str = str(sorted(self.filters.filters.items()))
-        return hashlib.md5(f"{method_name}:{filter_str}".encode()).hexdigest()
-
-    def _get_cached_result(self, method_name):
-        """Get cached result if available and not expired."""
-        import time
-        cache_key = self._get_cache_key(method_name)
-        if cache_key in self._cache:
-            result, timestamp = self._cache[cache_key]
-            if time.time() - timestamp < self._cache_timeout:
-                return result
-        return None
-
-    def _set_cached_result(self, method_name, result):
-        """Cache result with timestamp."""
-        import time
-        cache_key = self._get_cache_key(method_name)
-        self._cache[cache_key] = (result, time.time())
 
+    @cached_widget_data('contributions')
     def get_unified_metrics(self):
         """Get unified metrics combining all contribution statistics - optimized version."""
-        # Check cache first
-        cached_result = self._get_cached_result('unified_metrics')
-        if cached_result is not None:
-            return cached_result
-
         try:
             from datetime import datetime
             from datetime import timedelta
@@ -82,7 +56,6 @@ class ContributionsWidget:
                     'recent_licenses': 0,
                     'archive_rate': 0
                 }
-                self._set_cached_result('unified_metrics', result)
                 return result
 
             # Count primary contributions using SQL
@@ -175,14 +148,13 @@ class ContributionsWidget:
                 'archive_rate': archive_rate
             }
 
-            # Cache the result
-            self._set_cached_result('unified_metrics', result)
             return result
 
         except Exception as e:
             import traceback
             print(f"Error in get_unified_metrics: {e}")
             print(f"Traceback: {traceback.format_exc()}")
+            skip_cache()
             return {
                 'total_contributions': 0,
                 'live_contributions': 0,
@@ -197,6 +169,7 @@ class ContributionsWidget:
                 'archive_rate': 0
             }
 
+    @cached_widget_data('contributions')
     def get_data(self):
         """Get all contributions data."""
 
@@ -204,7 +177,7 @@ class ContributionsWidget:
             unified_metrics = self.get_unified_metrics()
 
         except Exception as e:
-
+            skip_cache()
             unified_metrics = {
                 'total_contributions': 0,
                 'live_contributions': 0,
@@ -232,13 +205,9 @@ class ContributionsWidget:
             'archive_metrics': self.get_archive_metrics(),
         }
 
+    @cached_widget_data('contributions')
     def get_basic_stats(self):
         """Get basic contribution statistics."""
-        # Check cache first
-        cached_result = self._get_cached_result('basic_stats')
-        if cached_result:
-            return cached_result
-
         queryset = Contribution.objects.all()
         filtered_queryset = self.filters.apply_filters_to_queryset(queryset, 'contribution')
 
@@ -285,8 +254,6 @@ class ContributionsWidget:
             'repetition_contributions': repetition_contributions,
         }
 
-        # Cache the result
-        self._set_cached_result('basic_stats', result)
         return result
 
     def get_contributions_by_authority(self):
@@ -5,10 +5,12 @@ This widget provides statistics and analytics for equipment inventory
 and rental requests in the OK_tools system.
 """
 
+from ..cache import cached_widget_data
 from datetime import datetime
 from datetime import timedelta
 from django.db.models import Avg
 from django.db.models import Count
+from django.db.models import F
 from django.db.models import Q
 from django.db.models import Sum
 from django.utils import timezone
@@ -20,6 +22,7 @@ from inventory.models import Organization
 from registration.models import MediaAuthority
 from registration.models import Profile
 from rental.models import EquipmentSet
+from rental.models import InventoryRentalStats
 from rental.models import RentalItem
 from rental.models import RentalRequest
 from rental.models import RentalTransaction
@@ -33,15 +36,9 @@ class InventoryWidget:
 
     def __init__(self, filters=None):
         self.filters = filters or {}
-        self._cache = {}
-        self._cache_timeout = 300  # 5 minutes
 
     def get_basic_stats(self):
         """Get basic inventory and rental statistics"""
-        cache_key = f"basic_stats_{hash(str(self.filters))}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-
         # Date filtering
         date_filter = self._get_date_filter()
 
@@ -78,15 +75,10 @@ class InventoryWidget:
             'completion_rate': round((completed_rentals / total_rentals * 100) if total_rentals > 0 else 0, 1)
         }
 
-        self._cache[cache_key] = stats
         return stats
 
     def get_inventory_by_category(self):
         """Get inventory statistics by category"""
-        cache_key = f"inventory_by_category_{hash(str(self.filters))}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-
         # Get all categories and filter inventory items manually
         all_categories = Category.objects.all()
         result = []
@@ -115,15 +107,10 @@ class InventoryWidget:
         # Sort by total_items descending
         result.sort(key=lambda x: x['total_items'], reverse=True)
 
-        self._cache[cache_key] = result
         return result
 
     def get_inventory_by_owner(self):
         """Get inventory statistics by owner organization"""
-        cache_key = f"inventory_by_owner_{hash(str(self.filters))}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-
         # Get all organizations and filter inventory items manually
         all_organizations = Organization.objects.all()
         result = []
@@ -149,15 +136,10 @@ class InventoryWidget:
                 'utilization_rate': round((rented_items / total_items * 100) if total_items > 0 else 0, 1)
             })
 
-        self._cache[cache_key] = result
         return result
 
     def get_rentals_by_status(self):
         """Get rental statistics by status"""
-        cache_key = f"rentals_by_status_{hash(str(self.filters))}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-
         date_filter = self._get_date_filter()
 
         rental_queryset = RentalRequest.objects.filter(**date_filter)
@@ -174,15 +156,10 @@ class InventoryWidget:
                 'count': status['count']
             })
 
-        self._cache[cache_key] = result
         return result
 
     def get_rentals_by_type(self):
         """Get rental statistics by type (equipment, room, mixed)"""
-        cache_key = f"rentals_by_type_{hash(str(self.filters))}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-
         date_filter = self._get_date_filter()
 
         rental_queryset = RentalRequest.objects.filter(**date_filter)
@@ -199,15 +176,10 @@ class InventoryWidget:
                 'count': rental_type['count']
             })
 
-        self._cache[cache_key] = result
         return result
 
     def get_rentals_by_user_demographics(self):
         """Get rental statistics by user demographics"""
-        cache_key = f"rentals_by_demographics_{hash(str(self.filters))}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-
         date_filter = self._get_date_filter()
 
         rental_queryset = RentalRequest.objects.filter(**date_filter)
@@ -285,15 +257,10 @@ class InventoryWidget:
             'age_groups': list(age_groups)
         }
 
-        self._cache[cache_key] = result
         return result
 
     def get_rentals_trend(self):
         """Get rental trends over time"""
-        cache_key = f"rentals_trend_{hash(str(self.filters))}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-
         date_filter = self._get_date_filter()
 
         rental_queryset = RentalRequest.objects.filter(**date_filter)
@@ -340,15 +307,10 @@ class InventoryWidget:
 
         result = trend_data
 
-        self._cache[cache_key] = result
         return result
 
     def get_equipment_sets_stats(self):
         """Get equipment sets statistics"""
-        cache_key = f"equipment_sets_stats_{hash(str(self.filters))}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-
         # Active equipment sets
         active_sets = EquipmentSet.objects.filter(is_active=True).count()
 
@@ -393,45 +355,55 @@ class InventoryWidget:
             'popular_sets': popular_sets
         }
 
-        self._cache[cache_key] = result
         return result
 
     def get_popular_inventory_stats(self):
         """Get popular inventory items statistics"""
-        cache_key = f"popular_inventory_stats_{hash(str(self.filters))}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-
-        # Date filtering for rental requests
-        date_filter = self._get_date_filter()
-
-        # Get rental items with extended filters
-        rental_items_queryset = RentalItem.objects.filter(
-            rental_request__created_at__gte=date_filter.get('created_at__gte', timezone.now() - timedelta(days=30))
-        )
-
-        # Apply rental filters through rental_request relationship
-        if 'gender' in self.filters and self.filters['gender']:
-            rental_items_queryset = rental_items_queryset.filter(
-                rental_request__user__profile__gender=self.filters['gender']
-            )
-
-        if 'member' in self.filters and self.filters['member'] != '':
-            is_member = self.filters['member'].lower() == 'true'
-            rental_items_queryset = rental_items_queryset.filter(
-                rental_request__user__profile__member=is_member
-            )
-
-        # Get popular inventory items by rental count
-        popular_items = rental_items_queryset.select_related('inventory_item').values(
-            'inventory_item__id',
-            'inventory_item__inventory_number',
-            'inventory_item__description',
-            'inventory_item__manufacturer__name'
-        ).annotate(
-            rental_count=Count('id'),
-            total_quantity=Sum('quantity_requested')
-        ).order_by('-rental_count')[:10]
+        all_time = self.filters.get('days') == 'all'
+        profile_filtered = bool(self.filters.get('gender')) or self.filters.get('member', '') != ''
+
+        if all_time and not profile_filtered:
+            # All-time totals are kept per item in the rental statistics
+            popular_items = InventoryRentalStats.objects.filter(rental_count__gt=0).values(
+                'inventory_item__id',
+                'inventory_item__inventory_number',
+                'inventory_item__description',
+                'inventory_item__manufacturer__name',
+                'rental_count',
+                total_quantity=F('units_requested')
+            ).order_by('-rental_count')[:10]
+        else:
+            rental_items_queryset = RentalItem.objects.all()
+
+            # Date filtering for rental requests
+            if not all_time:
+                date_filter = self._get_date_filter()
+                rental_items_queryset = rental_items_queryset.filter(
+                    rental_request__created_at__gte=date_filter.get('created_at__gte', timezone.now() - timedelta(days=30))
+                )
+
+            # Apply rental filters through rental_request relationship
+            if 'gender' in self.filters and self.filters['gender']:
+                rental_items_queryset = rental_items_queryset.filter(
+                    rental_request__user__profile__gender=self.filters['gender']
+                )
+
+            if 'member' in self.filters and self.filters['member'] != '':
+                is_member = self.filters['member'].lower() == 'true'
+                rental_items_queryset = rental_items_queryset.filter(
+                    rental_request__user__profile__member=is_member
+                )
+
+            # Get popular inventory items by rental count
+            popular_items = rental_items_queryset.select_related('inventory_item').values(
+                'inventory_item__id',
+                'inventory_item__inventory_number',
+                'inventory_item__description',
+                'inventory_item__manufacturer__name'
+            ).annotate(
+                rental_count=Count('id'),
+                total_quantity=Sum('quantity_requested')
+            ).order_by('-rental_count')[:10]
 
         # Total available inventory items for rent
         inventory_queryset = InventoryItem.objects.filter(available_for_rent=True)
@@ -457,15 +429,10 @@ class InventoryWidget:
             ]
         }
 
-        self._cache[cache_key] = result
         return result
 
     def get_room_rentals_stats(self):
         """Get room rental statistics"""
-        cache_key = f"room_rentals_stats_{hash(str(self.filters))}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-
         # Create date filter for rental_request
         date_filter = {}
         if 'days' in self.filters:
@@ -549,7 +516,6 @@ class InventoryWidget:
             ]
         }
 
-        self._cache[cache_key] = result
         return result
 
     def _get_date_filter(self):
@@ -618,10 +584,6 @@ class InventoryWidget:
 
     def get_user_activity_analytics(self):
         """Get user activity analytics - rental vs license creation"""
-        cache_key = f"user_activity_analytics_{hash(str(self.filters))}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-
         # Date filtering
         date_filter = self._get_date_filter()
 
@@ -691,9 +653,9 @@ class InventoryWidget:
             'rating': rating[:5]  # Top 5 users who create but don't rent much
         }
 
-        self._cache[cache_key] = result
         return result
 
+    @cached_widget_data('inventory')
     def get_all_data(self):
         """Get all widget data"""
         return {
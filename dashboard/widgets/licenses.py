@@ -1,3 +1,4 @@
+from ..cache import cached_widget_data
 from .filters import DashboardFilters
 from datetime import timedelta
 from dateutil.relativedelta import relativedelta
@@ -14,8 +15,8 @@ class LicensesWidget:
     def __init__(self, request):
         self.request = request
         self.filters = DashboardFilters(request)
-        self._cache = {}
 
+    @cached_widget_data('licenses')
     def get_data(self):
         """Get all licenses data."""
         return {
@@ -461,11 +462,6 @@ class LicensesWidget:
 
     def get_archive_stats(self):
         """Get archive statistics for licenses - optimized version."""
-        # Check cache first
-        cache_key = f"archive_stats_{hash(str(self.filters._get_filters()))}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-
         try:
             from contributions.models import Contribution
             from datetime import datetime
@@ -546,8 +542,6 @@ class LicensesWidget:
                 'archive_threshold_days': 365
             }
 
-            # Cache the result
-            self._cache[cache_key] = result
             return result
 
         except Exception as e:
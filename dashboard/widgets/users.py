@@ -4,16 +4,140 @@ Provides user statistics and analytics.
 """
 
 from .filters import DashboardFilters
+from datetime import date
 from datetime import datetime
 from datetime import timedelta
 from dateutil.relativedelta import relativedelta
+from django.db.models import Case
+from django.db.models import CharField
 from django.db.models import Count
 from django.db.models import Q
+from django.db.models import Value
+from django.db.models import When
+from django.db.models.functions import TruncDate
 from django.utils.translation import gettext_lazy as _
 from registration.models import MediaAuthority
 from registration.models import Profile
 
 
+AGE_GROUPS = ['up_to_34', '35_50', '51_65', 'over_65', 'unknown']
+GENDER_KEYS = {'f': 'female', 'm': 'male', 'd': 'diverse'}
+
+# Placeholder birthday of profiles with an unknown birthday
+UNKNOWN_BIRTHDAY = date(1800, 1, 1)
+
+
+def _birthday_cutoff(end_date, years):
+    """Return the latest birthday of persons at least ``years`` old at end_date."""
+    cutoff = end_date - relativedelta(years=years)
+    # relativedelta counts birthdays on 29 February as reached on 28 February
+    if relativedelta(end_date, cutoff + timedelta(days=1)).years >= years:
+        cutoff += timedelta(days=1)
+    return cutoff
+
+
+def user_demographics(queryset, end_date):
+    """
+    Count profiles by gender, age group, verification and membership.
+
+    Ages are computed at ``end_date`` like ``relativedelta(...).years``:
+    the age groups are compared as birthday cutoffs in a Case expression,
+    and all counts come from one query grouped by gender and age group.
+
+    Returns:
+        dict: ``basic_stats``, ``age_groups``, ``age_gender_distribution``
+        and ``member_distribution``
+    """
+    up_to_34 = _birthday_cutoff(end_date, 35)
+    up_to_50 = _birthday_cutoff(end_date, 51)
+    up_to_65 = _birthday_cutoff(end_date, 66)
+    rows = queryset.annotate(
+        gender_key=Case(
+            *[When(gender=gender, then=Value(key)) for gender, key in GENDER_KEYS.items()],
+            default=Value('unspecified'),
+            output_field=CharField(),
+        ),
+        age_group=Case(
+            When(Q(birthday__isnull=True) | Q(birthday=UNKNOWN_BIRTHDAY), then=Value('unknown')),
+            When(birthday__gt=up_to_34, then=Value('up_to_34')),
+            When(birthday__gt=up_to_50, then=Value('35_50')),
+            When(birthday__gt=up_to_65, then=Value('51_65')),
+            default=Value('over_65'),
+            output_field=CharField(),
+        ),
+    ).values('gender_key', 'age_group').annotate(
+        count=Count('id'),
+        verified=Count('id', filter=Q(verified=True)),
+        member=Count('id', filter=Q(member=True)),
+    ).order_by()
+
+    age_gender_distribution = {
+        key: dict.fromkeys(AGE_GROUPS, 0)
+        for key in ['female', 'male', 'diverse', 'unspecified']
+    }
+    age_groups = dict.fromkeys(AGE_GROUPS, 0)
+    genders = dict.fromkeys(age_gender_distribution, 0)
+    verified_users = member_users = 0
+    for row in rows:
+        age_gender_distribution[row['gender_key']][row['age_group']] += row['count']
+        age_groups[row['age_group']] += row['count']
+        genders[row['gender_key']] += row['count']
+        verified_users += row['verified']
+        member_users += row['member']
+    total_users = sum(genders.values())
+
+    return {
+        'basic_stats': {
+            'total_users': total_users,
+            'male_users': genders['male'],
+            'female_users': genders['female'],
+            'diverse_users': genders['diverse'],
+            'verified_users': verified_users,
+            'member_users': member_users,
+        },
+        'age_groups': age_groups,
+        'age_gender_distribution': age_gender_distribution,
+        'member_distribution': {
+            'members': member_users,
+            'non_members': total_users - member_users,
+        },
+    }
+
+
+def registration_trend(queryset, start_date, end_date):
+    """
+    Return the registrations per day, or per week for periods over 30 days.
+
+    Registrations are counted per day in one grouped query. Weeks start at
+    ``start_date`` rather than on Mondays, so they are summed from the days.
+    """
+    counts = dict(
+        queryset.filter(
+            created_at__date__gte=start_date,
+            created_at__date__lte=end_date,
+        ).annotate(
+            day=TruncDate('created_at')
+        ).values('day').annotate(
+            count=Count('id')
+        ).order_by().values_list('day', 'count')
+    )
+
+    trend = []
+    step = 7 if (end_date - start_date).days > 30 else 1
+    current_date = start_date
+    while current_date <= end_date:
+        last_date = min(current_date + timedelta(days=step - 1), end_date)
+        count = sum(counts.get(current_date + timedelta(days=day), 0)
+                    for day in range((last_date - current_date).days + 1))
+        if step == 1:
+            label = current_date.strftime('%Y-%m-%d')
+        else:
+            label = f"{current_date.strftime('%Y-%m-%d')} - {last_date.strftime('%Y-%m-%d')}"
+        trend.append({'date': label, 'count': count})
+        current_date = last_date + timedelta(days=1)
+    return trend
+
+
 class UsersWidget:
     """Widget for displaying user statistics."""
 
@@ -25,24 +149,7 @@ class UsersWidget:
         """Get basic user statistics."""
         queryset = Profile.objects.all()
         filtered_queryset = self.filters.apply_filters_to_queryset(queryset, 'profile')
-
-        # Calculate statistics
-        total_users = filtered_queryset.count()
-        male_users = filtered_queryset.filter(gender='m').count()
-        female_users = filtered_queryset.filter(gender='f').count()
-        diverse_users = filtered_queryset.filter(gender='d').count()
-        verified_users = filtered_queryset.filter(verified=True).count()
-        member_users = filtered_queryset.filter(member=True).count()
-
-
-        return {
-            'total_users': total_users,
-            'male_users': male_users,
-            'female_users': female_users,
-            'diverse_users': diverse_users,
-            'verified_users': verified_users,
-            'member_users': member_users,
-        }
+        return user_demographics(filtered_queryset, self.filters.date_range['end_date'])['basic_stats']
 
     def get_users_by_authority(self):
         """Get user count by media authority."""
@@ -63,44 +170,10 @@ class UsersWidget:
             # Include all profiles, including those with unknown birthday (01.01.1800)
             queryset = Profile.objects.all()
             filtered_queryset = self.filters.apply_filters_to_queryset(queryset, 'profile')
-
-            # Calculate age groups
-            age_groups = {
-                'up_to_34': 0,
-                '35_50': 0,
-                '51_65': 0,
-                'over_65': 0,
-                'unknown': 0
-            }
-
-            for profile in filtered_queryset:
-                if profile.birthday:
-                    # Check if birthday is the default unknown date (01.01.1800)
-                    if profile.birthday.year == 1800 and profile.birthday.month == 1 and profile.birthday.day == 1:
-                        age_groups['unknown'] += 1
-                    else:
-                        age = relativedelta(self.filters.date_range['end_date'], profile.birthday).years
-                        if age <= 34:
-                            age_groups['up_to_34'] += 1
-                        elif age <= 50:
-                            age_groups['35_50'] += 1
-                        elif age <= 65:
-                            age_groups['51_65'] += 1
-                        else:
-                            age_groups['over_65'] += 1
-                else:
-                    age_groups['unknown'] += 1
-
-            return age_groups
+            return user_demographics(filtered_queryset, self.filters.date_range['end_date'])['age_groups']
         except Exception:
             # Return default values if there's an error
-            return {
-                'up_to_34': 0,
-                '35_50': 0,
-                '51_65': 0,
-                'over_65': 0,
-                'unknown': 0
-            }
+            return dict.fromkeys(AGE_GROUPS, 0)
 
     def get_registration_trend(self):
         """Get user registration trend over time."""
@@ -0,0 +1,44 @@
+"""Buffered writing of AuditLog entries."""
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db import connections
+from ok_tools.on_commit import CommitBatch
+from ok_tools.on_commit import current_batch
+
+
+class AuditBatch(CommitBatch):
+    """AuditLog entries of one transaction, inserted together after commit."""
+
+    def __init__(self, using):
+        """Collect entries for the database ``using``."""
+        super().__init__()
+        self.using = using
+        self.entries = []
+
+    def execute(self):
+        """Insert all collected entries with one bulk_create."""
+        entries, self.entries = self.entries, []
+        if entries:
+            type(entries[0]).objects.using(self.using).bulk_create(entries, batch_size=500)
+
+
+def log_audit(entry, using=DEFAULT_DB_ALIAS):
+    """
+    Write an unsaved AuditLog entry once the current transaction commits.
+
+    All entries of a transaction are inserted with a single bulk_create
+    after the commit, and entries of a rolled back transaction are
+    dropped with it. Outside of transactions, or with AUDIT_LOG_BUFFERED
+    turned off, the entry is saved at once.
+
+    Args:
+        entry: AuditLog instance
+        using: Database alias of the transaction
+    """
+    if not getattr(settings, 'AUDIT_LOG_BUFFERED', True) or not connections[using].in_atomic_block:
+        entry.save(using=using)
+        return
+    # One batch per savepoint keeps entries of a rolled back savepoint out
+    batch = current_batch('audit_log', lambda: AuditBatch(using), using=using, per_savepoint=True)
+    batch.entries.append(entry)
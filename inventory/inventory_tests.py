@@ -0,0 +1,207 @@
+from .audit import AuditBatch
+from .models import AuditLog
+from .models import InventoryItem
+from .models import Location
+from .models import Manufacturer
+from .models import Organization
+from django.db import connection
+from django.db import transaction
+from django.test.utils import CaptureQueriesContext
+from ok_tools.on_commit import CommitBatch
+from ok_tools.on_commit import current_batch
+import pytest
+import weakref
+
+
+@pytest.fixture
+def items(db, django_capture_on_commit_callbacks):
+    """Return inventory items with all relations set."""
+    owner = Organization.objects.create(name='MSA')
+    location = Location.objects.create(name='Lager')
+    manufacturer = Manufacturer.objects.create(name='Sony')
+    # Write the audit entries of the creation like a commit would
+    with django_capture_on_commit_callbacks(execute=True):
+        return [
+            InventoryItem.objects.create(
+                inventory_number=f'INV-{number}',
+                location=location,
+                owner=owner,
+                manufacturer=manufacturer,
+                quantity=1,
+            )
+            for number in range(20)
+        ]
+
+
+def test__models__InventoryItem__1(items):
+    """Loading items reads no related objects for change tracking."""
+    with CaptureQueriesContext(connection) as queries:
+        loaded = list(InventoryItem.objects.all())
+    assert len(loaded) == 20
+    assert len(queries) == 1
+
+
+def test__models__InventoryItem__2(items, django_capture_on_commit_callbacks):
+    """Changed fields are logged, relations by their display name."""
+    item = InventoryItem.objects.get(id=items[0].id)
+    item.quantity = 3
+    item.location = Location.objects.create(name='Regal')
+    with django_capture_on_commit_callbacks(execute=True):
+        item.save()
+    log = AuditLog.objects.filter(
+        model_name='InventoryItem', action='updated').get()
+    assert log.changes == {
+        'quantity': {'old': '1', 'new': '3'},
+        'location': {'old': 'Lager', 'new': 'Regal'},
+    }
+
+    # The saved values are the baseline of the next save
+    with django_capture_on_commit_callbacks(execute=True):
+        item.save()
+    assert AuditLog.objects.filter(
+        model_name='InventoryItem', action='updated').latest('id').changes is None
+
+
+def test__models__InventoryItem__3(items, django_capture_on_commit_callbacks):
+    """Refreshed values and fields left out of update_fields are tracked."""
+    item = InventoryItem.objects.get(id=items[0].id)
+    InventoryItem.objects.filter(id=item.id).update(quantity=5)
+    item.refresh_from_db()
+    item.description = 'Camera'
+    with django_capture_on_commit_callbacks(execute=True):
+        item.save()
+    log = AuditLog.objects.filter(
+        model_name='InventoryItem', action='updated').latest('id')
+    assert log.changes == {'description': {'old': 'None', 'new': 'Camera'}}
+
+    InventoryItem.objects.filter(id=item.id).update(quantity=6)
+    item.refresh_from_db(fields=['quantity'])
+    item.serial_number = 'SN-1'
+    item.quantity = 7
+    with django_capture_on_commit_callbacks(execute=True):
+        item.save(update_fields=['quantity'])
+    log = AuditLog.objects.filter(
+        model_name='InventoryItem', action='updated').latest('id')
+    assert log.changes == {'quantity': {'old': '6', 'new': '7'}}
+
+    # The unsaved serial number is still a change of the next save
+    with django_capture_on_commit_callbacks(execute=True):
+        item.save()
+    log = AuditLog.objects.filter(
+        model_name='InventoryItem', action='updated').latest('id')
+    assert log.changes == {'serial_number': {'old': 'None', 'new': 'SN-1'}}
+
+
+def test__audit__log_audit__1(items, django_capture_on_commit_callbacks):
+    """Entries of a transaction are inserted together after the commit."""
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        with CaptureQueriesContext(connection) as queries:
+            for item in items:
+                item.quantity = 2
+                item.save()
+            assert not AuditLog.objects.filter(action='updated').exists()
+    flushes = [callback for callback in callbacks
+               if isinstance(getattr(callback, '__self__', None), AuditBatch)]
+    assert len(flushes) == 1
+    inserts = [query for query in queries.captured_queries
+               if query['sql'].startswith('INSERT INTO "inventory_auditlog"')]
+    assert inserts == []
+    assert AuditLog.objects.filter(action='updated').count() == 20
+
+    # Entries written in a rolled back savepoint are dropped
+    with django_capture_on_commit_callbacks(execute=True):
+        with pytest.raises(ValueError):
+            with transaction.atomic():
+                items[0].save()
+                raise ValueError
+        items[1].save()
+    assert AuditLog.objects.filter(action='updated').count() == 21
+
+
+def test__audit__log_audit__2(items, django_capture_on_commit_callbacks):
+    """Saves changing only rental counters are not logged."""
+    item = items[0]
+    with django_capture_on_commit_callbacks(execute=True):
+        item.reserved_quantity = 1
+        item.save()
+        item.save(update_fields=['rented_quantity'])
+        item.description = 'Camera'
+        item.reserved_quantity = 0
+        item.save()
+    log = AuditLog.objects.get(action='updated')
+    assert set(log.changes) == {'description', 'reserved_quantity'}
+
+
+class Collected(CommitBatch):
+    """Batch recording the values it was run with."""
+
+    runs = []
+
+    def __init__(self):
+        """Collect values."""
+        super().__init__()
+        self.values = []
+
+    def execute(self):
+        """Record the collected values."""
+        self.runs.append(self.values)
+
+
+def test__on_commit__current_batch__1(db, django_capture_on_commit_callbacks):
+    """A batch lost with a rolled back savepoint is replaced by a new one."""
+    Collected.runs = []
+    with django_capture_on_commit_callbacks(execute=True):
+        current_batch('test', Collected).values.append(1)
+        with pytest.raises(ValueError):
+            with transaction.atomic():
+                current_batch('test', Collected).values.append(2)
+                raise ValueError
+        # Without per_savepoint the batch registered before the savepoint
+        # stays pending and keeps what the savepoint added
+        current_batch('test', Collected).values.append(3)
+    assert Collected.runs == [[1, 2, 3]]
+
+    Collected.runs = []
+    with django_capture_on_commit_callbacks(execute=True):
+        with pytest.raises(ValueError):
+            with transaction.atomic():
+                current_batch('test', Collected).values.append(1)
+                raise ValueError
+        current_batch('test', Collected).values.append(2)
+    assert Collected.runs == [[2]]
+
+    # Per savepoint batches drop the values of a rolled back savepoint
+    Collected.runs = []
+    with django_capture_on_commit_callbacks(execute=True):
+        current_batch('test', Collected, per_savepoint=True).values.append(1)
+        with pytest.raises(ValueError):
+            with transaction.atomic():
+                current_batch('test', Collected, per_savepoint=True).values.append(2)
+                raise ValueError
+        current_batch('test', Collected, per_savepoint=True).values.append(3)
+    assert Collected.runs == [[1, 3]]
+
+    # A batch that already ran is not reused
+    with django_capture_on_commit_callbacks(execute=True):
+        current_batch('test', Collected).values.append(4)
+    assert Collected.runs == [[1, 3], [4]]
+
+
+def test__on_commit__current_batch__2(db, django_capture_on_commit_callbacks):
+    """Django behaves the way current_batch relies on."""
+    Collected.runs = []
+    depth = len(connection.savepoint_ids)
+    with django_capture_on_commit_callbacks(execute=True):
+        with pytest.raises(ValueError):
+            with transaction.atomic():
+                # Open savepoints are listed on the connection
+                assert len(connection.savepoint_ids) == depth + 1
+                batch = weakref.ref(current_batch('test', Collected))
+                raise ValueError
+        # The commit callbacks of a rolled back savepoint are released,
+        # which removes their batch from the lookup
+        assert batch() is None
+        assert len(connection.savepoint_ids) == depth
+        with transaction.atomic():
+            current_batch('test', Collected).values.append(1)
+    assert Collected.runs == [[1]]
@@ -1,10 +1,13 @@
+from .audit import log_audit
 from .middleware import get_current_user
 from datetime import datetime
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.core.files.storage import FileSystemStorage
 from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import FileExtensionValidator
+from django.db import DEFAULT_DB_ALIAS
 from django.db import models
 from django.db.models.signals import post_delete
 from django.db.models.signals import post_save
@@ -150,7 +153,87 @@ class Location(models.Model):
         return " -> ".join(reversed(parts))
 
 
-class InventoryItem(models.Model):
+class ChangeTrackingMixin:
+    """
+    Remember the column values loaded from the database for change auditing.
+
+    ``from_db`` keeps the raw values of the row (foreign keys as IDs), so
+    loading instances neither copies every field nor reads related
+    objects. Changes are computed on save and the saved values are taken
+    over as the new baseline afterwards, as are values reloaded with
+    ``refresh_from_db``.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Create an instance from a database row and remember its values."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value
+            for name, value in zip(field_names, values)
+            if value is not models.DEFERRED
+        }
+        return instance
+
+    def _tracked_fields(self, fields=None):
+        """Return the concrete fields named in ``fields``, all for None."""
+        if fields is None:
+            return self._meta.concrete_fields
+        names = set(fields)
+        return [
+            field for field in self._meta.concrete_fields
+            if field.name in names or field.attname in names
+        ]
+
+    def _take_over_values(self, fields=None):
+        """Use the current values of ``fields`` (all for None) as the baseline."""
+        loaded = getattr(self, '_loaded_values', None) or {}
+        loaded.update({
+            field.attname: self.__dict__[field.attname]
+            for field in self._tracked_fields(fields)
+            if field.attname in self.__dict__
+        })
+        self._loaded_values = loaded
+
+    def get_field_changes(self, fields=None) -> dict:
+        """
+        Return the fields changed since the instance was loaded or saved.
+
+        Args:
+            fields: Names of the fields to compare, e.g. the update_fields
+                of a save; all fields for None
+
+        Returns:
+            dict: Field to (old, new) tuple of raw values; empty for
+            instances not loaded from the database
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if not loaded:
+            return {}
+        changes = {}
+        for field in self._tracked_fields(fields):
+            if field.attname not in loaded:
+                continue
+            old_value = loaded[field.attname]
+            new_value = getattr(self, field.attname, None)
+            if old_value != new_value:
+                changes[field] = (old_value, new_value)
+        return changes
+
+    def save(self, *args, **kwargs):
+        """Save the model and take over the saved values for tracking changes."""
+        super().save(*args, **kwargs)
+        # Fields left out of update_fields keep their unsaved changes
+        self._take_over_values(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        """Reload fields from the database and take them over for tracking changes."""
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        # Changes of other writers are not changes of the next save
+        self._take_over_values(fields)
+
+
+class InventoryItem(ChangeTrackingMixin, models.Model):
     """Model representing an inventory item."""
 
     STATUS_IN_STOCK = "in_stock"
@@ -255,18 +338,6 @@ class InventoryItem(models.Model):
         verbose_name=_("Rented Quantity")
     )
 
-    def __init__(self, *args, **kwargs):
-        """Initialize InventoryItem and store original state."""
-        super().__init__(*args, **kwargs)
-
-        if self.pk:
-            self._original_state = type('OriginalState', (), {
-                field.name: getattr(self, field.name, None)
-                for field in self._meta.fields
-            })
-        else:
-            self._original_state = None
-
     class Meta:
         """Meta options for InventoryItem."""
 
@@ -291,16 +362,6 @@ class InventoryItem(models.Model):
         """Return purchase date in a readable format."""
         return self.purchase_date.strftime("%Y-%m-%d") if self.purchase_date else _("Not specified")
 
-    def save(self, *args, **kwargs):
-        """Save the model and update original state for tracking changes."""
-        # If the object already exists, save the current state
-        if self.pk and not hasattr(self, '_original_state'):
-            self._original_state = type('OriginalState', (), {
-                field.name: getattr(self, field.name, None)
-                for field in self._meta.fields
-            })
-        super().save(*args, **kwargs)
-
 
 class InventoryImport(models.Model):
     """Model representing the inventory import."""
@@ -521,52 +582,67 @@ class AuditLog(models.Model):
         return "\n".join(readable_changes)
 
 
+def _audit_value(field, value):
+    """Return a raw field value as shown in the audit log."""
+    if field.is_relation and value is not None:
+        # Only changed relations are resolved, one query each
+        value = field.related_model._default_manager.filter(pk=value).first() or value
+    return str(value)
+
+
+# Rental counters, kept up to date by rental transactions
+COUNTER_FIELDS = {'reserved_quantity', 'rented_quantity'}
+
+
+def _counters_only(field_changes, update_fields):
+    """Return whether a save changed nothing but the rental counters."""
+    if field_changes:
+        return {field.name for field in field_changes} <= COUNTER_FIELDS
+    return bool(update_fields) and set(update_fields) <= COUNTER_FIELDS
+
+
 @receiver(post_save, sender=InventoryItem)
-def inventory_item_save_handler(sender, instance, created, **kwargs):
+def inventory_item_save_handler(sender, instance, created, update_fields=None, **kwargs):
     """Signal handler for creating/updating AuditLog entry."""
     if created:
         action = "created"
         changes = None
     else:
         action = "updated"
-        changes = {}
-        if hasattr(instance, '_original_state') and instance._original_state:
-            for field in instance._meta.fields:
-                old_value = getattr(instance._original_state, field.name, None)
-                new_value = getattr(instance, field.name, None)
-                if old_value != new_value:
-                    if isinstance(old_value, bool):
-                        old_value = str(old_value)
-                    if isinstance(new_value, bool):
-                        new_value = str(new_value)
-                    if hasattr(old_value, '__str__'):
-                        old_value = str(old_value)
-                    if hasattr(new_value, '__str__'):
-                        new_value = str(new_value)
-                    changes[field.name] = {
-                        'old': old_value,
-                        'new': new_value
-                    }
+        field_changes = instance.get_field_changes(update_fields)
+        if (
+            getattr(settings, 'AUDIT_LOG_SKIP_COUNTER_CHANGES', True)
+            and _counters_only(field_changes, update_fields)
+        ):
+            # The rental transactions already record counter changes
+            return
+        changes = {
+            field.name: {
+                'old': _audit_value(field, old_value),
+                'new': _audit_value(field, new_value),
+            }
+            for field, (old_value, new_value) in field_changes.items()
+        }
         if not changes:
             changes = None
 
-    AuditLog.objects.create(
+    log_audit(AuditLog(
         model_name="InventoryItem",
         object_id=str(instance.pk),
         action=action,
         changes=changes,
         user=get_current_user()
-    )
+    ), using=kwargs.get('using', DEFAULT_DB_ALIAS))
 
 
 @receiver(post_delete, sender=InventoryItem)
 def inventory_item_delete_handler(sender, instance, **kwargs):
     """Signal handler for deleting AuditLog entry."""
-    AuditLog.objects.create(
+    log_audit(AuditLog(
         model_name="InventoryItem",
         object_id=str(instance.pk),
         action="deleted"
-    )
+    ), using=kwargs.get('using', DEFAULT_DB_ALIAS))
 
 
 class Inspection(models.Model):
@@ -9,10 +9,13 @@ from django.http import HttpResponse
 from django.shortcuts import render
 from django.urls import path, reverse
 from django.utils.html import format_html
+from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 from rangefilter.filters import DateRangeFilter
 
-from .models import StorageLocation, VideoFile, FileOperation
+from .models import StorageLocation, VideoFile, FileOperation, CopyJob, CopyRoute
+from .previews import PREVIEW_FILES, key_from_thumbnail, preview_paths
+from .streaming import stream_file
 from .tasks import copy_video_to_playout
 from .utils import verify_file_integrity, extract_video_metadata, extract_number_from_filename, calculate_checksum
 
@@ -254,6 +257,9 @@ class StorageLocationAdmin(admin.ModelAdmin):
         (_('Scanning'), {
             'fields': ('scan_enabled', 'scan_schedule')
         }),
+        (_('Copying'), {
+            'fields': ('max_concurrent_copies',)
+        }),
         (_('Information'), {
             'fields': ('video_count', 'created_at', 'updated_at')
         }),
@@ -376,19 +382,11 @@ class HasDuplicatesFilter(admin.SimpleListFilter):
     def queryset(self, request, queryset):
         if self.value() == 'yes':
             # Videos that have other versions with same number
-            from django.db.models import Count
-            duplicated_numbers = VideoFile.objects.values('number').annotate(
-                count=Count('number')
-            ).filter(count__gt=1).values_list('number', flat=True)
-            return queryset.filter(number__in=duplicated_numbers)
+            return queryset.with_duplicates()
         
         if self.value() == 'no':
             # Videos that are unique (no other versions)
-            from django.db.models import Count
-            unique_numbers = VideoFile.objects.values('number').annotate(
-                count=Count('number')
-            ).filter(count=1).values_list('number', flat=True)
-            return queryset.filter(number__in=unique_numbers)
+            return queryset.without_duplicates()
 
 
 class IsPrimaryVersionFilter(admin.SimpleListFilter):
@@ -403,13 +401,10 @@ class IsPrimaryVersionFilter(admin.SimpleListFilter):
     
     def queryset(self, request, queryset):
         if self.value() == 'primary':
-            # Complex filter - need to evaluate is_primary_version() for each
-            primary_ids = [v.id for v in queryset if v.is_primary_version()]
-            return queryset.filter(id__in=primary_ids)
+            return queryset.primary_versions()
         
         if self.value() == 'duplicate':
-            primary_ids = [v.id for v in queryset if v.is_primary_version()]
-            return queryset.exclude(id__in=primary_ids)
+            return queryset.duplicate_versions()
 
 
 @admin.register(VideoFile)
@@ -419,7 +414,7 @@ class VideoFileAdmin(admin.ModelAdmin):
     form = VideoFileAdminForm
     
     list_display = [
-        'number', 'filename', 'storage_location', 'resolution_display',
+        'number', 'thumbnail_display', 'filename', 'storage_location', 'resolution_display',
         'duration', 'file_size_display', 'format', 'is_available',
         'duplicates_indicator', 'view_video_link', 'player_link'
     ]
@@ -430,13 +425,18 @@ class VideoFileAdmin(admin.ModelAdmin):
         HasDuplicatesFilter, IsPrimaryVersionFilter
     ]
     search_fields = ['number', 'filename', 'video_codec', 'audio_codec']
+    
+    def get_queryset(self, request):
+        """Annotate version counts and primary flags for the duplicate columns."""
+        return super().get_queryset(request).with_versions()
+    
     def get_readonly_fields(self, request, obj=None):
         """Make fields editable when adding new video."""
         if obj:  # Editing existing object
             return [
                 'number', 'filename', 'storage_location', 'file_path',
                 'file_size', 'file_size_mb', 'duration', 'format',
-                'last_scanned', 'last_modified', 'checksum',
+                'last_scanned', 'last_modified', 'checksum', 'fingerprint',
                 'video_codec', 'video_codec_long', 'video_profile',
                 'video_bitrate', 'video_bitrate_mode', 'fps',
                 'width', 'height', 'resolution_display', 'aspect_ratio',
@@ -462,7 +462,7 @@ class VideoFileAdmin(admin.ModelAdmin):
                 (_('File Properties'), {
                     'fields': (
                         'format', 'file_size', 'file_size_mb', 'duration',
-                        'checksum', 'last_modified', 'last_scanned'
+                        'checksum', 'fingerprint', 'last_modified', 'last_scanned'
                     )
                 }),
                 (_('Video Properties'), {
@@ -526,6 +526,11 @@ class VideoFileAdmin(admin.ModelAdmin):
                 self.admin_site.admin_view(self.video_player_page),
                 name='media_files_videofile_player',
             ),
+            path(
+                '<int:video_id>/preview/<str:name>',
+                self.admin_site.admin_view(self.preview_view),
+                name='media_files_videofile_preview',
+            ),
             path(
                 'system-management/',
                 self.admin_site.admin_view(system_management_view),
@@ -541,6 +546,56 @@ class VideoFileAdmin(admin.ModelAdmin):
         return "-"
     file_size_display.short_description = _('Size')
     
+    def preview_url(self, obj, name):
+        """Return the versioned URL of a cached preview file or None."""
+        key = key_from_thumbnail(obj.thumbnail)
+        if not key:
+            return None
+        url = reverse('admin:media_files_videofile_preview', args=[obj.id, name])
+        return f'{url}?v={key}'
+    
+    def _sprite_vtt_url(self, obj):
+        """Return the URL of the seek-preview index if the sprite is rendered."""
+        key = key_from_thumbnail(obj.thumbnail)
+        if key and preview_paths(key)['vtt'].exists():
+            return self.preview_url(obj, 'sprite.vtt')
+        return None
+    
+    def thumbnail_display(self, obj):
+        """Display the cached thumbnail."""
+        url = self.preview_url(obj, 'thumbnail.jpg')
+        if not url:
+            return '-'
+        return format_html(
+            '<img src="{}" alt="" loading="lazy" style="width: 96px; height: auto;">', url
+        )
+    thumbnail_display.short_description = _('Preview')
+    
+    def preview_view(self, request, video_id, name):
+        """Serve a cached thumbnail, sprite sheet or sprite index."""
+        if name not in PREVIEW_FILES:
+            return HttpResponse('Preview not found', status=404)
+        
+        video = VideoFile.objects.filter(id=video_id).only('id', 'thumbnail').first()
+        key = key_from_thumbnail(video.thumbnail) if video else None
+        if not key:
+            return HttpResponse('Preview not found', status=404)
+        
+        preview_path = preview_paths(key)[PREVIEW_FILES[name]]
+        if not preview_path.exists():
+            return HttpResponse('Preview not found', status=404)
+        
+        # Versioned URLs never change content, others are revalidated
+        if request.GET.get('v') == key:
+            cache_control = 'private, max-age=31536000, immutable'
+        else:
+            cache_control = 'private, no-cache'
+        content_type = 'text/vtt' if name.endswith('.vtt') else 'image/jpeg'
+        return stream_file(
+            request, str(preview_path), content_type,
+            cache_control=cache_control, offload=False,
+        )
+    
     def license_link(self, obj):
         """Display link to associated license."""
         license_obj = obj.get_license()
@@ -588,7 +643,7 @@ class VideoFileAdmin(admin.ModelAdmin):
                 count
             )
         else:
-            primary = [v for v in obj.get_all_versions() if v.is_primary_version()][0]
+            primary = obj.get_all_versions()[0]
             return format_html(
                 '<span style="color: #ffc107;">⚠️ DUPLICATE VERSION</span><br>'
                 '<span style="color: #666;">Primary version is in: <a href="{}">{}</a></span>',
@@ -674,6 +729,9 @@ class VideoFileAdmin(admin.ModelAdmin):
             # Generate UNC path for VLC
             vlc_path = self._get_vlc_path(obj)
             
+            poster_url = self.preview_url(obj, 'thumbnail.jpg')
+            sprite_vtt_url = self._sprite_vtt_url(obj)
+            
             return format_html(
                 '''
                 <div style="max-width: 640px; margin: 10px 0;">
@@ -684,7 +742,7 @@ class VideoFileAdmin(admin.ModelAdmin):
                     <video
                         id="plyr-player-{}"
                         controls
-                        preload="auto"
+                        {}
                         width="640"
                         height="360">
                         <source src="{}" type="{}">
@@ -716,7 +774,8 @@ class VideoFileAdmin(admin.ModelAdmin):
                                     ],
                                     settings: ['quality', 'speed'],
                                     speed: {{ selected: 1, options: [0.5, 0.75, 1, 1.25, 1.5, 1.75, 2] }},
-                                    quality: {{ default: 720, options: [1080, 720, 480, 360] }}
+                                    quality: {{ default: 720, options: [1080, 720, 480, 360] }},
+                                    previewThumbnails: {{ enabled: {}, src: '{}' }}
                                 }});
                                 console.log('Plyr player ready');
                             }}
@@ -725,6 +784,8 @@ class VideoFileAdmin(admin.ModelAdmin):
                 </div>
                 ''',
                 obj.id,  # video player ID
+                # With a poster nothing has to be loaded before playback
+                format_html('poster="{}" preload="metadata"', poster_url) if poster_url else mark_safe('preload="auto"'),
                 stream_url,
                 mime_type,
                 stream_url,
@@ -735,7 +796,9 @@ class VideoFileAdmin(admin.ModelAdmin):
                     </div>
                     <code style="display: block; padding: 8px; background: white; border-radius: 3px; word-break: break-all; font-size: 11px; color: #495057; border: 1px solid #dee2e6;">{obj.unc_path}</code>
                 ''' if obj.unc_path else '',
-                obj.id  # video player ID for script
+                obj.id,  # video player ID for script
+                'true' if sprite_vtt_url else 'false',
+                sprite_vtt_url or '',
             )
         return _('Video not available')
     
@@ -745,7 +808,11 @@ class VideoFileAdmin(admin.ModelAdmin):
         """Display video player page."""
         try:
             video = VideoFile.objects.get(id=video_id)
-            return render(request, 'admin/video_player.html', {'video': video})
+            return render(request, 'admin/video_player.html', {
+                'video': video,
+                'poster_url': self.preview_url(video, 'thumbnail.jpg'),
+                'sprite_vtt_url': self._sprite_vtt_url(video),
+            })
         except VideoFile.DoesNotExist:
             return HttpResponse('Video not found', status=404)
         except Exception as e:
@@ -755,7 +822,6 @@ class VideoFileAdmin(admin.ModelAdmin):
     def stream_video(self, request, video_id):
         """Stream video file with range support."""
         import os
-        from django.http import FileResponse
         
         try:
             video = VideoFile.objects.get(id=video_id)
@@ -784,47 +850,8 @@ class VideoFileAdmin(admin.ModelAdmin):
             }
             content_type = content_types.get(file_extension, 'video/mp4')
             
-            # Get file size
-            file_size = os.path.getsize(file_path)
-            
-            # Handle range requests for video seeking
-            range_header = request.META.get('HTTP_RANGE', '').strip()
-            
-            if range_header:
-                import re
-                range_match = re.match(r'bytes=(\d+)-(\d*)', range_header)
-                
-                if range_match:
-                    first_byte = int(range_match.group(1))
-                    last_byte = int(range_match.group(2)) if range_match.group(2) else file_size - 1
-                    length = last_byte - first_byte + 1
-                    
-                    file_handle = open(file_path, 'rb')
-                    file_handle.seek(first_byte)
-                    
-                    response = HttpResponse(
-                        file_handle.read(length),
-                        status=206,
-                        content_type=content_type
-                    )
-                    response['Content-Length'] = str(length)
-                    response['Content-Range'] = f'bytes {first_byte}-{last_byte}/{file_size}'
-                    response['Accept-Ranges'] = 'bytes'
-                    response['Content-Disposition'] = 'inline'
-                    
-                    file_handle.close()
-                    return response
-            
-            # Full file response
-            file_handle = open(file_path, 'rb')
-            response = FileResponse(file_handle, content_type=content_type)
-            response['Content-Length'] = str(file_size)
-            response['Accept-Ranges'] = 'bytes'
-            response['Content-Disposition'] = 'inline'
-            response['Cache-Control'] = 'public, max-age=86400'  # Cache for 24 hours
-            response['X-Accel-Buffering'] = 'no'  # Disable nginx buffering
-            
-            return response
+            # Ranges and revalidation are streamed without loading the file
+            return stream_file(request, file_path, content_type)
             
         except VideoFile.DoesNotExist:
             return HttpResponse('Video not found', status=404)
@@ -886,6 +913,7 @@ class VideoFileAdmin(admin.ModelAdmin):
         
         success_count = 0
         error_count = 0
+        cached_count = 0
         
         for video in queryset:
             try:
@@ -893,6 +921,8 @@ class VideoFileAdmin(admin.ModelAdmin):
                     continue
                 
                 metadata = extract_video_metadata(video.full_path)
+                if metadata.get('from_cache'):
+                    cached_count += 1
                 
                 # Update fields
                 if 'format' in metadata:
@@ -924,7 +954,10 @@ class VideoFileAdmin(admin.ModelAdmin):
                 logger.error(f'Error updating metadata for {video.number}: {str(e)}')
         
         if success_count > 0:
-            self.message_user(request, f'Updated metadata for {success_count} video(s)')
+            self.message_user(
+                request,
+                f'Updated metadata for {success_count} video(s) ({cached_count} from ffprobe cache)'
+            )
         if error_count > 0:
             self.message_user(request, f'{error_count} error(s) occurred', level='error')
     update_metadata_action.short_description = _('Update metadata')
@@ -1086,7 +1119,7 @@ class FileOperationAdmin(admin.ModelAdmin):
     """Admin interface for file operations (read-only)."""
 
     list_display = [
-        'video_file', 'operation_type', 'status',
+        'video_file', 'operation_type', 'status', 'progress_display',
         'source_location', 'destination_location',
         'performed_by', 'performed_at'
     ]
@@ -1098,13 +1131,14 @@ class FileOperationAdmin(admin.ModelAdmin):
     search_fields = ['video_file__number', 'video_file__filename', 'error_message']
     readonly_fields = [
         'video_file', 'operation_type', 'source_location', 'destination_location',
-        'performed_by', 'performed_at', 'status', 'error_message', 'details'
+        'performed_by', 'performed_at', 'status', 'error_message', 'details',
+        'bytes_total', 'bytes_done', 'progress_display'
     ]
     
     fieldsets = (
         (None, {
             'fields': (
-                'video_file', 'operation_type', 'status',
+                'video_file', 'operation_type', 'status', 'progress_display',
                 'source_location', 'destination_location'
             )
         }),
@@ -1124,6 +1158,60 @@ class FileOperationAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         """Disable delete permission."""
         return False
+    
+    def progress_display(self, obj):
+        """Display copy progress in percent."""
+        progress = obj.progress
+        if progress is None:
+            return '-'
+        return f'{progress:.0f}%'
+    progress_display.short_description = _('Progress')
+
+
+@admin.register(CopyRoute)
+class CopyRouteAdmin(admin.ModelAdmin):
+    """Admin interface for copy limits between storage locations."""
+
+    list_display = ['source', 'destination', 'max_parallel', 'bandwidth_limit']
+    list_filter = ['source', 'destination']
+    list_select_related = ['source', 'destination']
+
+
+@admin.register(CopyJob)
+class CopyJobAdmin(admin.ModelAdmin):
+    """Admin interface for queued copy jobs (read-only)."""
+
+    list_display = [
+        'number', 'destination', 'broadcast_date', 'status', 'progress_display',
+        'attempts', 'worker', 'created_at', 'finished_at'
+    ]
+    list_filter = ['status', 'destination', ('broadcast_date', DateRangeFilter)]
+    search_fields = ['number', 'message', 'worker']
+    readonly_fields = [
+        'number', 'broadcast_date', 'destination', 'status', 'operation',
+        'requested_by', 'attempts', 'worker', 'message', 'progress_display',
+        'created_at', 'started_at', 'finished_at', 'updated_at'
+    ]
+    fields = readonly_fields
+    list_select_related = ['destination', 'operation']
+    actions = ['requeue_jobs']
+    
+    def has_add_permission(self, request):
+        """Disable add permission."""
+        return False
+    
+    def progress_display(self, obj):
+        """Display copy progress of the job's operation."""
+        if obj.status == 'RUNNING' and obj.operation and obj.operation.progress is not None:
+            return f'{obj.operation.progress:.0f}%'
+        return '-'
+    progress_display.short_description = _('Progress')
+    
+    def requeue_jobs(self, request, queryset):
+        """Put failed jobs back into the queue."""
+        count = queryset.filter(status='FAILED').update(status='QUEUED', worker='', message='')
+        self.message_user(request, f'{count} job(s) requeued')
+    requeue_jobs.short_description = _('Requeue failed jobs')
 
 
 # Add System Management as a proxy model like in planung
@@ -0,0 +1,194 @@
+"""Parallel copy engine with per-route concurrency and bandwidth limits."""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, NamedTuple, Optional
+
+from django.conf import settings
+
+from media_files.utils import copy_file_with_progress
+
+
+logger = logging.getLogger('django')
+
+# Seconds after which route limits are re-read from the database
+ROUTE_REFRESH_INTERVAL = 60.0
+
+_routes = {}
+_routes_lock = threading.Lock()
+
+
+class RateLimiter:
+    """
+    Limit the combined throughput of all copies sharing this limiter.
+
+    Every chunk reserves a time slot of ``size / rate`` seconds; a caller
+    waits until its slot starts, so parallel copies on one route together
+    never exceed the rate.
+    """
+
+    def __init__(self, bytes_per_second=0):
+        """Create a limiter, a rate of 0 disables limiting."""
+        self.rate = bytes_per_second or 0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def consume(self, amount):
+        """Block until ``amount`` bytes may be transferred."""
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(self._next_slot, now)
+            self._next_slot = start + amount / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+
+class Route:
+    """Concurrency slots and bandwidth limiter of a source/destination pair."""
+
+    def __init__(self, max_parallel, bandwidth_limit):
+        """Create a route allowing ``max_parallel`` copies at ``bandwidth_limit`` bytes/s."""
+        self.max_parallel = max(1, max_parallel)
+        self.semaphore = threading.BoundedSemaphore(self.max_parallel)
+        self.limiter = RateLimiter(bandwidth_limit)
+        self.loaded_at = time.monotonic()
+
+
+class Transfer(NamedTuple):
+    """A single file copy handled by the engine."""
+
+    key: Any
+    source: str
+    destination: str
+    source_location: Any = None
+    destination_location: Any = None
+
+
+def _route_limits(source_location, destination_location):
+    """Return (max_parallel, bytes per second) configured for a route."""
+    from media_files.models import CopyRoute
+
+    max_parallel = getattr(settings, 'VIDEO_COPY_ROUTE_WORKERS', 2)
+    bandwidth_mb = getattr(settings, 'VIDEO_COPY_BANDWIDTH_LIMIT', 0)
+
+    if source_location is not None and destination_location is not None:
+        route = CopyRoute.objects.filter(
+            source=source_location, destination=destination_location
+        ).first()
+        if route is not None:
+            max_parallel = route.max_parallel
+            bandwidth_mb = route.bandwidth_limit or 0
+
+    return max_parallel, bandwidth_mb * 1024 * 1024
+
+
+def get_route(source_location, destination_location) -> Route:
+    """
+    Return the process-wide Route of a source/destination storage pair.
+
+    Limits are re-read every ROUTE_REFRESH_INTERVAL seconds. A changed
+    bandwidth applies to running copies, a changed parallelism to copies
+    started afterwards.
+    """
+    key = (
+        getattr(source_location, 'pk', None),
+        getattr(destination_location, 'pk', None),
+    )
+    with _routes_lock:
+        route = _routes.get(key)
+    if route is not None and time.monotonic() - route.loaded_at < ROUTE_REFRESH_INTERVAL:
+        return route
+
+    max_parallel, bandwidth = _route_limits(source_location, destination_location)
+    with _routes_lock:
+        route = _routes.get(key)
+        if route is None or route.max_parallel != max(1, max_parallel):
+            route = Route(max_parallel, bandwidth)
+            _routes[key] = route
+        else:
+            route.limiter.rate = bandwidth
+            route.loaded_at = time.monotonic()
+    return route
+
+
+def reset_routes():
+    """Forget all cached routes, e.g. after their limits were changed."""
+    with _routes_lock:
+        _routes.clear()
+
+
+class CopyEngine:
+    """
+    Copy files in parallel.
+
+    Each copy holds a slot of its source/destination route and shares the
+    route's bandwidth limit, so many workers can be used without starving
+    a storage (e.g. playout ingest) or saturating a NAS link.
+    """
+
+    def __init__(self, workers=None, verify_checksum=True, bandwidth_limit=None):
+        """
+        Create an engine.
+
+        Args:
+            workers: Number of copy threads, defaults to VIDEO_COPY_WORKERS
+            verify_checksum: Whether to verify every copy
+            bandwidth_limit: Optional limit in bytes/s shared by all copies of
+                this engine, replaces the route limits
+        """
+        self.workers = workers or getattr(settings, 'VIDEO_COPY_WORKERS', 2)
+        self.verify_checksum = verify_checksum
+        self.limiter = RateLimiter(bandwidth_limit) if bandwidth_limit else None
+
+    def copy(self, transfer: Transfer, progress_callback=None, route: Optional[Route] = None):
+        """
+        Copy a single file within the limits of its route.
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        if route is None:
+            route = get_route(transfer.source_location, transfer.destination_location)
+        with route.semaphore:
+            return copy_file_with_progress(
+                transfer.source,
+                transfer.destination,
+                verify_checksum=self.verify_checksum,
+                progress_callback=progress_callback,
+                rate_limiter=self.limiter or route.limiter,
+            )
+
+    def copy_many(self, transfers):
+        """
+        Copy files in parallel and yield results as copies finish.
+
+        Routes are resolved in the calling thread, so the worker threads do
+        not access the database.
+
+        Yields:
+            Tuples of (transfer, success, message)
+        """
+        routes = [
+            get_route(transfer.source_location, transfer.destination_location)
+            for transfer in transfers
+        ]
+        if not transfers:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(self.copy, transfer, None, route): transfer
+                for transfer, route in zip(transfers, routes)
+            }
+            for future in as_completed(futures):
+                transfer = futures[future]
+                try:
+                    success, message = future.result()
+                except Exception as e:
+                    logger.error(f'Copy of {transfer.source} crashed: {str(e)}', exc_info=True)
+                    success, message = False, str(e)
+                yield transfer, success, message
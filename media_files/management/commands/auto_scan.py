@@ -32,6 +32,11 @@ class Command(BaseCommand):
             action='store_true',
             help='Calculate checksums for found files (slow)'
         )
+        parser.add_argument(
+            '--previews',
+            action='store_true',
+            help='Render missing thumbnails and preview sprites after scanning'
+        )
 
     def handle(self, *args, **options):
         """Execute the command."""
@@ -71,6 +76,9 @@ class Command(BaseCommand):
                 cmd_args = ['scan_video_storage', '--storage-id', str(storage.id)]
                 if force:
                     cmd_args.append('--force')
+                else:
+                    # Only re-probe files that changed since the last run
+                    cmd_args.append('--incremental')
                 if calculate_checksums:
                     cmd_args.append('--calculate-checksum')
                 
@@ -102,6 +110,21 @@ class Command(BaseCommand):
                 total_errors += 1
                 logger.error(f'Failed to scan storage {storage.name}: {str(e)}', exc_info=True)
         
+        if options.get('previews'):
+            from django.core.management import call_command
+            
+            self.stdout.write('\nRendering previews')
+            try:
+                call_command(
+                    'generate_previews',
+                    '--storage-id', *[str(storage.id) for storage in storages],
+                    stdout=self.stdout,
+                )
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'Failed to render previews: {str(e)}'))
+                logger.error(f'Failed to render previews: {str(e)}', exc_info=True)
+                total_errors += 1
+        
         # Summary
         self.stdout.write(self.style.SUCCESS('\n=== Auto Scan Complete ==='))
         self.stdout.write(f'Storage locations scanned: {total_scanned}')
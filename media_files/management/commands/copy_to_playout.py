@@ -4,8 +4,9 @@ import logging
 from django.core.management.base import BaseCommand, CommandError
 from django.utils.dateparse import parse_date
 
+from media_files.copy_engine import CopyEngine, Transfer
 from media_files.models import StorageLocation, VideoFile, FileOperation
-from media_files.utils import copy_file_with_progress
+from media_files.tasks import register_copied_video
 
 
 logger = logging.getLogger('django')
@@ -45,6 +46,18 @@ class Command(BaseCommand):
             action='store_true',
             help='Skip if file already exists in destination',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Number of files copied in parallel (default: VIDEO_COPY_WORKERS setting)',
+        )
+        parser.add_argument(
+            '--bandwidth-limit',
+            type=int,
+            default=None,
+            help='Combined copy throughput in MB/s, replaces the copy route limits',
+        )
 
     def handle(self, *args, **options):
         """Execute the command."""
@@ -104,11 +117,18 @@ class Command(BaseCommand):
 
         self.stdout.write(f'Destination: {destination.name} ({destination.path})')
         
+        workers = options.get('workers')
+        if workers is not None and workers < 1:
+            raise CommandError('--workers must be at least 1')
+        bandwidth_limit = options.get('bandwidth_limit')
+
         total_copied = 0
         total_skipped = 0
         total_errors = 0
+        planned = {}
 
-        for number in numbers:
+        # Select sources and create operation records, copy afterwards
+        for number in dict.fromkeys(numbers):
             try:
                 # Find video in archive
                 video = VideoFile.objects.filter(
@@ -116,7 +136,7 @@ class Command(BaseCommand):
                     is_available=True,
                 ).exclude(
                     storage_location=destination
-                ).first()
+                ).select_related('storage_location').first()
                 
                 if not video:
                     self.stdout.write(
@@ -139,11 +159,10 @@ class Command(BaseCommand):
                     total_skipped += 1
                     continue
                 
-                # Copy file
                 source_path = video.full_path
                 dest_path = f"{destination.path.rstrip('/')}/{video.filename}"
                 
-                self.stdout.write(f'\nCopying: {number} - {video.filename}')
+                self.stdout.write(f'\nQueued: {number} - {video.filename}')
                 self.stdout.write(f'From: {source_path}')
                 self.stdout.write(f'To: {dest_path}')
                 
@@ -154,71 +173,54 @@ class Command(BaseCommand):
                     source_location=video.storage_location,
                     destination_location=destination,
                     status='IN_PROGRESS',
+                    bytes_total=video.file_size,
                 )
                 
-                # Perform copy
-                success, message = copy_file_with_progress(
-                    source_path,
-                    dest_path,
-                    verify_checksum=verify
-                )
+                planned[number] = (video, operation, Transfer(
+                    key=number,
+                    source=source_path,
+                    destination=dest_path,
+                    source_location=video.storage_location,
+                    destination_location=destination,
+                ))
                 
+            except Exception as e:
+                total_errors += 1
+                self.stdout.write(
+                    self.style.ERROR(f'Error copying video {number}: {str(e)}')
+                )
+                logger.error(f'Error copying video {number}: {str(e)}', exc_info=True)
+
+        engine = CopyEngine(
+            workers=workers,
+            verify_checksum=verify,
+            bandwidth_limit=bandwidth_limit * 1024 * 1024 if bandwidth_limit else None,
+        )
+        if planned:
+            self.stdout.write(f'\nCopying {len(planned)} file(s) with {engine.workers} worker(s)')
+
+        for transfer, success, message in engine.copy_many([item[2] for item in planned.values()]):
+            number = transfer.key
+            video, operation, _ = planned[number]
+            try:
                 if success:
-                    # Create new VideoFile record for destination
-                    new_video, created = VideoFile.objects.get_or_create(
-                        number=video.number,
-                        storage_location=destination,
-                        defaults={
-                            'filename': video.filename,
-                            'file_path': video.filename,
-                            'file_size': video.file_size,
-                            'duration': video.duration,
-                            'format': video.format,
-                            'is_available': True,
-                            'checksum': video.checksum,
-                            # Copy all metadata
-                            'video_codec': video.video_codec,
-                            'video_codec_long': video.video_codec_long,
-                            'video_profile': video.video_profile,
-                            'video_bitrate': video.video_bitrate,
-                            'fps': video.fps,
-                            'width': video.width,
-                            'height': video.height,
-                            'aspect_ratio': video.aspect_ratio,
-                            'pixel_format': video.pixel_format,
-                            'color_space': video.color_space,
-                            'color_range': video.color_range,
-                            'chroma_subsampling': video.chroma_subsampling,
-                            'audio_codec': video.audio_codec,
-                            'audio_codec_long': video.audio_codec_long,
-                            'audio_bitrate': video.audio_bitrate,
-                            'audio_sample_rate': video.audio_sample_rate,
-                            'audio_channels': video.audio_channels,
-                            'audio_channel_layout': video.audio_channel_layout,
-                            'has_video': video.has_video,
-                            'has_audio': video.has_audio,
-                            'total_bitrate': video.total_bitrate,
-                            'metadata_json': video.metadata_json,
-                        }
-                    )
-                    
-                    if not created:
-                        # Update existing record
-                        new_video.is_available = True
-                        new_video.save()
+                    # Create or update VideoFile record for destination
+                    register_copied_video(video, destination, video.filename)
                     
                     operation.status = 'SUCCESS'
+                    if operation.bytes_total is not None:
+                        operation.bytes_done = operation.bytes_total
                     operation.save()
                     
                     total_copied += 1
-                    self.stdout.write(self.style.SUCCESS(f'Copied successfully: {message}'))
+                    self.stdout.write(self.style.SUCCESS(f'Copied {number}: {message}'))
                 else:
                     operation.status = 'FAILED'
                     operation.error_message = message
                     operation.save()
                     
                     total_errors += 1
-                    self.stdout.write(self.style.ERROR(f'Copy failed: {message}'))
+                    self.stdout.write(self.style.ERROR(f'Copy of {number} failed: {message}'))
                 
             except Exception as e:
                 total_errors += 1
@@ -233,4 +235,3 @@ class Command(BaseCommand):
         self.stdout.write(f'Skipped: {total_skipped}')
         if total_errors > 0:
             self.stdout.write(self.style.ERROR(f'Errors: {total_errors}'))
-
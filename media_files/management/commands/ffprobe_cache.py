@@ -0,0 +1,41 @@
+"""Management command to inspect and maintain the ffprobe cache."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from media_files.probe_cache import get_probe_cache
+
+
+class Command(BaseCommand):
+    """Show statistics of the ffprobe cache, evict stale entries or clear it."""
+
+    help = 'Inspect and maintain the persistent ffprobe metadata cache'
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            '--evict-missing',
+            action='store_true',
+            help='Remove entries for files that disappeared or changed',
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Remove all cache entries',
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command."""
+        cache = get_probe_cache()
+        if cache is None:
+            raise CommandError('ffprobe cache is disabled (media.probe_cache)')
+
+        if options.get('clear'):
+            cache.clear()
+            self.stdout.write(self.style.SUCCESS('ffprobe cache cleared'))
+        elif options.get('evict_missing'):
+            removed = cache.evict_missing()
+            self.stdout.write(self.style.SUCCESS(f'Evicted {removed} stale entries'))
+
+        stats = cache.stats()
+        self.stdout.write(f'Cache file: {stats["path"]}')
+        self.stdout.write(f'Entries: {stats["entries"]}')
@@ -1,9 +1,11 @@
 """Management command to find duplicate video files."""
 
 import json
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
-from django.db.models import Count
 from media_files.models import VideoFile, StorageLocation
+from media_files.utils import calculate_fingerprint
 
 
 class Command(BaseCommand):
@@ -33,28 +35,31 @@ class Command(BaseCommand):
             action='store_true',
             help='Output results in JSON format'
         )
+        parser.add_argument(
+            '--fingerprint',
+            action='store_true',
+            help='Compute fast sampled fingerprints to tell identical from '
+                 'different files without full checksums'
+        )
 
     def handle(self, *args, **options):
         """Execute the command."""
         # Find videos with duplicates
-        duplicated_numbers = VideoFile.objects.values('number').annotate(
-            count=Count('number')
-        ).filter(count__gt=1).values_list('number', flat=True)
-
-        if not duplicated_numbers:
+        queryset = VideoFile.objects.with_duplicates()
+        if not queryset.exists():
             self.stdout.write(
                 self.style.SUCCESS('No duplicate videos found.')
             )
             return
 
         # Filter by storage type if specified
-        queryset = VideoFile.objects.filter(number__in=duplicated_numbers)
         if options['storage_type']:
             queryset = queryset.filter(storage_location__storage_type=options['storage_type'])
 
-        # Group by number
+        # Group by number, best version first
+        # (priority: ARCHIVE > PLAYOUT > CUSTOM, then by quality)
         videos_by_number = {}
-        for video in queryset.select_related('storage_location'):
+        for video in queryset.select_related('storage_location').order_by_version():
             if video.number not in videos_by_number:
                 videos_by_number[video.number] = []
             videos_by_number[video.number].append(video)
@@ -73,6 +78,9 @@ class Command(BaseCommand):
             )
             return
 
+        if options['fingerprint']:
+            self._update_fingerprints(videos_by_number)
+
         total_duplicates = sum(len(videos) - 1 for videos in videos_by_number.values())
 
         if options['json']:
@@ -82,6 +90,40 @@ class Command(BaseCommand):
         else:
             self._output_detailed(videos_by_number, total_duplicates)
 
+    def _update_fingerprints(self, videos_by_number):
+        """Compute sampled fingerprints for all available candidates."""
+        candidates = [
+            video
+            for videos in videos_by_number.values()
+            for video in videos
+            if video.is_available
+        ]
+        workers = getattr(settings, 'VIDEO_SCAN_WORKERS', 4)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            fingerprints = executor.map(
+                lambda video: calculate_fingerprint(video.full_path), candidates
+            )
+            changed = []
+            for video, fingerprint in zip(candidates, fingerprints):
+                if fingerprint and fingerprint != video.fingerprint:
+                    video.fingerprint = fingerprint
+                    changed.append(video)
+        VideoFile.objects.bulk_update(changed, ['fingerprint'], batch_size=500)
+
+    def _same_content(self, video, other):
+        """
+        Compare two files by checksum, else by fingerprint.
+
+        Returns 'identical' for equal checksums, 'likely_identical' for
+        equal fingerprints (only sampled, so not proof), 'different' or
+        None if neither is known for both files.
+        """
+        if video.checksum and other.checksum:
+            return 'identical' if video.checksum == other.checksum else 'different'
+        if video.fingerprint and other.fingerprint:
+            return 'likely_identical' if video.fingerprint == other.fingerprint else 'different'
+        return None
+
     def _output_json(self, videos_by_number, total_duplicates):
         """Output results in JSON format."""
         results = {
@@ -91,16 +133,8 @@ class Command(BaseCommand):
         }
 
         for number, videos in videos_by_number.items():
-            # Sort by priority: ARCHIVE > PLAYOUT > CUSTOM, then by quality
-            storage_priority = {'ARCHIVE': 3, 'PLAYOUT': 2, 'CUSTOM': 1}
-            sorted_videos = sorted(videos, key=lambda v: (
-                storage_priority.get(v.storage_location.storage_type, 0),
-                v.total_bitrate or 0,
-                v.created_at
-            ), reverse=True)
-
-            primary = sorted_videos[0]
-            duplicates = sorted_videos[1:]
+            primary = videos[0]
+            duplicates = videos[1:]
 
             video_info = {
                 'primary': {
@@ -112,11 +146,13 @@ class Command(BaseCommand):
                     'resolution': f"{primary.width}x{primary.height}" if primary.width and primary.height else None,
                     'file_size_mb': primary.file_size_mb,
                     'checksum': primary.checksum,
+                    'fingerprint': primary.fingerprint,
                 },
                 'duplicates': []
             }
 
             for dup in duplicates:
+                same_content = self._same_content(primary, dup)
                 video_info['duplicates'].append({
                     'id': dup.id,
                     'filename': dup.filename,
@@ -126,7 +162,9 @@ class Command(BaseCommand):
                     'resolution': f"{dup.width}x{dup.height}" if dup.width and dup.height else None,
                     'file_size_mb': dup.file_size_mb,
                     'checksum': dup.checksum,
-                    'is_identical': primary.checksum and dup.checksum and primary.checksum == dup.checksum,
+                    'fingerprint': dup.fingerprint,
+                    'is_identical': {'identical': True, 'different': False}.get(same_content),
+                    'likely_identical': same_content == 'likely_identical',
                 })
 
             results['videos'][str(number)] = video_info
@@ -156,17 +194,8 @@ class Command(BaseCommand):
 
         for number in sorted(videos_by_number.keys()):
             videos = videos_by_number[number]
-            
-            # Sort by priority: ARCHIVE > PLAYOUT > CUSTOM, then by quality
-            storage_priority = {'ARCHIVE': 3, 'PLAYOUT': 2, 'CUSTOM': 1}
-            sorted_videos = sorted(videos, key=lambda v: (
-                storage_priority.get(v.storage_location.storage_type, 0),
-                v.total_bitrate or 0,
-                v.created_at
-            ), reverse=True)
-
-            primary = sorted_videos[0]
-            duplicates = sorted_videos[1:]
+            primary = videos[0]
+            duplicates = videos[1:]
 
             self.stdout.write(
                 self.style.SUCCESS(f'Video #{number} ({len(videos)} versions):')
@@ -188,14 +217,16 @@ class Command(BaseCommand):
                 resolution_str = f"{dup.width}x{dup.height}" if dup.width and dup.height else "Unknown"
                 size_str = f"{dup.file_size_mb} MB" if dup.file_size_mb else "Unknown"
                 
-                # Check if identical by checksum
+                # Check if identical by checksum or fingerprint
                 identical_marker = ""
-                if primary.checksum and dup.checksum:
-                    if primary.checksum == dup.checksum:
-                        identical_marker = ", identical checksum"
-                    else:
-                        identical_marker = ", different checksum!"
-                        identical_marker = self.style.WARNING(identical_marker)
+                same_content = self._same_content(primary, dup)
+                if same_content == 'identical':
+                    identical_marker = ", identical content"
+                elif same_content == 'likely_identical':
+                    identical_marker = ", likely identical (fingerprint only)"
+                elif same_content == 'different':
+                    identical_marker = ", different content!"
+                    identical_marker = self.style.WARNING(identical_marker)
 
                 self.stdout.write(
                     f'  - DUPLICATE: {dup.storage_location.name}/{dup.filename} '
@@ -216,6 +247,7 @@ class Command(BaseCommand):
         # Count by storage type
         storage_counts = {}
         identical_checksums = 0
+        likely_identical = 0
         different_checksums = 0
 
         for videos in videos_by_number.values():
@@ -227,11 +259,13 @@ class Command(BaseCommand):
             if len(videos) > 1:
                 primary = videos[0]
                 for dup in videos[1:]:
-                    if primary.checksum and dup.checksum:
-                        if primary.checksum == dup.checksum:
-                            identical_checksums += 1
-                        else:
-                            different_checksums += 1
+                    same_content = self._same_content(primary, dup)
+                    if same_content == 'identical':
+                        identical_checksums += 1
+                    elif same_content == 'likely_identical':
+                        likely_identical += 1
+                    elif same_content == 'different':
+                        different_checksums += 1
 
         self.stdout.write(self.style.SUCCESS('Summary Statistics:'))
         self.stdout.write(f'  Total videos with duplicates: {total_videos}')
@@ -243,10 +277,14 @@ class Command(BaseCommand):
             for storage_type, count in sorted(storage_counts.items()):
                 self.stdout.write(f'    {storage_type}: {count}')
 
-        if identical_checksums > 0 or different_checksums > 0:
-            self.stdout.write('  Checksum analysis:')
+        if identical_checksums > 0 or likely_identical > 0 or different_checksums > 0:
+            self.stdout.write('  Checksum/fingerprint analysis:')
             if identical_checksums > 0:
                 self.stdout.write(f'    Identical files (safe to delete): {identical_checksums}')
+            if likely_identical > 0:
+                self.stdout.write(
+                    f'    Likely identical (fingerprint only, verify before deleting): {likely_identical}'
+                )
             if different_checksums > 0:
                 self.stdout.write(
                     self.style.WARNING(f'    Different files (manual review needed): {different_checksums}')
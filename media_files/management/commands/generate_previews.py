@@ -0,0 +1,172 @@
+"""Management command to render thumbnails and seek-preview sprites."""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from media_files.models import VideoFile
+from media_files.previews import (
+    key_from_thumbnail,
+    preview_cache_dir,
+    preview_key,
+    previews_exist,
+    render_previews,
+    thumbnail_relative_path,
+)
+
+
+logger = logging.getLogger('django')
+
+# Rows per bulk_update statement
+BULK_BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    """Render missing thumbnails and sprite sheets into the preview cache."""
+
+    help = 'Generate video thumbnails and seek-preview sprite sheets'
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            '--storage-id',
+            type=int,
+            nargs='+',
+            help='Only videos of these storage locations',
+        )
+        parser.add_argument(
+            '--number',
+            type=int,
+            nargs='+',
+            help='Only videos with these numbers',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Render again even if previews exist',
+        )
+        parser.add_argument(
+            '--no-sprites',
+            action='store_true',
+            help='Only render thumbnails',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Number of parallel ffmpeg processes '
+                 '(default: VIDEO_PREVIEW_WORKERS setting)',
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Delete cached previews no video refers to',
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command."""
+        force = options.get('force')
+        sprites = not options.get('no_sprites')
+        workers = options.get('workers') or getattr(settings, 'VIDEO_PREVIEW_WORKERS', 2)
+
+        if workers < 1:
+            raise CommandError('--workers must be at least 1')
+
+        videos = VideoFile.objects.filter(
+            is_available=True, has_video=True,
+        ).select_related('storage_location')
+        if options.get('storage_id'):
+            videos = videos.filter(storage_location_id__in=options['storage_id'])
+        if options.get('number'):
+            videos = videos.filter(number__in=options['number'])
+
+        # Group videos by key, copies with the same checksum are rendered once
+        pending = {}
+        up_to_date = []
+        skipped = 0
+        for video in videos:
+            key = preview_key(video)
+            if not force and previews_exist(key, sprites):
+                if video.thumbnail != thumbnail_relative_path(key):
+                    video.thumbnail = thumbnail_relative_path(key)
+                    up_to_date.append(video)
+                skipped += 1
+                continue
+            pending.setdefault(key, []).append(video)
+
+        self.stdout.write(
+            f'{len(pending)} preview(s) to render, {skipped} video(s) already rendered'
+        )
+        if up_to_date:
+            VideoFile.objects.bulk_update(up_to_date, ['thumbnail'], batch_size=BULK_BATCH_SIZE)
+
+        rendered = 0
+        errors = 0
+        changed = []
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for key, group in pending.items():
+                video = group[0]
+                duration = video.duration.total_seconds() if video.duration else None
+                futures[executor.submit(
+                    render_previews, video.full_path, key, duration,
+                    video.width, video.height, sprites,
+                )] = key
+
+            for future in as_completed(futures):
+                key = futures[future]
+                group = pending[key]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'thumbnail': False, 'error': str(e)}
+
+                if result['thumbnail']:
+                    rendered += 1
+                    for video in group:
+                        video.thumbnail = thumbnail_relative_path(key)
+                        changed.append(video)
+                if result['error']:
+                    errors += 1
+                    self.stdout.write(
+                        self.style.ERROR(f'{group[0].number} - {group[0].filename}: {result["error"]}')
+                    )
+                else:
+                    self.stdout.write(
+                        self.style.SUCCESS(f'Rendered: {group[0].number} - {group[0].filename}')
+                    )
+
+                if len(changed) >= BULK_BATCH_SIZE:
+                    VideoFile.objects.bulk_update(changed, ['thumbnail'])
+                    changed = []
+
+        if changed:
+            VideoFile.objects.bulk_update(changed, ['thumbnail'])
+
+        if options.get('prune'):
+            self.stdout.write(f'Pruned {self._prune()} unused preview file(s)')
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS('\n=== Previews Complete ==='))
+        self.stdout.write(f'Rendered: {rendered} in {elapsed:.1f} s')
+        self.stdout.write(f'Already rendered: {skipped}')
+        if errors:
+            self.stdout.write(self.style.ERROR(f'Errors: {errors}'))
+
+    def _prune(self):
+        """Delete cache files whose key no video refers to."""
+        used = {
+            key_from_thumbnail(thumbnail)
+            for thumbnail in VideoFile.objects.exclude(thumbnail='').values_list('thumbnail', flat=True)
+        }
+        removed = 0
+        for path in preview_cache_dir().glob('*/*'):
+            key = path.name.split('.')[0].split('_')[0]
+            if key not in used:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
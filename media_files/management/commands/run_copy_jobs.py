@@ -0,0 +1,119 @@
+"""Management command to execute queued copy jobs."""
+
+import logging
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+from media_files.tasks import claim_copy_jobs, requeue_stale_copy_jobs, run_copy_job
+
+
+logger = logging.getLogger('django')
+
+
+def _run_job_in_thread(job):
+    """Run a copy job and release the thread's database connection."""
+    try:
+        return run_copy_job(job)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    """Execute queued copy jobs, e.g. playout copies of saved broadcast plans."""
+
+    help = 'Run the background worker for queued video copy jobs'
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Number of copies running in parallel in this worker '
+                 '(default: VIDEO_COPY_WORKERS setting)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when the queue is empty instead of polling for new jobs',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Seconds between queue checks while idle (default: 5)',
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command."""
+        workers = options.get('workers') or getattr(settings, 'VIDEO_COPY_WORKERS', 2)
+        poll_interval = options.get('poll_interval')
+        once = options.get('once')
+        stale_timeout = timedelta(
+            minutes=getattr(settings, 'VIDEO_COPY_JOB_TIMEOUT', 30)
+        )
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+
+        if workers < 1:
+            raise CommandError('--workers must be at least 1')
+
+        self.stdout.write(f'Copy worker {worker_id} started with {workers} slot(s)')
+        totals = {'SUCCESS': 0, 'SKIPPED': 0, 'FAILED': 0}
+        running = set()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                while True:
+                    close_old_connections()
+                    requeued = requeue_stale_copy_jobs(stale_timeout)
+                    if requeued:
+                        self.stdout.write(
+                            self.style.WARNING(f'Requeued {requeued} abandoned job(s)')
+                        )
+
+                    for job in claim_copy_jobs(workers - len(running), worker_id):
+                        self.stdout.write(f'Started: {job.number} -> {job.destination.name}')
+                        running.add(executor.submit(_run_job_in_thread, job))
+
+                    if not running:
+                        if once:
+                            break
+                        time.sleep(poll_interval)
+                        continue
+
+                    done, running = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._report(future, totals)
+            except KeyboardInterrupt:
+                self.stdout.write(self.style.WARNING('Interrupted, waiting for running copies'))
+                for future in running:
+                    self._report(future, totals)
+
+        self.stdout.write(self.style.SUCCESS('\n=== Copy Worker Finished ==='))
+        self.stdout.write(f'Copied: {totals["SUCCESS"]}')
+        self.stdout.write(f'Skipped: {totals["SKIPPED"]}')
+        if totals['FAILED']:
+            self.stdout.write(self.style.ERROR(f'Failed: {totals["FAILED"]}'))
+
+    def _report(self, future, totals):
+        """Print the outcome of a finished job."""
+        try:
+            job = future.result()
+        except Exception as e:
+            totals['FAILED'] += 1
+            self.stdout.write(self.style.ERROR(f'Copy job crashed: {str(e)}'))
+            logger.error(f'Copy job crashed: {str(e)}', exc_info=True)
+            return
+
+        totals[job.status] = totals.get(job.status, 0) + 1
+        line = f'{job.get_status_display()}: {job.number} - {job.message}'
+        if job.status == 'FAILED':
+            self.stdout.write(self.style.ERROR(line))
+        else:
+            self.stdout.write(self.style.SUCCESS(line))
@@ -1,21 +1,40 @@
 """Management command to scan video storage and update database."""
 
 import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
 from media_files.models import StorageLocation, VideoFile, FileOperation
+from media_files.probe_cache import get_probe_cache
 from media_files.utils import (
+    VIDEO_METADATA_FIELDS,
     scan_directory,
     extract_number_from_filename,
-    extract_video_metadata,
-    calculate_checksum,
-    get_file_modified_time,
+    apply_video_metadata,
+    is_file_unchanged,
+    link_videos_to_licenses,
+    probe_video_file,
 )
 
 
 logger = logging.getLogger('django')
 
+# Rows per bulk_create/bulk_update statement
+BULK_BATCH_SIZE = 1000
+
+UPDATE_FIELDS = VIDEO_METADATA_FIELDS + [
+    'filename', 'file_path', 'is_available', 'checksum',
+    'last_scanned', 'last_modified', 'updated_at',
+]
+
 
 class Command(BaseCommand):
     """Scan video storage and update VideoFile records in database."""
@@ -49,14 +68,39 @@ class Command(BaseCommand):
             action='store_true',
             help='Calculate checksums (slow for large files)',
         )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Skip files whose size and modification time are unchanged',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Number of parallel ffprobe/checksum workers '
+                 '(default: VIDEO_SCAN_WORKERS setting)',
+        )
+        parser.add_argument(
+            '--executor',
+            choices=['thread', 'process'],
+            default='thread',
+            help='Worker pool type for probing and hashing (default: thread)',
+        )
 
     def handle(self, *args, **options):
         """Execute the command."""
         storage_id = options.get('storage_id')
         scan_all = options.get('all')
         force = options.get('force')
-        update_metadata = options.get('update_metadata')
         calculate_checksums = options.get('calculate_checksum')
+        incremental = options.get('incremental') and not force
+        workers = options.get('workers') or getattr(settings, 'VIDEO_SCAN_WORKERS', 4)
+        executor_class = (
+            ProcessPoolExecutor if options.get('executor') == 'process' else ThreadPoolExecutor
+        )
+
+        if workers < 1:
+            raise CommandError('--workers must be at least 1')
 
         # Determine which storages to scan
         if storage_id:
@@ -71,158 +115,401 @@ class Command(BaseCommand):
         total_found = 0
         total_created = 0
         total_updated = 0
+        total_skipped = 0
         total_errors = 0
+        total_bytes = 0
+        total_probed = 0
+        total_cache_hits = 0
+        started = time.monotonic()
 
         for storage in storages:
             self.stdout.write(f'\nScanning storage: {storage.name} ({storage.path})')
-            
+
             try:
                 # Scan directory for video files
                 found_files = scan_directory(storage)
                 total_found += len(found_files)
-                
+
                 self.stdout.write(f'Found {len(found_files)} video files')
-                
+
                 # Mark files not found as unavailable
                 found_numbers = set()
                 for filename, rel_path, abs_path in found_files:
                     number = extract_number_from_filename(filename)
                     if number:
                         found_numbers.add(number)
-                
+
+                # Prefetch all records of this storage once
+                existing_videos = {
+                    video.number: video
+                    for video in VideoFile.objects.filter(storage_location=storage)
+                }
+
                 # Mark missing files as unavailable
-                existing_videos = VideoFile.objects.filter(storage_location=storage)
-                for video in existing_videos:
-                    if video.number not in found_numbers and video.is_available:
-                        video.is_available = False
-                        video.save(update_fields=['is_available'])
-                        self.stdout.write(
-                            self.style.WARNING(f'Marked unavailable: {video.number} - {video.filename}')
-                        )
-                
+                missing = [
+                    video for video in existing_videos.values()
+                    if video.number not in found_numbers and video.is_available
+                ]
+                if missing:
+                    VideoFile.objects.filter(
+                        pk__in=[video.pk for video in missing]
+                    ).update(is_available=False)
+                for video in missing:
+                    video.is_available = False
+                    self.stdout.write(
+                        self.style.WARNING(f'Marked unavailable: {video.number} - {video.filename}')
+                    )
+
+                # Drop cached ffprobe output of files that disappeared
+                probe_cache = get_probe_cache()
+                if probe_cache is not None and missing:
+                    probe_cache.discard(
+                        str(Path(storage.path) / video.file_path) for video in missing
+                    )
+
+                # Select files that need probing
+                pending = []
+                seen_numbers = set()
+                skipped = 0
                 for filename, rel_path, abs_path in found_files:
-                    try:
-                        # Extract number from filename
-                        number = extract_number_from_filename(filename)
-                        
-                        if not number:
-                            self.stdout.write(
-                                self.style.WARNING(
-                                    f'Could not extract number from: {filename}'
-                                )
-                            )
-                            continue
-                        
-                        # Check if VideoFile already exists
-                        video_file, created = VideoFile.objects.get_or_create(
-                            number=number,
-                            defaults={
-                                'filename': filename,
-                                'storage_location': storage,
-                                'file_path': rel_path,
-                                'is_available': True,
-                            }
-                        )
-                        
-                        if created:
-                            total_created += 1
-                            self.stdout.write(
-                                self.style.SUCCESS(f'Created: {number} - {filename}')
-                            )
-                        else:
-                            # Update existing record - always check availability
-                            video_file.filename = filename
-                            video_file.storage_location = storage
-                            video_file.file_path = rel_path
-                            video_file.is_available = True  # File exists, so it's available
-                            total_updated += 1
-                            self.stdout.write(
-                                self.style.SUCCESS(f'Updated: {number} - {filename}')
+                    number = extract_number_from_filename(filename)
+
+                    if not number:
+                        self.stdout.write(
+                            self.style.WARNING(
+                                f'Could not extract number from: {filename}'
                             )
-                        
-                        # Extract and update metadata
-                        self.stdout.write(f'Extracting metadata for: {filename}')
-                        metadata = extract_video_metadata(abs_path)
-                        
-                        # Update VideoFile with metadata
-                        if 'format' in metadata:
-                            video_file.format = metadata['format']
-                        if 'file_size' in metadata:
-                            video_file.file_size = metadata['file_size']
-                        if 'duration' in metadata:
-                            video_file.duration = metadata['duration']
-                        if 'total_bitrate' in metadata:
-                            video_file.total_bitrate = metadata['total_bitrate']
-                        
-                        # Video metadata
-                        video_file.has_video = metadata.get('has_video', False)
-                        if video_file.has_video:
-                            video_file.video_codec = metadata.get('video_codec', '')
-                            video_file.video_codec_long = metadata.get('video_codec_long', '')
-                            video_file.video_profile = metadata.get('video_profile', '')
-                            video_file.video_bitrate = metadata.get('video_bitrate')
-                            video_file.fps = metadata.get('fps')
-                            video_file.width = metadata.get('width')
-                            video_file.height = metadata.get('height')
-                            video_file.aspect_ratio = metadata.get('aspect_ratio', '')
-                            video_file.pixel_format = metadata.get('pixel_format', '')
-                            video_file.color_space = metadata.get('color_space', '')
-                            video_file.color_range = metadata.get('color_range', '')
-                            video_file.chroma_subsampling = metadata.get('chroma_subsampling', '')
-                        
-                        # Audio metadata
-                        video_file.has_audio = metadata.get('has_audio', False)
-                        if video_file.has_audio:
-                            video_file.audio_codec = metadata.get('audio_codec', '')
-                            video_file.audio_codec_long = metadata.get('audio_codec_long', '')
-                            video_file.audio_bitrate = metadata.get('audio_bitrate')
-                            video_file.audio_sample_rate = metadata.get('audio_sample_rate')
-                            video_file.audio_channels = metadata.get('audio_channels')
-                            video_file.audio_channel_layout = metadata.get('audio_channel_layout', '')
-                        
-                        # Store full metadata JSON
-                        if 'raw_json' in metadata:
-                            video_file.metadata_json = metadata['raw_json']
-                        
-                        # Update timestamps
-                        video_file.last_scanned = timezone.now()
-                        video_file.last_modified = get_file_modified_time(abs_path)
-                        
-                        # Calculate checksum if requested
-                        if calculate_checksums:
-                            self.stdout.write(f'Calculating checksum for: {filename}')
-                            video_file.checksum = calculate_checksum(abs_path)
-                        
-                        video_file.save()
-                        
-                        # Log operation
-                        FileOperation.objects.create(
-                            video_file=video_file,
-                            operation_type='SCAN',
-                            source_location=storage,
-                            status='SUCCESS',
-                            details={'filename': filename, 'path': rel_path}
                         )
-                        
-                    except Exception as e:
-                        total_errors += 1
+                        continue
+
+                    if number in seen_numbers:
                         self.stdout.write(
-                            self.style.ERROR(f'Error processing {filename}: {str(e)}')
+                            self.style.WARNING(
+                                f'Duplicate number {number} in storage, skipping: {rel_path}'
+                            )
                         )
-                        logger.error(f'Error processing {filename}: {str(e)}', exc_info=True)
-                
+                        continue
+                    seen_numbers.add(number)
+
+                    if incremental:
+                        existing = existing_videos.get(number)
+                        try:
+                            stat_result = os.stat(abs_path)
+                        except OSError:
+                            stat_result = None
+                        if (
+                            stat_result is not None
+                            and existing is not None
+                            and existing.is_available
+                            and existing.file_path == rel_path
+                            and is_file_unchanged(existing, stat_result.st_size, stat_result.st_mtime)
+                        ):
+                            skipped += 1
+                            continue
+
+                    pending.append((number, filename, rel_path, abs_path))
+
+                total_skipped += skipped
+                stats = {'created': 0, 'updated': 0, 'errors': 0, 'bytes': 0, 'cache_hits': 0}
+
+                if pending:
+                    self.stdout.write(
+                        f'Probing {len(pending)} file(s) with {workers} {options.get("executor")} worker(s)'
+                    )
+                    self._probe_and_store(
+                        storage, pending, existing_videos, executor_class, workers,
+                        calculate_checksums, stats,
+                    )
+
+                total_created += stats['created']
+                total_updated += stats['updated']
+                total_errors += stats['errors']
+                total_bytes += stats['bytes']
+                total_cache_hits += stats['cache_hits']
+                total_probed += len(pending)
+
+                # One summary record per storage instead of one per file
+                FileOperation.objects.create(
+                    operation_type='SCAN',
+                    source_location=storage,
+                    status='FAILED' if stats['errors'] else 'SUCCESS',
+                    details={
+                        'found': len(found_files),
+                        'created': stats['created'],
+                        'updated': stats['updated'],
+                        'skipped': skipped,
+                        'unavailable': len(missing),
+                        'errors': stats['errors'],
+                        'cache_hits': stats['cache_hits'],
+                        'incremental': bool(incremental),
+                    },
+                )
+
             except Exception as e:
                 self.stdout.write(
                     self.style.ERROR(f'Error scanning storage {storage.name}: {str(e)}')
                 )
                 logger.error(f'Error scanning storage {storage.name}: {str(e)}', exc_info=True)
                 total_errors += 1
-        
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+
         # Summary
         self.stdout.write(self.style.SUCCESS('\n=== Scan Complete ==='))
         self.stdout.write(f'Total files found: {total_found}')
         self.stdout.write(f'New records created: {total_created}')
         self.stdout.write(f'Records updated: {total_updated}')
+        if incremental:
+            self.stdout.write(f'Unchanged files skipped: {total_skipped}')
+        self.stdout.write(
+            f'Throughput: {total_found / elapsed:.1f} files/s, '
+            f'{total_bytes / elapsed:,.0f} bytes/s '
+            f'({total_bytes / (1024 * 1024):.1f} MB probed in {elapsed:.1f} s)'
+        )
+        if total_probed:
+            self.stdout.write(
+                f'ffprobe cache: {total_cache_hits} hits, '
+                f'{total_probed - total_cache_hits} misses'
+            )
         if total_errors > 0:
             self.stdout.write(self.style.ERROR(f'Errors: {total_errors}'))
 
+    def scan_paths(self, storage, paths, executor_class=ThreadPoolExecutor, workers=None,
+                   calculate_checksums=False):
+        """
+        Update the records of changed paths of a storage without walking it.
+
+        Video files are probed unless size and modification time are
+        unchanged. Records of paths that no longer exist, or lie below a
+        removed directory, are marked unavailable. Used by watch_storage.
+
+        Args:
+            storage: StorageLocation the paths belong to
+            paths: Absolute paths reported as created, changed or deleted
+            executor_class: Worker pool class for probing
+            workers: Number of workers (default: VIDEO_SCAN_WORKERS setting)
+            calculate_checksums: Whether to calculate checksums
+
+        Returns:
+            Dict with 'created', 'updated', 'skipped', 'unavailable' and 'errors' counts
+        """
+        workers = workers or getattr(settings, 'VIDEO_SCAN_WORKERS', 4)
+        supported_formats = getattr(settings, 'VIDEO_SUPPORTED_FORMATS', ['mp4', 'mov', 'mpeg', 'mpg'])
+        base_path = Path(storage.path)
+
+        found = {}
+        removed = []
+        for path in paths:
+            abs_path = Path(path)
+            try:
+                rel_path = str(abs_path.relative_to(base_path))
+            except ValueError:
+                continue
+
+            if abs_path.is_file():
+                filename = abs_path.name
+                ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+                if ext not in supported_formats:
+                    continue
+                number = extract_number_from_filename(filename)
+                if not number:
+                    self.stdout.write(
+                        self.style.WARNING(f'Could not extract number from: {filename}')
+                    )
+                    continue
+                found[number] = (number, filename, rel_path, str(abs_path))
+            elif not abs_path.exists():
+                removed.append(rel_path)
+
+        stats = {
+            'created': 0, 'updated': 0, 'skipped': 0, 'unavailable': 0,
+            'errors': 0, 'bytes': 0, 'cache_hits': 0,
+        }
+        if not found and not removed:
+            return stats
+
+        # Fetch only the records of the reported paths
+        lookup = Q(number__in=list(found))
+        for rel_path in removed:
+            lookup |= Q(file_path=rel_path) | Q(file_path__startswith=f'{rel_path}/')
+        existing_videos = {
+            video.number: video
+            for video in VideoFile.objects.filter(lookup, storage_location=storage)
+        }
+
+        missing = [
+            video for video in existing_videos.values()
+            if video.is_available and video.number not in found and any(
+                video.file_path == rel_path or video.file_path.startswith(f'{rel_path}/')
+                for rel_path in removed
+            )
+        ]
+        if missing:
+            VideoFile.objects.filter(
+                pk__in=[video.pk for video in missing]
+            ).update(is_available=False)
+            probe_cache = get_probe_cache()
+            if probe_cache is not None:
+                probe_cache.discard(str(base_path / video.file_path) for video in missing)
+        for video in missing:
+            video.is_available = False
+            self.stdout.write(
+                self.style.WARNING(f'Marked unavailable: {video.number} - {video.filename}')
+            )
+        stats['unavailable'] = len(missing)
+
+        pending = []
+        for number, filename, rel_path, abs_path in found.values():
+            existing = existing_videos.get(number)
+            if existing is not None and existing.is_available and existing.file_path != rel_path:
+                if (base_path / existing.file_path).exists():
+                    self.stdout.write(
+                        self.style.WARNING(
+                            f'Duplicate number {number} in storage, skipping: {rel_path}'
+                        )
+                    )
+                    continue
+            elif existing is not None and existing.is_available:
+                try:
+                    stat_result = os.stat(abs_path)
+                except OSError:
+                    continue
+                if is_file_unchanged(existing, stat_result.st_size, stat_result.st_mtime):
+                    stats['skipped'] += 1
+                    continue
+            pending.append((number, filename, rel_path, abs_path))
+
+        if pending:
+            self._probe_and_store(
+                storage, pending, existing_videos, executor_class, workers,
+                calculate_checksums, stats,
+            )
+
+        FileOperation.objects.create(
+            operation_type='SCAN',
+            source_location=storage,
+            status='FAILED' if stats['errors'] else 'SUCCESS',
+            details={
+                'found': len(found),
+                'created': stats['created'],
+                'updated': stats['updated'],
+                'skipped': stats['skipped'],
+                'unavailable': stats['unavailable'],
+                'errors': stats['errors'],
+                'cache_hits': stats['cache_hits'],
+                'watch': True,
+            },
+        )
+        return stats
+
+    def _probe_and_store(self, storage, pending, existing_videos, executor_class,
+                         workers, calculate_checksums, stats):
+        """Probe pending files in a worker pool and write them in batches."""
+        to_create = []
+        to_update = []
+
+        # Probe and hash in parallel, write results in this thread
+        with executor_class(max_workers=workers) as executor:
+            futures = {
+                executor.submit(probe_video_file, item[3], calculate_checksums): item
+                for item in pending
+            }
+            for future in as_completed(futures):
+                number, filename, rel_path, abs_path = futures[future]
+                try:
+                    probe = future.result()
+                    if probe['error']:
+                        raise OSError(probe['error'])
+
+                    stats['bytes'] += probe['size']
+                    if probe['metadata'].get('from_cache'):
+                        stats['cache_hits'] += 1
+                    video_file = existing_videos.get(number)
+                    if video_file is None:
+                        video_file = VideoFile(number=number, storage_location=storage)
+                        to_create.append(video_file)
+                    else:
+                        to_update.append(video_file)
+                    self._apply_probe(video_file, filename, rel_path, probe)
+
+                except Exception as e:
+                    stats['errors'] += 1
+                    self.stdout.write(
+                        self.style.ERROR(f'Error processing {filename}: {str(e)}')
+                    )
+                    logger.error(f'Error processing {filename}: {str(e)}', exc_info=True)
+
+                if len(to_create) + len(to_update) >= BULK_BATCH_SIZE:
+                    self._flush(to_create, to_update, stats)
+                    to_create, to_update = [], []
+
+        self._flush(to_create, to_update, stats)
+
+    def _apply_probe(self, video_file, filename, rel_path, probe):
+        """Copy a probe result onto an (unsaved) VideoFile instance."""
+        now = timezone.now()
+
+        video_file.filename = filename
+        video_file.file_path = rel_path
+        video_file.is_available = True  # File exists, so it's available
+
+        apply_video_metadata(video_file, probe['metadata'])
+        if 'file_size' not in probe['metadata']:
+            video_file.file_size = probe['size']
+
+        # Update timestamps; bulk_update() does not touch auto_now fields
+        video_file.last_scanned = now
+        video_file.updated_at = now
+        if probe['mtime'] is not None:
+            video_file.last_modified = timezone.make_aware(
+                datetime.fromtimestamp(probe['mtime'])
+            )
+
+        if probe['checksum']:
+            video_file.checksum = probe['checksum']
+
+    def _flush(self, to_create, to_update, stats):
+        """Write a batch of new and changed records with bulk queries."""
+        if not to_create and not to_update:
+            return
+
+        try:
+            with transaction.atomic():
+                VideoFile.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+                VideoFile.objects.bulk_update(to_update, UPDATE_FIELDS, batch_size=BULK_BATCH_SIZE)
+            created, updated = to_create, to_update
+        except Exception as e:
+            # Fall back to row-by-row writes to isolate the failing record
+            logger.warning(f'Bulk write failed, retrying row by row: {str(e)}')
+            created, updated = [], []
+            for video_file in to_create:
+                # The batch was rolled back, discard primary keys set by it
+                video_file.pk = None
+                video_file._state.adding = True
+            for video_file, target in (
+                [(v, created) for v in to_create] + [(v, updated) for v in to_update]
+            ):
+                try:
+                    with transaction.atomic():
+                        video_file.save()
+                    target.append(video_file)
+                except Exception as row_error:
+                    stats['errors'] += 1
+                    self.stdout.write(
+                        self.style.ERROR(f'Error processing {video_file.filename}: {str(row_error)}')
+                    )
+                    logger.error(f'Error saving {video_file.filename}: {str(row_error)}', exc_info=True)
+
+        for video_file in created:
+            self.stdout.write(
+                self.style.SUCCESS(f'Created: {video_file.number} - {video_file.filename}')
+            )
+        for video_file in updated:
+            self.stdout.write(
+                self.style.SUCCESS(f'Updated: {video_file.number} - {video_file.filename}')
+            )
+        stats['created'] += len(created)
+        stats['updated'] += len(updated)
+
+        # bulk writes bypass post_save, so link licenses explicitly
+        link_videos_to_licenses(created + updated)
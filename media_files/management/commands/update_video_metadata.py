@@ -5,6 +5,7 @@ from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 
 from media_files.models import VideoFile, FileOperation
+from media_files.probe_cache import get_probe_cache
 from media_files.utils import extract_video_metadata, calculate_checksum
 
 
@@ -38,6 +39,11 @@ class Command(BaseCommand):
             action='store_true',
             help='Recalculate checksums',
         )
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='Bypass the ffprobe cache and probe every file again',
+        )
 
     def handle(self, *args, **options):
         """Execute the command."""
@@ -45,6 +51,7 @@ class Command(BaseCommand):
         update_all = options.get('all')
         missing_only = options.get('missing_only')
         calculate_checksums = options.get('calculate_checksum')
+        use_cache = not options.get('no_cache')
 
         # Determine which files to update
         if number:
@@ -68,7 +75,7 @@ class Command(BaseCommand):
                 abs_path = video.full_path
                 
                 # Extract metadata
-                metadata = extract_video_metadata(abs_path)
+                metadata = extract_video_metadata(abs_path, use_cache=use_cache)
                 
                 # Update VideoFile with metadata
                 if 'format' in metadata:
@@ -154,6 +161,12 @@ class Command(BaseCommand):
         # Summary
         self.stdout.write(self.style.SUCCESS('\n=== Update Complete ==='))
         self.stdout.write(f'Total updated: {total_updated}')
+        probe_cache = get_probe_cache()
+        if probe_cache is not None and use_cache:
+            cache_stats = probe_cache.stats()
+            self.stdout.write(
+                f'ffprobe cache: {cache_stats["hits"]} hits, {cache_stats["misses"]} misses'
+            )
         if total_errors > 0:
             self.stdout.write(self.style.ERROR(f'Errors: {total_errors}'))
 
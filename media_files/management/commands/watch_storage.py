@@ -0,0 +1,153 @@
+"""Management command to watch storage locations for changed video files."""
+
+import logging
+import time
+from pathlib import Path
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from media_files.management.commands.scan_video_storage import Command as ScanCommand
+from media_files.models import StorageLocation
+from media_files.watcher import Debouncer, create_watcher
+
+
+logger = logging.getLogger('django')
+
+
+class Command(BaseCommand):
+    """Keep VideoFile records up to date from file system change events."""
+
+    help = 'Watch storage locations and scan only created, changed or deleted files'
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            '--storage-id',
+            type=int,
+            nargs='+',
+            help='Watch these storage locations (default: all active with scanning enabled)',
+        )
+        parser.add_argument(
+            '--mode',
+            choices=['auto', 'inotify', 'poll'],
+            default=None,
+            help='Change detection (default: VIDEO_WATCH_MODE setting); auto uses '
+                 'polling for network file systems',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=None,
+            help='Seconds between checks (default: VIDEO_WATCH_POLL_INTERVAL setting)',
+        )
+        parser.add_argument(
+            '--settle',
+            type=float,
+            default=None,
+            help='Seconds a file must stop growing before it is scanned '
+                 '(default: VIDEO_WATCH_SETTLE_TIME setting)',
+        )
+        parser.add_argument(
+            '--calculate-checksum',
+            action='store_true',
+            help='Calculate checksums of changed files',
+        )
+        parser.add_argument(
+            '--no-initial-scan',
+            action='store_true',
+            help='Do not run an incremental scan at startup to catch up on '
+                 'changes made while the watcher was stopped',
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command."""
+        mode = options.get('mode') or getattr(settings, 'VIDEO_WATCH_MODE', 'auto')
+        poll_interval = options.get('poll_interval') or getattr(settings, 'VIDEO_WATCH_POLL_INTERVAL', 10)
+        settle = options.get('settle')
+        if settle is None:
+            settle = getattr(settings, 'VIDEO_WATCH_SETTLE_TIME', 30)
+
+        if options.get('storage_id'):
+            storages = list(StorageLocation.objects.filter(id__in=options['storage_id']))
+        else:
+            storages = list(StorageLocation.objects.filter(is_active=True, scan_enabled=True))
+        storages = [storage for storage in storages if Path(storage.path).is_dir()]
+        if not storages:
+            raise CommandError('No accessible storage locations to watch')
+
+        if not options.get('no_initial_scan'):
+            for storage in storages:
+                self._full_scan(storage)
+
+        watcher = create_watcher([storage.path for storage in storages], mode)
+        debouncer = Debouncer(settle)
+        scanner = ScanCommand(stdout=self.stdout, stderr=self.stderr)
+        totals = {'created': 0, 'updated': 0, 'unavailable': 0, 'errors': 0}
+
+        self.stdout.write(
+            f'Watching {len(storages)} storage location(s) with '
+            f'{type(watcher).__name__} (settle time {settle:g} s)'
+        )
+
+        try:
+            while True:
+                # Wake up often enough to release settled files on time
+                timeout = min(poll_interval, settle) if len(debouncer) else poll_interval
+                changes = watcher.wait(timeout)
+                if watcher.overflowed:
+                    self.stdout.write(self.style.WARNING('Event queue overflowed, rescanning'))
+                    watcher.overflowed = False
+                    for storage in storages:
+                        self._full_scan(storage)
+                debouncer.add(changes)
+
+                ready = debouncer.pop_ready()
+                if not ready:
+                    continue
+
+                close_old_connections()
+                for storage in storages:
+                    prefix = str(Path(storage.path)).rstrip('/') + '/'
+                    paths = [path for path in ready if path.startswith(prefix)]
+                    if not paths:
+                        continue
+                    try:
+                        stats = scanner.scan_paths(
+                            storage, paths,
+                            calculate_checksums=options.get('calculate_checksum'),
+                        )
+                    except Exception as e:
+                        totals['errors'] += 1
+                        self.stdout.write(
+                            self.style.ERROR(f'Error scanning changes in {storage.name}: {str(e)}')
+                        )
+                        logger.error(f'Error scanning changes in {storage.name}: {str(e)}', exc_info=True)
+                        continue
+                    for key in totals:
+                        totals[key] += stats[key]
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Interrupted'))
+        finally:
+            watcher.close()
+
+        self.stdout.write(self.style.SUCCESS('\n=== Watcher Stopped ==='))
+        self.stdout.write(f'New records created: {totals["created"]}')
+        self.stdout.write(f'Records updated: {totals["updated"]}')
+        self.stdout.write(f'Marked unavailable: {totals["unavailable"]}')
+        if totals['errors']:
+            self.stdout.write(self.style.ERROR(f'Errors: {totals["errors"]}'))
+
+    def _full_scan(self, storage):
+        """Run an incremental scan of a whole storage."""
+        started = time.monotonic()
+        try:
+            call_command(
+                'scan_video_storage', '--storage-id', str(storage.id), '--incremental',
+                stdout=self.stdout,
+            )
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Failed to scan {storage.name}: {str(e)}'))
+            logger.error(f'Failed to scan {storage.name}: {str(e)}', exc_info=True)
+        logger.info(f'Scanned {storage.name} in {time.monotonic() - started:.1f} s')
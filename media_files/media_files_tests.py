@@ -0,0 +1,1364 @@
+"""Tests for media files module."""
+
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from io import StringIO
+
+from .models import StorageLocation, VideoFile, FileOperation, version_ordering
+from .utils import (
+    extract_number_from_filename,
+    scan_directory,
+    calculate_checksum,
+    calculate_fingerprint,
+    copy_file_with_progress,
+    is_file_unchanged,
+)
+
+
+class ExtractNumberFromFilenameTests(TestCase):
+    """Tests for extract_number_from_filename function."""
+
+    def test_extract_valid_number(self):
+        """Test extracting number from valid filename."""
+        filename = "12345_my_video.mp4"
+        result = extract_number_from_filename(filename)
+        self.assertEqual(result, 12345)
+
+    def test_extract_with_leading_zeros(self):
+        """Test extracting number with leading zeros."""
+        filename = "00123_video.mov"
+        result = extract_number_from_filename(filename)
+        self.assertEqual(result, 123)
+
+    def test_no_underscore(self):
+        """Test filename without underscore."""
+        filename = "12345.mp4"
+        result = extract_number_from_filename(filename)
+        self.assertIsNone(result)
+
+    def test_no_number(self):
+        """Test filename without number."""
+        filename = "video_file.mp4"
+        result = extract_number_from_filename(filename)
+        self.assertIsNone(result)
+
+    def test_number_in_middle(self):
+        """Test number not at start."""
+        filename = "video_12345_test.mp4"
+        result = extract_number_from_filename(filename)
+        self.assertIsNone(result)
+
+
+class StorageLocationModelTests(TestCase):
+    """Tests for StorageLocation model."""
+
+    def setUp(self):
+        """Set up test storage location."""
+        self.storage = StorageLocation.objects.create(
+            name="Test Archive",
+            storage_type="ARCHIVE",
+            path="/tmp/test_archive/",
+            is_active=True,
+            scan_enabled=False
+        )
+
+    def test_storage_creation(self):
+        """Test storage location can be created."""
+        self.assertEqual(self.storage.name, "Test Archive")
+        self.assertEqual(self.storage.storage_type, "ARCHIVE")
+        self.assertTrue(self.storage.is_active)
+
+    def test_storage_string_representation(self):
+        """Test string representation of storage."""
+        expected = "Test Archive (Archive)"
+        self.assertEqual(str(self.storage), expected)
+
+    def test_video_count_property(self):
+        """Test video count property."""
+        self.assertEqual(self.storage.video_count, 0)
+        
+        # Create video file
+        VideoFile.objects.create(
+            number=12345,
+            filename="12345_test.mp4",
+            storage_location=self.storage,
+            file_path="12345_test.mp4",
+            is_available=True
+        )
+        
+        self.assertEqual(self.storage.video_count, 1)
+
+
+class VideoFileModelTests(TestCase):
+    """Tests for VideoFile model."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.storage = StorageLocation.objects.create(
+            name="Test Storage",
+            storage_type="ARCHIVE",
+            path="/tmp/test/",
+            is_active=True
+        )
+        
+        self.video = VideoFile.objects.create(
+            number=12345,
+            filename="12345_test_video.mp4",
+            storage_location=self.storage,
+            file_path="12345_test_video.mp4",
+            file_size=1048576,  # 1 MB
+            duration=timedelta(minutes=5, seconds=30),
+            format="mp4",
+            is_available=True,
+            width=1920,
+            height=1080,
+            fps=25.0,
+            total_bitrate=5000000
+        )
+
+    def test_video_creation(self):
+        """Test video file can be created."""
+        self.assertEqual(self.video.number, 12345)
+        self.assertEqual(self.video.filename, "12345_test_video.mp4")
+        self.assertTrue(self.video.is_available)
+
+    def test_full_path_property(self):
+        """Test full_path property."""
+        expected = "/tmp/test/12345_test_video.mp4"
+        self.assertEqual(self.video.full_path, expected)
+
+    def test_resolution_display(self):
+        """Test resolution_display property."""
+        self.assertEqual(self.video.resolution_display, "1920x1080")
+
+    def test_file_size_mb(self):
+        """Test file_size_mb property."""
+        self.assertEqual(self.video.file_size_mb, 1.0)
+
+    def test_bitrate_mbps(self):
+        """Test bitrate_mbps property."""
+        self.assertEqual(self.video.bitrate_mbps, 5.0)
+
+    def test_string_representation(self):
+        """Test string representation."""
+        expected = "12345 - 12345_test_video.mp4"
+        self.assertEqual(str(self.video), expected)
+
+
+class FileOperationModelTests(TestCase):
+    """Tests for FileOperation model."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.storage = StorageLocation.objects.create(
+            name="Test Storage",
+            storage_type="ARCHIVE",
+            path="/tmp/test/",
+            is_active=True
+        )
+        
+        self.video = VideoFile.objects.create(
+            number=12345,
+            filename="12345_test.mp4",
+            storage_location=self.storage,
+            file_path="12345_test.mp4",
+            is_available=True
+        )
+
+    def test_operation_creation(self):
+        """Test file operation can be created."""
+        operation = FileOperation.objects.create(
+            video_file=self.video,
+            operation_type='SCAN',
+            source_location=self.storage,
+            status='SUCCESS'
+        )
+        
+        self.assertEqual(operation.video_file, self.video)
+        self.assertEqual(operation.operation_type, 'SCAN')
+        self.assertEqual(operation.status, 'SUCCESS')
+
+    def test_operation_string_representation(self):
+        """Test string representation."""
+        operation = FileOperation.objects.create(
+            video_file=self.video,
+            operation_type='COPY',
+            status='IN_PROGRESS'
+        )
+        
+        expected_substring = "Copy"
+        self.assertIn(expected_substring, str(operation))
+
+
+class ScanDirectoryTests(TestCase):
+    """Tests for scan_directory function."""
+
+    def setUp(self):
+        """Set up temporary directory with test files."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage = StorageLocation.objects.create(
+            name="Test Storage",
+            storage_type="ARCHIVE",
+            path=self.temp_dir,
+            is_active=True
+        )
+        
+        # Create test files
+        self.test_files = [
+            "12345_video1.mp4",
+            "67890_video2.mov",
+            "11111_video3.mpeg",
+            "readme.txt"  # Should be ignored
+        ]
+        
+        for filename in self.test_files:
+            filepath = Path(self.temp_dir) / filename
+            filepath.touch()
+
+    def tearDown(self):
+        """Clean up temporary files."""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_scan_finds_video_files(self):
+        """Test that scan_directory finds video files."""
+        found_files = scan_directory(self.storage)
+        
+        # Should find 3 video files, ignore txt file
+        self.assertEqual(len(found_files), 3)
+        
+        # Check that found files are video files
+        video_filenames = [f[0] for f in found_files]
+        self.assertIn("12345_video1.mp4", video_filenames)
+        self.assertIn("67890_video2.mov", video_filenames)
+        self.assertIn("11111_video3.mpeg", video_filenames)
+        self.assertNotIn("readme.txt", video_filenames)
+
+
+class CalculateChecksumTests(TestCase):
+    """Tests for calculate_checksum function."""
+
+    def setUp(self):
+        """Create temporary file for testing."""
+        self.temp_file = tempfile.NamedTemporaryFile(delete=False)
+        self.temp_file.write(b"Test content for checksum")
+        self.temp_file.close()
+
+    def tearDown(self):
+        """Clean up temporary file."""
+        os.unlink(self.temp_file.name)
+
+    def test_calculate_sha256(self):
+        """Test SHA256 checksum calculation."""
+        checksum = calculate_checksum(self.temp_file.name, algorithm='sha256')
+        
+        # Should return non-empty hex string
+        self.assertTrue(checksum)
+        self.assertEqual(len(checksum), 64)  # SHA256 produces 64 hex characters
+
+    def test_calculate_md5(self):
+        """Test MD5 checksum calculation."""
+        checksum = calculate_checksum(self.temp_file.name, algorithm='md5')
+        
+        # Should return non-empty hex string
+        self.assertTrue(checksum)
+        self.assertEqual(len(checksum), 32)  # MD5 produces 32 hex characters
+
+    def test_consistent_checksum(self):
+        """Test that checksum is consistent for same content."""
+        checksum1 = calculate_checksum(self.temp_file.name)
+        checksum2 = calculate_checksum(self.temp_file.name)
+        
+        self.assertEqual(checksum1, checksum2)
+
+    def test_calculate_blake2b(self):
+        """Test BLAKE2 checksum fits the checksum field."""
+        checksum = calculate_checksum(self.temp_file.name, algorithm='blake2b')
+
+        self.assertEqual(len(checksum), 64)
+        self.assertNotEqual(checksum, calculate_checksum(self.temp_file.name, algorithm='sha256'))
+
+
+    def test_default_is_sha256(self):
+        """Test that stored checksums keep SHA-256 whatever copies verify with."""
+        import hashlib
+        from django.test import override_settings
+
+        expected = hashlib.sha256(Path(self.temp_file.name).read_bytes()).hexdigest()
+        with override_settings(VIDEO_COPY_VERIFY_ALGORITHM='md5'):
+            self.assertEqual(calculate_checksum(self.temp_file.name), expected)
+
+
+class FingerprintTests(TestCase):
+    """Tests for calculate_fingerprint and the streaming copy."""
+
+    def setUp(self):
+        """Create a temporary directory."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        """Clean up."""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _write(self, name, content):
+        path = self.temp_dir / name
+        path.write_bytes(content)
+        return str(path)
+
+    def test_identical_files_same_fingerprint(self):
+        """Test that equal content gives equal fingerprints."""
+        content = os.urandom(10000)
+        first = self._write('a.mp4', content)
+        second = self._write('b.mp4', content)
+
+        self.assertEqual(
+            calculate_fingerprint(first, sample_size=1000),
+            calculate_fingerprint(second, sample_size=1000),
+        )
+
+    def test_sampled_regions_detect_changes(self):
+        """Test that changes in head, middle or tail change the fingerprint."""
+        content = bytearray(10000)
+        original = calculate_fingerprint(self._write('a.mp4', bytes(content)), sample_size=1000)
+
+        for offset in (0, 5000, 9999):
+            changed = bytearray(content)
+            changed[offset] = 1
+            path = self._write(f'changed_{offset}.mp4', bytes(changed))
+            self.assertNotEqual(calculate_fingerprint(path, sample_size=1000), original)
+
+    def test_size_is_part_of_fingerprint(self):
+        """Test that files differing only in length differ."""
+        short = self._write('short.mp4', b'\0' * 100)
+        long = self._write('long.mp4', b'\0' * 101)
+
+        self.assertNotEqual(calculate_fingerprint(short), calculate_fingerprint(long))
+
+    def test_copy_with_verification(self):
+        """Test that the streaming copy produces an identical file."""
+        content = os.urandom(50000)
+        source = self._write('source.mp4', content)
+        destination = str(self.temp_dir / 'sub' / 'destination.mp4')
+
+        success, message = copy_file_with_progress(source, destination)
+
+        self.assertTrue(success, message)
+        self.assertEqual(Path(destination).read_bytes(), content)
+
+
+    def test_find_duplicates_separates_fingerprint_matches(self):
+        """Test that only equal checksums count as safe to delete."""
+        from .management.commands.find_duplicates import Command
+
+        storage = StorageLocation.objects.create(
+            name='Archive', storage_type='ARCHIVE', path=str(self.temp_dir)
+        )
+        videos_by_number = {
+            number: [
+                VideoFile(number=number, filename=f'{number}_video.mp4', storage_location=storage,
+                          checksum=checksum, fingerprint=fingerprint)
+                for checksum, fingerprint in versions
+            ]
+            for number, versions in (
+                (1, [('a' * 64, 'f1'), ('a' * 64, 'f2')]),
+                (2, [('', 'f1'), ('', 'f1')]),
+                (3, [('', 'f1'), ('', 'f2')]),
+            )
+        }
+
+        out = StringIO()
+        Command(stdout=out)._output_summary_statistics(videos_by_number)
+        self.assertIn('Identical files (safe to delete): 1', out.getvalue())
+        self.assertIn('Likely identical (fingerprint only, verify before deleting): 1', out.getvalue())
+        self.assertIn('Different files (manual review needed): 1', out.getvalue())
+
+        out = StringIO()
+        Command(stdout=out)._output_json(videos_by_number, 3)
+        duplicates = [video['duplicates'][0] for video in json.loads(out.getvalue())['videos'].values()]
+        self.assertEqual(
+            [(duplicate['is_identical'], duplicate['likely_identical']) for duplicate in duplicates],
+            [(True, False), (None, True), (False, False)],
+        )
+
+class IntegrationTests(TestCase):
+    """Integration tests for media files workflows."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.archive = StorageLocation.objects.create(
+            name="Archive",
+            storage_type="ARCHIVE",
+            path=self.temp_dir,
+            is_active=True
+        )
+
+    def tearDown(self):
+        """Clean up."""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_full_workflow(self):
+        """Test complete workflow: create file, scan, create VideoFile."""
+        # Create test video file
+        test_filename = "12345_integration_test.mp4"
+        test_filepath = Path(self.temp_dir) / test_filename
+        test_filepath.write_bytes(b"fake video content")
+        
+        # Scan directory
+        found_files = scan_directory(self.archive)
+        self.assertEqual(len(found_files), 1)
+        
+        filename, rel_path, abs_path = found_files[0]
+        self.assertEqual(filename, test_filename)
+        
+        # Extract number
+        number = extract_number_from_filename(filename)
+        self.assertEqual(number, 12345)
+        
+        # Create VideoFile
+        video = VideoFile.objects.create(
+            number=number,
+            filename=filename,
+            storage_location=self.archive,
+            file_path=rel_path,
+            is_available=True
+        )
+        
+        self.assertEqual(video.number, 12345)
+        self.assertEqual(video.filename, test_filename)
+        
+        # Create operation log
+        operation = FileOperation.objects.create(
+            video_file=video,
+            operation_type='SCAN',
+            source_location=self.archive,
+            status='SUCCESS'
+        )
+        
+        self.assertEqual(operation.video_file, video)
+        self.assertEqual(operation.status, 'SUCCESS')
+
+
+class IncrementalScanTests(TestCase):
+    """Tests for the incremental mode of scan_video_storage."""
+
+    def setUp(self):
+        """Set up storage with one video file."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage = StorageLocation.objects.create(
+            name="Archive",
+            storage_type="ARCHIVE",
+            path=self.temp_dir,
+            is_active=True
+        )
+        self.file_path = Path(self.temp_dir) / "12345_incremental.mp4"
+        self.file_path.write_bytes(b"fake video content")
+
+    def tearDown(self):
+        """Clean up."""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _scan(self, *args):
+        out = StringIO()
+        call_command(
+            'scan_video_storage', '--storage-id', str(self.storage.id),
+            '--workers', '2', *args, stdout=out
+        )
+        return out.getvalue()
+
+    def test_is_file_unchanged(self):
+        """Test size and mtime comparison against the stored record."""
+        stat_result = os.stat(self.file_path)
+        video = VideoFile(
+            number=12345,
+            file_size=stat_result.st_size,
+            last_modified=timezone.make_aware(
+                datetime.fromtimestamp(stat_result.st_mtime)
+            ),
+        )
+        self.assertTrue(is_file_unchanged(video, stat_result.st_size, stat_result.st_mtime))
+        self.assertFalse(is_file_unchanged(video, stat_result.st_size + 1, stat_result.st_mtime))
+        self.assertFalse(is_file_unchanged(video, stat_result.st_size, stat_result.st_mtime + 10))
+        self.assertFalse(is_file_unchanged(None, stat_result.st_size, stat_result.st_mtime))
+
+    def test_unchanged_files_are_skipped(self):
+        """Test that a second incremental scan does not re-probe the file."""
+        output = self._scan('--incremental')
+        self.assertIn('Created: 12345', output)
+        self.assertIn('files/s', output)
+
+        output = self._scan('--incremental')
+        self.assertNotIn('Updated: 12345', output)
+        self.assertIn('Unchanged files skipped: 1', output)
+
+    def test_changed_file_is_rescanned(self):
+        """Test that a modified file is probed again."""
+        self._scan('--incremental')
+        self.file_path.write_bytes(b"longer fake video content")
+
+        output = self._scan('--incremental')
+        self.assertIn('Updated: 12345', output)
+
+    def test_each_file_is_probed(self):
+        """Test that every pending file is probed by its own path."""
+        (Path(self.temp_dir) / "12346_other.mp4").write_bytes(b"other")
+        self._scan()
+
+        self.assertEqual(VideoFile.objects.get(number=12345).file_size, 18)
+        self.assertEqual(VideoFile.objects.get(number=12346).file_size, 5)
+
+    def test_force_disables_incremental(self):
+        """Test that --force rescans unchanged files."""
+        self._scan('--incremental')
+        output = self._scan('--incremental', '--force')
+        self.assertIn('Updated: 12345', output)
+
+
+class BulkScanWriteTests(TestCase):
+    """Tests for the batched write path of scan_video_storage."""
+
+    def setUp(self):
+        """Set up an empty storage directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage = StorageLocation.objects.create(
+            name="Archive",
+            storage_type="ARCHIVE",
+            path=self.temp_dir,
+            is_active=True
+        )
+
+    def tearDown(self):
+        """Clean up."""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _create_files(self, count, start=1000, directory=None):
+        for number in range(start, start + count):
+            path = Path(directory or self.temp_dir) / f"{number}_video.mp4"
+            path.write_bytes(b"x" * number)
+
+    def _count_scan_queries(self, storage=None):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        storage = storage or self.storage
+        with CaptureQueriesContext(connection) as context:
+            call_command(
+                'scan_video_storage', '--storage-id', str(storage.id),
+                stdout=StringIO()
+            )
+        return len(context.captured_queries)
+
+    def test_query_count_does_not_grow_with_files(self):
+        """Test that scanning more files does not issue more queries."""
+        self._create_files(3)
+        small = self._count_scan_queries()
+
+        other_dir = tempfile.mkdtemp(dir=self.temp_dir)
+        other = StorageLocation.objects.create(
+            name="Other", storage_type="CUSTOM", path=other_dir, is_active=True
+        )
+        self._create_files(12, start=2000, directory=other_dir)
+        large = self._count_scan_queries(other)
+
+        self.assertEqual(VideoFile.objects.filter(storage_location=other).count(), 12)
+        self.assertEqual(small, large)
+
+    def test_single_summary_operation(self):
+        """Test that one summary SCAN operation is logged per storage."""
+        self._create_files(5)
+        self._count_scan_queries()
+
+        operations = FileOperation.objects.filter(operation_type='SCAN')
+        self.assertEqual(operations.count(), 1)
+        operation = operations.get()
+        self.assertIsNone(operation.video_file)
+        self.assertEqual(operation.details['created'], 5)
+
+    def test_missing_files_marked_unavailable(self):
+        """Test that records without a file are marked unavailable."""
+        self._create_files(2)
+        self._count_scan_queries()
+        os.unlink(Path(self.temp_dir) / "1000_video.mp4")
+
+        self._count_scan_queries()
+
+        self.assertFalse(VideoFile.objects.get(number=1000).is_available)
+        self.assertTrue(VideoFile.objects.get(number=1001).is_available)
+
+
+class ProbeCacheTests(TestCase):
+    """Tests for the persistent ffprobe cache."""
+
+    def setUp(self):
+        """Create a cache file and a video file in a temporary directory."""
+        from .probe_cache import ProbeCache
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = ProbeCache(Path(self.temp_dir) / 'cache.sqlite3')
+        self.video_path = str(Path(self.temp_dir) / '12345_cached.mp4')
+        Path(self.video_path).write_bytes(b"fake video content")
+
+    def tearDown(self):
+        """Clean up."""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_hit_and_miss(self):
+        """Test that a stored entry is returned while the file is unchanged."""
+        self.assertIsNone(self.cache.get(self.video_path))
+        self.cache.set(self.video_path, {'format': {'duration': '1.0'}})
+
+        self.assertEqual(self.cache.get(self.video_path), {'format': {'duration': '1.0'}})
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['entries'], 1)
+
+    def test_changed_file_is_a_miss(self):
+        """Test that a changed file is not served from the cache."""
+        self.cache.set(self.video_path, {'format': {}})
+        Path(self.video_path).write_bytes(b"different and longer content")
+
+        self.assertIsNone(self.cache.get(self.video_path))
+
+    def test_evict_missing(self):
+        """Test that entries of deleted files are evicted."""
+        self.cache.set(self.video_path, {'format': {}})
+        os.unlink(self.video_path)
+
+        self.assertEqual(self.cache.evict_missing(), 1)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_extract_metadata_uses_cache(self):
+        """Test that ffprobe only runs once for an unchanged file."""
+        from unittest import mock
+        from django.test import override_settings
+        from .utils import extract_video_metadata
+
+        ffprobe_output = mock.Mock(
+            returncode=0,
+            stdout=json.dumps({'format': {'duration': '5.0', 'size': '18'}}),
+        )
+        with override_settings(
+            VIDEO_PROBE_CACHE_ENABLED=True,
+            VIDEO_PROBE_CACHE_PATH=self.cache.path,
+        ), mock.patch('media_files.utils.subprocess.run', return_value=ffprobe_output) as run:
+            first = extract_video_metadata(self.video_path)
+            second = extract_video_metadata(self.video_path)
+
+        self.assertEqual(run.call_count, 1)
+        self.assertFalse(first['from_cache'])
+        self.assertTrue(second['from_cache'])
+        self.assertEqual(second['duration'], timedelta(seconds=5))
+
+
+class CopyJobQueueTests(TestCase):
+    """Tests for the background copy job queue."""
+
+    def setUp(self):
+        """Create an archive with two videos and an empty playout storage."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        (self.temp_dir / 'archive').mkdir()
+        (self.temp_dir / 'playout').mkdir()
+        self.archive = StorageLocation.objects.create(
+            name='Archive', storage_type='ARCHIVE', path=str(self.temp_dir / 'archive')
+        )
+        self.playout = StorageLocation.objects.create(
+            name='Playout', storage_type='PLAYOUT', path=str(self.temp_dir / 'playout'),
+            max_concurrent_copies=1,
+        )
+        for number in (101, 102):
+            filename = f'{number}_video.mp4'
+            (self.temp_dir / 'archive' / filename).write_bytes(b'video content %d' % number)
+            VideoFile.objects.create(
+                number=number, filename=filename, file_path=filename,
+                storage_location=self.archive, file_size=17,
+            )
+        self.broadcast_date = datetime(2025, 10, 6).date()
+
+    def tearDown(self):
+        """Clean up."""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_enqueue_skips_active_duplicates(self):
+        """Test that numbers already queued for the date are not queued again."""
+        from .models import CopyJob
+        from .tasks import enqueue_copy_jobs
+
+        self.assertEqual(len(enqueue_copy_jobs([101, 102, 101], self.broadcast_date)), 2)
+        self.assertEqual(len(enqueue_copy_jobs([101, 102], self.broadcast_date)), 0)
+        self.assertEqual(CopyJob.objects.filter(destination=self.playout).count(), 2)
+
+    def test_enqueue_skips_invalid_numbers(self):
+        """Test that an invalid number does not stop the other numbers."""
+        from .tasks import enqueue_copy_jobs
+
+        with self.assertLogs('django', level='WARNING') as logs:
+            jobs = enqueue_copy_jobs(['101', 'abc', None, 102], self.broadcast_date)
+        self.assertEqual([job.number for job in jobs], [101, 102])
+        self.assertIn("'abc', None", logs.output[0])
+
+    def test_claim_respects_destination_limit(self):
+        """Test that no more jobs run than the destination allows."""
+        from .tasks import claim_copy_jobs, enqueue_copy_jobs
+
+        enqueue_copy_jobs([101, 102], self.broadcast_date)
+
+        claimed = claim_copy_jobs(5, 'test')
+        self.assertEqual([job.number for job in claimed], [101])
+        self.assertEqual(claim_copy_jobs(5, 'test'), [])
+
+    def test_run_copy_job(self):
+        """Test that a job stores its outcome and the copy progress."""
+        from unittest import mock
+        from .tasks import claim_copy_jobs, enqueue_copy_jobs, run_copy_job
+
+        def fake_copy(number, destination, broadcast_date, progress_callback, on_operation):
+            operation = FileOperation.objects.create(
+                operation_type='COPY', destination_location=destination, bytes_total=100,
+            )
+            on_operation(operation)
+            progress_callback(40, 100)
+            return {'number': number, 'status': 'success', 'message': 'File copied successfully'}
+
+        enqueue_copy_jobs([101], self.broadcast_date)
+        with mock.patch('media_files.tasks.copy_number_to_destination', side_effect=fake_copy), \
+                mock.patch('media_files.tasks.PROGRESS_UPDATE_INTERVAL', 0):
+            job = run_copy_job(claim_copy_jobs(1, 'test')[0])
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'SUCCESS')
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(job.operation.progress, 40.0)
+
+    def test_heartbeat_covers_whole_job(self):
+        """Test that heartbeats are sent while a copy reports no progress."""
+        from unittest import mock
+        from .tasks import CopyJobHeartbeat, claim_copy_jobs, enqueue_copy_jobs, run_copy_job
+
+        beats = []
+
+        def slow_copy(number, destination, broadcast_date, progress_callback, on_operation):
+            time.sleep(0.2)
+            return {'number': number, 'status': 'success', 'message': 'File copied successfully'}
+
+        enqueue_copy_jobs([101], self.broadcast_date)
+        with mock.patch('media_files.tasks.copy_number_to_destination', side_effect=slow_copy), \
+                mock.patch('media_files.tasks.HEARTBEAT_INTERVAL', 0.01), \
+                mock.patch.object(CopyJobHeartbeat, 'beat', lambda heartbeat: beats.append(1) or True):
+            run_copy_job(claim_copy_jobs(1, 'test')[0])
+
+        self.assertGreater(len(beats), 1)
+
+    def test_heartbeat_stops_after_requeue(self):
+        """Test that a job taken from the worker is no longer refreshed."""
+        from .models import CopyJob
+        from .tasks import CopyJobHeartbeat, claim_copy_jobs, enqueue_copy_jobs
+
+        enqueue_copy_jobs([101], self.broadcast_date)
+        heartbeat = CopyJobHeartbeat(claim_copy_jobs(1, 'test')[0])
+        self.assertTrue(heartbeat.beat())
+        CopyJob.objects.update(status='QUEUED', worker='')
+        self.assertFalse(heartbeat.beat())
+
+    def test_outcome_of_taken_over_job_is_not_stored(self):
+        """Test that a worker does not overwrite a job another worker runs."""
+        from unittest import mock
+        from .models import CopyJob
+        from .tasks import claim_copy_jobs, enqueue_copy_jobs, run_copy_job
+
+        def requeued_copy(number, destination, broadcast_date, progress_callback, on_operation):
+            CopyJob.objects.update(worker='other', message='Requeued after worker timeout')
+            return {'number': number, 'status': 'success', 'message': 'File copied successfully'}
+
+        enqueue_copy_jobs([101], self.broadcast_date)
+        with mock.patch('media_files.tasks.copy_number_to_destination', side_effect=requeued_copy):
+            job = run_copy_job(claim_copy_jobs(1, 'test')[0])
+
+        self.assertEqual((job.status, job.worker), ('RUNNING', 'other'))
+        job.refresh_from_db()
+        self.assertEqual(job.message, 'Requeued after worker timeout')
+
+    def test_requeue_stale_jobs(self):
+        """Test that running jobs without heartbeat are queued again."""
+        from .models import CopyJob
+        from .tasks import enqueue_copy_jobs, requeue_stale_copy_jobs
+
+        job = enqueue_copy_jobs([101], self.broadcast_date)[0]
+        CopyJob.objects.filter(pk=job.pk).update(
+            status='RUNNING', updated_at=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertEqual(requeue_stale_copy_jobs(timedelta(minutes=30)), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'QUEUED')
+
+    def test_run_copy_jobs_command(self):
+        """Test that the worker drains the queue with --once."""
+        from concurrent.futures import Future
+        from unittest import mock
+        from .tasks import enqueue_copy_jobs
+
+        class InlineExecutor:
+            """Executor running jobs in the test's database connection."""
+
+            def __init__(self, max_workers):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                return False
+
+            def submit(self, fn, job):
+                future = Future()
+                future.set_result(job)
+                job.status = 'SKIPPED'
+                job.save()
+                return future
+
+        enqueue_copy_jobs([101, 102], self.broadcast_date)
+        out = StringIO()
+        # Closing connections would close the test transaction's connection
+        with mock.patch(
+            'media_files.management.commands.run_copy_jobs.ThreadPoolExecutor', InlineExecutor
+        ), mock.patch(
+            'media_files.management.commands.run_copy_jobs.close_old_connections'
+        ) as close_old_connections:
+            call_command('run_copy_jobs', '--once', stdout=out)
+        self.assertTrue(close_old_connections.called)
+
+        self.assertIn('Skipped: 2', out.getvalue())
+
+
+class CopyEngineTests(TestCase):
+    """Tests for resumable transfers and the parallel copy engine."""
+
+    def setUp(self):
+        """Create a source file in a temporary directory."""
+        from .copy_engine import reset_routes
+
+        reset_routes()
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.source = str(self.temp_dir / '12345_source.mp4')
+        self.content = os.urandom(300 * 1024)
+        Path(self.source).write_bytes(self.content)
+        self.destination = str(self.temp_dir / 'out' / '12345_source.mp4')
+
+    def tearDown(self):
+        """Clean up."""
+        import shutil
+        from .copy_engine import reset_routes
+
+        reset_routes()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_resume_partial_copy(self):
+        """Test that a matching partial file is continued."""
+        Path(self.destination).parent.mkdir()
+        Path(self.destination + '.part').write_bytes(self.content[:100 * 1024])
+
+        success, message = copy_file_with_progress(self.source, self.destination)
+
+        self.assertTrue(success)
+        self.assertIn('resumed at 102400 bytes', message)
+        self.assertEqual(Path(self.destination).read_bytes(), self.content)
+        self.assertFalse(Path(self.destination + '.part').exists())
+
+    def test_mismatching_partial_copy_restarts(self):
+        """Test that a partial file with other content is overwritten."""
+        Path(self.destination).parent.mkdir()
+        Path(self.destination + '.part').write_bytes(b'x' * 1024)
+
+        success, message = copy_file_with_progress(self.source, self.destination)
+
+        self.assertTrue(success)
+        self.assertNotIn('resumed', message)
+        self.assertEqual(Path(self.destination).read_bytes(), self.content)
+
+    def test_partial_copy_in_use_is_not_resumed(self):
+        """Test that a partial file another copy is writing is left alone."""
+        import fcntl
+        from .utils import _claim_partial
+
+        partial = self.destination + '.part'
+        Path(self.destination).parent.mkdir()
+        Path(partial).write_bytes(self.content[:100 * 1024])
+
+        # Held by a copy in this process
+        with _claim_partial(partial) as claimed:
+            self.assertTrue(claimed)
+            success, message = copy_file_with_progress(self.source, self.destination)
+        self.assertFalse(success)
+        self.assertIn('being written by another copy', message)
+
+        # Locked the way another process would lock it
+        with open(partial, 'rb') as locked:
+            fcntl.flock(locked, fcntl.LOCK_EX)
+            success, _ = copy_file_with_progress(self.source, self.destination)
+        self.assertFalse(success)
+        self.assertEqual(Path(partial).read_bytes(), self.content[:100 * 1024])
+        self.assertFalse(Path(self.destination).exists())
+
+        success, message = copy_file_with_progress(self.source, self.destination)
+        self.assertTrue(success)
+        self.assertIn('resumed at 102400 bytes', message)
+
+    def test_zero_copy_methods(self):
+        """Test kernel copies with verification of both files."""
+        for method in ('sendfile', 'copy_file_range'):
+            with self.subTest(method=method):
+                success, _ = copy_file_with_progress(
+                    self.source, self.destination, method=method, resume=False
+                )
+                self.assertTrue(success)
+                self.assertEqual(Path(self.destination).read_bytes(), self.content)
+
+    def test_rate_limiter(self):
+        """Test that a limiter spreads chunks over time."""
+        import time
+        from .copy_engine import RateLimiter
+
+        limiter = RateLimiter(10 * 1024 * 1024)
+        started = time.monotonic()
+        for _ in range(4):
+            limiter.consume(1024 * 1024)
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.25)
+
+    def test_copy_many_respects_route_limit(self):
+        """Test that parallel copies on one route stay within its limit."""
+        import threading
+        import time
+        from unittest import mock
+        from .copy_engine import CopyEngine, Transfer
+        from .models import CopyRoute
+
+        archive = StorageLocation.objects.create(name='Archive', path=str(self.temp_dir))
+        playout = StorageLocation.objects.create(name='Playout', path=str(self.temp_dir / 'out'))
+        CopyRoute.objects.create(source=archive, destination=playout, max_parallel=2)
+
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+
+        def fake_copy(source, destination, **kwargs):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.05)
+            with lock:
+                state['running'] -= 1
+            return True, 'File copied successfully'
+
+        transfers = [
+            Transfer(key=i, source=self.source, destination=f'{self.destination}.{i}',
+                     source_location=archive, destination_location=playout)
+            for i in range(6)
+        ]
+        with mock.patch('media_files.copy_engine.copy_file_with_progress', side_effect=fake_copy):
+            results = list(CopyEngine(workers=6).copy_many(transfers))
+
+        self.assertEqual(len(results), 6)
+        self.assertTrue(all(success for _, success, _ in results))
+        self.assertEqual(state['peak'], 2)
+
+
+class StreamFileTests(TestCase):
+    """Tests for ranged and conditional video streaming."""
+
+    def setUp(self):
+        """Create a video file in a temporary directory."""
+        from django.test import RequestFactory
+
+        self.factory = RequestFactory()
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.path = str(self.temp_dir / '12345_stream.mp4')
+        self.content = bytes(range(256)) * 4
+        Path(self.path).write_bytes(self.content)
+
+    def tearDown(self):
+        """Clean up."""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _get(self, **headers):
+        from .streaming import stream_file
+
+        response = stream_file(self.factory.get('/', **headers), self.path, 'video/mp4')
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return response, body
+
+    def test_full_response(self):
+        """Test that a plain request streams the whole file with validators."""
+        response, body = self._get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+    def test_ranges(self):
+        """Test closed, open-ended and suffix ranges."""
+        for header, start, end in (
+            ('bytes=10-19', 10, 19),
+            ('bytes=1000-', 1000, 1023),
+            ('bytes=-4', 1020, 1023),
+            ('bytes=1000-5000', 1000, 1023),
+        ):
+            with self.subTest(header=header):
+                response, body = self._get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(body, self.content[start:end + 1])
+                self.assertEqual(response['Content-Length'], str(end - start + 1))
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/1024')
+
+    def test_unsatisfiable_range(self):
+        """Test that a range beyond the end is rejected."""
+        response, _ = self._get(HTTP_RANGE='bytes=2000-')
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_revalidation(self):
+        """Test that a matching ETag or date answers 304."""
+        response, _ = self._get()
+
+        not_modified, body = self._get(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(body, b'')
+
+        not_modified, _ = self._get(HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_if_range_mismatch_sends_full_file(self):
+        """Test that a stale If-Range ignores the range."""
+        response, body = self._get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+
+    def test_accel_redirect_offload(self):
+        """Test that nginx offload only sends the internal location."""
+        from django.test import override_settings
+
+        with override_settings(
+            VIDEO_STREAM_OFFLOAD='x-accel-redirect',
+            VIDEO_STREAM_OFFLOAD_MAP=[(str(self.temp_dir), '/internal-video/')],
+        ):
+            response, body = self._get(HTTP_RANGE='bytes=0-9')
+
+        self.assertEqual(response['X-Accel-Redirect'], '/internal-video/12345_stream.mp4')
+        self.assertEqual(body, b'')
+
+
+class PreviewTests(TestCase):
+    """Tests for the thumbnail and sprite sheet pipeline."""
+
+    def setUp(self):
+        """Create a video and a temporary preview cache."""
+        from django.test import override_settings
+
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.settings_override = override_settings(
+            VIDEO_PREVIEW_CACHE_DIR=str(self.temp_dir / 'previews'),
+            VIDEO_PREVIEW_WORKERS=1,
+        )
+        self.settings_override.enable()
+        self.storage = StorageLocation.objects.create(
+            name='Archive', storage_type='ARCHIVE', path=str(self.temp_dir)
+        )
+        (self.temp_dir / '201_preview.mp4').write_bytes(b'video')
+        self.video = VideoFile.objects.create(
+            number=201, filename='201_preview.mp4', file_path='201_preview.mp4',
+            storage_location=self.storage, file_size=5, checksum='abc123',
+            duration=timedelta(minutes=10), width=1920, height=1080,
+        )
+
+    def tearDown(self):
+        """Clean up."""
+        import shutil
+        self.settings_override.disable()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _fake_ffmpeg(self, cmd, *args, **kwargs):
+        """Write the output file ffmpeg would produce."""
+        from unittest import mock
+
+        Path(cmd[-1]).write_bytes(b'jpeg')
+        return mock.Mock(returncode=0, stderr=b'')
+
+    def test_preview_key_follows_content(self):
+        """Test that the key depends on the checksum, not the location."""
+        from .previews import preview_key
+
+        key = preview_key(self.video)
+        self.video.file_path = 'moved/201_preview.mp4'
+        self.assertEqual(preview_key(self.video), key)
+        self.video.checksum = 'def456'
+        self.assertNotEqual(preview_key(self.video), key)
+
+    def test_command_renders_once(self):
+        """Test that previews are rendered, stored and not rendered again."""
+        from unittest import mock
+        from .previews import preview_key, preview_paths
+
+        with mock.patch('subprocess.run', side_effect=self._fake_ffmpeg) as mock_run:
+            call_command('generate_previews', stdout=StringIO())
+            self.assertEqual(mock_run.call_count, 2)
+
+            call_command('generate_previews', stdout=StringIO())
+            self.assertEqual(mock_run.call_count, 2)
+
+        key = preview_key(self.video)
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.thumbnail, f'{key[:2]}/{key}.jpg')
+        vtt = preview_paths(key)['vtt'].read_text()
+        self.assertTrue(vtt.startswith('WEBVTT'))
+        self.assertIn(f'sprite.jpg?v={key}#xywh=0,0,160,90', vtt)
+        self.assertEqual(vtt.count(' --> '), 100)
+
+    def test_preview_view_cache_headers(self):
+        """Test that versioned preview URLs are cached as immutable."""
+        from django.contrib.admin.sites import AdminSite
+        from django.test import RequestFactory
+        from unittest import mock
+        from .admin import VideoFileAdmin
+
+        with mock.patch('subprocess.run', side_effect=self._fake_ffmpeg):
+            call_command('generate_previews', '--no-sprites', stdout=StringIO())
+        self.video.refresh_from_db()
+        admin = VideoFileAdmin(VideoFile, AdminSite())
+        key = Path(self.video.thumbnail).stem
+        factory = RequestFactory()
+
+        response = admin.preview_view(factory.get('/', {'v': key}), self.video.id, 'thumbnail.jpg')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'private, max-age=31536000, immutable')
+        # response.close() sends request_finished, which closes the test connection
+        response.file_to_stream.close()
+
+        response = admin.preview_view(factory.get('/'), self.video.id, 'thumbnail.jpg')
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        response.file_to_stream.close()
+
+        response = admin.preview_view(factory.get('/'), self.video.id, 'sprite.jpg')
+        self.assertEqual(response.status_code, 404)
+
+
+class VersionResolutionTests(TestCase):
+    """Tests for primary/duplicate version resolution in the database."""
+
+    def setUp(self):
+        """Create videos in an archive and a playout storage."""
+        self.archive = StorageLocation.objects.create(
+            name='Archive', storage_type='ARCHIVE', path='/tmp/archive'
+        )
+        self.playout = StorageLocation.objects.create(
+            name='Playout', storage_type='PLAYOUT', path='/tmp/playout'
+        )
+        for number in range(301, 311):
+            VideoFile.objects.create(
+                number=number, filename=f'{number}.mp4', file_path=f'{number}.mp4',
+                storage_location=self.archive if number % 2 else self.playout,
+                total_bitrate=number * 1000,
+            )
+
+    def test_unique_videos_are_primary(self):
+        """Test the annotations of videos with a single version."""
+        videos = list(VideoFile.objects.with_versions())
+
+        self.assertEqual(len(videos), 10)
+        for video in videos:
+            self.assertTrue(video.is_primary_version())
+            self.assertFalse(video.has_duplicates)
+            self.assertEqual(video.duplicate_count, 0)
+        self.assertEqual(VideoFile.objects.primary_versions().count(), 10)
+        self.assertEqual(VideoFile.objects.duplicate_versions().count(), 0)
+        self.assertEqual(VideoFile.objects.with_duplicates().count(), 0)
+        self.assertEqual(VideoFile.objects.without_duplicates().count(), 10)
+
+    def test_annotations_ignore_outer_filters(self):
+        """Test that filtering the queryset does not change the ranking."""
+        videos = VideoFile.objects.filter(storage_location=self.playout).with_versions()
+
+        self.assertEqual(videos.count(), 5)
+        self.assertTrue(all(video.is_primary for video in videos))
+
+    def test_version_ordering(self):
+        """Test that archive versions and higher bitrates rank first."""
+        numbers = list(
+            VideoFile.objects.order_by(*version_ordering()).values_list('number', flat=True)
+        )
+
+        self.assertEqual(numbers, [309, 307, 305, 303, 301, 310, 308, 306, 304, 302])
+
+    def test_changelist_query_count(self):
+        """Test that the duplicate column does not query per row."""
+        from django.contrib.auth import get_user_model
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.urls import reverse
+
+        user = get_user_model().objects.create_superuser(
+            email='admin@example.com', password='secret'
+        )
+        self.client.force_login(user)
+        url = reverse('admin:media_files_videofile_changelist')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'is_primary': 'primary'})
+        self.assertEqual(response.status_code, 200)
+
+        VideoFile.objects.create(
+            number=311, filename='311.mp4', file_path='311.mp4',
+            storage_location=self.archive,
+        )
+        with self.assertNumQueries(len(queries.captured_queries)):
+            self.client.get(url, {'is_primary': 'primary'})
+
+
+class StorageWatcherTests(TestCase):
+    """Tests for the file system watchers and path-based scanning."""
+
+    def setUp(self):
+        """Set up an empty storage directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage = StorageLocation.objects.create(
+            name="Incoming", storage_type="CUSTOM", path=self.temp_dir,
+            is_active=True, scan_enabled=True,
+        )
+
+    def tearDown(self):
+        """Clean up."""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _touch_dir(self, directory):
+        """Advance a directory's mtime past the timestamp granularity."""
+        mtime = os.stat(directory).st_mtime_ns + 10 ** 9
+        os.utime(directory, ns=(mtime, mtime))
+
+    def test_debouncer_waits_for_stable_files(self):
+        """Test that growing files are held back and deleted paths are not."""
+        from .watcher import Debouncer
+
+        path = Path(self.temp_dir) / '1000_video.mp4'
+        path.write_bytes(b'x')
+        debouncer = Debouncer(settle_time=10)
+        debouncer.add([str(path), str(Path(self.temp_dir) / 'gone.mp4')], now=0)
+
+        self.assertEqual(debouncer.pop_ready(now=1), [str(Path(self.temp_dir) / 'gone.mp4')])
+        path.write_bytes(b'xx')
+        self.assertEqual(debouncer.pop_ready(now=9), [])
+        self.assertEqual(debouncer.pop_ready(now=15), [])
+        self.assertEqual(debouncer.pop_ready(now=19), [str(path)])
+        self.assertEqual(len(debouncer), 0)
+
+    def test_polling_watcher_reports_changes(self):
+        """Test that new files, new directories and deletions are reported."""
+        from .watcher import PollingWatcher
+
+        old = Path(self.temp_dir) / '1000_video.mp4'
+        old.write_bytes(b'x')
+        watcher = PollingWatcher([self.temp_dir])
+        self.assertEqual(watcher.poll(), set())
+
+        subdir = Path(self.temp_dir) / 'delivery'
+        subdir.mkdir()
+        (subdir / '1001_video.mp4').write_bytes(b'x')
+        old.unlink()
+        self._touch_dir(self.temp_dir)
+
+        self.assertEqual(watcher.poll(), {str(old), str(subdir / '1001_video.mp4')})
+        self.assertEqual(watcher.poll(), set())
+
+    def test_inotify_watcher_reports_changes(self):
+        """Test that inotify reports files in new directories."""
+        from unittest import SkipTest
+        from .watcher import InotifyWatcher, supports_inotify
+
+        if not supports_inotify(self.temp_dir):
+            raise SkipTest('inotify not available')
+
+        watcher = InotifyWatcher([self.temp_dir])
+        try:
+            subdir = Path(self.temp_dir) / 'delivery'
+            subdir.mkdir()
+            (subdir / '1001_video.mp4').write_bytes(b'x')
+            changes = set()
+            for _ in range(5):
+                changes |= watcher.wait(0.2)
+        finally:
+            watcher.close()
+
+        self.assertIn(str(subdir / '1001_video.mp4'), changes)
+
+    def test_scan_paths(self):
+        """Test that only reported paths are scanned or marked unavailable."""
+        from .management.commands.scan_video_storage import Command as ScanCommand
+
+        subdir = Path(self.temp_dir) / 'delivery'
+        subdir.mkdir()
+        for path in (Path(self.temp_dir) / '1000_video.mp4', subdir / '1001_video.mp4'):
+            path.write_bytes(b'x' * 10)
+        scanner = ScanCommand(stdout=StringIO())
+
+        stats = scanner.scan_paths(self.storage, [str(subdir / '1001_video.mp4')])
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(list(VideoFile.objects.values_list('number', flat=True)), [1001])
+
+        stats = scanner.scan_paths(self.storage, [str(subdir / '1001_video.mp4')])
+        self.assertEqual(stats['skipped'], 1)
+
+        import shutil
+        shutil.rmtree(subdir)
+        stats = scanner.scan_paths(self.storage, [str(subdir)])
+        self.assertEqual(stats['unavailable'], 1)
+        self.assertFalse(VideoFile.objects.get(number=1001).is_available)
+
+    def test_watch_command(self):
+        """Test that the command scans a file delivered while watching."""
+        from unittest import mock
+        from .watcher import PollingWatcher
+
+        delivered = Path(self.temp_dir) / '1002_video.mp4'
+        calls = []
+
+        def wait(watcher, timeout):
+            calls.append(timeout)
+            if len(calls) == 1:
+                delivered.write_bytes(b'x' * 10)
+                self._touch_dir(self.temp_dir)
+            elif len(calls) > 2:
+                raise KeyboardInterrupt
+            return watcher.poll()
+
+        out = StringIO()
+        # Closing connections would close the test transaction's connection
+        with mock.patch.object(PollingWatcher, 'wait', wait), mock.patch(
+            'media_files.management.commands.watch_storage.close_old_connections'
+        ) as close_old_connections:
+            call_command(
+                'watch_storage', '--mode', 'poll', '--settle', '0',
+                '--poll-interval', '0.01', stdout=out,
+            )
+
+        self.assertTrue(close_old_connections.called)
+        self.assertTrue(VideoFile.objects.get(number=1002).is_available)
+        self.assertIn('New records created: 1', out.getvalue())
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-17 10:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media_files', '0004_add_unc_path_to_storage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='fileoperation',
+            name='video_file',
+            field=models.ForeignKey(blank=True, help_text='Empty for summary records covering a whole storage scan', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='operations', to='media_files.videofile', verbose_name='Video File'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media_files', '0005_fileoperation_video_file_nullable'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='videofile',
+            name='fingerprint',
+            field=models.CharField(blank=True, help_text='Fast sampled hash (size, head, middle, tail) for duplicate screening', max_length=64, verbose_name='Fingerprint'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media_files', '0006_videofile_fingerprint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storagelocation',
+            name='max_concurrent_copies',
+            field=models.PositiveSmallIntegerField(default=2, help_text='Maximum number of background copy jobs writing to this location at once', verbose_name='Max Concurrent Copies'),
+        ),
+        migrations.AddField(
+            model_name='fileoperation',
+            name='bytes_total',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='Bytes Total'),
+        ),
+        migrations.AddField(
+            model_name='fileoperation',
+            name='bytes_done',
+            field=models.BigIntegerField(default=0, help_text='Progress of a running copy', verbose_name='Bytes Done'),
+        ),
+        migrations.CreateModel(
+            name='CopyJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.IntegerField(help_text='License number of the video to copy', verbose_name='Number')),
+                ('broadcast_date', models.DateField(blank=True, null=True, verbose_name='Broadcast Date')),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('SUCCESS', 'Success'), ('SKIPPED', 'Skipped'), ('FAILED', 'Failed')], default='QUEUED', max_length=20, verbose_name='Status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Attempts')),
+                ('worker', models.CharField(blank=True, max_length=255, verbose_name='Worker')),
+                ('message', models.TextField(blank=True, verbose_name='Message')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Started At')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Heartbeat of a running job', verbose_name='Updated At')),
+                ('destination', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='copy_jobs', to='media_files.storagelocation', verbose_name='Destination')),
+                ('operation', models.ForeignKey(blank=True, help_text='Operation record holding the copy progress', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='copy_jobs', to='media_files.fileoperation', verbose_name='Operation')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Requested By')),
+            ],
+            options={
+                'verbose_name': 'Copy Job',
+                'verbose_name_plural': 'Copy Jobs',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'destination'], name='media_copyjob_status_dest')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-17 13:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media_files', '0007_copyjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CopyRoute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('max_parallel', models.PositiveSmallIntegerField(default=2, help_text='Maximum number of files copied at once on this route (per process)', verbose_name='Parallel Copies')),
+                ('bandwidth_limit', models.PositiveIntegerField(blank=True, help_text='Combined throughput of all copies on this route, empty for unlimited', null=True, verbose_name='Bandwidth Limit (MB/s)')),
+                ('destination', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='incoming_routes', to='media_files.storagelocation', verbose_name='Destination')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outgoing_routes', to='media_files.storagelocation', verbose_name='Source')),
+            ],
+            options={
+                'verbose_name': 'Copy Route',
+                'verbose_name_plural': 'Copy Routes',
+                'unique_together': {('source', 'destination')},
+            },
+        ),
+    ]
@@ -3,6 +3,8 @@
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Count, Window
+from django.db.models.functions import Coalesce, RowNumber
 from django.utils.translation import gettext_lazy as _
 import logging
 
@@ -57,6 +59,11 @@ class StorageLocation(models.Model):
         verbose_name=_('Scan Schedule'),
         help_text=_('Cron-style schedule for automatic scanning (optional)'),
     )
+    max_concurrent_copies = models.PositiveSmallIntegerField(
+        default=2,
+        verbose_name=_('Max Concurrent Copies'),
+        help_text=_('Maximum number of background copy jobs writing to this location at once'),
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -82,6 +89,96 @@ class StorageLocation(models.Model):
         return self.videofile_set.count()
 
 
+# Priority of storage types when choosing the primary version of a video
+STORAGE_PRIORITY = {'ARCHIVE': 3, 'PLAYOUT': 2, 'CUSTOM': 1}
+
+
+def version_ordering():
+    """
+    Return the order_by() expressions ranking versions of a video.
+
+    Best first: storage priority (ARCHIVE > PLAYOUT > CUSTOM), total
+    bitrate, newest, and the id as tie-breaker.
+    """
+    storage_priority = models.Case(
+        *[
+            models.When(storage_location__storage_type=storage_type, then=models.Value(priority))
+            for storage_type, priority in STORAGE_PRIORITY.items()
+        ],
+        default=models.Value(0),
+        output_field=models.IntegerField(),
+    )
+    return [
+        storage_priority.desc(),
+        Coalesce('total_bitrate', 0).desc(),
+        models.F('created_at').desc(),
+        models.F('id').desc(),
+    ]
+
+
+class VideoFileQuerySet(models.QuerySet):
+    """QuerySet resolving primary and duplicate versions in the database."""
+
+    def _primary_ids(self):
+        """Return a subquery of the ids of all primary versions."""
+        ranked = VideoFile.objects.annotate(
+            version_rank=Window(
+                RowNumber(),
+                partition_by=[models.F('number')],
+                order_by=version_ordering(),
+            )
+        )
+        return ranked.filter(version_rank=1).values('id')
+
+    def _duplicated_numbers(self):
+        """Return a subquery of the numbers with more than one version."""
+        return VideoFile.objects.order_by().values('number').annotate(
+            count=Count('id')
+        ).filter(count__gt=1).values('number')
+
+    def with_versions(self):
+        """
+        Annotate ``version_count`` and ``is_primary``.
+
+        Both are computed over all versions of a number, independent of
+        other filters on this queryset, so a page of videos needs no
+        further queries for has_duplicates, duplicate_count or
+        is_primary_version().
+        """
+        version_count = VideoFile.objects.filter(
+            number=models.OuterRef('number')
+        ).order_by().values('number').annotate(count=Count('id')).values('count')
+        return self.annotate(
+            version_count=Coalesce(
+                models.Subquery(version_count, output_field=models.IntegerField()), 1
+            ),
+            is_primary=models.ExpressionWrapper(
+                models.Q(id__in=self._primary_ids()),
+                output_field=models.BooleanField(),
+            ),
+        )
+
+    def primary_versions(self):
+        """Return only the best version of each number."""
+        return self.filter(id__in=self._primary_ids())
+
+    def duplicate_versions(self):
+        """Return all versions except the best one of each number."""
+        return self.exclude(id__in=self._primary_ids())
+
+    def with_duplicates(self):
+        """Return videos whose number has several versions."""
+        return self.filter(number__in=self._duplicated_numbers())
+
+    def without_duplicates(self):
+        """Return videos whose number has a single version."""
+        return self.exclude(number__in=self._duplicated_numbers())
+
+    def order_by_version(self):
+        """Order by number, best version first."""
+        return self.order_by('number', *version_ordering())
+
+
 class VideoFile(models.Model):
     """Model representing a video file with comprehensive metadata."""
 
@@ -154,6 +251,12 @@ class VideoFile(models.Model):
         blank=True,
         verbose_name=_('Checksum (SHA256)'),
     )
+    fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name=_('Fingerprint'),
+        help_text=_('Fast sampled hash (size, head, middle, tail) for duplicate screening'),
+    )
 
     # Video metadata (from ffprobe)
     video_codec = models.CharField(
@@ -284,6 +387,8 @@ class VideoFile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = VideoFileQuerySet.as_manager()
+
     class Meta:
         """Meta options for VideoFile."""
 
@@ -349,33 +454,29 @@ class VideoFile(models.Model):
     @property
     def has_duplicates(self):
         """Check if there are other versions with same number."""
-        return VideoFile.objects.filter(number=self.number).exclude(id=self.id).exists()
+        return self.duplicate_count > 0
 
     @property
     def duplicate_count(self):
         """Count of other versions."""
+        if hasattr(self, 'version_count'):
+            return self.version_count - 1
         return VideoFile.objects.filter(number=self.number).exclude(id=self.id).count()
 
     def get_all_versions(self):
-        """Get all versions of this video (including self)."""
-        return VideoFile.objects.filter(number=self.number).order_by('-total_bitrate', '-created_at')
+        """Get all versions of this video (including self), best first."""
+        return VideoFile.objects.filter(
+            number=self.number
+        ).with_versions().select_related('storage_location').order_by_version()
 
     def is_primary_version(self):
         """Check if this is the primary (best quality) version."""
-        versions = self.get_all_versions()
-        if not versions:
-            return True
-        
-        # Priority: ARCHIVE > PLAYOUT > CUSTOM
-        storage_priority = {'ARCHIVE': 3, 'PLAYOUT': 2, 'CUSTOM': 1}
-        
-        best = max(versions, key=lambda v: (
-            storage_priority.get(v.storage_location.storage_type, 0),
-            v.total_bitrate or 0,
-            v.created_at
-        ))
-        
-        return best.id == self.id
+        if hasattr(self, 'is_primary'):
+            return self.is_primary
+        best_id = VideoFile.objects.filter(
+            number=self.number
+        ).order_by(*version_ordering()).values_list('id', flat=True).first()
+        return best_id is None or best_id == self.id
 
     def get_quality_score(self):
         """Calculate quality score for comparison."""
@@ -407,8 +508,11 @@ class FileOperation(models.Model):
     video_file = models.ForeignKey(
         VideoFile,
         on_delete=models.CASCADE,
+        null=True,
+        blank=True,
         related_name='operations',
         verbose_name=_('Video File'),
+        help_text=_('Empty for summary records covering a whole storage scan'),
     )
     operation_type = models.CharField(
         max_length=20,
@@ -458,6 +562,16 @@ class FileOperation(models.Model):
         verbose_name=_('Details'),
         help_text=_('Additional operation details'),
     )
+    bytes_total = models.BigIntegerField(
+        null=True,
+        blank=True,
+        verbose_name=_('Bytes Total'),
+    )
+    bytes_done = models.BigIntegerField(
+        default=0,
+        verbose_name=_('Bytes Done'),
+        help_text=_('Progress of a running copy'),
+    )
 
     class Meta:
         """Meta options for FileOperation."""
@@ -470,3 +584,141 @@ class FileOperation(models.Model):
         """Return string representation."""
         return f"{self.get_operation_type_display()} - {self.video_file} ({self.get_status_display()})"
 
+    @property
+    def progress(self):
+        """Return progress in percent or None if the size is unknown."""
+        if not self.bytes_total:
+            return None
+        return min(100.0, 100.0 * self.bytes_done / self.bytes_total)
+
+
+class CopyRoute(models.Model):
+    """Copy limits between a source and a destination storage location."""
+
+    source = models.ForeignKey(
+        StorageLocation,
+        on_delete=models.CASCADE,
+        related_name='outgoing_routes',
+        verbose_name=_('Source'),
+    )
+    destination = models.ForeignKey(
+        StorageLocation,
+        on_delete=models.CASCADE,
+        related_name='incoming_routes',
+        verbose_name=_('Destination'),
+    )
+    max_parallel = models.PositiveSmallIntegerField(
+        default=2,
+        verbose_name=_('Parallel Copies'),
+        help_text=_('Maximum number of files copied at once on this route (per process)'),
+    )
+    bandwidth_limit = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name=_('Bandwidth Limit (MB/s)'),
+        help_text=_('Combined throughput of all copies on this route, empty for unlimited'),
+    )
+
+    class Meta:
+        """Meta options for CopyRoute."""
+
+        verbose_name = _('Copy Route')
+        verbose_name_plural = _('Copy Routes')
+        unique_together = [['source', 'destination']]
+
+    def __str__(self):
+        """Return string representation."""
+        return f"{self.source.name} -> {self.destination.name}"
+
+
+class CopyJob(models.Model):
+    """
+    Queued copy of a video to a storage location.
+
+    Jobs are created by the broadcast planning and executed by the
+    ``run_copy_jobs`` worker, so saving a plan does not wait for the copies.
+    """
+
+    STATUS_CHOICES = [
+        ('QUEUED', _('Queued')),
+        ('RUNNING', _('Running')),
+        ('SUCCESS', _('Success')),
+        ('SKIPPED', _('Skipped')),
+        ('FAILED', _('Failed')),
+    ]
+
+    ACTIVE_STATUSES = ('QUEUED', 'RUNNING')
+
+    number = models.IntegerField(
+        verbose_name=_('Number'),
+        help_text=_('License number of the video to copy'),
+    )
+    broadcast_date = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name=_('Broadcast Date'),
+    )
+    destination = models.ForeignKey(
+        StorageLocation,
+        on_delete=models.CASCADE,
+        related_name='copy_jobs',
+        verbose_name=_('Destination'),
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='QUEUED',
+        verbose_name=_('Status'),
+    )
+    operation = models.ForeignKey(
+        FileOperation,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='copy_jobs',
+        verbose_name=_('Operation'),
+        help_text=_('Operation record holding the copy progress'),
+    )
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_('Requested By'),
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name=_('Attempts'),
+    )
+    worker = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name=_('Worker'),
+    )
+    message = models.TextField(
+        blank=True,
+        verbose_name=_('Message'),
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created At'))
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Started At'))
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Finished At'))
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_('Updated At'),
+        help_text=_('Heartbeat of a running job'),
+    )
+
+    class Meta:
+        """Meta options for CopyJob."""
+
+        verbose_name = _('Copy Job')
+        verbose_name_plural = _('Copy Jobs')
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'destination'], name='media_copyjob_status_dest'),
+        ]
+
+    def __str__(self):
+        """Return string representation."""
+        return f"{self.number} -> {self.destination.name} ({self.get_status_display()})"
+
@@ -0,0 +1,219 @@
+"""Thumbnails and seek-preview sprite sheets of video files."""
+
+import hashlib
+import logging
+import math
+import os
+import subprocess
+from pathlib import Path
+from typing import Dict, Optional
+
+from django.conf import settings
+
+from media_files.utils import generate_thumbnail
+
+
+logger = logging.getLogger('django')
+
+# Bump to re-render all previews after changing how they are produced
+PREVIEW_VERSION = 1
+
+# Tiles per sprite sheet row
+SPRITE_COLUMNS = 10
+
+PREVIEW_FILES = {
+    'thumbnail.jpg': 'thumbnail',
+    'sprite.jpg': 'sprite',
+    'sprite.vtt': 'vtt',
+}
+
+
+def preview_cache_dir() -> Path:
+    """Return the directory holding rendered previews."""
+    return Path(settings.VIDEO_PREVIEW_CACHE_DIR)
+
+
+def preview_key(video_file) -> str:
+    """
+    Return the cache key of a video's previews.
+
+    Videos with a checksum are keyed by content, so copies in several
+    storages share their previews. Otherwise the key changes with the
+    file's location, size and modification time.
+    """
+    if video_file.checksum:
+        identity = f'checksum:{video_file.checksum}'
+    else:
+        modified = video_file.last_modified.timestamp() if video_file.last_modified else ''
+        identity = (
+            f'file:{video_file.storage_location_id}:{video_file.file_path}:'
+            f'{video_file.file_size}:{modified}'
+        )
+    options = (
+        f'{PREVIEW_VERSION}:{settings.VIDEO_THUMBNAIL_WIDTH}:'
+        f'{settings.VIDEO_SPRITE_TILE_WIDTH}:{settings.VIDEO_SPRITE_MAX_TILES}'
+    )
+    return hashlib.sha1(f'{identity}:{options}'.encode()).hexdigest()
+
+
+def preview_paths(key: str) -> Dict[str, Path]:
+    """Return the cache paths of the previews of ``key``."""
+    directory = preview_cache_dir() / key[:2]
+    return {
+        'thumbnail': directory / f'{key}.jpg',
+        'sprite': directory / f'{key}_sprite.jpg',
+        'vtt': directory / f'{key}_sprite.vtt',
+    }
+
+
+def thumbnail_relative_path(key: str) -> str:
+    """Return the thumbnail path stored in VideoFile.thumbnail."""
+    return f'{key[:2]}/{key}.jpg'
+
+
+def key_from_thumbnail(thumbnail: str) -> Optional[str]:
+    """Return the preview key of a VideoFile.thumbnail value."""
+    if not thumbnail:
+        return None
+    return Path(thumbnail).stem
+
+
+def previews_exist(key: str, sprites=True) -> bool:
+    """Return whether the previews of ``key`` are rendered."""
+    paths = preview_paths(key)
+    names = ['thumbnail', 'sprite', 'vtt'] if sprites else ['thumbnail']
+    return all(paths[name].exists() for name in names)
+
+
+def _sprite_layout(duration: float):
+    """Return (interval, tiles, rows) of the sprite sheet for a duration."""
+    max_tiles = settings.VIDEO_SPRITE_MAX_TILES
+    interval = max(duration / max_tiles, 1.0)
+    tiles = max(1, min(max_tiles, math.ceil(duration / interval)))
+    rows = math.ceil(tiles / SPRITE_COLUMNS)
+    return interval, tiles, rows
+
+
+def _format_vtt_time(seconds: float) -> str:
+    """Format seconds as WebVTT timestamp."""
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f'{int(hours):02d}:{int(minutes):02d}:{seconds:06.3f}'
+
+
+def render_sprite(file_path: str, sprite_path: Path, vtt_path: Path, duration: float,
+                  width=None, height=None, image_url='sprite.jpg') -> bool:
+    """
+    Render a seek-preview sprite sheet and its WebVTT index.
+
+    Only keyframes are decoded, which is much faster than decoding the
+    whole video and precise enough for seek previews.
+
+    Args:
+        file_path: Path to video file
+        sprite_path: Output JPEG path
+        vtt_path: Output WebVTT path
+        duration: Video duration in seconds
+        width: Video width (optional, for the tile aspect ratio)
+        height: Video height (optional, for the tile aspect ratio)
+        image_url: URL of the sprite in the cues, relative to the WebVTT file
+
+    Returns:
+        True if successful, False otherwise
+    """
+    tile_width = settings.VIDEO_SPRITE_TILE_WIDTH
+    if width and height:
+        tile_height = max(2, round(tile_width * height / width / 2) * 2)
+    else:
+        tile_height = round(tile_width * 9 / 16 / 2) * 2
+    interval, tiles, rows = _sprite_layout(duration)
+
+    tmp_sprite = sprite_path.with_name(f'{sprite_path.stem}.tmp.jpg')
+    cmd = [
+        'ffmpeg',
+        '-y',
+        '-skip_frame', 'nokey',
+        '-i', file_path,
+        '-an',
+        '-vf', (
+            f'fps=1/{interval:.3f},scale={tile_width}:{tile_height},'
+            f'tile={SPRITE_COLUMNS}x{rows}'
+        ),
+        '-frames:v', '1',
+        '-q:v', '5',
+        str(tmp_sprite),
+    ]
+    try:
+        result = subprocess.run(
+            cmd, capture_output=True, timeout=settings.VIDEO_PREVIEW_TIMEOUT
+        )
+        if result.returncode != 0 or not tmp_sprite.exists():
+            logger.error(f"Failed to generate sprite for {file_path}: {result.stderr}")
+            return False
+    except Exception as e:
+        logger.error(f"Error generating sprite for {file_path}: {e}")
+        return False
+
+    lines = ['WEBVTT', '']
+    for index in range(tiles):
+        start = index * interval
+        end = min((index + 1) * interval, duration)
+        x = (index % SPRITE_COLUMNS) * tile_width
+        y = (index // SPRITE_COLUMNS) * tile_height
+        lines.append(f'{_format_vtt_time(start)} --> {_format_vtt_time(end)}')
+        lines.append(f'{image_url}#xywh={x},{y},{tile_width},{tile_height}')
+        lines.append('')
+
+    tmp_vtt = vtt_path.with_name(f'{vtt_path.stem}.tmp.vtt')
+    tmp_vtt.write_text('\n'.join(lines))
+    os.replace(tmp_sprite, sprite_path)
+    os.replace(tmp_vtt, vtt_path)
+    return True
+
+
+def render_previews(file_path: str, key: str, duration: Optional[float],
+                    width=None, height=None, sprites=True) -> Dict:
+    """
+    Render the thumbnail and sprite sheet of a video into the cache.
+
+    Does not access the database, so it can run in a worker pool.
+
+    Args:
+        file_path: Path to video file
+        key: Preview key (see preview_key())
+        duration: Video duration in seconds (optional)
+        width: Video width (optional)
+        height: Video height (optional)
+        sprites: Whether to render the sprite sheet
+
+    Returns:
+        Dict with 'key', 'thumbnail' and 'sprite' (bools) and 'error'
+    """
+    paths = preview_paths(key)
+    paths['thumbnail'].parent.mkdir(parents=True, exist_ok=True)
+    result = {'key': key, 'thumbnail': False, 'sprite': False, 'error': None}
+
+    # Skip black leader frames, but stay inside short clips
+    position = min(5.0, duration / 2) if duration else 0.0
+    tmp_thumbnail = paths['thumbnail'].with_name(f'{key}.tmp.jpg')
+    if generate_thumbnail(
+        file_path,
+        str(tmp_thumbnail),
+        timestamp=_format_vtt_time(position),
+        width=settings.VIDEO_THUMBNAIL_WIDTH,
+    ):
+        os.replace(tmp_thumbnail, paths['thumbnail'])
+        result['thumbnail'] = True
+    else:
+        result['error'] = 'Thumbnail generation failed'
+        return result
+
+    if sprites and duration:
+        result['sprite'] = render_sprite(
+            file_path, paths['sprite'], paths['vtt'], duration, width, height,
+            image_url=f'sprite.jpg?v={key}',
+        )
+        if not result['sprite']:
+            result['error'] = 'Sprite generation failed'
+
+    return result
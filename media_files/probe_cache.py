@@ -0,0 +1,176 @@
+"""Persistent on-disk cache for ffprobe output."""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+
+
+logger = logging.getLogger('django')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS probe_cache (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    probed_at REAL NOT NULL
+)
+"""
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def file_identity(file_path: str) -> Tuple[int, int, int]:
+    """
+    Return the identity of a file as (size, mtime_ns, inode).
+
+    Any change of content, replacement or rename-over of the file
+    changes at least one of these values.
+    """
+    stat_result = os.stat(file_path)
+    return stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino
+
+
+class ProbeCache:
+    """
+    SQLite-backed cache of raw ffprobe JSON output.
+
+    Entries are stored per path and are only returned while the file's
+    (size, mtime, inode) identity still matches, so changed files always
+    go back to ffprobe. The SQLite file is safe to share between threads
+    and worker processes.
+    """
+
+    def __init__(self, path):
+        """Create a cache stored in the SQLite file at ``path``."""
+        self.path = str(path)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connection(self):
+        """Return a connection for the current thread and process."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def get(self, file_path: str, identity=None) -> Optional[Dict]:
+        """Return cached ffprobe output for ``file_path`` or None on a miss."""
+        identity = identity or file_identity(file_path)
+        try:
+            row = self._connection().execute(
+                'SELECT size, mtime_ns, inode, data FROM probe_cache WHERE path = ?',
+                (file_path,),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"ffprobe cache lookup failed for {file_path}: {e}")
+            row = None
+
+        if row is not None and tuple(row[:3]) == tuple(identity):
+            self._count('hits')
+            return json.loads(row[3])
+
+        self._count('misses')
+        return None
+
+    def set(self, file_path: str, data: Dict, identity=None) -> None:
+        """Store ffprobe output for ``file_path``."""
+        identity = identity or file_identity(file_path)
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO probe_cache '
+                    '(path, size, mtime_ns, inode, data, probed_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (file_path, *identity, json.dumps(data), time.time()),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"ffprobe cache write failed for {file_path}: {e}")
+
+    def discard(self, paths) -> int:
+        """Remove entries for the given paths, return the number removed."""
+        paths = [(str(p),) for p in paths]
+        if not paths:
+            return 0
+        conn = self._connection()
+        with conn:
+            before = conn.total_changes
+            conn.executemany('DELETE FROM probe_cache WHERE path = ?', paths)
+            removed = conn.total_changes - before
+        self._count('evictions', removed)
+        return removed
+
+    def evict_missing(self) -> int:
+        """Remove entries whose file disappeared or changed identity."""
+        stale = []
+        rows = self._connection().execute(
+            'SELECT path, size, mtime_ns, inode FROM probe_cache'
+        ).fetchall()
+        for path, size, mtime_ns, inode in rows:
+            try:
+                if file_identity(path) != (size, mtime_ns, inode):
+                    stale.append(path)
+            except OSError:
+                stale.append(path)
+        return self.discard(stale)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM probe_cache')
+
+    def __len__(self):
+        """Return the number of cached entries."""
+        return self._connection().execute(
+            'SELECT COUNT(*) FROM probe_cache'
+        ).fetchone()[0]
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters of this process and the entry count."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self),
+                'path': self.path,
+            }
+
+
+def get_probe_cache() -> Optional[ProbeCache]:
+    """Return the configured ffprobe cache or None if caching is disabled."""
+    if not getattr(settings, 'VIDEO_PROBE_CACHE_ENABLED', True):
+        return None
+    path = getattr(settings, 'VIDEO_PROBE_CACHE_PATH', None)
+    if not path:
+        return None
+    with _instances_lock:
+        if path not in _instances:
+            _instances[path] = ProbeCache(path)
+        return _instances[path]
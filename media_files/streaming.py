@@ -0,0 +1,229 @@
+"""Streaming of video files with HTTP range and conditional request support."""
+
+import io
+import logging
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+
+logger = logging.getLogger('django')
+
+# Bytes per read when the response is not sent by the WSGI server's sendfile
+STREAM_CHUNK_SIZE = 512 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangedFile:
+    """
+    Read-only view of ``length`` bytes of a file starting at ``start``.
+
+    FileResponse reads the view in fixed chunks, so memory use does not
+    depend on the range size. ``fileno()`` lets WSGI servers with
+    ``wsgi.file_wrapper`` support (gunicorn) send the range with
+    ``sendfile`` straight from the page cache.
+    """
+
+    def __init__(self, file, start, length):
+        """Wrap an open binary ``file``."""
+        self.file = file
+        self.start = start
+        self.length = length
+        self.name = getattr(file, 'name', '')
+        self.file.seek(start)
+        self._position = 0
+
+    def read(self, size=-1):
+        """Read at most ``size`` bytes without crossing the end of the range."""
+        remaining = self.length - self._position
+        if remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        data = self.file.read(size)
+        self._position += len(data)
+        return data
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        """Move within the range, positions are relative to its start."""
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.length
+        self._position = min(max(offset, 0), self.length)
+        self.file.seek(self.start + self._position)
+        return self._position
+
+    def tell(self):
+        """Return the position relative to the start of the range."""
+        return self._position
+
+    def seekable(self):
+        """Return True, ranges are always seekable."""
+        return True
+
+    def fileno(self):
+        """Return the descriptor of the wrapped file, positioned at the range."""
+        return self.file.fileno()
+
+    def close(self):
+        """Close the wrapped file."""
+        self.file.close()
+
+
+def file_etag(stat_result):
+    """Return a strong ETag derived from the size and modification time."""
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def parse_range_header(header, file_size):
+    """
+    Parse a single byte range of a Range header.
+
+    Args:
+        header: Value of the Range header
+        file_size: Size of the file in bytes
+
+    Returns:
+        (first_byte, last_byte) tuple, None if the header should be ignored
+        (malformed or several ranges), or False if it is unsatisfiable
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        suffix = int(last)
+        if suffix == 0:
+            return False
+        return max(file_size - suffix, 0), file_size - 1
+
+    first_byte = int(first)
+    last_byte = min(int(last), file_size - 1) if last else file_size - 1
+    if first_byte >= file_size or last_byte < first_byte:
+        return False
+    return first_byte, last_byte
+
+
+def _if_range_matches(request, etag, mtime):
+    """Return whether a Range may be applied according to If-Range."""
+    if_range = request.META.get('HTTP_IF_RANGE', '').strip()
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(mtime)
+
+
+def offload_url(file_path):
+    """
+    Return the internal nginx location of ``file_path`` or None.
+
+    Uses the VIDEO_STREAM_OFFLOAD_MAP setting, a list of
+    (file system prefix, internal location) pairs.
+    """
+    for prefix, location in getattr(settings, 'VIDEO_STREAM_OFFLOAD_MAP', []):
+        if file_path.startswith(prefix):
+            relative = file_path[len(prefix):].lstrip('/')
+            return f"{location.rstrip('/')}/{quote(relative)}"
+    return None
+
+
+def _offload_response(file_path, content_type):
+    """Return a response letting the web server send the file, or None."""
+    mode = getattr(settings, 'VIDEO_STREAM_OFFLOAD', '')
+    if mode == 'x-accel-redirect':
+        url = offload_url(file_path)
+        if url is None:
+            logger.warning(f'No stream offload location configured for {file_path}')
+            return None
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = url
+        return response
+    if mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = file_path
+        return response
+    return None
+
+
+def stream_file(request, file_path, content_type, cache_control='public, max-age=86400',
+                offload=True):
+    """
+    Return a response streaming ``file_path`` to the client.
+
+    Handles conditional requests (ETag/Last-Modified, answering 304) and a
+    single byte range (206/416). If VIDEO_STREAM_OFFLOAD is set, the web
+    server sends the file via X-Accel-Redirect or X-Sendfile and handles
+    ranges itself.
+
+    Args:
+        request: HttpRequest
+        file_path: Absolute path of the file
+        content_type: MIME type of the file
+        cache_control: Value of the Cache-Control header
+        offload: Whether the file may be handed to the web server
+
+    Returns:
+        HttpResponse
+    """
+    stat_result = os.stat(file_path)
+    file_size = stat_result.st_size
+    etag = file_etag(stat_result)
+    last_modified = http_date(stat_result.st_mtime)
+
+    def add_validators(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = last_modified
+        response['Accept-Ranges'] = 'bytes'
+        response['Cache-Control'] = cache_control
+        return response
+
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=int(stat_result.st_mtime)
+    )
+    if not_modified is not None:
+        return add_validators(not_modified)
+
+    response = _offload_response(file_path, content_type) if offload else None
+    if response is not None:
+        response['Content-Disposition'] = 'inline'
+        return add_validators(response)
+
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE', '')
+    if range_header and _if_range_matches(request, etag, stat_result.st_mtime):
+        byte_range = parse_range_header(range_header, file_size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{file_size}'
+        return add_validators(response)
+
+    file_handle = open(file_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file_handle, content_type=content_type)
+    else:
+        first_byte, last_byte = byte_range
+        response = FileResponse(
+            RangedFile(file_handle, first_byte, last_byte - first_byte + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {first_byte}-{last_byte}/{file_size}'
+
+    response.block_size = STREAM_CHUNK_SIZE
+    response['Content-Disposition'] = 'inline'
+    response['X-Accel-Buffering'] = 'no'  # Disable nginx buffering
+    return add_validators(response)
@@ -1,14 +1,39 @@
 """Tasks for media files operations."""
 
 import logging
+import threading
+import time
 from pathlib import Path
+from typing import NamedTuple
+from django.db import connection
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
 
-from media_files.models import StorageLocation, VideoFile, FileOperation
-from media_files.utils import copy_file_with_progress
+from media_files.copy_engine import CopyEngine, Transfer
+from media_files.models import StorageLocation, VideoFile, FileOperation, CopyJob
 
 
 logger = logging.getLogger('django')
 
+# Seconds between progress writes of a running copy job
+PROGRESS_UPDATE_INTERVAL = 2.0
+
+# Seconds between heartbeats of a running copy job, well below the
+# VIDEO_COPY_JOB_TIMEOUT after which it is requeued
+HEARTBEAT_INTERVAL = 30.0
+
+# Fields taken over from the source record when a video is copied
+COPIED_VIDEO_FIELDS = [
+    'file_size', 'duration', 'format', 'checksum', 'fingerprint',
+    'video_codec', 'video_codec_long', 'video_profile', 'video_bitrate',
+    'fps', 'width', 'height', 'aspect_ratio', 'pixel_format',
+    'color_space', 'color_range', 'chroma_subsampling',
+    'audio_codec', 'audio_codec_long', 'audio_bitrate', 'audio_sample_rate',
+    'audio_channels', 'audio_channel_layout',
+    'has_video', 'has_audio', 'total_bitrate', 'metadata_json',
+]
+
 
 def get_week_folder_for_date(date):
     """
@@ -28,16 +53,219 @@ def get_week_folder_for_date(date):
     return f"{iso_year}_KW_{iso_week:02d}"
 
 
-def copy_videos_for_plan(license_numbers, broadcast_date):
+def get_playout_destination():
+    """Return the active PLAYOUT storage used for automatic copies or None."""
+    return StorageLocation.objects.filter(
+        storage_type='PLAYOUT',
+        is_active=True
+    ).first()
+
+
+class PlannedCopy(NamedTuple):
+    """A copy prepared in the database and waiting for its file transfer."""
+
+    number: int
+    video: VideoFile
+    file_path: str
+    operation: FileOperation
+    transfer: Transfer
+
+
+def register_copied_video(video, destination, file_path):
+    """
+    Create or re-enable the VideoFile record of a copied video.
+    
+    Args:
+        video: Source VideoFile
+        destination: StorageLocation the file was copied to
+        file_path: Path of the copy relative to the destination
+        
+    Returns:
+        VideoFile of the copy
+    """
+    defaults = {field: getattr(video, field) for field in COPIED_VIDEO_FIELDS}
+    defaults.update({
+        'filename': video.filename,
+        'file_path': file_path,
+        'is_available': True,
+    })
+    new_video, created = VideoFile.objects.get_or_create(
+        number=video.number,
+        storage_location=destination,
+        defaults=defaults,
+    )
+    
+    if not created:
+        new_video.is_available = True
+        new_video.save()
+    
+    return new_video
+
+
+def prepare_plan_copy(number, destination, broadcast_date):
+    """
+    Select the source of a scheduled video and create its operation record.
+    
+    Args:
+        number: License number of the video
+        destination: Destination StorageLocation
+        broadcast_date: Date of the broadcast, determines the week folder
+        
+    Returns:
+        PlannedCopy, or a result dict if there is nothing to copy
+    """
+    # Find video with quality prioritization
+    videos = VideoFile.objects.filter(
+        number=number,
+        is_available=True,
+    ).exclude(
+        storage_location=destination
+    ).select_related('storage_location')
+    
+    if not videos:
+        logger.warning(f'Video {number} not found for auto-copy')
+        return {
+            'number': number,
+            'status': 'error',
+            'message': 'Not found in any storage'
+        }
+    
+    # Sort by priority: ARCHIVE > PLAYOUT > CUSTOM, then by quality
+    storage_priority = {'ARCHIVE': 3, 'PLAYOUT': 2, 'CUSTOM': 1}
+    video = max(videos, key=lambda v: (
+        storage_priority.get(v.storage_location.storage_type, 0),
+        v.total_bitrate or 0,
+        v.width or 0
+    ))
+    
+    logger.info(f'Selected video {number} from {video.storage_location.name} '
+               f'(bitrate: {video.total_bitrate}, resolution: {video.width}x{video.height})')
+    
+    # Check if already exists in playout
+    existing = VideoFile.objects.filter(
+        number=number,
+        storage_location=destination,
+        is_available=True
+    ).first()
+    
+    if existing:
+        logger.info(f'Video {number} already in playout, skipping')
+        return {
+            'number': number,
+            'status': 'skipped',
+            'message': 'Already in playout'
+        }
+    
+    # Determine week folder for playout
+    week_folder = get_week_folder_for_date(broadcast_date)
+    dest_path = f"{destination.path.rstrip('/')}/{week_folder}/{video.filename}"
+    
+    # Create operation record
+    operation = FileOperation.objects.create(
+        video_file=video,
+        operation_type='COPY',
+        source_location=video.storage_location,
+        destination_location=destination,
+        status='IN_PROGRESS',
+        bytes_total=video.file_size,
+        details={'broadcast_date': str(broadcast_date)}
+    )
+    
+    return PlannedCopy(
+        number=number,
+        video=video,
+        file_path=f"{week_folder}/{video.filename}",
+        operation=operation,
+        transfer=Transfer(
+            key=number,
+            source=video.full_path,
+            destination=dest_path,
+            source_location=video.storage_location,
+            destination_location=destination,
+        ),
+    )
+
+
+def finish_plan_copy(planned, success, message):
+    """
+    Store the outcome of a planned copy.
+    
+    Args:
+        planned: PlannedCopy whose transfer finished
+        success: Whether the file was copied
+        message: Message of the copy
+        
+    Returns:
+        Dict with 'number', 'status' ('success' or 'error') and 'message'
+    """
+    operation = planned.operation
+    
+    if success:
+        register_copied_video(planned.video, planned.transfer.destination_location, planned.file_path)
+        
+        operation.status = 'SUCCESS'
+        if operation.bytes_total is not None:
+            operation.bytes_done = operation.bytes_total
+        operation.save()
+        
+        logger.info(f'Successfully copied video {planned.number} to playout')
+        return {
+            'number': planned.number,
+            'status': 'success',
+            'message': message
+        }
+    
+    operation.status = 'FAILED'
+    operation.error_message = message
+    operation.save()
+    
+    logger.error(f'Failed to copy video {planned.number}: {message}')
+    return {
+        'number': planned.number,
+        'status': 'error',
+        'message': message
+    }
+
+
+def copy_number_to_destination(number, destination, broadcast_date, progress_callback=None,
+                               on_operation=None):
+    """
+    Copy the best available version of a video to the destination storage.
+    
+    Args:
+        number: License number of the video
+        destination: Destination StorageLocation
+        broadcast_date: Date of the broadcast, determines the week folder
+        progress_callback: Optional callable receiving (bytes_copied, total_bytes)
+        on_operation: Optional callable receiving the created FileOperation
+        
+    Returns:
+        Dict with 'number', 'status' ('success', 'skipped' or 'error') and 'message'
+    """
+    planned = prepare_plan_copy(number, destination, broadcast_date)
+    if isinstance(planned, dict):
+        return planned
+    if on_operation is not None:
+        on_operation(planned.operation)
+    
+    logger.info(f'Copying video {number} from archive to playout')
+    success, message = CopyEngine().copy(planned.transfer, progress_callback=progress_callback)
+    return finish_plan_copy(planned, success, message)
+
+
+def copy_videos_for_plan(license_numbers, broadcast_date, workers=None):
     """
     Copy videos from archive to playout for scheduled broadcast.
     
-    This function is called when a broadcast plan is saved (not draft).
-    It automatically copies the needed videos from archive to playout storage.
+    Copies synchronously; the broadcast planning uses enqueue_copy_jobs()
+    unless VIDEO_COPY_IN_BACKGROUND is disabled. Files are transferred in
+    parallel by the CopyEngine, database records are written by the
+    calling thread.
     
     Args:
         license_numbers: List of license numbers to copy
         broadcast_date: Date of the broadcast plan
+        workers: Number of parallel copies (optional, defaults to VIDEO_COPY_WORKERS)
         
     Returns:
         Dict with results: {'copied': int, 'skipped': int, 'errors': int}
@@ -50,165 +278,41 @@ def copy_videos_for_plan(license_numbers, broadcast_date):
     }
     
     # Get destination (playout) storage
-    destination = StorageLocation.objects.filter(
-        storage_type='PLAYOUT',
-        is_active=True
-    ).first()
+    destination = get_playout_destination()
     
     if not destination:
         logger.error('No PLAYOUT storage found for auto-copy')
         return results
     
-    logger.info(f'Auto-copying {len(license_numbers)} videos for {broadcast_date}')
+    # A video scheduled several times on one day is copied once
+    numbers = list(dict.fromkeys(license_numbers))
+    logger.info(f'Auto-copying {len(numbers)} videos for {broadcast_date}')
     
-    for number in license_numbers:
+    counters = {'success': 'copied', 'skipped': 'skipped', 'error': 'errors'}
+    planned = {}
+    
+    def record(detail):
+        results[counters[detail['status']]] += 1
+        results['details'].append(detail)
+    
+    for number in numbers:
         try:
-            # Find video with quality prioritization
-            videos = VideoFile.objects.filter(
-                number=number,
-                is_available=True,
-            ).exclude(
-                storage_location=destination
-            ).select_related('storage_location')
-            
-            if not videos:
-                logger.warning(f'Video {number} not found for auto-copy')
-                results['errors'] += 1
-                results['details'].append({
-                    'number': number,
-                    'status': 'error',
-                    'message': 'Not found in any storage'
-                })
-                continue
-            
-            # Sort by priority: ARCHIVE > PLAYOUT > CUSTOM, then by quality
-            storage_priority = {'ARCHIVE': 3, 'PLAYOUT': 2, 'CUSTOM': 1}
-            video = max(videos, key=lambda v: (
-                storage_priority.get(v.storage_location.storage_type, 0),
-                v.total_bitrate or 0,
-                v.width or 0
-            ))
-            
-            logger.info(f'Selected video {number} from {video.storage_location.name} '
-                       f'(bitrate: {video.total_bitrate}, resolution: {video.width}x{video.height})')
-            
-            # Check if already exists in playout
-            existing = VideoFile.objects.filter(
-                number=number,
-                storage_location=destination,
-                is_available=True
-            ).first()
-            
-            if existing:
-                logger.info(f'Video {number} already in playout, skipping')
-                results['skipped'] += 1
-                results['details'].append({
-                    'number': number,
-                    'status': 'skipped',
-                    'message': 'Already in playout'
-                })
-                continue
-            
-            # Determine week folder for playout
-            week_folder = get_week_folder_for_date(broadcast_date)
-            dest_path = f"{destination.path.rstrip('/')}/{week_folder}/{video.filename}"
-            
-            logger.info(f'Copying video {number} from archive to playout')
-            
-            # Create operation record
-            operation = FileOperation.objects.create(
-                video_file=video,
-                operation_type='COPY',
-                source_location=video.storage_location,
-                destination_location=destination,
-                status='IN_PROGRESS',
-                details={'broadcast_date': str(broadcast_date)}
-            )
-            
-            # Ensure week folder exists
-            week_folder_path = f"{destination.path.rstrip('/')}/{week_folder}"
-            Path(week_folder_path).mkdir(parents=True, exist_ok=True)
-            
-            success, message = copy_file_with_progress(
-                source_path,
-                dest_path,
-                verify_checksum=True
-            )
-            
-            if success:
-                # Create new VideoFile record for playout
-                new_video, created = VideoFile.objects.get_or_create(
-                    number=video.number,
-                    storage_location=destination,
-                    defaults={
-                        'filename': video.filename,
-                        'file_path': f"{week_folder}/{video.filename}",
-                        'file_size': video.file_size,
-                        'duration': video.duration,
-                        'format': video.format,
-                        'is_available': True,
-                        'checksum': video.checksum,
-                        # Copy metadata
-                        'video_codec': video.video_codec,
-                        'video_codec_long': video.video_codec_long,
-                        'video_profile': video.video_profile,
-                        'video_bitrate': video.video_bitrate,
-                        'fps': video.fps,
-                        'width': video.width,
-                        'height': video.height,
-                        'aspect_ratio': video.aspect_ratio,
-                        'pixel_format': video.pixel_format,
-                        'color_space': video.color_space,
-                        'color_range': video.color_range,
-                        'chroma_subsampling': video.chroma_subsampling,
-                        'audio_codec': video.audio_codec,
-                        'audio_codec_long': video.audio_codec_long,
-                        'audio_bitrate': video.audio_bitrate,
-                        'audio_sample_rate': video.audio_sample_rate,
-                        'audio_channels': video.audio_channels,
-                        'audio_channel_layout': video.audio_channel_layout,
-                        'has_video': video.has_video,
-                        'has_audio': video.has_audio,
-                        'total_bitrate': video.total_bitrate,
-                        'metadata_json': video.metadata_json,
-                    }
-                )
-                
-                if not created:
-                    new_video.is_available = True
-                    new_video.save()
-                
-                operation.status = 'SUCCESS'
-                operation.save()
-                
-                results['copied'] += 1
-                results['details'].append({
-                    'number': number,
-                    'status': 'success',
-                    'message': message
-                })
-                logger.info(f'Successfully copied video {number} to playout')
-            else:
-                operation.status = 'FAILED'
-                operation.error_message = message
-                operation.save()
-                
-                results['errors'] += 1
-                results['details'].append({
-                    'number': number,
-                    'status': 'error',
-                    'message': message
-                })
-                logger.error(f'Failed to copy video {number}: {message}')
-        
+            result = prepare_plan_copy(number, destination, broadcast_date)
         except Exception as e:
-            results['errors'] += 1
-            results['details'].append({
-                'number': number,
-                'status': 'error',
-                'message': str(e)
-            })
             logger.error(f'Exception copying video {number}: {str(e)}', exc_info=True)
+            result = {'number': number, 'status': 'error', 'message': str(e)}
+        if isinstance(result, PlannedCopy):
+            planned[number] = result
+        else:
+            record(result)
+    
+    engine = CopyEngine(workers=workers)
+    for transfer, success, message in engine.copy_many([p.transfer for p in planned.values()]):
+        try:
+            record(finish_plan_copy(planned[transfer.key], success, message))
+        except Exception as e:
+            logger.error(f'Exception copying video {transfer.key}: {str(e)}', exc_info=True)
+            record({'number': transfer.key, 'status': 'error', 'message': str(e)})
     
     logger.info(
         f'Auto-copy completed: {results["copied"]} copied, '
@@ -218,6 +322,242 @@ def copy_videos_for_plan(license_numbers, broadcast_date):
     return results
 
 
+def enqueue_copy_jobs(license_numbers, broadcast_date, user=None, destination=None):
+    """
+    Queue copies of videos to playout for the run_copy_jobs worker.
+    
+    Numbers that already have a queued or running job for the same
+    destination and date are not queued again. Values that are no license
+    number are skipped and logged, the other numbers are still queued.
+    
+    Args:
+        license_numbers: List of license numbers to copy
+        broadcast_date: Date of the broadcast plan
+        user: User requesting the copies (optional)
+        destination: Destination StorageLocation (optional, defaults to PLAYOUT)
+        
+    Returns:
+        List of created CopyJob instances
+    """
+    destination = destination or get_playout_destination()
+    if not destination:
+        logger.error('No PLAYOUT storage found for auto-copy')
+        return []
+    
+    numbers = []
+    invalid = []
+    for number in license_numbers:
+        try:
+            numbers.append(int(number))
+        except (TypeError, ValueError):
+            invalid.append(number)
+    if invalid:
+        logger.warning(
+            f'Skipped {len(invalid)} invalid license number(s) for {broadcast_date}: '
+            f'{", ".join(repr(number) for number in invalid)}'
+        )
+    numbers = list(dict.fromkeys(numbers))
+    active = set(
+        CopyJob.objects.filter(
+            number__in=numbers,
+            destination=destination,
+            broadcast_date=broadcast_date,
+            status__in=CopyJob.ACTIVE_STATUSES,
+        ).values_list('number', flat=True)
+    )
+    
+    jobs = CopyJob.objects.bulk_create([
+        CopyJob(
+            number=number,
+            broadcast_date=broadcast_date,
+            destination=destination,
+            requested_by=user,
+        )
+        for number in numbers if number not in active
+    ])
+    logger.info(f'Queued {len(jobs)} copy job(s) for {broadcast_date}')
+    return jobs
+
+
+def claim_copy_jobs(limit, worker=''):
+    """
+    Mark up to ``limit`` queued jobs as running and return them.
+    
+    The destination rows are locked while claiming, so concurrent workers
+    never start more than StorageLocation.max_concurrent_copies jobs per
+    destination; locked job rows are skipped.
+    
+    Args:
+        limit: Maximum number of jobs to claim
+        worker: Identifier of the claiming worker
+        
+    Returns:
+        List of claimed CopyJob instances
+    """
+    if limit < 1:
+        return []
+    
+    with transaction.atomic():
+        destination_ids = set(
+            CopyJob.objects.filter(status='QUEUED').values_list('destination_id', flat=True)
+        )
+        if not destination_ids:
+            return []
+        
+        destinations = {
+            storage.pk: storage
+            for storage in StorageLocation.objects.select_for_update().filter(pk__in=destination_ids)
+        }
+        running = dict(
+            CopyJob.objects.filter(status='RUNNING', destination_id__in=destination_ids)
+            .values('destination_id').annotate(count=Count('id'))
+            .values_list('destination_id', 'count')
+        )
+        free = {
+            pk: storage.max_concurrent_copies - running.get(pk, 0)
+            for pk, storage in destinations.items()
+        }
+        # Oldest queued jobs of every destination with free slots
+        candidates = []
+        for pk, slots in free.items():
+            if slots <= 0:
+                continue
+            candidates.extend(
+                CopyJob.objects.select_for_update(skip_locked=True).filter(
+                    status='QUEUED',
+                    destination_id=pk,
+                ).order_by('created_at', 'pk')[:min(slots, limit)]
+            )
+        claimed = sorted(candidates, key=lambda job: (job.created_at, job.pk))[:limit]
+        
+        now = timezone.now()
+        for job in claimed:
+            job.status = 'RUNNING'
+            job.worker = worker
+            job.started_at = now
+            job.updated_at = now
+            job.attempts += 1
+        CopyJob.objects.bulk_update(
+            claimed, ['status', 'worker', 'started_at', 'updated_at', 'attempts']
+        )
+    
+    for job in claimed:
+        job.destination = destinations[job.destination_id]
+    return claimed
+
+
+class CopyJobHeartbeat(threading.Thread):
+    """
+    Refresh ``updated_at`` of a running job every HEARTBEAT_INTERVAL seconds.
+
+    Runs for the whole job, including the wait for a route slot and the
+    checksum verification, which report no progress. Stops by itself once
+    the job no longer belongs to the worker, e.g. after it was requeued.
+    """
+
+    def __init__(self, job):
+        """Create a heartbeat for ``job``, started with start()."""
+        super().__init__(name=f'copy-job-{job.pk}-heartbeat', daemon=True)
+        self.job = job
+        self.stopped = threading.Event()
+
+    def beat(self):
+        """Refresh the job and return whether it still belongs to the worker."""
+        return bool(CopyJob.objects.filter(
+            pk=self.job.pk, worker=self.job.worker, status='RUNNING'
+        ).update(updated_at=timezone.now()))
+
+    def run(self):
+        """Send heartbeats until stop() is called."""
+        try:
+            while not self.stopped.wait(HEARTBEAT_INTERVAL):
+                if not self.beat():
+                    logger.warning(f'Copy job {self.job.pk} was taken over by another worker')
+                    return
+        finally:
+            connection.close()
+
+    def stop(self):
+        """Stop sending heartbeats and wait for the thread."""
+        self.stopped.set()
+        self.join()
+
+
+def run_copy_job(job):
+    """
+    Execute a claimed copy job and store its outcome.
+    
+    Progress is written to the job's FileOperation at most every
+    PROGRESS_UPDATE_INTERVAL seconds; a CopyJobHeartbeat keeps the job
+    from being requeued while it runs. The outcome is only stored if the
+    job still belongs to this worker.
+    
+    Args:
+        job: CopyJob in status RUNNING
+        
+    Returns:
+        The CopyJob as stored in the database
+    """
+    state = {'operation': None, 'last_update': time.monotonic()}
+    owned = CopyJob.objects.filter(pk=job.pk, worker=job.worker, status='RUNNING')
+    
+    def on_operation(operation):
+        state['operation'] = operation
+        owned.update(operation=operation, updated_at=timezone.now())
+    
+    def on_progress(copied, total):
+        now = time.monotonic()
+        if now - state['last_update'] < PROGRESS_UPDATE_INTERVAL or state['operation'] is None:
+            return
+        state['last_update'] = now
+        FileOperation.objects.filter(pk=state['operation'].pk).update(
+            bytes_done=copied, bytes_total=total
+        )
+    
+    heartbeat = CopyJobHeartbeat(job)
+    heartbeat.start()
+    try:
+        detail = copy_number_to_destination(
+            job.number, job.destination, job.broadcast_date or timezone.localdate(),
+            progress_callback=on_progress, on_operation=on_operation,
+        )
+    except Exception as e:
+        logger.error(f'Exception in copy job {job.pk}: {str(e)}', exc_info=True)
+        detail = {'number': job.number, 'status': 'error', 'message': str(e)}
+    finally:
+        heartbeat.stop()
+    
+    job.operation = state['operation']
+    job.status = {'success': 'SUCCESS', 'skipped': 'SKIPPED'}.get(detail['status'], 'FAILED')
+    job.message = detail['message']
+    job.finished_at = timezone.now()
+    job.updated_at = job.finished_at
+    # A requeued job may run in another worker by now, whose outcome wins
+    if not owned.update(
+        operation=job.operation, status=job.status, message=job.message,
+        finished_at=job.finished_at, updated_at=job.updated_at,
+    ):
+        logger.warning(f'Copy job {job.pk} was taken over by another worker, outcome not stored')
+        job.refresh_from_db()
+    return job
+
+
+def requeue_stale_copy_jobs(timeout):
+    """
+    Put running jobs without a heartbeat for ``timeout`` back into the queue.
+    
+    Args:
+        timeout: timedelta after which a running job counts as abandoned
+        
+    Returns:
+        Number of requeued jobs
+    """
+    return CopyJob.objects.filter(
+        status='RUNNING',
+        updated_at__lt=timezone.now() - timeout,
+    ).update(status='QUEUED', worker='', message='Requeued after worker timeout')
+
+
 def copy_video_to_playout(video_file, destination_storage=None, user=None, broadcast_date=None):
     """
     Copy a single video file to playout storage.
@@ -276,46 +616,17 @@ def copy_video_to_playout(video_file, destination_storage=None, user=None, broad
             status='IN_PROGRESS',
         )
         
-        success, message = copy_file_with_progress(source_path, dest_path)
+        success, message = CopyEngine().copy(Transfer(
+            key=video_file.number,
+            source=source_path,
+            destination=dest_path,
+            source_location=video_file.storage_location,
+            destination_location=destination_storage,
+        ))
         
         if success:
             # Create new VideoFile record
-            new_video, _ = VideoFile.objects.get_or_create(
-                number=video_file.number,
-                storage_location=destination_storage,
-                defaults={
-                    'filename': video_file.filename,
-                    'file_path': f"{week_folder}/{video_file.filename}",
-                    'file_size': video_file.file_size,
-                    'duration': video_file.duration,
-                    'format': video_file.format,
-                    'is_available': True,
-                    'checksum': video_file.checksum,
-                    # Copy all metadata fields
-                    'video_codec': video_file.video_codec,
-                    'video_codec_long': video_file.video_codec_long,
-                    'video_profile': video_file.video_profile,
-                    'video_bitrate': video_file.video_bitrate,
-                    'fps': video_file.fps,
-                    'width': video_file.width,
-                    'height': video_file.height,
-                    'aspect_ratio': video_file.aspect_ratio,
-                    'pixel_format': video_file.pixel_format,
-                    'color_space': video_file.color_space,
-                    'color_range': video_file.color_range,
-                    'chroma_subsampling': video_file.chroma_subsampling,
-                    'audio_codec': video_file.audio_codec,
-                    'audio_codec_long': video_file.audio_codec_long,
-                    'audio_bitrate': video_file.audio_bitrate,
-                    'audio_sample_rate': video_file.audio_sample_rate,
-                    'audio_channels': video_file.audio_channels,
-                    'audio_channel_layout': video_file.audio_channel_layout,
-                    'has_video': video_file.has_video,
-                    'has_audio': video_file.has_audio,
-                    'total_bitrate': video_file.total_bitrate,
-                    'metadata_json': video_file.metadata_json,
-                }
-            )
+            register_copied_video(video_file, destination_storage, f"{week_folder}/{video_file.filename}")
             
             operation.status = 'SUCCESS'
             operation.save()
@@ -1,5 +1,6 @@
 """Utility functions for media files management."""
 
+import errno
 import hashlib
 import json
 import logging
@@ -7,12 +8,20 @@ import os
 import re
 import shutil
 import subprocess
+import sys
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, Optional, Tuple
 
 from django.utils import timezone
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
 
 logger = logging.getLogger('django')
 
@@ -73,15 +82,63 @@ def scan_directory(storage_location, supported_formats=None) -> list:
     return found_files
 
 
-def extract_video_metadata(file_path: str) -> Dict:
+def run_ffprobe(file_path: str, use_cache: bool = True) -> Tuple[Optional[Dict], bool]:
+    """
+    Return the parsed ffprobe JSON output for a file.
+
+    Results are served from the persistent probe cache when the file's
+    size, mtime and inode are unchanged.
+
+    Args:
+        file_path: Absolute path to the video file
+        use_cache: Whether to consult and fill the probe cache
+
+    Returns:
+        Tuple of (ffprobe data or None on failure, served_from_cache: bool)
+    """
+    from .probe_cache import file_identity, get_probe_cache
+
+    cache = get_probe_cache() if use_cache else None
+    identity = None
+    if cache is not None:
+        identity = file_identity(file_path)
+        data = cache.get(file_path, identity)
+        if data is not None:
+            return data, True
+
+    # Run ffprobe to get JSON output
+    cmd = [
+        'ffprobe',
+        '-v', 'quiet',
+        '-print_format', 'json',
+        '-show_format',
+        '-show_streams',
+        file_path
+    ]
+
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+
+    if result.returncode != 0:
+        logger.error(f"ffprobe failed for {file_path}: {result.stderr}")
+        return None, False
+
+    data = json.loads(result.stdout)
+    if cache is not None:
+        cache.set(file_path, data, identity)
+    return data, False
+
+
+def extract_video_metadata(file_path: str, use_cache: bool = True) -> Dict:
     """
     Extract comprehensive video metadata using ffprobe.
     
     Args:
         file_path: Absolute path to the video file
+        use_cache: Whether to use the persistent ffprobe cache
         
     Returns:
-        Dictionary with extracted metadata
+        Dictionary with extracted metadata; 'from_cache' tells whether
+        ffprobe was skipped
     """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
@@ -89,26 +146,15 @@ def extract_video_metadata(file_path: str) -> Dict:
     metadata = {
         'has_video': False,
         'has_audio': False,
+        'from_cache': False,
     }
     
     try:
-        # Run ffprobe to get JSON output
-        cmd = [
-            'ffprobe',
-            '-v', 'quiet',
-            '-print_format', 'json',
-            '-show_format',
-            '-show_streams',
-            file_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        data, metadata['from_cache'] = run_ffprobe(file_path, use_cache=use_cache)
         
-        if result.returncode != 0:
-            logger.error(f"ffprobe failed for {file_path}: {result.stderr}")
+        if data is None:
             return metadata
         
-        data = json.loads(result.stdout)
         metadata['raw_json'] = data
         
         # Extract format information
@@ -203,47 +249,432 @@ def extract_video_metadata(file_path: str) -> Dict:
     return metadata
 
 
-def calculate_checksum(file_path: str, algorithm='sha256') -> str:
+# VideoFile fields written from ffprobe output by apply_video_metadata()
+VIDEO_METADATA_FIELDS = [
+    'format', 'file_size', 'duration', 'total_bitrate',
+    'has_video', 'video_codec', 'video_codec_long', 'video_profile',
+    'video_bitrate', 'fps', 'width', 'height', 'aspect_ratio',
+    'pixel_format', 'color_space', 'color_range', 'chroma_subsampling',
+    'has_audio', 'audio_codec', 'audio_codec_long', 'audio_bitrate',
+    'audio_sample_rate', 'audio_channels', 'audio_channel_layout',
+    'metadata_json',
+]
+
+
+def apply_video_metadata(video_file, metadata: Dict) -> None:
+    """
+    Copy metadata returned by extract_video_metadata() onto a VideoFile.
+
+    The instance is not saved.
+
+    Args:
+        video_file: VideoFile instance to update
+        metadata: Dictionary from extract_video_metadata()
+    """
+    if 'format' in metadata:
+        video_file.format = metadata['format']
+    if 'file_size' in metadata:
+        video_file.file_size = metadata['file_size']
+    if 'duration' in metadata:
+        video_file.duration = metadata['duration']
+    if 'total_bitrate' in metadata:
+        video_file.total_bitrate = metadata['total_bitrate']
+
+    # Video metadata
+    video_file.has_video = metadata.get('has_video', False)
+    if video_file.has_video:
+        video_file.video_codec = metadata.get('video_codec', '')
+        video_file.video_codec_long = metadata.get('video_codec_long', '')
+        video_file.video_profile = metadata.get('video_profile', '')
+        video_file.video_bitrate = metadata.get('video_bitrate')
+        video_file.fps = metadata.get('fps')
+        video_file.width = metadata.get('width')
+        video_file.height = metadata.get('height')
+        video_file.aspect_ratio = metadata.get('aspect_ratio', '')
+        video_file.pixel_format = metadata.get('pixel_format', '')
+        video_file.color_space = metadata.get('color_space', '')
+        video_file.color_range = metadata.get('color_range', '')
+        video_file.chroma_subsampling = metadata.get('chroma_subsampling', '')
+
+    # Audio metadata
+    video_file.has_audio = metadata.get('has_audio', False)
+    if video_file.has_audio:
+        video_file.audio_codec = metadata.get('audio_codec', '')
+        video_file.audio_codec_long = metadata.get('audio_codec_long', '')
+        video_file.audio_bitrate = metadata.get('audio_bitrate')
+        video_file.audio_sample_rate = metadata.get('audio_sample_rate')
+        video_file.audio_channels = metadata.get('audio_channels')
+        video_file.audio_channel_layout = metadata.get('audio_channel_layout', '')
+
+    # Store full metadata JSON
+    if 'raw_json' in metadata:
+        video_file.metadata_json = metadata['raw_json']
+
+
+def link_videos_to_licenses(video_files) -> int:
+    """
+    Link saved VideoFiles to their Licenses and sync durations in bulk.
+
+    Set-based counterpart of the ``auto_link_to_license`` signal for
+    records written with bulk_create()/bulk_update(), which do not send
+    post_save.
+
+    Args:
+        video_files: Iterable of saved VideoFile instances
+
+    Returns:
+        Number of newly linked videos
+    """
+    from licenses.models import License
+    from .models import VideoFile
+
+    video_files = [v for v in video_files if v.pk]
+    if not video_files:
+        return 0
+
+    numbers = {v.number for v in video_files}
+    licenses = {
+        lic.number: lic for lic in License.objects.filter(number__in=numbers)
+    }
+    if not licenses:
+        return 0
+
+    # A license can only be linked to one video file (one-to-one)
+    taken = set(
+        VideoFile.objects.filter(license__in=licenses.values())
+        .values_list('license_id', flat=True)
+    )
+
+    newly_linked = []
+    for video in video_files:
+        if video.license_id:
+            continue
+        license = licenses.get(video.number)
+        if license and license.pk not in taken:
+            video.license = license
+            taken.add(license.pk)
+            newly_linked.append(video)
+
+    if newly_linked:
+        VideoFile.objects.bulk_update(newly_linked, ['license'])
+        logger.info(f"Auto-linked {len(newly_linked)} VideoFile(s) to License")
+
+    # Sync duration from video to license (same 1 second tolerance as the signal)
+    by_pk = {lic.pk: lic for lic in licenses.values()}
+    changed = {}
+    for video in video_files:
+        license = by_pk.get(video.license_id)
+        if not license or not video.duration:
+            continue
+        video_seconds = int(video.duration.total_seconds())
+        if license.duration and abs(video_seconds - int(license.duration.total_seconds())) < 1:
+            continue
+        license.duration = timedelta(seconds=video_seconds)
+        changed[license.pk] = license
+
+    if changed:
+        License.objects.bulk_update(list(changed.values()), ['duration'])
+        logger.info(f"Synced duration for {len(changed)} License(s) from VideoFile")
+
+    return len(newly_linked)
+
+
+# Algorithm of the checksums stored in VideoFile.checksum. Stored values do
+# not record their algorithm, so changing it would make every existing
+# checksum mismatch; fast hashes are only used for copy verification
+CHECKSUM_ALGORITHM = 'sha256'
+
+
+def _hash_buffer_size() -> int:
+    """Return the read buffer size used for hashing and copying."""
+    from django.conf import settings
+    return getattr(settings, 'VIDEO_HASH_BUFFER_SIZE', 8 * 1024 * 1024)
+
+
+def new_hasher(algorithm: str):
+    """
+    Create a hash object for a supported checksum algorithm.
+
+    Args:
+        algorithm: 'sha256', 'md5' or 'blake2b' (256 bit digest)
+
+    Returns:
+        hashlib hash object
+    """
+    if algorithm == 'sha256':
+        return hashlib.sha256()
+    elif algorithm == 'md5':
+        return hashlib.md5()
+    elif algorithm == 'blake2b':
+        # 32 byte digest so the hex value fits the 64 character checksum field
+        return hashlib.blake2b(digest_size=32)
+    raise ValueError(f"Unsupported algorithm: {algorithm}")
+
+
+def calculate_checksum(file_path: str, algorithm=CHECKSUM_ALGORITHM) -> str:
     """
     Calculate file checksum.
     
     Args:
         file_path: Absolute path to the file
-        algorithm: Hash algorithm ('sha256' or 'md5')
+        algorithm: Hash algorithm ('sha256', 'md5' or 'blake2b'); checksums
+            stored in VideoFile.checksum always use CHECKSUM_ALGORITHM
         
     Returns:
         Hexadecimal checksum string
     """
-    if algorithm == 'sha256':
-        hasher = hashlib.sha256()
-    elif algorithm == 'md5':
-        hasher = hashlib.md5()
-    else:
-        raise ValueError(f"Unsupported algorithm: {algorithm}")
+    hasher = new_hasher(algorithm)
+    buffer_size = _hash_buffer_size()
     
     try:
         with open(file_path, 'rb') as f:
-            # Read in chunks to handle large files
-            for chunk in iter(lambda: f.read(8192), b''):
-                hasher.update(chunk)
+            # Read in large chunks to handle large files
+            buffer = bytearray(buffer_size)
+            view = memoryview(buffer)
+            while True:
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                hasher.update(view[:read])
         return hasher.hexdigest()
     except Exception as e:
         logger.error(f"Error calculating checksum for {file_path}: {e}")
         return ''
 
 
-def copy_file_with_progress(source: str, destination: str, verify_checksum=True) -> Tuple[bool, str]:
+def calculate_fingerprint(file_path: str, sample_size=None) -> str:
+    """
+    Calculate a fast sampled fingerprint for duplicate screening.
+
+    Hashes the file size plus samples from the head, middle and tail of the
+    file, so only a few MB are read regardless of file size. Files smaller
+    than three samples are hashed completely. Equal fingerprints mean
+    "very likely identical"; use calculate_checksum() for proof.
+
+    Args:
+        file_path: Absolute path to the file
+        sample_size: Bytes per sample, defaults to VIDEO_FINGERPRINT_SAMPLE_SIZE
+
+    Returns:
+        Hexadecimal fingerprint string or '' on error
+    """
+    if sample_size is None:
+        from django.conf import settings
+        sample_size = getattr(settings, 'VIDEO_FINGERPRINT_SAMPLE_SIZE', 4 * 1024 * 1024)
+
+    hasher = new_hasher('blake2b')
+    try:
+        size = os.path.getsize(file_path)
+        hasher.update(str(size).encode())
+        with open(file_path, 'rb') as f:
+            if size <= 3 * sample_size:
+                hasher.update(f.read())
+            else:
+                for offset in (0, (size - sample_size) // 2, size - sample_size):
+                    f.seek(offset)
+                    hasher.update(f.read(sample_size))
+        return hasher.hexdigest()
+    except Exception as e:
+        logger.error(f"Error calculating fingerprint for {file_path}: {e}")
+        return ''
+
+
+# Suffix of files being copied, renamed to the final name after verification
+PART_SUFFIX = '.part'
+
+# Bytes compared at the end of a partial copy before it is resumed
+RESUME_CHECK_SIZE = 64 * 1024
+
+# errno values meaning a zero-copy syscall is not supported for these files
+ZERO_COPY_UNSUPPORTED = {
+    errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF,
+}
+
+
+# Partial files written by copies of this process. flock() alone does not
+# keep threads apart on file systems that map it to per-process locks (NFS)
+_partials_in_use = set()
+_partials_lock = threading.Lock()
+
+
+@contextmanager
+def _claim_partial(partial: str):
+    """
+    Lock ``partial`` for a copy and yield whether the lock was taken.
+
+    The lock is held until the copy ends, so a copy never resumes or
+    overwrites a partial file another copy is still writing, in this or
+    another process. The kernel releases it when a crashed process exits.
+    """
+    with _partials_lock:
+        claimed = partial not in _partials_in_use
+        _partials_in_use.add(partial)
+    if not claimed:
+        yield False
+        return
+    fd = None
+    try:
+        fd = os.open(partial, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+        yield True
+    finally:
+        if fd is not None:
+            os.close(fd)
+        with _partials_lock:
+            _partials_in_use.discard(partial)
+
+
+def _select_copy_method(method, hashing):
+    """
+    Return the transfer method for a copy.
+
+    'auto' streams through a buffer when the data has to be hashed anyway
+    (single pass), otherwise the kernel copies without user-space buffers.
+    """
+    if method in (None, 'auto'):
+        if hashing:
+            return 'buffered'
+        if hasattr(os, 'copy_file_range'):
+            return 'copy_file_range'
+        if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+            return 'sendfile'
+        return 'buffered'
+    if method not in ('buffered', 'sendfile', 'copy_file_range'):
+        raise ValueError(f"Unsupported copy method: {method}")
+    if method != 'buffered' and not hasattr(os, method):
+        return 'buffered'
+    return method
+
+
+def _resume_offset(source: str, partial: str, file_size: int) -> int:
+    """
+    Return the number of bytes of ``partial`` that can be kept.
+
+    A partial file is only resumed if it is not larger than the source, was
+    written after the source was last modified and its tail matches the
+    source at the same offset.
+    """
+    try:
+        part_stat = os.stat(partial)
+    except OSError:
+        return 0
+
+    part_size = part_stat.st_size
+    if part_size == 0 or part_size > file_size:
+        return 0
+    if part_stat.st_mtime < os.path.getmtime(source):
+        return 0
+
+    check_size = min(RESUME_CHECK_SIZE, part_size)
+    with open(source, 'rb') as src, open(partial, 'rb') as part:
+        src.seek(part_size - check_size)
+        part.seek(part_size - check_size)
+        if src.read(check_size) != part.read(check_size):
+            return 0
+    return part_size
+
+
+def _transfer(src, dst, offset, file_size, method, rate_limiter, hasher, progress_callback):
+    """Copy ``src`` to ``dst`` from ``offset`` on, return the bytes present in ``dst``."""
+    chunk_size = _hash_buffer_size()
+    copied = offset
+
+    if method == 'buffered':
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        src.seek(offset)
+        dst.seek(offset)
+        while True:
+            read = src.readinto(buffer)
+            if not read:
+                break
+            if rate_limiter is not None:
+                rate_limiter.consume(read)
+            if hasher is not None:
+                hasher.update(view[:read])
+            dst.write(view[:read])
+            copied += read
+            if progress_callback is not None:
+                progress_callback(copied, file_size)
+        return copied
+
+    in_fd, out_fd = src.fileno(), dst.fileno()
+    dst.flush()
+    os.lseek(out_fd, offset, os.SEEK_SET)
+    while copied < file_size:
+        count = min(chunk_size, file_size - copied)
+        if rate_limiter is not None:
+            rate_limiter.consume(count)
+        try:
+            if method == 'copy_file_range':
+                sent = os.copy_file_range(in_fd, out_fd, count, copied, copied)
+            else:
+                sent = os.sendfile(out_fd, in_fd, copied, count)
+        except OSError as e:
+            if e.errno not in ZERO_COPY_UNSUPPORTED:
+                raise
+            # Not supported between these file systems, continue buffered
+            logger.debug(f"{method} not supported ({e}), falling back")
+            fallback = 'sendfile' if method == 'copy_file_range' and hasattr(os, 'sendfile') else 'buffered'
+            return _transfer(src, dst, copied, file_size, fallback, rate_limiter, hasher, progress_callback)
+        if not sent:
+            break
+        copied += sent
+        if progress_callback is not None:
+            progress_callback(copied, file_size)
+    return copied
+
+
+def copy_file_with_progress(source: str, destination: str, verify_checksum=True,
+                            algorithm=None, progress_callback=None, rate_limiter=None,
+                            resume=None, method=None) -> Tuple[bool, str]:
     """
     Copy file with progress logging and optional integrity verification.
+
+    Data is written to ``<destination>.part`` and renamed once complete and
+    verified, so an interrupted copy never leaves a truncated file under
+    the final name and can be resumed by the next attempt. The partial file
+    is locked during the copy; a copy finding it locked by another copy
+    fails instead of writing into it.
+
+    With the 'buffered' method the source hash is computed while the data
+    is streamed to the destination, so verification costs one extra read
+    (of the destination) instead of two. The zero-copy methods let the
+    kernel (or the NAS, for server-side copies) move the data and hash both
+    files afterwards.
     
     Args:
         source: Source file path
         destination: Destination file path
         verify_checksum: Whether to verify checksum after copy
+        algorithm: Hash algorithm for the verification, defaults to the
+            VIDEO_COPY_VERIFY_ALGORITHM setting (not stored anywhere, so a
+            fast hash like BLAKE2 is safe to use)
+        progress_callback: Optional callable receiving (bytes_copied, total_bytes)
+            after every written chunk
+        rate_limiter: Optional RateLimiter shared by copies on the same route
+        resume: Whether to continue a matching partial copy, defaults to the
+            VIDEO_COPY_RESUME setting
+        method: 'auto', 'buffered', 'sendfile' or 'copy_file_range',
+            defaults to the VIDEO_COPY_METHOD setting
         
     Returns:
         Tuple of (success: bool, message: str)
     """
+    from django.conf import settings
+    if algorithm is None:
+        algorithm = getattr(settings, 'VIDEO_COPY_VERIFY_ALGORITHM', 'blake2b')
+    if resume is None:
+        resume = getattr(settings, 'VIDEO_COPY_RESUME', True)
+    if method is None:
+        method = getattr(settings, 'VIDEO_COPY_METHOD', 'auto')
+
+    partial = f"{destination}{PART_SUFFIX}"
     try:
         # Ensure destination directory exists
         dest_path = Path(destination)
@@ -253,31 +684,71 @@ def copy_file_with_progress(source: str, destination: str, verify_checksum=True)
         file_size = os.path.getsize(source)
         file_size_mb = file_size / (1024 * 1024)
         
-        logger.info(f"Copying {source} to {destination} ({file_size_mb:.2f} MB)")
-        
-        # Calculate source checksum if verification is enabled
-        source_checksum = None
-        if verify_checksum:
-            logger.debug("Calculating source checksum...")
-            source_checksum = calculate_checksum(source)
-        
-        # Copy the file
-        shutil.copy2(source, destination)
-        
-        # Verify checksum
-        if verify_checksum and source_checksum:
-            logger.debug("Verifying destination checksum...")
-            dest_checksum = calculate_checksum(destination)
-            if source_checksum != dest_checksum:
-                os.remove(destination)
-                error_msg = "Checksum mismatch - file may be corrupted"
-                logger.error(error_msg)
+        with _claim_partial(partial) as claimed:
+            if not claimed:
+                error_msg = f"{partial} is being written by another copy"
+                logger.warning(error_msg)
                 return False, error_msg
+            offset = _resume_offset(source, partial, file_size) if resume else 0
+            method = _select_copy_method(method, hashing=verify_checksum)
+            hasher = new_hasher(algorithm) if verify_checksum and method == 'buffered' else None
+        
+            if offset:
+                logger.info(
+                    f"Resuming copy of {source} to {destination} at "
+                    f"{offset / (1024 * 1024):.2f} of {file_size_mb:.2f} MB ({method})"
+                )
+            else:
+                logger.info(f"Copying {source} to {destination} ({file_size_mb:.2f} MB, {method})")
+        
+            with open(source, 'rb') as src, open(partial, 'r+b' if offset else 'wb') as dst:
+                dst.truncate(offset)
+                if hasher is not None and offset:
+                    # The kept part was not hashed in this pass
+                    buffer = bytearray(_hash_buffer_size())
+                    view = memoryview(buffer)
+                    remaining = offset
+                    while remaining:
+                        read = src.readinto(view[:min(len(buffer), remaining)])
+                        if not read:
+                            break
+                        hasher.update(view[:read])
+                        remaining -= read
+                copied = _transfer(
+                    src, dst, offset, file_size, method, rate_limiter, hasher, progress_callback
+                )
+            if copied != file_size:
+                raise OSError(f"Short copy: {copied} of {file_size} bytes")
+            shutil.copystat(source, partial)
+        
+            # Verify checksum
+            if verify_checksum:
+                logger.debug("Verifying destination checksum...")
+                if hasher is not None:
+                    source_checksum = hasher.hexdigest()
+                    dest_checksum = calculate_checksum(partial, algorithm=algorithm)
+                else:
+                    from concurrent.futures import ThreadPoolExecutor
+                    with ThreadPoolExecutor(max_workers=2) as executor:
+                        source_future = executor.submit(calculate_checksum, source, algorithm)
+                        dest_future = executor.submit(calculate_checksum, partial, algorithm)
+                        source_checksum = source_future.result()
+                        dest_checksum = dest_future.result()
+                if source_checksum != dest_checksum:
+                    os.remove(partial)
+                    error_msg = "Checksum mismatch - file may be corrupted"
+                    logger.error(error_msg)
+                    return False, error_msg
         
-        logger.info(f"Successfully copied file to {destination}")
-        return True, "File copied successfully"
+            os.replace(partial, destination)
+        
+            logger.info(f"Successfully copied file to {destination}")
+            if offset:
+                return True, f"File copied successfully (resumed at {offset} bytes)"
+            return True, "File copied successfully"
         
     except Exception as e:
+        # The partial file is kept so the next attempt can resume it
         error_msg = f"Error copying file: {str(e)}"
         logger.error(error_msg)
         return False, error_msg
@@ -302,6 +773,10 @@ def verify_file_integrity(video_file) -> Tuple[bool, str]:
         return False, "File not found"
     
     try:
+        # A size mismatch is conclusive without reading the file
+        if video_file.file_size and os.path.getsize(full_path) != video_file.file_size:
+            return False, "Size mismatch - file may be corrupted"
+        
         current_checksum = calculate_checksum(full_path)
         
         if current_checksum == video_file.checksum:
@@ -313,7 +788,8 @@ def verify_file_integrity(video_file) -> Tuple[bool, str]:
         return False, f"Error verifying integrity: {str(e)}"
 
 
-def generate_thumbnail(file_path: str, output_path: str, timestamp='00:00:05') -> bool:
+def generate_thumbnail(file_path: str, output_path: str, timestamp='00:00:05',
+                       width=None) -> bool:
     """
     Generate thumbnail image from video.
     
@@ -321,6 +797,7 @@ def generate_thumbnail(file_path: str, output_path: str, timestamp='00:00:05') -
         file_path: Path to video file
         output_path: Path for output thumbnail
         timestamp: Time position for thumbnail (format: HH:MM:SS)
+        width: Scale the image to this width, keeping the aspect ratio (optional)
         
     Returns:
         True if successful, False otherwise
@@ -336,8 +813,10 @@ def generate_thumbnail(file_path: str, output_path: str, timestamp='00:00:05') -
             '-i', file_path,
             '-vframes', '1',
             '-q:v', '2',
-            output_path
         ]
+        if width:
+            cmd += ['-vf', f'scale={width}:-2']
+        cmd.append(output_path)
         
         result = subprocess.run(cmd, capture_output=True, timeout=10)
         
@@ -371,6 +850,64 @@ def get_file_modified_time(file_path: str) -> Optional[datetime]:
         return None
 
 
+def is_file_unchanged(video_file, size: int, mtime: float) -> bool:
+    """
+    Check whether a file on disk still matches the stored VideoFile record.
+
+    The comparison uses size and modification time only, so it is cheap
+    enough to run for every file of an archive scan.
+
+    Args:
+        video_file: VideoFile instance (or None)
+        size: Current file size in bytes
+        mtime: Current modification time as POSIX timestamp
+
+    Returns:
+        True if size and mtime match the stored values
+    """
+    if video_file is None or video_file.file_size is None or video_file.last_modified is None:
+        return False
+    if video_file.file_size != size:
+        return False
+    # Network shares may round timestamps, so allow sub-second differences
+    return abs(video_file.last_modified.timestamp() - mtime) < 1
+
+
+def probe_video_file(abs_path: str, with_checksum: bool = False) -> Dict:
+    """
+    Stat, probe and optionally hash a single video file.
+
+    This function does not touch the database, so it can run inside a
+    thread or process pool while the caller writes the results.
+
+    Args:
+        abs_path: Absolute path to the video file
+        with_checksum: Whether to calculate the file checksum
+
+    Returns:
+        Dictionary with 'path', 'size', 'mtime', 'metadata', 'checksum'
+        and 'error' (None on success)
+    """
+    result = {
+        'path': abs_path,
+        'size': 0,
+        'mtime': None,
+        'metadata': {},
+        'checksum': None,
+        'error': None,
+    }
+    try:
+        stat_result = os.stat(abs_path)
+        result['size'] = stat_result.st_size
+        result['mtime'] = stat_result.st_mtime
+        result['metadata'] = extract_video_metadata(abs_path)
+        if with_checksum:
+            result['checksum'] = calculate_checksum(abs_path)
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
 def check_duplicate_before_copy(source_video, destination_storage):
     """
     Check if copying would create a duplicate.
@@ -400,6 +937,13 @@ def check_duplicate_before_copy(source_video, destination_storage):
         else:
             return True, existing, "Different file with same number exists (different checksum)"
     
+    # Sampled fingerprints are a strong hint when no checksums exist
+    if source_video.fingerprint and existing.fingerprint:
+        if source_video.fingerprint == existing.fingerprint:
+            return True, existing, "Identical file already exists (same fingerprint)"
+        else:
+            return True, existing, "Different file with same number exists (different fingerprint)"
+    
     # Compare by size if no checksum
     if source_video.file_size == existing.file_size:
         return True, existing, "File with same size already exists"
@@ -0,0 +1,323 @@
+"""File system watchers reporting changed paths of storage locations."""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+
+logger = logging.getLogger('django')
+
+# inotify event masks (see inotify(7))
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# Growing files need no IN_MODIFY: the debouncer re-checks them until stable
+WATCH_MASK = (
+    IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+    | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+
+EVENT_HEADER = struct.Struct('iIII')
+
+# Network file systems do not deliver inotify events for remote changes
+NETWORK_FILESYSTEMS = {'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'afs', 'ceph', 'glusterfs', '9p'}
+
+
+def filesystem_type(path: str) -> Optional[str]:
+    """Return the file system type of the mount containing ``path``."""
+    path = os.path.realpath(path)
+    best, best_type = '', None
+    try:
+        with open('/proc/self/mounts') as mounts:
+            for line in mounts:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                mount_point = fields[1].replace('\\040', ' ')
+                if (
+                    (path == mount_point or path.startswith(mount_point.rstrip('/') + '/'))
+                    and len(mount_point) >= len(best)
+                ):
+                    best, best_type = mount_point, fields[2]
+    except OSError:
+        return None
+    return best_type
+
+
+def supports_inotify(path: str) -> bool:
+    """Return whether changes below ``path`` can be watched with inotify."""
+    if not hasattr(os, 'uname') or os.uname().sysname != 'Linux':
+        return False
+    fs_type = filesystem_type(path) or ''
+    return fs_type not in NETWORK_FILESYSTEMS and not fs_type.startswith('fuse')
+
+
+class InotifyWatcher:
+    """
+    Watch directory trees with Linux inotify.
+
+    Uses libc through ctypes, so no extra package is needed. Directories
+    created or moved into a tree are watched as well, and the files they
+    already contain are reported.
+    """
+
+    def __init__(self, roots: Iterable[str]):
+        """Start watching the directory trees below ``roots``."""
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f'inotify_init1 failed: {os.strerror(error)}')
+        self.roots = [str(root) for root in roots]
+        self.overflowed = False
+        self._paths: Dict[int, str] = {}
+        for root in self.roots:
+            self._watch_tree(root)
+
+    def _add_watch(self, directory: str) -> None:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOSPC:
+                raise OSError(error, 'inotify watch limit reached, raise fs.inotify.max_user_watches')
+            if error not in (errno.ENOENT, errno.ENOTDIR):
+                logger.warning(f'Cannot watch {directory}: {os.strerror(error)}')
+            return
+        self._paths[wd] = directory
+
+    def _watch_tree(self, directory: str, changes: Optional[Set[str]] = None) -> None:
+        """Watch a tree and, if ``changes`` is given, report its files."""
+        for root, _dirs, files in os.walk(directory):
+            self._add_watch(root)
+            if changes is not None:
+                changes.update(os.path.join(root, name) for name in files)
+
+    def wait(self, timeout: float) -> Set[str]:
+        """
+        Wait up to ``timeout`` seconds and return the changed paths.
+
+        Sets ``overflowed`` if the kernel dropped events; the caller then
+        has to rescan the watched trees.
+        """
+        changes: Set[str] = set()
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return changes
+
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            self._parse(data, changes)
+        return changes
+
+    def _parse(self, data: bytes, changes: Set[str]) -> None:
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length]
+            offset += EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                self.overflowed = True
+                continue
+            directory = self._paths.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                self._paths.pop(wd, None)
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                continue
+
+            path = os.path.join(directory, os.fsdecode(name.rstrip(b'\0')))
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._watch_tree(path, changes)
+            else:
+                changes.add(path)
+
+    def close(self) -> None:
+        """Stop watching."""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher:
+    """
+    Detect changes by comparing directory modification times.
+
+    A directory's mtime changes when entries are created, renamed or
+    deleted in it, so an idle tree costs one stat() per directory and
+    poll. Files rewritten in place under the same name are not noticed;
+    the periodic auto_scan still catches those.
+    """
+
+    def __init__(self, roots: Iterable[str]):
+        """Index the directory trees below ``roots``."""
+        self.roots = [str(root) for root in roots]
+        self.overflowed = False
+        self._dirs: Dict[str, tuple] = {}
+        for root in self.roots:
+            self._index(root)
+
+    def _index(self, directory: str, changes: Optional[Set[str]] = None) -> None:
+        """Record a directory tree and, if ``changes`` is given, report its files."""
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+            with os.scandir(directory) as entries:
+                listing = {entry.name: entry.is_dir(follow_symlinks=False) for entry in entries}
+        except OSError:
+            return
+        self._dirs[directory] = (mtime, listing)
+        for name, is_dir in listing.items():
+            path = os.path.join(directory, name)
+            if is_dir:
+                self._index(path, changes)
+            elif changes is not None:
+                changes.add(path)
+
+    def _forget(self, directory: str) -> None:
+        prefix = directory.rstrip('/') + '/'
+        for path in [path for path in self._dirs if path == directory or path.startswith(prefix)]:
+            del self._dirs[path]
+
+    def poll(self) -> Set[str]:
+        """Return the paths created or deleted since the last poll."""
+        changes: Set[str] = set()
+        for directory in list(self._dirs):
+            if directory not in self._dirs:
+                continue  # Forgotten while handling its parent
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                # Reported as deleted by the parent directory
+                self._forget(directory)
+                continue
+
+            old_mtime, old_listing = self._dirs[directory]
+            if mtime == old_mtime:
+                continue
+
+            try:
+                with os.scandir(directory) as entries:
+                    listing = {entry.name: entry.is_dir(follow_symlinks=False) for entry in entries}
+            except OSError:
+                continue
+            self._dirs[directory] = (mtime, listing)
+
+            for name in listing.keys() - old_listing.keys():
+                path = os.path.join(directory, name)
+                if listing[name]:
+                    self._index(path, changes)
+                else:
+                    changes.add(path)
+            for name in old_listing.keys() - listing.keys():
+                path = os.path.join(directory, name)
+                changes.add(path)
+                if old_listing[name]:
+                    self._forget(path)
+        return changes
+
+    def wait(self, timeout: float) -> Set[str]:
+        """Sleep ``timeout`` seconds and return the changed paths."""
+        time.sleep(timeout)
+        return self.poll()
+
+    def close(self) -> None:
+        """Stop watching."""
+        self._dirs.clear()
+
+
+def create_watcher(roots: List[str], mode: str = 'auto'):
+    """
+    Return a watcher for ``roots``.
+
+    Args:
+        roots: Directories to watch recursively
+        mode: 'inotify', 'poll', or 'auto' to use inotify unless a root is
+            on a network file system, where it would miss remote changes
+
+    Returns:
+        InotifyWatcher or PollingWatcher
+    """
+    if mode == 'auto':
+        mode = 'inotify' if all(supports_inotify(root) for root in roots) else 'poll'
+    if mode == 'inotify':
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError) as e:
+            logger.warning(f'inotify unavailable, falling back to polling: {str(e)}')
+    return PollingWatcher(roots)
+
+
+class Debouncer:
+    """
+    Hold back changed paths until their size and mtime stop changing.
+
+    Files delivered over the network grow for minutes; probing them early
+    would store a truncated duration. Deleted paths are released at once.
+    """
+
+    def __init__(self, settle_time: float):
+        """Release paths unchanged for ``settle_time`` seconds."""
+        self.settle_time = settle_time
+        self._pending: Dict[str, tuple] = {}
+
+    def __len__(self):
+        """Return the number of pending paths."""
+        return len(self._pending)
+
+    @staticmethod
+    def _signature(path: str):
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            return None
+        return stat_result.st_size, stat_result.st_mtime_ns
+
+    def add(self, paths: Iterable[str], now: Optional[float] = None) -> None:
+        """Start or restart tracking ``paths``."""
+        now = time.monotonic() if now is None else now
+        for path in paths:
+            self._pending[path] = (self._signature(path), now)
+
+    def pop_ready(self, now: Optional[float] = None) -> List[str]:
+        """Return and forget the paths that have settled."""
+        now = time.monotonic() if now is None else now
+        ready = []
+        for path, (signature, since) in list(self._pending.items()):
+            current = self._signature(path)
+            if current is None:
+                ready.append(path)
+            elif current != signature:
+                self._pending[path] = (current, now)
+                continue
+            elif now - since >= self.settle_time:
+                ready.append(path)
+            else:
+                continue
+            del self._pending[path]
+        return ready
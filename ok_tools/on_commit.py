@@ -0,0 +1,63 @@
+"""Work collected during a transaction and run once after it commits."""
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db import connections
+from django.db import transaction
+import weakref
+
+
+class CommitBatch:
+    """Work of one transaction, run by ``run`` after the commit."""
+
+    def __init__(self):
+        """Start an empty batch."""
+        self.done = False
+
+    def run(self):
+        """Run the collected work."""
+        self.done = True
+        self.execute()
+
+    def execute(self):
+        """Process the collected work, implemented by subclasses."""
+        raise NotImplementedError
+
+
+def current_batch(name, factory, using=DEFAULT_DB_ALIAS, per_savepoint=False):
+    """
+    Return the batch ``name`` run after the current transaction commits.
+
+    The batch is created with ``factory`` and registered with
+    ``transaction.on_commit`` on first use. Batches are keyed by the
+    savepoints open when they were created and only reused while all of
+    them are still open, so work is never added to a batch whose savepoint
+    was rolled back. The pending commit callback is the only strong
+    reference to a batch: when Django discards the callbacks of a rolled
+    back transaction, the batch disappears from the lookup as well. A
+    batch that already ran is replaced by a new one.
+
+    With ``per_savepoint`` each savepoint gets its own batch, so the work
+    collected in a rolled back savepoint is dropped with it. Otherwise the
+    batch of an enclosing savepoint or of the transaction is reused, and
+    the work of a rolled back inner savepoint stays in it.
+
+    Must be called inside an atomic block; outside of transactions callers
+    do their work at once.
+
+    Args:
+        name: Name of the batch, unique per kind of work
+        factory: Callable returning a new CommitBatch
+        using: Database alias of the transaction
+        per_savepoint: Whether to keep one batch per savepoint
+    """
+    connection = connections[using]
+    batches = connection.__dict__.setdefault('commit_batches', weakref.WeakValueDictionary())
+    savepoints = tuple(connection.savepoint_ids)
+    depths = [len(savepoints)] if per_savepoint else range(len(savepoints) + 1)
+    for depth in depths:
+        batch = batches.get((name, savepoints[:depth]))
+        if batch is not None and not batch.done:
+            return batch
+    batch = batches[(name, savepoints)] = factory()
+    transaction.on_commit(batch.run, using=using)
+    return batch
@@ -14,6 +14,7 @@ from pathlib import Path
 import configparser
 import logging
 import os
+import tempfile
 
 
 # Logger for settings.py
@@ -132,6 +133,40 @@ DATABASES = {
     }
 }
 
+# Cache shared by all worker processes, used for dashboard statistics.
+# cache_backend is "file" (default), "db" (run ``manage.py createcachetable``),
+# "redis" (needs the redis package, cache_location is the URL) or "locmem"
+# (per process, for development). The file backend's add() is not atomic
+# across processes, so with several workers the dashboard lock and the
+# generation tokens can race: a result may be computed more than once or,
+# rarely, cached under a generation that was just replaced until it times
+# out. Use "db" or "redis" when running more than one worker.
+CACHE_BACKENDS = {
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "db": "django.core.cache.backends.db.DatabaseCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+}
+CACHE_LOCATIONS = {
+    "file": os.path.join(tempfile.gettempdir(), "ok-tools-cache"),
+    "db": "ok_tools_cache",
+    "redis": "redis://127.0.0.1:6379",
+    "locmem": "ok-tools",
+}
+_cache_backend = config.get("django", "cache_backend", fallback="file")
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[_cache_backend],
+        "LOCATION": config.get(
+            "django", "cache_location", fallback=CACHE_LOCATIONS[_cache_backend]
+        ),
+    }
+}
+
+# Seconds dashboard widget results are cached; changes to the underlying
+# data invalidate them earlier
+DASHBOARD_CACHE_TIMEOUT = config.getint("django", "dashboard_cache_timeout", fallback=300)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -266,6 +301,14 @@ DEFAULT_FROM_EMAIL = config.get(
 )
 
 
+# Audit log: insert the entries of a transaction with one bulk insert after
+# it commits, and skip inventory entries that only change rental counters
+# (rental transactions record those)
+AUDIT_LOG_BUFFERED = config.getboolean("django", "audit_log_buffered", fallback=True)
+AUDIT_LOG_SKIP_COUNTER_CHANGES = config.getboolean(
+    "django", "audit_log_skip_counter_changes", fallback=True
+)
+
 # Organization settings - configurable via config file
 OK_NAME = config.get("organization", "name", fallback="Offener Kanal Merseburg-Querfurt e.V.")
 OK_NAME_SHORT = config.get("organization", "short_name", fallback="OK Merseburg")
@@ -374,3 +417,64 @@ VIDEO_AUTO_DETECT_DUPLICATES = config.getboolean("media", "auto_detect_duplicate
 # NAS UNC paths for VLC integration
 NAS_ARCHIVE_UNC_PATH = config.get("nas_storage", "archive_unc_path", fallback="\\\\192.168.88.101\\FilmArchiv")
 NAS_PLAYOUT_UNC_PATH = config.get("nas_storage", "playout_unc_path", fallback="\\\\192.168.88.2\\Sendedaten")
+
+# Video storage scanning (parallel ffprobe/checksum workers)
+VIDEO_SCAN_WORKERS = config.getint("media", "scan_workers", fallback=os.cpu_count() or 4)
+
+# Persistent ffprobe result cache (SQLite file keyed by path, size, mtime and inode)
+VIDEO_PROBE_CACHE_ENABLED = config.getboolean("media", "probe_cache", fallback=True)
+VIDEO_PROBE_CACHE_PATH = config.get(
+    "media", "probe_cache_path", fallback=os.path.join(BASE_DIR, "ffprobe_cache.sqlite3")
+)
+
+# Hashing: read buffer, algorithm for copy verification (never stored, so a
+# fast hash is fine; stored checksums are always SHA-256) and fingerprint
+# sample size
+VIDEO_HASH_BUFFER_SIZE = config.getint("media", "hash_buffer_size", fallback=8 * 1024 * 1024)
+VIDEO_COPY_VERIFY_ALGORITHM = config.get("media", "copy_verify_algorithm", fallback="blake2b")
+VIDEO_FINGERPRINT_SAMPLE_SIZE = config.getint("media", "fingerprint_sample_size", fallback=4 * 1024 * 1024)
+
+# Background copy jobs (run_copy_jobs worker): queue playout copies instead of
+# copying while saving a plan, parallel copies per worker and minutes without
+# heartbeat (sent every 30 seconds while a job runs) after which a running job
+# is requeued
+VIDEO_COPY_IN_BACKGROUND = config.getboolean("media", "copy_in_background", fallback=True)
+VIDEO_COPY_WORKERS = config.getint("media", "copy_workers", fallback=2)
+VIDEO_COPY_JOB_TIMEOUT = config.getint("media", "copy_job_timeout", fallback=30)
+
+# Copy engine: parallel copies per source/destination route and combined
+# bandwidth limit in MB/s (0 = unlimited) unless configured as CopyRoute,
+# transfer method (auto, buffered, sendfile, copy_file_range) and resuming
+# of partial copies
+VIDEO_COPY_ROUTE_WORKERS = config.getint("media", "copy_route_workers", fallback=2)
+VIDEO_COPY_BANDWIDTH_LIMIT = config.getint("media", "copy_bandwidth_limit", fallback=0)
+VIDEO_COPY_METHOD = config.get("media", "copy_method", fallback="auto")
+VIDEO_COPY_RESUME = config.getboolean("media", "copy_resume", fallback=True)
+
+# Video streaming offload to the web server: "" (stream from Django),
+# "x-accel-redirect" (nginx) or "x-sendfile" (Apache/lighttpd). For nginx,
+# stream_offload_map lists "<path prefix>=<internal location>" pairs
+# separated by whitespace
+VIDEO_STREAM_OFFLOAD = config.get("media", "stream_offload", fallback="")
+VIDEO_STREAM_OFFLOAD_MAP = [
+    tuple(pair.split("=", 1))
+    for pair in config.get("media", "stream_offload_map", fallback="").split()
+    if "=" in pair
+]
+
+# Thumbnails and seek-preview sprites (generate_previews): cache directory,
+# parallel ffmpeg processes, image sizes and the ffmpeg timeout in seconds
+VIDEO_PREVIEW_CACHE_DIR = config.get(
+    "media", "preview_cache_dir", fallback=os.path.join(BASE_DIR, "preview_cache")
+)
+VIDEO_PREVIEW_WORKERS = config.getint("media", "preview_workers", fallback=max((os.cpu_count() or 2) // 2, 1))
+VIDEO_THUMBNAIL_WIDTH = config.getint("media", "thumbnail_width", fallback=320)
+VIDEO_SPRITE_TILE_WIDTH = config.getint("media", "sprite_tile_width", fallback=160)
+VIDEO_SPRITE_MAX_TILES = config.getint("media", "sprite_max_tiles", fallback=100)
+VIDEO_PREVIEW_TIMEOUT = config.getint("media", "preview_timeout", fallback=600)
+
+# Storage watcher (watch_storage): change detection ('auto', 'inotify' or
+# 'poll'), seconds between polls and seconds a file must stop growing
+VIDEO_WATCH_MODE = config.get("media", "watch_mode", fallback="auto")
+VIDEO_WATCH_POLL_INTERVAL = config.getfloat("media", "watch_poll_interval", fallback=10)
+VIDEO_WATCH_SETTLE_TIME = config.getfloat("media", "watch_settle_time", fallback=30)
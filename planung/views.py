@@ -87,10 +87,15 @@ def save_day_plan(request):
         if not plan_data.get('draft') and getattr(settings, 'VIDEO_AUTO_COPY_ON_SCHEDULE', False):
             try:
                 from media_files.tasks import copy_videos_for_plan
+                from media_files.tasks import enqueue_copy_jobs
                 numbers = [item.get('number') for item in plan_data.get('items', []) if item.get('number')]
                 if numbers:
                     logger.info(f"Triggering auto-copy for {len(numbers)} videos for plan {date}")
-                    copy_videos_for_plan(numbers, date)
+                    if getattr(settings, 'VIDEO_COPY_IN_BACKGROUND', True):
+                        user = request.user if request.user.is_authenticated else None
+                        enqueue_copy_jobs(numbers, date, user=user)
+                    else:
+                        copy_videos_for_plan(numbers, date)
             except ImportError:
                 logger.warning("media_files module not available, skipping auto-copy")
             except Exception as e:
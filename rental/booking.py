@@ -0,0 +1,120 @@
+"""Bulk booking of rental items with their transactions and inventory counters."""
+
+from .models import RentalItem
+from .models import RentalTransaction
+from .stats import queue_rental_stats
+from dashboard.cache import invalidate_widget_cache
+from django.db.models import Case
+from django.db.models import F
+from django.db.models import IntegerField
+from django.db.models import Value
+from django.db.models import When
+from django.db.models.functions import Greatest
+from inventory.models import InventoryItem
+
+
+# Counter changes of InventoryItem per transaction type (field: sign)
+INVENTORY_COUNTER_UPDATES = {
+    'reserve': {'reserved_quantity': 1},
+    'issue': {'reserved_quantity': -1, 'rented_quantity': 1},
+    'return': {'rented_quantity': -1},
+    'cancel': {'reserved_quantity': -1},
+}
+
+# RentalItem counter increased per transaction type
+RENTAL_ITEM_COUNTERS = {
+    'issue': 'quantity_issued',
+    'return': 'quantity_returned',
+}
+
+
+def apply_inventory_counters(changes):
+    """
+    Apply the counter changes of transactions to their inventory items.
+
+    Changes are summed per item and written with a single UPDATE
+    statement on F() expressions, so concurrent bookings cannot overwrite
+    each other. Counters never drop below zero. The update sends no
+    signals, so the inventory dashboard is invalidated here.
+
+    Args:
+        changes: Iterable of (inventory_item_id, transaction_type, quantity)
+    """
+    deltas = {}
+    for inventory_item_id, transaction_type, quantity in changes:
+        for field, sign in INVENTORY_COUNTER_UPDATES.get(transaction_type, {}).items():
+            item_deltas = deltas.setdefault(inventory_item_id, {})
+            item_deltas[field] = item_deltas.get(field, 0) + sign * int(quantity or 0)
+
+    updates = {}
+    for field in ('reserved_quantity', 'rented_quantity'):
+        whens = [
+            When(id=item_id, then=Value(item_deltas[field]))
+            for item_id, item_deltas in deltas.items()
+            if item_deltas.get(field)
+        ]
+        if whens:
+            updates[field] = Greatest(
+                F(field) + Case(*whens, default=Value(0), output_field=IntegerField()), 0
+            )
+    if updates:
+        InventoryItem.objects.filter(id__in=list(deltas)).update(**updates)
+        invalidate_widget_cache('inventory')
+
+
+def book_rental_items(rental_request, quantities, transaction_type, performed_by, notes='',
+                      issued=None):
+    """
+    Create the rental items of a request with their transactions in bulk.
+
+    Items and transactions are inserted with one bulk_create each and the
+    inventory counters changed with one grouped update, instead of three
+    to four queries per item. bulk_create sends no post_save signals, so
+    ``update_inventory_quantities`` does not run; issued quantities are
+    set on the new items directly and the statistics and the inventory
+    dashboard are refreshed here.
+
+    Args:
+        rental_request: RentalRequest the items belong to
+        quantities: Iterable of (inventory_item_id, quantity)
+        transaction_type: 'reserve' or 'issue', or None to record no
+            transactions and leave the inventory counters unchanged
+        performed_by: User recorded on the transactions
+        notes: Notes of the transactions
+        issued: Whether the items are issued at once (default: whether
+            transaction_type is 'issue')
+
+    Returns:
+        list: Created RentalItem instances
+    """
+    if issued is None:
+        issued = transaction_type == 'issue'
+    rental_items = RentalItem.objects.bulk_create([
+        RentalItem(
+            rental_request=rental_request,
+            inventory_item_id=inventory_item_id,
+            quantity_requested=quantity,
+            quantity_issued=quantity if issued else 0,
+        )
+        for inventory_item_id, quantity in quantities
+    ])
+    queue_rental_stats(rental_request_ids=[rental_request.id])
+    invalidate_widget_cache('inventory')
+    if transaction_type is None:
+        return rental_items
+
+    RentalTransaction.objects.bulk_create([
+        RentalTransaction(
+            rental_item=rental_item,
+            transaction_type=transaction_type,
+            quantity=rental_item.quantity_requested,
+            performed_by=performed_by,
+            notes=notes,
+        )
+        for rental_item in rental_items
+    ])
+    apply_inventory_counters(
+        (rental_item.inventory_item_id, transaction_type, rental_item.quantity_requested)
+        for rental_item in rental_items
+    )
+    return rental_items
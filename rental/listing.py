@@ -0,0 +1,167 @@
+"""Keyset-paginated listing of rental requests with summaries computed in SQL."""
+
+from .models import RentalItem
+from .models import RentalRequest
+from .models import RoomRental
+from base64 import urlsafe_b64decode
+from base64 import urlsafe_b64encode
+from datetime import datetime
+from django.db import connection
+from django.db.models import Count
+from django.db.models import Exists
+from django.db.models import F
+from django.db.models import IntegerField
+from django.db.models import OuterRef
+from django.db.models import Q
+from django.db.models import Subquery
+from django.db.models import Value
+from django.db.models import Window
+from django.db.models.functions import Coalesce
+from django.db.models.functions import RowNumber
+
+
+# Rentals per page and items or rooms listed per rental
+PAGE_SIZE = 20
+SUMMARY_SIZE = 3
+
+
+def encode_cursor(rental):
+    """Return the opaque cursor pointing after ``rental``."""
+    raw = f'{rental.created_at.isoformat()}|{rental.id}'
+    return urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Return the (created_at, id) position encoded in ``cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        created_at, rental_id = urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(rental_id)
+    except (TypeError, UnicodeError, ValueError) as e:
+        raise ValueError(f'Invalid cursor: {cursor}') from e
+
+
+def _count_of(model):
+    """Return a subquery counting the rows of ``model`` per rental request."""
+    counts = model.objects.filter(
+        rental_request=OuterRef('pk')
+    ).order_by().values('rental_request').annotate(count=Count('id')).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def filter_rentals(status='all', type_filter='all', user_query=''):
+    """
+    Return the rental requests matching the list filters, newest first.
+
+    The type filter tests for items and rooms with EXISTS subqueries
+    instead of joins, so no DISTINCT over the whole result is needed.
+    """
+    has_items = Exists(RentalItem.objects.filter(rental_request=OuterRef('pk')))
+    has_rooms = Exists(RoomRental.objects.filter(rental_request=OuterRef('pk')))
+
+    rentals = RentalRequest.objects.all()
+    if status != 'all':
+        rentals = rentals.filter(status=status)
+
+    if type_filter == 'equipment':
+        rentals = rentals.filter(has_items, ~has_rooms)
+    elif type_filter == 'room':
+        rentals = rentals.filter(has_rooms, ~has_items)
+    elif type_filter == 'mixed':
+        rentals = rentals.filter(has_items, has_rooms)
+
+    if user_query:
+        rentals = rentals.filter(
+            Q(user__email__icontains=user_query)
+            | Q(user__profile__first_name__icontains=user_query)
+            | Q(user__profile__last_name__icontains=user_query)
+        )
+    return rentals.order_by('-created_at', '-id')
+
+
+def estimated_count(rentals, filtered):
+    """
+    Return the number of rentals and whether it is an estimate.
+
+    Without filters PostgreSQL's planner statistics give the size of the
+    table without scanning it. Filtered lists, other databases and tables
+    never analyzed are counted exactly.
+    """
+    if not filtered and connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [RentalRequest._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            return row[0], True
+    return rentals.count(), False
+
+
+def _first_rows(queryset, rental_ids):
+    """Return the first SUMMARY_SIZE rows of ``queryset`` per rental request."""
+    return queryset.filter(rental_request_id__in=rental_ids).annotate(
+        row_number=Window(RowNumber(), partition_by=[F('rental_request_id')], order_by=F('id').asc())
+    ).filter(row_number__lte=SUMMARY_SIZE).order_by('rental_request_id', 'id')
+
+
+def rental_page(rentals, cursor=None, offset=0, size=PAGE_SIZE):
+    """
+    Return one page of rentals with their counts and summaries.
+
+    Pages continue after the (created_at, id) position of ``cursor``, so
+    every page reads only its own rows from the index however deep into
+    the history it is. ``offset`` is used for page numbers without a
+    cursor. Item and room counts are annotated as subqueries and the
+    first items and rooms of all rentals on the page are read with one
+    window query each.
+
+    Returns:
+        tuple: (list of RentalRequest with ``items_count``,
+        ``rooms_count``, ``items_summary`` and ``rooms_summary``,
+        cursor of the next page or None)
+    """
+    rentals = rentals.select_related(
+        'user__profile', 'created_by__profile'
+    ).annotate(
+        items_count=_count_of(RentalItem),
+        rooms_count=_count_of(RoomRental),
+    )
+    if cursor:
+        created_at, rental_id = decode_cursor(cursor)
+        rentals = rentals.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=rental_id)
+        )
+        offset = 0
+    page = list(rentals[offset:offset + size + 1])
+    next_cursor = encode_cursor(page[size - 1]) if len(page) > size else None
+    page = page[:size]
+
+    rental_ids = [rental.id for rental in page]
+    items_summary = {rental_id: [] for rental_id in rental_ids}
+    for row in _first_rows(RentalItem.objects, rental_ids).values(
+        'rental_request_id', 'quantity_requested',
+        'inventory_item__description', 'inventory_item__inventory_number',
+    ):
+        items_summary[row['rental_request_id']].append({
+            'description': row['inventory_item__description'] or row['inventory_item__inventory_number'],
+            'quantity': row['quantity_requested'],
+        })
+    rooms_summary = {rental_id: [] for rental_id in rental_ids}
+    for row in _first_rows(RoomRental.objects, rental_ids).values(
+        'rental_request_id', 'room__name', 'people_count',
+    ):
+        rooms_summary[row['rental_request_id']].append({
+            'name': row['room__name'],
+            'people_count': row['people_count'],
+        })
+
+    for rental in page:
+        rental.items_summary = items_summary[rental.id]
+        rental.rooms_summary = rooms_summary[rental.id]
+    return page, next_cursor
@@ -1,16 +1,10 @@
-from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
-from django.db import transaction
-from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from rental.models import RentalRequest
-from rental.models import RentalTransaction
-from rental.models import RoomRental
+from rental.expiry import expire_room_rentals
 import logging
 
 
 logger = logging.getLogger(__name__)
-OKUser = get_user_model()
 
 
 class Command(BaseCommand):
@@ -35,33 +29,34 @@ class Command(BaseCommand):
         """Execute command logic to expire reservations and rentals."""
         dry_run = options['dry_run']
         verbose = options['verbose']
+        # Runs every minute, so runs without expired rentals stay silent
+        # unless asked for
+        chatty = verbose or dry_run or options['verbosity'] > 1
 
-        self.stdout.write(
-            self.style.SUCCESS('🚀 Starting automatic expiration of expired room rentals...')
-        )
+        if chatty:
+            self.stdout.write(
+                self.style.SUCCESS('🚀 Starting automatic expiration of expired room rentals...')
+            )
 
         if dry_run:
             self.stdout.write(
                 self.style.WARNING('⚠️  TEST MODE - changes will not be applied')
             )
 
-        # Find all active room rentals that have expired
-        now = timezone.now()
-        expired_rentals = []
-
-        # Get all active room rentals
-        active_room_rentals = RoomRental.objects.filter(
-            rental_request__status__in=['reserved', 'issued']
-        ).select_related('rental_request', 'room')
-
-        for room_rental in active_room_rentals:
-            if room_rental.is_expired:
-                expired_rentals.append(room_rental)
-
-        if not expired_rentals:
+        try:
+            expired_rentals = expire_room_rentals(dry_run=dry_run)
+        except Exception as e:
             self.stdout.write(
-                self.style.SUCCESS('✅ No expired room rentals found')
+                self.style.ERROR(f'\n❌ Error during processing: {str(e)}')
             )
+            logger.error(_('Error during automatic expiration of expired room rentals: {}').format(str(e)))
+            raise
+
+        if not expired_rentals:
+            if chatty:
+                self.stdout.write(
+                    self.style.SUCCESS('✅ No expired room rentals found')
+                )
             return
 
         self.stdout.write(
@@ -97,81 +92,18 @@ class Command(BaseCommand):
             )
             return
 
-        # Apply changes
-        self.stdout.write('\n🔄 Applying changes...')
-
-        try:
-            with transaction.atomic():
-                processed_count = 0
-
-                for room_rental in expired_rentals:
-                    rental_request = room_rental.rental_request
-
-                    if rental_request.status == 'reserved':
-                        # For room reservations: create return transaction (auto-return)
-                        RentalTransaction.objects.create(
-                            room=room_rental.room,
-                            transaction_type='return',
-                            quantity=1,  # Room = 1 unit
-                            notes=_('Automatic return of expired room reservation: {}').format(room_rental.room.name),
-                            performed_by=OKUser.objects.filter(is_superuser=True).first()
-                        )
-
-                        # Update request status to returned (not cancelled)
-                        rental_request.status = 'returned'
-                        rental_request.actual_end_date = now
-                        rental_request.save()
-
-                        if verbose:
-                            self.stdout.write(
-                                f'  ✅ Auto-returned room reservation: {room_rental.room.name}'
-                            )
-
-                    elif rental_request.status == 'issued':
-                        # For rentals: create return transaction
-                        RentalTransaction.objects.create(
-                            room=room_rental.room,
-                            transaction_type='return',
-                            quantity=1,  # Room = 1 unit
-                            notes=_('Automatic return of expired room rental: {}').format(room_rental.room.name),
-                            performed_by=OKUser.objects.filter(is_superuser=True).first()
-                        )
-
-                        # Update request status and return date
-                        rental_request.status = 'returned'
-                        rental_request.actual_end_date = now
-                        rental_request.save()
-
-                        if verbose:
-                            self.stdout.write(
-                                f'  ✅ Returned room: {room_rental.room.name}'
-                            )
-
-                    processed_count += 1
-
-                self.stdout.write(
-                    self.style.SUCCESS(f'\n✅ Successfully processed {processed_count} expired room rentals')
-                )
-
-                # Log result
-                logger.info(
-                    _('Automatic expiration of expired room rentals: '
-                      'processed {} rentals, '
-                      'auto-returned reservations: {}, '
-                      'returned rentals: {}').format(
-                        processed_count,
-                        len(reserved_expired),
-                        len(issued_expired)
-                    )
-                )
+        self.stdout.write(
+            self.style.SUCCESS(f'\n✅ Successfully processed {len(expired_rentals)} expired room rentals')
+        )
 
-        except Exception as e:
-            self.stdout.write(
-                self.style.ERROR(f'\n❌ Error during processing: {str(e)}')
+        # Log result
+        logger.info(
+            _('Automatic expiration of expired room rentals: '
+              'processed {} rentals, '
+              'auto-returned reservations: {}, '
+              'returned rentals: {}').format(
+                len(expired_rentals),
+                len(reserved_expired),
+                len(issued_expired)
             )
-            logger.error(_('Error during automatic expiration of expired room rentals: {}').format(str(e)))
-            raise
-
-        self.stdout.write(
-            self.style.SUCCESS('\n🎉 Automatic expiration of expired room rentals completed!')
         )
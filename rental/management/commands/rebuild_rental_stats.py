@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from rental.models import InventoryRentalStats
+from rental.models import UserRentalStats
+from rental.stats import refresh_rental_stats
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Management command to rebuild the rental statistics tables."""
+
+    help = 'Recompute the rental statistics of all inventory items and users from the rental history.'
+
+    def handle(self, *args, **options):
+        """Execute command logic to rebuild the statistics."""
+        refresh_rental_stats()
+        items = InventoryRentalStats.objects.count()
+        users = UserRentalStats.objects.count()
+        logger.info(f'Rebuilt rental statistics of {items} items and {users} users')
+        if options['verbosity'] > 1:
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ Rebuilt rental statistics of {items} items and {users} users'
+            ))
@@ -0,0 +1,107 @@
+from dashboard.cache import invalidate_widget_cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from inventory.models import InventoryItem
+from rental.booking import INVENTORY_COUNTER_UPDATES
+from rental.models import RentalTransaction
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+def ledger_quantities():
+    """
+    Return the reserved and rented quantities recorded by transactions.
+
+    Replays the transaction log of each item in the order it was written
+    and clamps the counters at zero after every transaction, like
+    ``apply_inventory_counters`` does. Summing the log instead would drop
+    reservations made after an item was issued without one.
+
+    Returns:
+        dict: Inventory item ID to (reserved_quantity, rented_quantity)
+    """
+    transactions = RentalTransaction.objects.filter(
+        rental_item__isnull=False,
+    ).values_list(
+        'rental_item__inventory_item_id', 'transaction_type', 'quantity',
+    ).order_by('performed_at', 'id')
+
+    counters = {}
+    for item_id, transaction_type, quantity in transactions.iterator(chunk_size=2000):
+        item_counters = counters.setdefault(item_id, {'reserved_quantity': 0, 'rented_quantity': 0})
+        for field, sign in INVENTORY_COUNTER_UPDATES.get(transaction_type, {}).items():
+            item_counters[field] = max(0, item_counters[field] + sign * int(quantity or 0))
+    return {
+        item_id: (item_counters['reserved_quantity'], item_counters['rented_quantity'])
+        for item_id, item_counters in counters.items()
+    }
+
+
+class Command(BaseCommand):
+    """Management command to recompute inventory counters from rental transactions."""
+
+    help = 'Recompute reserved and rented quantities of inventory items from the rental transaction log.'
+
+    def add_arguments(self, parser):
+        """Register command-line arguments."""
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would be done without applying changes',
+        )
+        parser.add_argument(
+            '--verbose',
+            action='store_true',
+            help='Verbose output',
+        )
+
+    def handle(self, *args, **options):
+        """Execute command logic to correct drifted counters."""
+        dry_run = options['dry_run']
+        verbose = options['verbose']
+
+        with transaction.atomic():
+            # Lock the counters first: transactions committing meanwhile wait
+            # and apply their F() updates on top of the corrected values
+            counters = list(
+                InventoryItem.objects.select_for_update()
+                .values_list('id', 'inventory_number', 'reserved_quantity', 'rented_quantity')
+                .order_by('id')
+            )
+            ledger = ledger_quantities()
+
+            corrections = []
+            for item_id, number, reserved, rented in counters:
+                expected = ledger.get(item_id, (0, 0))
+                if (reserved or 0, rented or 0) == expected:
+                    continue
+                corrections.append(InventoryItem(
+                    id=item_id, reserved_quantity=expected[0], rented_quantity=expected[1],
+                ))
+                if verbose:
+                    self.stdout.write(
+                        f'  {number}: reserved {reserved} → {expected[0]}, '
+                        f'rented {rented} → {expected[1]}'
+                    )
+
+            if corrections and not dry_run:
+                InventoryItem.objects.bulk_update(
+                    corrections, ['reserved_quantity', 'rented_quantity'], batch_size=500,
+                )
+                invalidate_widget_cache('inventory')
+
+        if not corrections:
+            self.stdout.write(self.style.SUCCESS('✅ All inventory counters match the transaction log'))
+            return
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️  TEST MODE - {len(corrections)} of {len(counters)} items would be corrected'
+            ))
+        else:
+            logger.warning(f'Corrected inventory counters of {len(corrections)} items')
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ Corrected {len(corrections)} of {len(counters)} items'
+            ))
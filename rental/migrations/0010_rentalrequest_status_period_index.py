@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:00
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental', '0009_equipmenttemplate_equipmenttemplateitem'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rentalrequest',
+            index=models.Index(
+                fields=['status', 'requested_start_date', 'requested_end_date'],
+                name='rental_req_status_period',
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:00
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental', '0010_rentalrequest_status_period_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rentalrequest',
+            index=models.Index(
+                fields=['-created_at', '-id'],
+                name='rental_req_created_id',
+            ),
+        ),
+    ]
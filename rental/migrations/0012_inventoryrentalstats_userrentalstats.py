@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:00
+
+from django.conf import settings
+from django.db import migrations
+from django.db import models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('inventory', '0034_merge_20250819_1733'),
+        ('rental', '0011_rentalrequest_created_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryRentalStats',
+            fields=[
+                ('inventory_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rental_stats', serialize=False, to='inventory.inventoryitem', verbose_name='Inventory item')),
+                ('rental_count', models.PositiveIntegerField(default=0, verbose_name='Rentals')),
+                ('units_requested', models.PositiveIntegerField(default=0, verbose_name='Units requested')),
+                ('units_issued', models.PositiveIntegerField(default=0, verbose_name='Units issued')),
+                ('last_rental_at', models.DateTimeField(blank=True, null=True, verbose_name='Last rental')),
+                ('overdue_count', models.PositiveIntegerField(default=0, verbose_name='Overdue rentals')),
+            ],
+            options={
+                'verbose_name': 'Inventory rental statistics',
+                'verbose_name_plural': 'Inventory rental statistics',
+                'indexes': [models.Index(fields=['-rental_count'], name='inv_rental_stats_count')],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserRentalStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rental_stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='User')),
+                ('rental_count', models.PositiveIntegerField(default=0, verbose_name='Rentals')),
+                ('active_count', models.PositiveIntegerField(default=0, verbose_name='Active rentals')),
+                ('completed_count', models.PositiveIntegerField(default=0, verbose_name='Completed rentals')),
+                ('units_issued', models.PositiveIntegerField(default=0, verbose_name='Units issued')),
+                ('last_rental_at', models.DateTimeField(blank=True, null=True, verbose_name='Last rental')),
+                ('overdue_count', models.PositiveIntegerField(default=0, verbose_name='Overdue rentals')),
+            ],
+            options={
+                'verbose_name': 'User rental statistics',
+                'verbose_name_plural': 'User rental statistics',
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:00
+
+from django.db import migrations
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import Max
+from django.db.models import Q
+from django.db.models import Sum
+from django.utils import timezone
+
+
+def backfill_rental_stats(apps, schema_editor):
+    """
+    Compute the rental statistics of the existing rental history.
+
+    Same aggregations as ``rental.stats.refresh_rental_stats``, written
+    against the historical models so later changes to the rental models
+    do not break this migration. The tables were created empty in 0012.
+    """
+    RentalItem = apps.get_model('rental', 'RentalItem')
+    RentalRequest = apps.get_model('rental', 'RentalRequest')
+    InventoryRentalStats = apps.get_model('rental', 'InventoryRentalStats')
+    UserRentalStats = apps.get_model('rental', 'UserRentalStats')
+    now = timezone.now()
+
+    item_rows = RentalItem.objects.values('inventory_item_id').annotate(
+        rental_count=Count('id'),
+        units_requested=Sum('quantity_requested'),
+        units_issued=Sum('quantity_issued'),
+        last_rental_at=Max('rental_request__requested_start_date'),
+        overdue_count=Count('id', filter=Q(
+            rental_request__status='issued',
+            rental_request__requested_end_date__lt=now,
+            quantity_issued__gt=F('quantity_returned'),
+        )),
+    ).order_by()
+    InventoryRentalStats.objects.bulk_create(
+        [InventoryRentalStats(**row) for row in item_rows], batch_size=500)
+
+    units_issued = dict(
+        RentalItem.objects.values('rental_request__user_id').annotate(
+            units=Sum('quantity_issued')
+        ).order_by().values_list('rental_request__user_id', 'units')
+    )
+    user_rows = RentalRequest.objects.values('user_id').annotate(
+        rental_count=Count('id'),
+        active_count=Count('id', filter=Q(status__in=['reserved', 'issued'])),
+        completed_count=Count('id', filter=Q(status='returned')),
+        last_rental_at=Max('requested_start_date'),
+        overdue_count=Count('id', filter=Q(status='issued', requested_end_date__lt=now)),
+    ).order_by()
+    UserRentalStats.objects.bulk_create(
+        [UserRentalStats(units_issued=units_issued.get(row['user_id']) or 0, **row)
+         for row in user_rows],
+        batch_size=500,
+    )
+
+
+def remove_rental_stats(apps, schema_editor):
+    """Empty the statistics tables again."""
+    apps.get_model('rental', 'InventoryRentalStats').objects.all().delete()
+    apps.get_model('rental', 'UserRentalStats').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental', '0012_inventoryrentalstats_userrentalstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rental_stats, remove_rental_stats),
+    ]
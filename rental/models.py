@@ -1,8 +1,35 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
+from inventory.models import ChangeTrackingMixin
 
 
-class RentalRequest(models.Model):
+# Statuses in which a rental occupies equipment or rooms
+OCCUPYING_STATUSES = ('reserved', 'issued')
+
+
+def occupancy_q(start_date, end_date, prefix=''):
+    """Return a filter for occupying rental requests overlapping a period.
+
+    The overlap test (starts before the period ends and ends after it
+    starts) runs in the database and is served by the
+    ``rental_req_status_period`` index.
+
+    Args:
+        start_date: period start datetime
+        end_date: period end datetime
+        prefix: lookup path to the rental request, e.g. ``'rental_request__'``
+
+    Returns:
+        Q: filter for use on RentalRequest or a related model
+    """
+    return models.Q(**{
+        f'{prefix}status__in': OCCUPYING_STATUSES,
+        f'{prefix}requested_start_date__lt': end_date,
+        f'{prefix}requested_end_date__gt': start_date,
+    })
+
+
+class RentalRequest(ChangeTrackingMixin, models.Model):
     """Equipment rental request."""
 
     user = models.ForeignKey(
@@ -81,21 +108,21 @@ class RentalRequest(models.Model):
         verbose_name = _('Rental request')
         verbose_name_plural = _('Rental requests')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['status', 'requested_start_date', 'requested_end_date'],
+                name='rental_req_status_period',
+            ),
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='rental_req_created_id',
+            ),
+        ]
 
     def __str__(self) -> str:
         """Return human-readable representation."""
         return f"{self.project_name} ({self.user})"
 
-    def __init__(self, *args, **kwargs):
-        """Save original state for change auditing."""
-        super().__init__(*args, **kwargs)
-        # Safely read values without triggering relation descriptors on add view
-        original = {}
-        for field in self._meta.fields:
-            attr_name = getattr(field, 'attname', field.name)
-            original[field.name] = getattr(self, attr_name, None)
-        self._original_state = type('OriginalState', (), original)
-
     def can_user_access_item(self, inventory_item):
         """Check user access rights to inventory based on user status."""
         if not getattr(inventory_item, 'available_for_rent', False):
@@ -309,23 +336,40 @@ class EquipmentSet(models.Model):
         """Add set items to rental request.
 
         If an item with the same `inventory_item` already exists in the request,
-        increase `quantity_requested`.
+        increase `quantity_requested`. Existing items are read with one query
+        and written with one bulk update, new items with one bulk insert.
         """
-        for set_item in self.items.select_related('inventory_item').all():
-            rental_item, _ = RentalItem.objects.get_or_create(
+        from .stats import queue_rental_stats
+        from dashboard.cache import invalidate_widget_cache
+
+        quantities = {}
+        for inventory_item_id, quantity in self.items.values_list('inventory_item_id', 'quantity'):
+            quantities[inventory_item_id] = quantities.get(inventory_item_id, 0) + quantity
+
+        existing = {
+            rental_item.inventory_item_id: rental_item
+            for rental_item in RentalItem.objects.filter(
+                rental_request=rental_request, inventory_item_id__in=list(quantities)
+            )
+        }
+        for inventory_item_id, rental_item in existing.items():
+            rental_item.quantity_requested = (
+                (rental_item.quantity_requested or 0) + quantities.pop(inventory_item_id)
+            )
+        RentalItem.objects.bulk_update(existing.values(), ['quantity_requested'])
+        RentalItem.objects.bulk_create([
+            RentalItem(
                 rental_request=rental_request,
-                inventory_item=set_item.inventory_item,
-                defaults={
-                    'quantity_requested': 0,
-                    'quantity_issued': 0,
-                    'quantity_returned': 0,
-                    'notes': '',
-                },
+                inventory_item_id=inventory_item_id,
+                quantity_requested=quantity,
+                quantity_issued=0,
+                quantity_returned=0,
+                notes='',
             )
-            rental_item.quantity_requested = (rental_item.quantity_requested or 0) + set_item.quantity
-            rental_item.save(update_fields=[
-                'quantity_requested',
-            ])
+            for inventory_item_id, quantity in quantities.items()
+        ])
+        queue_rental_stats(rental_request_ids=[rental_request.id])
+        invalidate_widget_cache('inventory')
 
 
 class EquipmentSetItem(models.Model):
@@ -551,7 +595,6 @@ class Room(models.Model):
         Returns:
             bool: True if room is available, False if occupied
         """
-        from django.db.models import Q
         from django.utils import timezone
 
         # Check that room is active
@@ -568,31 +611,9 @@ class Room(models.Model):
             return False
 
         # Look for conflicts with existing rentals
-        conflicting_rentals = RoomRental.objects.filter(
-            room=self,
-            rental_request__status__in=['reserved', 'issued']
-        )
-
-        # Exclude current request when editing
-        if exclude_rental_request:
-            conflicting_rentals = conflicting_rentals.exclude(
-                rental_request_id=exclude_rental_request
-            )
-
-        # Check time conflicts
-        for rental in conflicting_rentals:
-            rental_start = rental.rental_request.requested_start_date
-            rental_end = rental.rental_request.requested_end_date
-
-            # Check time interval overlap
-            if rental_start and rental_end:
-                # There is overlap if:
-                # 1. New time starts before existing ends AND ends after existing starts
-                # 2. Or new time completely contains existing
-                if (start_date < rental_end and end_date > rental_start):
-                    return False
-
-        return True
+        return not self._occupying_rentals(
+            start_date, end_date, exclude_rental_request
+        ).exists()
 
     def get_conflicting_rentals(self, start_date, end_date, exclude_rental_request=None):
         """Return list of conflicting rentals for specified time.
@@ -603,31 +624,27 @@ class Room(models.Model):
             exclude_rental_request: request ID to exclude
 
         Returns:
-            QuerySet: List of conflicting rentals
+            list: Conflicting RoomRental instances with request, user and profile loaded
         """
-        from django.db.models import Q
+        return list(
+            self._occupying_rentals(start_date, end_date, exclude_rental_request)
+            .select_related('rental_request__user__profile')
+            .order_by('rental_request__requested_start_date')
+        )
 
+    def _occupying_rentals(self, start_date, end_date, exclude_rental_request=None):
+        """Return room rentals of this room overlapping the period."""
         conflicting_rentals = RoomRental.objects.filter(
+            occupancy_q(start_date, end_date, prefix='rental_request__'),
             room=self,
-            rental_request__status__in=['reserved', 'issued']
         )
 
+        # Exclude current request when editing
         if exclude_rental_request:
             conflicting_rentals = conflicting_rentals.exclude(
                 rental_request_id=exclude_rental_request
             )
-
-        # Filter by time overlap
-        conflicts = []
-        for rental in conflicting_rentals:
-            rental_start = rental.rental_request.requested_start_date
-            rental_end = rental.rental_request.requested_end_date
-
-            if rental_start and rental_end:
-                if (start_date < rental_end and end_date > rental_start):
-                    conflicts.append(rental)
-
-        return conflicts
+        return conflicting_rentals
 
 
 class RoomRental(models.Model):
@@ -786,3 +803,96 @@ class EquipmentTemplateItem(models.Model):
 
     def __str__(self):
         return f"{self.template.name} - {self.inventory_item.description} ({self.quantity})"
+
+
+class InventoryRentalStats(models.Model):
+    """Rental totals of an inventory item, maintained by ``rental.stats``."""
+
+    inventory_item = models.OneToOneField(
+        'inventory.InventoryItem',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rental_stats',
+        verbose_name=_('Inventory item'),
+    )
+    rental_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Rentals'),
+    )
+    units_requested = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Units requested'),
+    )
+    units_issued = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Units issued'),
+    )
+    last_rental_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_('Last rental'),
+    )
+    overdue_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Overdue rentals'),
+    )
+
+    class Meta:
+        """Django model metadata for ``InventoryRentalStats``."""
+
+        verbose_name = _('Inventory rental statistics')
+        verbose_name_plural = _('Inventory rental statistics')
+        indexes = [
+            models.Index(fields=['-rental_count'], name='inv_rental_stats_count'),
+        ]
+
+    def __str__(self):
+        """Return human-readable representation."""
+        return f"{self.inventory_item_id}: {self.rental_count}"
+
+
+class UserRentalStats(models.Model):
+    """Rental totals of a user, maintained by ``rental.stats``."""
+
+    user = models.OneToOneField(
+        'registration.OKUser',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rental_stats',
+        verbose_name=_('User'),
+    )
+    rental_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Rentals'),
+    )
+    active_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Active rentals'),
+    )
+    completed_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Completed rentals'),
+    )
+    units_issued = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Units issued'),
+    )
+    last_rental_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_('Last rental'),
+    )
+    overdue_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Overdue rentals'),
+    )
+
+    class Meta:
+        """Django model metadata for ``UserRentalStats``."""
+
+        verbose_name = _('User rental statistics')
+        verbose_name_plural = _('User rental statistics')
+
+    def __str__(self):
+        """Return human-readable representation."""
+        return f"{self.user_id}: {self.rental_count}"
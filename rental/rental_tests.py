@@ -0,0 +1,779 @@
+from .booking import apply_inventory_counters
+from .expiry import expire_room_rentals
+from .models import EquipmentSet
+from .models import EquipmentSetItem
+from .models import InventoryRentalStats
+from .models import RentalItem
+from .models import RentalRequest
+from .models import RentalTransaction
+from .models import Room
+from .models import RoomRental
+from .models import UserRentalStats
+from .stats import ITEM_STATS_FIELDS
+from .stats import USER_STATS_FIELDS
+from .views import check_items_availability
+from .views import get_available_quantities_for_period
+from .views import get_available_quantity_for_period
+from dashboard.models import UserJourney
+from dashboard.models import UserJourneyStage
+from dashboard.widgets.inventory import InventoryWidget
+from datetime import datetime
+from datetime import timedelta
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db import transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from importlib import import_module
+from inventory.models import AuditLog
+from inventory.models import InventoryItem
+from inventory.models import Location
+from inventory.models import Organization
+from ok_tools.datetime import TZ
+from ok_tools.testing import create_user
+import json
+import pytest
+import threading
+import time
+
+
+START = datetime(2030, 5, 1, 10, 0, tzinfo=TZ)
+END = datetime(2030, 5, 3, 18, 0, tzinfo=TZ)
+
+
+@pytest.fixture
+def owner(db):
+    """Return the state media institution owning rentable equipment."""
+    return Organization.objects.create(
+        name=getattr(settings, 'STATE_MEDIA_INSTITUTION', 'MSA'))
+
+
+@pytest.fixture
+def location(db):
+    """Return a storage location for inventory."""
+    return Location.objects.create(name='Lager')
+
+
+def create_item(owner, location, number, quantity=10):
+    """Create an inventory item available for rent."""
+    return InventoryItem.objects.create(
+        inventory_number=f'INV-{number}',
+        description=f'Camera {number}',
+        location=location,
+        owner=owner,
+        quantity=quantity,
+        available_for_rent=True,
+    )
+
+
+def create_rental(user, item, status, start=START, end=END, requested=1,
+                  issued=0, returned=0):
+    """Create a rental request with a single item."""
+    rental = RentalRequest.objects.create(
+        user=user,
+        created_by=user,
+        project_name='Project',
+        purpose='Purpose',
+        requested_start_date=start,
+        requested_end_date=end,
+        status=status,
+    )
+    RentalItem.objects.create(
+        rental_request=rental,
+        inventory_item=item,
+        quantity_requested=requested,
+        quantity_issued=issued,
+        quantity_returned=returned,
+    )
+    return rental
+
+
+def test__views__get_available_quantities_for_period__1(
+        db, user, owner, location):
+    """Reserved and issued quantities of overlapping rentals are deducted."""
+    item = create_item(owner, location, 1)
+    other = create_item(owner, location, 2, quantity=3)
+    create_rental(user, item, 'reserved', requested=3, issued=1)
+    create_rental(user, item, 'issued', requested=4, issued=4, returned=1)
+    create_rental(user, item, 'draft', requested=5)
+    create_rental(
+        user, item, 'reserved', requested=5,
+        start=END + timedelta(days=1), end=END + timedelta(days=2))
+
+    with CaptureQueriesContext(connection) as queries:
+        available = get_available_quantities_for_period(
+            [item, other], START, END)
+
+    assert available == {item.id: 5, other.id: 3}
+    assert len(queries) == 1
+    assert get_available_quantity_for_period(item, START, END) == 5
+
+
+def test__views__check_items_availability__1(db, user, owner, location):
+    """Quantities requested twice for one item are added up."""
+    item = create_item(owner, location, 1, quantity=3)
+
+    assert check_items_availability(
+        [{'inventory_id': item.id, 'quantity': 2}], START, END) is None
+    error = check_items_availability([
+        {'inventory_id': item.id, 'quantity': 2},
+        {'inventory_id': item.id, 'quantity': 2},
+    ], START, END)
+    assert 'Available: 3, requested: 4' in error
+
+
+def rental_item_queries(queries):
+    """Return the number of captured queries reading rental items."""
+    return sum(
+        'FROM "rental_rentalitem"' in query['sql']
+        for query in queries.captured_queries)
+
+
+def test__views__api_get_user_inventory__1(
+        client, admin_user, user, owner, location):
+    """Availability of all listed items is computed in one query."""
+    client.force_login(admin_user)
+    url = reverse('rental:api_user_inventory', args=[user.id])
+    params = {'start_date': START.isoformat(), 'end_date': END.isoformat()}
+
+    for number in range(2):
+        create_rental(
+            user, create_item(owner, location, number), 'reserved')
+    with CaptureQueriesContext(connection) as few:
+        response = client.get(url, params)
+    assert len(response.json()['inventory']) == 2
+
+    for number in range(2, 8):
+        create_rental(
+            user, create_item(owner, location, number), 'reserved')
+    with CaptureQueriesContext(connection) as many:
+        response = client.get(url, params)
+    inventory = response.json()['inventory']
+    assert len(inventory) == 8
+    assert {row['available_quantity'] for row in inventory} == {9}
+    assert rental_item_queries(many) == rental_item_queries(few) == 1
+
+
+def test__models__Room__1(db, user):
+    """Room conflicts are found by overlap in the database."""
+    room = Room.objects.create(name='Studio', capacity=10)
+    periods = [
+        ('reserved', START - timedelta(days=400), START - timedelta(days=399)),
+        ('issued', START - timedelta(hours=2), START + timedelta(hours=1)),
+        ('reserved', END - timedelta(hours=1), END + timedelta(hours=5)),
+        ('draft', START, END),
+        ('returned', START, END),
+        ('reserved', END, END + timedelta(days=1)),
+    ]
+    for status, start, end in periods:
+        rental = RentalRequest.objects.create(
+            user=user, created_by=user, project_name=status, purpose='-',
+            requested_start_date=start, requested_end_date=end,
+            status=status)
+        RoomRental.objects.create(
+            rental_request=rental, room=room, people_count=1)
+
+    with CaptureQueriesContext(connection) as queries:
+        assert not room.is_available_for_time(START, END)
+    assert len(queries) == 1
+
+    with CaptureQueriesContext(connection) as queries:
+        conflicts = room.get_conflicting_rentals(START, END)
+        names = [c.rental_request.user.profile.first_name for c in conflicts]
+    assert len(queries) == 1
+    assert names == ['john', 'john']
+    assert [c.rental_request.status for c in conflicts] == [
+        'issued', 'reserved']
+
+    issued = conflicts[0].rental_request
+    assert not room.is_available_for_time(START, START + timedelta(minutes=30))
+    assert room.is_available_for_time(
+        START, START + timedelta(minutes=30), exclude_rental_request=issued.id)
+    assert room.is_available_for_time(
+        START + timedelta(hours=1), END - timedelta(hours=1))
+
+
+def test__views__api_get_room_schedule__1(client, admin_user, user):
+    """Schedules of all rooms are built from one rental query."""
+    client.force_login(admin_user)
+    url = reverse('rental:api_room_schedule')
+    params = {'start_date': '2030-05-01', 'end_date': '2030-05-03'}
+    rooms = [Room.objects.create(name=f'Studio {n}', capacity=10)
+             for n in range(4)]
+
+    def book(room, status, start, end):
+        rental = RentalRequest.objects.create(
+            user=user, created_by=user, project_name=status, purpose='-',
+            requested_start_date=start, requested_end_date=end,
+            status=status)
+        RoomRental.objects.create(
+            rental_request=rental, room=room, people_count=2)
+
+    book(rooms[0], 'issued', START + timedelta(hours=1), END)
+    book(rooms[0], 'draft', START, END)
+    with CaptureQueriesContext(connection) as few:
+        response = client.get(url, params)
+    assert response.status_code == 200
+
+    for room in rooms[1:]:
+        book(room, 'reserved', START, START + timedelta(minutes=30))
+    with CaptureQueriesContext(connection) as many:
+        response = client.get(url, params)
+    assert len(many) == len(few)
+
+    schedules = {r['name']: r['schedule'] for r in response.json()['rooms']}
+    first, middle, last = schedules['Studio 0']
+    slots = {slot['time']: slot for slot in first['slots']}
+    assert slots['10:30']['status'] == 'available'
+    assert slots['11:00']['info']['start_time'] == '11:00'
+    assert slots['11:00']['info']['end_time'] == '18:00'
+    assert slots['11:00']['info']['project'] == 'issued'
+    # Multi-day rentals occupy the whole day in between
+    assert {slot['status'] for slot in middle['slots']} == {'occupied'}
+    assert last['slots'][-1]['status'] == 'occupied'
+
+    slots = schedules['Studio 1'][0]['slots']
+    assert [slot['status'] for slot in slots[:2]] == ['occupied', 'available']
+    assert slots[0]['info']['people_count'] == 2
+
+
+def test__views__api_inventory_calendar__1(
+        client, admin_user, user, owner, location):
+    """Calendar slots of all items are filled from one rental query."""
+    client.force_login(admin_user)
+    url = reverse('rental:api_inventory_calendar')
+    camera = create_item(owner, location, 1)
+    tripod = create_item(owner, location, 2)
+    create_item(owner, location, 3)
+    create_rental(user, camera, 'reserved', end=START + timedelta(days=1))
+    create_rental(user, camera, 'issued', start=START + timedelta(days=1))
+    create_rental(user, tripod, 'issued',
+                  start=START + timedelta(hours=2),
+                  end=START + timedelta(hours=3, minutes=30))
+
+    with CaptureQueriesContext(connection) as few:
+        response = client.get(url, {'mode': 'day', 'date': '2030-05-01'})
+    items = {it['id']: it for it in response.json()['items']}
+    hours = [slot['status'] for slot in items[tripod.id]['hours']]
+    assert hours == ['available'] * 2 + ['issued'] * 2 + ['available'] * 6
+    info = items[camera.id]['hours'][0]['info']
+    assert info['start'] == '01.05.2030 10:00'
+    assert info['user_name'] == 'john doe'
+
+    response = client.get(url, {'mode': 'week', 'date': '2030-04-30'})
+    week = response.json()['items'][0]['week']
+    # Issued rentals win over reservations of the same day
+    assert [d['status'] for d in week[:5]] == [
+        'available', 'reserved', 'issued', 'issued', 'available']
+
+    for number in range(4, 10):
+        create_rental(user, create_item(owner, location, number), 'reserved')
+    with CaptureQueriesContext(connection) as many:
+        response = client.get(url, {'mode': 'month', 'date': '2030-05-17'})
+    items = response.json()['items']
+    assert len(items) == 9
+    assert {len(it['month']) for it in items} == {31}
+    assert len(many) == len(few)
+
+
+def test__signals__update_inventory_quantities__1(db, user, owner, location):
+    """Transactions change the counters without saving the item."""
+    item = create_item(owner, location, 1)
+    rental = create_rental(user, item, 'reserved', requested=3)
+    rental_item = rental.items.get()
+
+    def book(transaction_type, quantity):
+        RentalTransaction.objects.create(
+            rental_item=rental_item, transaction_type=transaction_type,
+            quantity=quantity, performed_by=user)
+
+    logged = AuditLog.objects.filter(model_name='InventoryItem').count()
+    book('reserve', 3)
+    book('issue', 2)
+    book('return', 1)
+    book('cancel', 2)
+    assert rental_item.quantity_issued == 2
+    assert rental_item.quantity_returned == 1
+
+    item.refresh_from_db()
+    # Counters never drop below zero
+    assert (item.reserved_quantity, item.rented_quantity) == (0, 1)
+    assert AuditLog.objects.filter(
+        model_name='InventoryItem').count() == logged
+
+
+def test__reconcile_inventory_quantities__1(db, user, owner, location):
+    """Counters are recomputed from the transaction log."""
+    item = create_item(owner, location, 1)
+    idle = create_item(owner, location, 2)
+    rental_item = create_rental(user, item, 'issued', requested=4).items.get()
+    for transaction_type, quantity in [('reserve', 4), ('issue', 3)]:
+        RentalTransaction.objects.create(
+            rental_item=rental_item, transaction_type=transaction_type,
+            quantity=quantity, performed_by=user)
+    InventoryItem.objects.filter(id=item.id).update(
+        reserved_quantity=7, rented_quantity=0)
+    InventoryItem.objects.filter(id=idle.id).update(rented_quantity=2)
+
+    call_command('reconcile_inventory_quantities', '--dry-run')
+    item.refresh_from_db()
+    assert item.reserved_quantity == 7
+
+    call_command('reconcile_inventory_quantities')
+    counters = dict(InventoryItem.objects.values_list(
+        'id', 'reserved_quantity'))
+    assert counters == {item.id: 1, idle.id: 0}
+    item.refresh_from_db()
+    idle.refresh_from_db()
+    assert (item.rented_quantity, idle.rented_quantity) == (3, 0)
+
+
+def test__reconcile_inventory_quantities__2(db, user, owner, location):
+    """The log is replayed with the counters clamped like live updates."""
+    item = create_item(owner, location, 1)
+    issued = create_rental(user, item, 'issued').items.get()
+    reserved = create_rental(user, item, 'reserved').items.get()
+    # A direct issue has no reservation to release
+    for rental_item, transaction_type in [(issued, 'issue'), (reserved, 'reserve')]:
+        RentalTransaction.objects.create(
+            rental_item=rental_item, transaction_type=transaction_type,
+            quantity=1, performed_by=user)
+    item.refresh_from_db()
+    assert (item.reserved_quantity, item.rented_quantity) == (1, 1)
+
+    call_command('reconcile_inventory_quantities')
+    item.refresh_from_db()
+    assert (item.reserved_quantity, item.rented_quantity) == (1, 1)
+
+
+@pytest.mark.skipif(
+    connection.vendor == 'sqlite', reason='SQLite serializes all writers')
+@pytest.mark.django_db(transaction=True)
+def test__signals__update_inventory_quantities__2(user, owner, location):
+    """Parallel transactions on one item lose no counter updates."""
+    threads, cycles = 8, 10
+    item = create_item(owner, location, 1, quantity=1000)
+    rental_items = [
+        create_rental(user, item, 'issued', requested=1000).items.get()
+        for _ in range(threads)]
+    barrier = threading.Barrier(threads)
+    errors = []
+
+    def work(rental_item):
+        try:
+            barrier.wait()
+            for _ in range(cycles):
+                for transaction_type, quantity in [
+                        ('reserve', 2), ('issue', 1), ('return', 1)]:
+                    with transaction.atomic():
+                        RentalTransaction.objects.create(
+                            rental_item=rental_item,
+                            transaction_type=transaction_type,
+                            quantity=quantity, performed_by=user)
+        except Exception as e:  # pragma: no cover
+            errors.append(e)
+        finally:
+            connection.close()
+
+    workers = [threading.Thread(target=work, args=(rental_item,))
+               for rental_item in rental_items]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert not errors
+    item.refresh_from_db()
+    assert item.reserved_quantity == threads * cycles
+    assert item.rented_quantity == 0
+    assert {ri.quantity_issued for ri in RentalItem.objects.filter(
+        inventory_item=item)} == {cycles}
+
+
+def post_rental(client, user, items=(), rooms=(), action='reserved'):
+    """Post a rental for the test period to api_create_rental."""
+    return client.post(
+        reverse('rental:api_create_rental'),
+        json.dumps({
+            'user_id': user.id, 'project_name': 'Project', 'purpose': '-',
+            'start_date': START.isoformat(), 'end_date': END.isoformat(),
+            'action': action, 'items': list(items), 'rooms': list(rooms),
+        }),
+        content_type='application/json')
+
+
+def test__views__api_create_rental__1(
+        client, admin_user, user, owner, location):
+    """A rejected room leaves no partial booking behind."""
+    client.force_login(admin_user)
+    camera = create_item(owner, location, 1, quantity=1)
+    room = Room.objects.create(name='Studio', capacity=10)
+    items = [{'inventory_id': camera.id, 'quantity': 1}]
+    rooms = [{'room_id': room.id, 'people_count': 2}]
+
+    response = post_rental(client, user, items, rooms)
+    assert response.json()['success']
+    rental = RentalRequest.objects.get()
+    assert rental.rental_type == 'mixed'
+    camera.refresh_from_db()
+    assert camera.reserved_quantity == 1
+
+    other = create_item(owner, location, 2)
+    response = post_rental(
+        client, user, [{'inventory_id': other.id, 'quantity': 1}], rooms)
+    assert response.status_code == 400
+    assert 'Studio' in response.json()['error']
+    assert 'john doe (Project)' in response.json()['error']
+    assert list(RentalRequest.objects.all()) == [rental]
+
+    response = post_rental(client, user, items)
+    assert 'Available: 0, requested: 1' in response.json()['error']
+
+
+def test__views__api_create_rental__3(
+        client, admin_user, user, owner, location):
+    """Items and transactions of a rental are written in bulk."""
+    client.force_login(admin_user)
+    items = [create_item(owner, location, n) for n in range(30)]
+
+    def book(count):
+        with CaptureQueriesContext(connection) as queries:
+            response = post_rental(client, user, [
+                {'inventory_id': item.id, 'quantity': 2}
+                for item in items[:count]])
+        assert response.json()['success']
+        return sum(query['sql'].startswith(('INSERT', 'UPDATE'))
+                   for query in queries.captured_queries)
+
+    assert book(30) == book(2)
+    assert RentalTransaction.objects.filter(
+        transaction_type='reserve').count() == 32
+    items[0].refresh_from_db()
+    items[29].refresh_from_db()
+    assert items[0].reserved_quantity == 4
+    assert items[29].reserved_quantity == 2
+
+
+@pytest.mark.skipif(
+    connection.vendor == 'sqlite', reason='SQLite serializes all writers')
+@pytest.mark.django_db(transaction=True)
+def test__views__api_create_rental__2(admin_user, user, owner, location):
+    """Concurrent bookings never overbook items or rooms."""
+    threads = 8
+    scarce = create_item(owner, location, 1, quantity=3)
+    room = Room.objects.create(name='Studio', capacity=10)
+    own_items = [create_item(owner, location, 10 + n, quantity=100)
+                 for n in range(threads)]
+
+    def run(bookings_of_thread, rounds):
+        barrier = threading.Barrier(threads)
+        results = []
+
+        def work(bookings):
+            from django.test import Client
+            client = Client()
+            client.force_login(admin_user)
+            try:
+                barrier.wait()
+                for _ in range(rounds):
+                    response = post_rental(client, user, **bookings)
+                    results.append(response.json().get('success', False))
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=work, args=(bookings_of_thread(n),))
+                   for n in range(threads)]
+        started = time.monotonic()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return results, time.monotonic() - started
+
+    results, _ = run(lambda n: {
+        'items': [{'inventory_id': scarce.id, 'quantity': 1}]}, 1)
+    assert results.count(True) == 3
+    results, _ = run(lambda n: {
+        'rooms': [{'room_id': room.id, 'people_count': 1}]}, 1)
+    assert results.count(True) == 1
+    assert RoomRental.objects.filter(room=room).count() == 1
+
+    # Bookings of different items do not wait for each other's locks
+    rounds = 5
+    results, elapsed = run(lambda n: {
+        'items': [{'inventory_id': own_items[n].id, 'quantity': 1}]}, rounds)
+    assert results.count(True) == threads * rounds
+    assert elapsed < 10
+
+    scarce.refresh_from_db()
+    assert scarce.reserved_quantity == 3
+
+
+def test__models__EquipmentSet__1(db, user, owner, location):
+    """Applying a set adds to existing items and inserts the others in bulk."""
+    items = [create_item(owner, location, n) for n in range(5)]
+    equipment_set = EquipmentSet.objects.create(name='Kit', created_by=user)
+    for item in items:
+        EquipmentSetItem.objects.create(
+            equipment_set=equipment_set, inventory_item=item, quantity=2)
+    rental = create_rental(user, items[0], 'reserved', requested=1)
+
+    with CaptureQueriesContext(connection) as queries:
+        equipment_set.apply_to_rental_request(rental)
+    assert len(queries) <= 5
+    assert dict(rental.items.values_list(
+        'inventory_item_id', 'quantity_requested')) == {
+            item.id: 3 if item == items[0] else 2 for item in items}
+
+
+def test__views__api_issue_from_reservation__1(
+        client, admin_user, user, owner, location):
+    """New items are checked for availability and added issued."""
+    client.force_login(admin_user)
+    camera = create_item(owner, location, 1)
+    tripod = create_item(owner, location, 2, quantity=1)
+    rental = create_rental(user, camera, 'reserved', requested=2)
+    rental_item = rental.items.get()
+    url = reverse('rental:api_issue_from_reservation')
+
+    def issue(new_items):
+        return client.post(url, json.dumps({
+            'rental_id': rental.id, 'created_by': admin_user.id,
+            'start_date': START.isoformat(), 'end_date': END.isoformat(),
+            'item_quantities': {str(rental_item.id): 2},
+            'new_items': new_items,
+        }), content_type='application/json')
+
+    response = issue([{'inventory_id': tripod.id, 'quantity': 2}])
+    assert 'Available: 1, requested: 2' in response.json()['error']
+    rental.refresh_from_db()
+    assert rental.status == 'reserved'
+
+    response = issue([{'inventory_id': tripod.id, 'quantity': 1}])
+    assert response.json()['success']
+    assert dict(rental.items.values_list(
+        'inventory_item_id', 'quantity_issued')) == {camera.id: 2, tripod.id: 1}
+
+
+def test__models__RentalRequest__1(
+        admin_user, user, owner, location, django_capture_on_commit_callbacks):
+    """Rental requests are loaded without snapshots and audited on save."""
+    with django_capture_on_commit_callbacks(execute=True):
+        item = create_item(owner, location, 1)
+        for _ in range(5):
+            create_rental(user, item, 'reserved')
+    with CaptureQueriesContext(connection) as queries:
+        rentals = list(RentalRequest.objects.all())
+    assert len(queries) == 1
+
+    rental = rentals[0]
+    rental.status = 'issued'
+    with django_capture_on_commit_callbacks(execute=True):
+        rental.save()
+    log = AuditLog.objects.filter(
+        model_name='RentalRequest', action='updated').get()
+    assert set(log.changes) == {'status', 'updated_at'}
+    assert log.changes['status'] == {'old': 'reserved', 'new': 'issued'}
+
+
+def test__views__api_get_all_rentals__1(
+        client, admin_user, user, owner, location):
+    """Rentals are paged by cursor with a constant number of queries."""
+    client.force_login(admin_user)
+    items = [create_item(owner, location, n) for n in range(5)]
+    room = Room.objects.create(name='Studio', capacity=10)
+    url = reverse('rental:api_get_all_rentals')
+
+    def create_rentals(count):
+        for _ in range(count):
+            rental = create_rental(user, items[0], 'reserved')
+            for item in items[1:]:
+                RentalItem.objects.create(
+                    rental_request=rental, inventory_item=item,
+                    quantity_requested=1)
+            RoomRental.objects.create(
+                rental_request=rental, room=room, people_count=2)
+
+    def first_page():
+        with CaptureQueriesContext(connection) as queries:
+            data = client.get(url).json()
+        return data, len(queries)
+
+    create_rentals(2)
+    _, queries = first_page()
+    create_rentals(23)
+    data, more_queries = first_page()
+    assert more_queries == queries
+    assert len(data['rentals']) == 20
+    assert data['total_count'] == 25
+    assert data['has_next'] and not data['has_previous']
+    newest = data['rentals'][0]
+    assert newest['items_count'] == 5
+    assert newest['rooms_count'] == 1
+    assert [item['description'] for item in newest['items_summary']] == [
+        'Camera 0', 'Camera 1', 'Camera 2']
+    assert newest['rooms_summary'] == [{'name': 'Studio', 'people_count': 2}]
+
+    following = client.get(url, {'cursor': data['next_cursor']}).json()
+    assert len(following['rentals']) == 5
+    assert not following['has_next'] and following['has_previous']
+    assert 'total_count' not in following
+    ids = [rental['id'] for rental in data['rentals'] + following['rentals']]
+    assert ids == sorted(RentalRequest.objects.values_list('id', flat=True),
+                         reverse=True)
+
+    # Old page numbers still work and filters need no DISTINCT
+    assert client.get(url, {'page': 2}).json()['rentals'] == following['rentals']
+    rooms_only = client.get(url, {'type': 'room'}).json()
+    assert rooms_only['total_count'] == 0
+    assert client.get(url, {'cursor': 'x'}).status_code == 400
+
+
+def test__expiry__expire_room_rentals__1(
+        client, admin_user, user, django_capture_on_commit_callbacks):
+    """Expired room rentals are returned with a constant number of writes."""
+    rooms = [Room.objects.create(name=f'Room {n}', capacity=10)
+             for n in range(4)]
+
+    def book(status, end, room_count):
+        rental = RentalRequest.objects.create(
+            user=user, created_by=user, project_name='Project',
+            purpose='-', requested_start_date=START - timedelta(days=1),
+            requested_end_date=end, status=status, rental_type='room')
+        for room in rooms[:room_count]:
+            RoomRental.objects.create(
+                rental_request=rental, room=room, people_count=2)
+        return rental
+
+    reserved = book('reserved', START, 2)
+    issued = book('issued', START, 3)
+    running = book('issued', END, 4)
+    done = book('returned', START, 1)
+    now = START + timedelta(hours=1)
+
+    with CaptureQueriesContext(connection) as queries:
+        with django_capture_on_commit_callbacks(execute=True):
+            expired = expire_room_rentals(now=now)
+    assert len(expired) == 5
+    writes = [query for query in queries.captured_queries
+              if query['sql'].startswith(('INSERT', 'UPDATE'))]
+    # Transactions, requests, funnel stages and audit log
+    assert len(writes) == 4
+    assert dict(RentalRequest.objects.values_list('id', 'status')) == {
+        reserved.id: 'returned', issued.id: 'returned',
+        running.id: 'issued', done.id: 'returned'}
+    assert RentalTransaction.objects.filter(
+        room__isnull=False, transaction_type='return').count() == 5
+    assert AuditLog.objects.filter(
+        model_name='RentalRequest', object_id=str(reserved.id),
+        action='updated').get().changes['status'] == {
+            'old': 'reserved', 'new': 'returned'}
+    journey = UserJourney.objects.get(
+        user=user, stage=UserJourneyStage.RENTAL_COMPLETED)
+    assert journey.rental_request == issued
+    assert journey.metadata == {'source': 'rental_completion'}
+
+    assert expire_room_rentals(now=now) == []
+    RentalRequest.objects.filter(id=running.id).update(
+        requested_start_date=START.replace(year=2020),
+        requested_end_date=END.replace(year=2020))
+    client.force_login(admin_user)
+    response = client.post(reverse('rental:api_expire_room_rentals'))
+    assert response.json()['statistics'] == {
+        'total_expired': 4, 'reserved_expired': 0, 'issued_expired': 4}
+
+
+def test__expiry__expire_room_rentals__2(
+        db, user_dict, owner, location, django_capture_on_commit_callbacks):
+    """Bulk rental writes invalidate the cached inventory dashboard."""
+    # The test transaction never commits, so the writes are captured from
+    # the start instead of joining an invalidation scheduled by a fixture
+    with django_capture_on_commit_callbacks(execute=True):
+        get_user_model().objects.create_superuser('admin@example.com', 'password')
+        user = create_user(user_dict)
+        room = Room.objects.create(name='Studio', capacity=10)
+        item = create_item(owner, location, 1)
+        rental = RentalRequest.objects.create(
+            user=user, created_by=user, project_name='Project', purpose='-',
+            requested_start_date=START - timedelta(days=1), requested_end_date=START,
+            status='issued', rental_type='room')
+        RoomRental.objects.create(rental_request=rental, room=room, people_count=2)
+
+    def basic_stats():
+        return InventoryWidget({'days': '30', 'gender': ''}).get_all_data()['basic_stats']
+
+    assert (basic_stats()['completed_rentals'], basic_stats()['reserved_items']) == (0, 0)
+    with django_capture_on_commit_callbacks(execute=True):
+        expire_room_rentals(now=START + timedelta(hours=1))
+    assert basic_stats()['completed_rentals'] == 1
+    with django_capture_on_commit_callbacks(execute=True):
+        apply_inventory_counters([(item.id, 'reserve', 1)])
+    assert basic_stats()['reserved_items'] == 1
+
+
+def test__stats__refresh_rental_stats__1(
+        client, admin_user, user, owner, location,
+        django_capture_on_commit_callbacks):
+    """Rental statistics follow changes and match a full rebuild."""
+    client.force_login(admin_user)
+    camera = create_item(owner, location, 1)
+    tripod = create_item(owner, location, 2)
+    with django_capture_on_commit_callbacks(execute=True):
+        response = post_rental(client, user, [
+            {'inventory_id': camera.id, 'quantity': 2},
+            {'inventory_id': tripod.id, 'quantity': 1}])
+    assert response.json()['success']
+    stats = InventoryRentalStats.objects.get(inventory_item=camera)
+    assert (stats.rental_count, stats.units_requested, stats.overdue_count) == (
+        1, 2, 0)
+    assert UserRentalStats.objects.get(user=user).active_count == 1
+
+    past = START.replace(year=2020)
+    with django_capture_on_commit_callbacks(execute=True):
+        create_rental(user, camera, 'issued', start=past,
+                      end=past + timedelta(days=1), requested=1, issued=1)
+    stats.refresh_from_db()
+    assert (stats.rental_count, stats.units_requested, stats.units_issued,
+            stats.overdue_count) == (2, 3, 1, 1)
+    data = client.get(reverse('rental:api_user_stats', args=[user.id])).json()
+    assert (data['active_rentals'], data['overdue_rentals']) == (2, 1)
+
+    popular = InventoryWidget({'days': 'all'}).get_popular_inventory_stats()
+    assert [(item['id'], item['rental_count'], item['total_quantity'])
+            for item in popular['popular_items']] == [
+        (camera.id, 2, 3), (tripod.id, 1, 1)]
+
+    def snapshot():
+        return (
+            list(InventoryRentalStats.objects.order_by('pk').values()),
+            list(UserRentalStats.objects.order_by('pk').values()),
+        )
+
+    maintained = snapshot()
+    InventoryRentalStats.objects.all().delete()
+    call_command('rebuild_rental_stats')
+    assert snapshot() == maintained
+
+    # The backfill migration computes the same statistics
+    def rows():
+        return (
+            list(InventoryRentalStats.objects.order_by('inventory_item').values(
+                'inventory_item', *ITEM_STATS_FIELDS)),
+            list(UserRentalStats.objects.order_by('user').values('user', *USER_STATS_FIELDS)),
+        )
+
+    rebuilt = rows()
+    InventoryRentalStats.objects.all().delete()
+    UserRentalStats.objects.all().delete()
+    import_module('rental.migrations.0013_backfill_rental_stats').backfill_rental_stats(
+        django_apps, None)
+    assert rows() == rebuilt
+
+    # Overdue rentals are counted when requested, not at the last refresh
+    RentalRequest.objects.filter(status='reserved').update(
+        status='issued', requested_end_date=past)
+    data = client.get(reverse('rental:api_user_stats', args=[user.id])).json()
+    assert data['overdue_rentals'] == 2
@@ -0,0 +1,267 @@
+"""Room schedules and inventory calendars built from sorted rentals."""
+
+from .models import RentalItem
+from .models import RoomRental
+from .models import occupancy_q
+from array import array
+from bisect import bisect_left
+from bisect import bisect_right
+from datetime import date
+from datetime import datetime
+from datetime import time
+from datetime import timedelta
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+# Bookable hours shown in the schedule, split into 30-minute slots
+SLOT_FIRST_HOUR = 10
+SLOT_LAST_HOUR = 18
+SLOT_MINUTES = 30
+
+# Business hours of the inventory calendar, one slot per hour in day mode
+CALENDAR_FIRST_HOUR = 10
+CALENDAR_LAST_HOUR = 20
+
+# German day name abbreviations by weekday
+GERMAN_DAYS = {
+    0: 'MO',  # Monday
+    1: 'DI',  # Tuesday
+    2: 'MI',  # Wednesday
+    3: 'DO',  # Thursday
+    4: 'FR',  # Friday
+    5: 'SA',  # Saturday
+    6: 'SO'   # Sunday
+}
+
+
+def user_display_name(user):
+    """Return the name of a user as shown in schedules.
+
+    Prefers first and last name from the profile, then from the user,
+    then the local part of the email address.
+    """
+    profile = getattr(user, 'profile', None)
+    if profile is not None:
+        names = [name for name in (profile.first_name, profile.last_name) if name]
+        if names:
+            return ' '.join(names)
+    if user.first_name and user.last_name:
+        return f"{user.first_name} {user.last_name}"
+    if user.email:
+        return user.email.split('@')[0]
+    return _("User #{user_id}").format(user_id=user.id)
+
+
+def _day_slots(day):
+    """Return (label, start, end) of the aware slots of a day."""
+    slots = []
+    for hour in range(SLOT_FIRST_HOUR, SLOT_LAST_HOUR):
+        for minute in range(0, 60, SLOT_MINUTES):
+            slot_start = timezone.make_aware(datetime.combine(day, time(hour, minute)))
+            slots.append((
+                f"{hour:02d}:{minute:02d}",
+                slot_start,
+                slot_start + timedelta(minutes=SLOT_MINUTES),
+            ))
+    return slots
+
+
+def _day_header(day, today):
+    """Return the schedule entry of a day without slots."""
+    return {
+        'date': day.isoformat(),
+        'day_name': day.strftime('%A'),  # Monday, Tuesday, etc.
+        'day_short': GERMAN_DAYS[day.weekday()],  # German abbreviations
+        'day_number': day.day,
+        'is_today': day == today,
+        'is_weekend': day.weekday() >= 5,  # Saturday and Sunday
+        'slots': []
+    }
+
+
+def build_room_schedules(rooms, start_date, end_date):
+    """Build the half-hour occupancy schedule of rooms for a date range.
+
+    All reserved and issued rentals of all rooms in the range are loaded
+    with one query, sorted by start. Each room's rentals are then swept
+    through the chronological slots once: a rental becomes active when a
+    slot ends after its start and is dropped when a slot starts after its
+    end, so each rental is handled once instead of once per slot.
+
+    Args:
+        rooms: Iterable of Room instances
+        start_date: First date of the schedule
+        end_date: Last date of the schedule (inclusive)
+
+    Returns:
+        dict: Room ID to list of days with their slots
+    """
+    rooms = list(rooms)
+    period_start = timezone.make_aware(datetime.combine(start_date, time.min))
+    period_end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+
+    rentals_by_room = {room.id: [] for room in rooms}
+    rentals = RoomRental.objects.filter(
+        occupancy_q(period_start, period_end, prefix='rental_request__'),
+        room__in=rooms,
+    ).select_related('rental_request__user__profile').order_by(
+        'rental_request__requested_start_date', 'id'
+    )
+    names = {}
+    for rental in rentals:
+        rental_request = rental.rental_request
+        if rental_request.user_id not in names:
+            names[rental_request.user_id] = user_display_name(rental_request.user)
+        start = rental_request.requested_start_date
+        end = rental_request.requested_end_date
+        rentals_by_room[rental.room_id].append((start, end, {
+            'user_name': names[rental_request.user_id],
+            'project': rental_request.project_name or _("No project"),
+            'status': rental_request.status,
+            'people_count': rental.people_count or 1,
+            'start_time': timezone.localtime(start).strftime('%H:%M'),
+            'end_time': timezone.localtime(end).strftime('%H:%M'),
+        }))
+
+    days = []
+    day = start_date
+    while day <= end_date:
+        days.append((day, _day_slots(day)))
+        day += timedelta(days=1)
+    today = timezone.localdate()
+
+    schedules = {}
+    for room in rooms:
+        room_rentals = rentals_by_room[room.id]
+        next_rental = 0
+        active = []
+        schedule = []
+        for day, slots in days:
+            day_schedule = _day_header(day, today)
+            for label, slot_start, slot_end in slots:
+                while next_rental < len(room_rentals) and room_rentals[next_rental][0] < slot_end:
+                    active.append(room_rentals[next_rental])
+                    next_rental += 1
+                active = [rental for rental in active if rental[1] > slot_start]
+
+                # The earliest started rental covering the slot is shown
+                info = active[0][2] if active else None
+                day_schedule['slots'].append({
+                    'time': label,
+                    'status': 'occupied' if info else 'available',
+                    'info': info
+                })
+            schedule.append(day_schedule)
+        schedules[room.id] = schedule
+    return schedules
+
+
+def calendar_slots(mode, day):
+    """Return the (key, start, end) slots of an inventory calendar.
+
+    Day mode has one slot per business hour of ``day`` keyed by time,
+    week mode the business hours of seven days from ``day`` and month
+    mode those of every day in the month of ``day``, keyed by date.
+    """
+    if mode == 'day':
+        slots = []
+        for hour in range(CALENDAR_FIRST_HOUR, CALENDAR_LAST_HOUR):
+            slot_start = timezone.make_aware(datetime.combine(day, time(hour)))
+            slots.append((f"{hour:02d}:00", slot_start, slot_start + timedelta(hours=1)))
+        return slots
+
+    if mode == 'month':
+        first = day.replace(day=1)
+        following = date(first.year + first.month // 12, first.month % 12 + 1, 1)
+        days = [first + timedelta(days=i) for i in range((following - first).days)]
+    else:
+        days = [day + timedelta(days=i) for i in range(7)]
+    return [
+        (d.isoformat(),
+         timezone.make_aware(datetime.combine(d, time(CALENDAR_FIRST_HOUR))),
+         timezone.make_aware(datetime.combine(d, time(CALENDAR_LAST_HOUR - 1))))
+        for d in days
+    ]
+
+
+def build_inventory_calendar(item_ids, mode, day):
+    """Build the occupancy rows of inventory items for a calendar.
+
+    Slot boundaries are computed once and every reserved or issued rental
+    is mapped to the range of slot indexes it overlaps by bisection. Each
+    item keeps one array of the rental occupying each slot, so the cost
+    grows with the rentals and the slots they cover rather than with
+    items times slots times rentals. In week and month mode issued
+    rentals take precedence over reservations, in day mode the earliest
+    started rental is shown.
+
+    Args:
+        item_ids: IDs of the inventory items
+        mode: 'day', 'week' or 'month'
+        day: Date of the day, first day of the week or any day of the month
+
+    Returns:
+        dict: Item ID to list of slots; items without rentals share one list
+    """
+    slots = calendar_slots(mode, day)
+    starts = [slot_start for _, slot_start, _ in slots]
+    ends = [slot_end for _, _, slot_end in slots]
+    prefer_issued = mode != 'day'
+
+    rentals = RentalItem.objects.filter(
+        occupancy_q(starts[0], ends[-1], prefix='rental_request__'),
+        inventory_item_id__in=item_ids,
+    ).select_related('rental_request__user__profile').order_by(
+        'rental_request__requested_start_date', 'rental_request_id'
+    )
+
+    requests = []
+    request_index = {}
+    cells_by_item = {}
+    for rental_item in rentals:
+        rental_request = rental_item.rental_request
+        first = bisect_right(ends, rental_request.requested_start_date)
+        last = bisect_left(starts, rental_request.requested_end_date)
+        if first >= last:
+            continue  # Only outside of business hours
+
+        index = request_index.get(rental_request.id)
+        if index is None:
+            index = request_index[rental_request.id] = len(requests)
+            requests.append(rental_request)
+        issued = rental_request.status == 'issued'
+
+        cells = cells_by_item.get(rental_item.inventory_item_id)
+        if cells is None:
+            cells = cells_by_item[rental_item.inventory_item_id] = array('i', [-1]) * len(slots)
+        for slot in range(first, last):
+            current = cells[slot]
+            if current < 0 or (prefer_issued and issued and requests[current].status != 'issued'):
+                cells[slot] = index
+
+    names = {}
+    infos = []
+    for rental_request in requests:
+        if rental_request.user_id not in names:
+            names[rental_request.user_id] = user_display_name(rental_request.user)
+        infos.append({
+            'user_name': names[rental_request.user_id],
+            'status': rental_request.status,
+            'start': timezone.localtime(rental_request.requested_start_date).strftime('%d.%m.%Y %H:%M'),
+            'end': timezone.localtime(rental_request.requested_end_date).strftime('%d.%m.%Y %H:%M'),
+            'id': rental_request.id,
+        })
+
+    def cell(key, index):
+        info = infos[index] if index >= 0 else None
+        status = info['status'] if info else 'available'
+        if mode == 'day':
+            return {'time': key, 'status': status, 'info': info}
+        return {'date': key, 'status': status, 'user_name': info['user_name'] if info else None}
+
+    free_row = [cell(key, -1) for key, _, _ in slots]
+    rows = {item_id: free_row for item_id in item_ids}
+    for item_id, cells in cells_by_item.items():
+        rows[item_id] = [cell(key, index) for (key, _, _), index in zip(slots, cells)]
+    return rows
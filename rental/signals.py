@@ -5,15 +5,20 @@ This module contains signal handlers that automatically respond to model changes
 in the rental system. It handles audit logging and inventory quantity updates.
 """
 
+from .booking import RENTAL_ITEM_COUNTERS
+from .booking import apply_inventory_counters
 from .models import RentalItem
 from .models import RentalRequest
 from .models import RentalTransaction
+from .stats import queue_rental_stats
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
 from django.db.models.signals import post_delete
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
+from inventory.audit import log_audit
 from inventory.models import AuditLog
-from inventory.models import InventoryItem
 
 
 @receiver(post_save, sender=RentalRequest)
@@ -23,6 +28,7 @@ def log_rental_request_changes(sender, instance: RentalRequest, created, **kwarg
 
     Writes to general AuditLog with model_name="RentalRequest".
     If created — action="created"; otherwise records changed fields.
+    Entries are inserted in bulk when the transaction commits.
 
     Args:
         sender: The model class that sent the signal
@@ -32,28 +38,19 @@ def log_rental_request_changes(sender, instance: RentalRequest, created, **kwarg
     """
     action = "created" if created else "updated"
     changes = None
-    if not created and hasattr(instance, '_original_state'):
-        changes = {}
-        for field in instance._meta.fields:
-            # Use attname to avoid RelatedObjectDoesNotExist on empty FK
-            attr_name = getattr(field, 'attname', field.name)
-            old_value = getattr(instance._original_state, field.name, None)
-            new_value = getattr(instance, attr_name, None)
-            if old_value != new_value:
-                if hasattr(old_value, '__str__'):
-                    old_value = str(old_value)
-                if hasattr(new_value, '__str__'):
-                    new_value = str(new_value)
-                changes[field.name] = {'old': old_value, 'new': new_value}
-        if not changes:
-            changes = None
-
-    AuditLog.objects.create(
+    if not created:
+        # Foreign keys are compared and logged by ID
+        changes = {
+            field.name: {'old': str(old_value), 'new': str(new_value)}
+            for field, (old_value, new_value) in instance.get_field_changes().items()
+        } or None
+
+    log_audit(AuditLog(
         model_name="RentalRequest",
         object_id=str(instance.pk),
         action=action,
         changes=changes,
-    )
+    ), using=kwargs.get('using', DEFAULT_DB_ALIAS))
 
 
 @receiver(post_save, sender=RentalTransaction)
@@ -66,6 +63,12 @@ def update_inventory_quantities(sender, instance: RentalTransaction, created, **
     - return: decreases rented_quantity
     - cancel: decreases reserved_quantity
 
+    Counters are changed with UPDATE statements on F() expressions, so
+    concurrent transactions on the same item cannot overwrite each other.
+    The item is not loaded or saved, so no InventoryItem audit entry is
+    written; the transaction itself records the change. Counters drifting
+    anyway can be rebuilt with ``reconcile_inventory_quantities``.
+
     Args:
         sender: The model class that sent the signal
         instance: The RentalTransaction instance being saved
@@ -76,25 +79,58 @@ def update_inventory_quantities(sender, instance: RentalTransaction, created, **
         return
 
     # Skip room transactions (they don't have rental_item)
-    if not instance.rental_item:
+    if not instance.rental_item_id:
         return
 
-    rental_item = instance.rental_item
-    item: InventoryItem = rental_item.inventory_item
     qty = int(instance.quantity or 0)
+    if not qty:
+        return
+
+    rental_item = instance.rental_item
+    apply_inventory_counters([(rental_item.inventory_item_id, instance.transaction_type, qty)])
+
+    counter = RENTAL_ITEM_COUNTERS.get(instance.transaction_type)
+    if counter:
+        RentalItem.objects.filter(pk=rental_item.pk).update(**{counter: F(counter) + qty})
+        rental_item.refresh_from_db(fields=[counter])
+        queue_rental_stats(
+            item_ids=[rental_item.inventory_item_id],
+            rental_request_ids=[rental_item.rental_request_id],
+            using=kwargs.get('using', DEFAULT_DB_ALIAS),
+        )
 
-    if instance.transaction_type == 'reserve':
-        item.reserved_quantity = (item.reserved_quantity or 0) + qty
-    elif instance.transaction_type == 'issue':
-        item.reserved_quantity = max(0, (item.reserved_quantity or 0) - qty)
-        item.rented_quantity = (item.rented_quantity or 0) + qty
-        rental_item.quantity_issued = (rental_item.quantity_issued or 0) + qty
-        rental_item.save(update_fields=['quantity_issued'])
-    elif instance.transaction_type == 'return':
-        item.rented_quantity = max(0, (item.rented_quantity or 0) - qty)
-        rental_item.quantity_returned = (rental_item.quantity_returned or 0) + qty
-        rental_item.save(update_fields=['quantity_returned'])
-    elif instance.transaction_type == 'cancel':
-        item.reserved_quantity = max(0, (item.reserved_quantity or 0) - qty)
-
-    item.save(update_fields=['reserved_quantity', 'rented_quantity'])
+
+@receiver(post_save, sender=RentalRequest)
+@receiver(post_delete, sender=RentalRequest)
+def queue_rental_request_stats(sender, instance: RentalRequest, **kwargs):
+    """
+    Refresh the rental statistics of the request's user and items after the commit.
+
+    Args:
+        sender: The model class that sent the signal
+        instance: The RentalRequest instance saved or deleted
+        **kwargs: Additional keyword arguments
+    """
+    queue_rental_stats(
+        rental_request_ids=[instance.pk],
+        user_ids=[instance.user_id],
+        using=kwargs.get('using', DEFAULT_DB_ALIAS),
+    )
+
+
+@receiver(post_save, sender=RentalItem)
+@receiver(post_delete, sender=RentalItem)
+def queue_rental_item_stats(sender, instance: RentalItem, **kwargs):
+    """
+    Refresh the rental statistics of the item and its renter after the commit.
+
+    Args:
+        sender: The model class that sent the signal
+        instance: The RentalItem instance saved or deleted
+        **kwargs: Additional keyword arguments
+    """
+    queue_rental_stats(
+        item_ids=[instance.inventory_item_id],
+        rental_request_ids=[instance.rental_request_id],
+        using=kwargs.get('using', DEFAULT_DB_ALIAS),
+    )
@@ -11,6 +11,8 @@ document.addEventListener('DOMContentLoaded', function() {
         constructor() {
             console.log('🚀 RentalStats constructor started');
             this.currentPage = 1;
+            this.rentalsCursors = [''];  // Cursor of each visited page
+            this.rentalsTotal = null;
             this.currentAction = null;
 
             console.log('🔗 Binding events...');
@@ -34,18 +36,18 @@ document.addEventListener('DOMContentLoaded', function() {
 
             // Filter events
             document.getElementById('statusFilter').addEventListener('change', () => {
-                this.currentPage = 1;
+                this.resetRentalsPage();
                 this.loadRentalsData();
             });
 
             document.getElementById('typeFilter').addEventListener('change', () => {
-                this.currentPage = 1;
+                this.resetRentalsPage();
                 this.loadRentalsData();
             });
 
             document.getElementById('userFilter').addEventListener('input',
                 this.debounce(() => {
-                    this.currentPage = 1;
+                    this.resetRentalsPage();
                     this.loadRentalsData();
                 }, 500)
             );
@@ -114,6 +116,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
                 const params = new URLSearchParams({
                     page: this.currentPage,
+                    cursor: this.rentalsCursors[this.currentPage - 1] || '',
                     status: document.getElementById('statusFilter').value,
                     type: document.getElementById('typeFilter').value,
                     user: document.getElementById('userFilter').value
@@ -218,13 +221,18 @@ document.addEventListener('DOMContentLoaded', function() {
 
         updateRentalsInfo(data) {
             const info = document.getElementById('rentalsInfo');
-            info.textContent = `${data.total_count} ${gettext('rentals total')}`;
+            // Only the first page reports the total
+            if (data.total_count !== undefined) {
+                this.rentalsTotal = `${data.total_is_estimate ? '~' : ''}${data.total_count}`;
+            }
+            info.textContent = `${this.rentalsTotal} ${gettext('rentals total')}`;
         }
 
         updateRentalsPagination(data) {
             const pagination = document.getElementById('rentalsPagination');
+            this.rentalsCursors[this.currentPage] = data.next_cursor || '';
 
-            if (data.total_pages <= 1) {
+            if (!data.has_previous && !data.has_next) {
                 pagination.innerHTML = '';
                 return;
             }
@@ -233,23 +241,24 @@ document.addEventListener('DOMContentLoaded', function() {
 
             // Previous button
             if (data.has_previous) {
-                html += `<li class="page-item"><a class="page-link" href="#" onclick="rentalStats.changePage(${data.current_page - 1})">${gettext('Previous')}</a></li>`;
+                html += `<li class="page-item"><a class="page-link" href="#" onclick="rentalStats.changePage(${this.currentPage - 1})">${gettext('Previous')}</a></li>`;
             }
 
-            // Page numbers
-            for (let i = Math.max(1, data.current_page - 2); i <= Math.min(data.total_pages, data.current_page + 2); i++) {
-                const active = i === data.current_page ? 'active' : '';
-                html += `<li class="page-item ${active}"><a class="page-link" href="#" onclick="rentalStats.changePage(${i})">${i}</a></li>`;
-            }
+            html += `<li class="page-item active"><span class="page-link">${this.currentPage}</span></li>`;
 
             // Next button
             if (data.has_next) {
-                html += `<li class="page-link" href="#" onclick="rentalStats.changePage(${data.current_page + 1})">${gettext('Next')}</a></li>`;
+                html += `<li class="page-item"><a class="page-link" href="#" onclick="rentalStats.changePage(${this.currentPage + 1})">${gettext('Next')}</a></li>`;
             }
 
             pagination.innerHTML = html;
         }
 
+        resetRentalsPage() {
+            this.currentPage = 1;
+            this.rentalsCursors = [''];
+        }
+
         changePage(page) {
             this.currentPage = page;
             this.loadRentalsData();
@@ -0,0 +1,149 @@
+"""Summary tables of rental totals per inventory item and per user."""
+
+from .models import InventoryRentalStats
+from .models import RentalItem
+from .models import RentalRequest
+from .models import UserRentalStats
+from django.db import DEFAULT_DB_ALIAS
+from django.db import connections
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import Max
+from django.db.models import Q
+from django.db.models import Sum
+from django.utils import timezone
+from ok_tools.on_commit import CommitBatch
+from ok_tools.on_commit import current_batch
+
+
+ITEM_STATS_FIELDS = ['rental_count', 'units_requested', 'units_issued', 'last_rental_at', 'overdue_count']
+USER_STATS_FIELDS = ['rental_count', 'active_count', 'completed_count', 'units_issued', 'last_rental_at',
+                     'overdue_count']
+
+
+def _item_stats(item_ids, now):
+    """Return unsaved InventoryRentalStats of the items, all items for None."""
+    rental_items = RentalItem.objects.all()
+    if item_ids is not None:
+        rental_items = rental_items.filter(inventory_item_id__in=item_ids)
+    rows = rental_items.values('inventory_item_id').annotate(
+        rental_count=Count('id'),
+        units_requested=Sum('quantity_requested'),
+        units_issued=Sum('quantity_issued'),
+        last_rental_at=Max('rental_request__requested_start_date'),
+        overdue_count=Count('id', filter=Q(
+            rental_request__status='issued',
+            rental_request__requested_end_date__lt=now,
+            quantity_issued__gt=F('quantity_returned'),
+        )),
+    ).order_by()
+    return [InventoryRentalStats(**row) for row in rows]
+
+
+def _user_stats(user_ids, now):
+    """Return unsaved UserRentalStats of the users, all users for None."""
+    rental_requests = RentalRequest.objects.all()
+    rental_items = RentalItem.objects.all()
+    if user_ids is not None:
+        rental_requests = rental_requests.filter(user_id__in=user_ids)
+        rental_items = rental_items.filter(rental_request__user_id__in=user_ids)
+    units_issued = dict(
+        rental_items.values('rental_request__user_id').annotate(
+            units=Sum('quantity_issued')
+        ).order_by().values_list('rental_request__user_id', 'units')
+    )
+    rows = rental_requests.values('user_id').annotate(
+        rental_count=Count('id'),
+        active_count=Count('id', filter=Q(status__in=['reserved', 'issued'])),
+        completed_count=Count('id', filter=Q(status='returned')),
+        last_rental_at=Max('requested_start_date'),
+        overdue_count=Count('id', filter=Q(status='issued', requested_end_date__lt=now)),
+    ).order_by()
+    return [
+        UserRentalStats(units_issued=units_issued.get(row['user_id']) or 0, **row)
+        for row in rows
+    ]
+
+
+def _store(model, key, stats, ids, fields):
+    """Upsert ``stats`` and delete the rows of ``ids`` without rentals."""
+    model.objects.bulk_create(
+        stats, update_conflicts=True, unique_fields=[key], update_fields=fields, batch_size=500,
+    )
+    kept = [getattr(row, f'{key}_id') for row in stats]
+    stale = model.objects.exclude(**{f'{key}_id__in': kept})
+    if ids is not None:
+        stale = stale.filter(**{f'{key}_id__in': ids})
+    stale.delete()
+
+
+def refresh_rental_stats(item_ids=None, user_ids=None, now=None):
+    """
+    Recompute the rental statistics of inventory items and users.
+
+    Each side is computed with one grouped query (two for users) and
+    written with one upsert, so refreshing one item costs the same
+    indexed reads as refreshing a hundred. Overdue counts depend on the
+    time, so a full refresh runs regularly (``rebuild_rental_stats``).
+
+    Args:
+        item_ids: IDs of the inventory items to refresh, None for all
+        user_ids: IDs of the users to refresh, None for all
+        now: Time overdue rentals are counted at (default: now)
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        if item_ids is None or item_ids:
+            _store(InventoryRentalStats, 'inventory_item', _item_stats(item_ids, now), item_ids,
+                   ITEM_STATS_FIELDS)
+        if user_ids is None or user_ids:
+            _store(UserRentalStats, 'user', _user_stats(user_ids, now), user_ids, USER_STATS_FIELDS)
+
+
+class StatsRefresh(CommitBatch):
+    """Items and users whose statistics are refreshed after the commit."""
+
+    def __init__(self):
+        """Collect the changes of one transaction."""
+        super().__init__()
+        self.item_ids = set()
+        self.rental_request_ids = set()
+        self.user_ids = set()
+
+    def execute(self):
+        """Refresh the statistics of all collected items and users."""
+        item_ids = set(self.item_ids)
+        user_ids = set(self.user_ids)
+        if self.rental_request_ids:
+            user_ids.update(RentalRequest.objects.filter(
+                id__in=self.rental_request_ids
+            ).values_list('user_id', flat=True))
+            item_ids.update(RentalItem.objects.filter(
+                rental_request_id__in=self.rental_request_ids
+            ).values_list('inventory_item_id', flat=True))
+        refresh_rental_stats(item_ids, user_ids)
+
+
+def queue_rental_stats(item_ids=(), rental_request_ids=(), user_ids=(), using=DEFAULT_DB_ALIAS):
+    """
+    Refresh the statistics touched by a change once the transaction commits.
+
+    All changes of a transaction are refreshed together after the commit,
+    so booking twenty items refreshes their statistics with one upsert
+    instead of twenty. Outside of transactions they are refreshed at once.
+
+    Args:
+        item_ids: IDs of changed inventory items
+        rental_request_ids: IDs of changed rental requests, whose user and
+            items are refreshed
+        user_ids: IDs of changed users
+        using: Database alias of the transaction
+    """
+    in_transaction = connections[using].in_atomic_block
+    refresh = current_batch('rental_stats', StatsRefresh, using=using) if in_transaction else StatsRefresh()
+    refresh.item_ids.update(item_ids)
+    refresh.rental_request_ids.update(rental_request_ids)
+    refresh.user_ids.update(user_ids)
+    if not in_transaction:
+        refresh.run()
@@ -1,3 +1,4 @@
+from .booking import book_rental_items
 from .models import EquipmentSet
 from .models import EquipmentSetItem
 from .models import RentalIssue
@@ -6,9 +7,13 @@ from .models import RentalRequest
 from .models import RentalTransaction
 from .models import Room
 from .models import RoomRental
+from .models import occupancy_q
 from .permissions import CanCreateRentalRequest
 from .permissions import IsAuthenticatedAndMemberOrReadOnly
 from .permissions import StaffCanIssuePermission
+from .schedule import build_inventory_calendar
+from .schedule import build_room_schedules
+from .schedule import user_display_name
 from .serializers import EquipmentSetItemSerializer
 from .serializers import EquipmentSetSerializer
 from .serializers import InventoryItemSerializer
@@ -21,6 +26,7 @@ from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.mixins import UserPassesTestMixin
+from django.db import transaction
 from django.db.models import Q
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
@@ -434,9 +440,12 @@ def api_get_user_inventory(request, user_id):
             Q(category__name__icontains=search_query)
         )
 
+    items = list(inventory_query)
+    available = get_available_quantities_for_period(items, start_date, end_date)
+
     result = []
-    for item in inventory_query:
-        available_qty = get_available_quantity_for_period(item, start_date, end_date)
+    for item in items:
+        available_qty = available[item.id]
         if available_qty > 0:
             result.append({
                 'id': item.id,
@@ -521,121 +530,10 @@ def api_create_rental_user(request):
                 'error': _('End time must be after start time')
             }, status=400)
 
-        # Validate availability for equipment items during the requested period
-        if 'items' in data and data['items']:
-            for item_data in data['items']:
-                inventory_item = get_object_or_404(InventoryItem, id=item_data['inventory_id'])
-                requested_qty = int(item_data['quantity'])
-
-                # Use the same logic as api_get_user_inventory to check availability
-                available_qty = get_available_quantity_for_period(inventory_item, start_date, end_date)
-
-                if available_qty < requested_qty:
-                    return JsonResponse({
-                        'error': _('Item "{item_description}" is not available for the selected period. Available: {available}, requested: {requested}').format(
-                            item_description=inventory_item.description,
-                            available=available_qty,
-                            requested=requested_qty
-                        )
-                    }, status=400)
-
-        # Determine rental type
-        rental_type = data.get('rental_type', 'equipment')
-        if 'rooms' in data and data['rooms']:
-            if rental_type == 'equipment':
-                rental_type = 'mixed'
-            elif rental_type == 'room':
-                rental_type = 'room'
-
-        # If all items are available, create the rental
-        rental_request = RentalRequest.objects.create(
-            user_id=data['user_id'],
-            created_by=request.user,
-            project_name=data['project_name'],
-            purpose=data['purpose'],
-            requested_start_date=start_date,
-            requested_end_date=end_date,
-            status=data.get('action', 'draft'),
-            rental_type=rental_type,
-            notes=data.get('notes', '')
-        )
-
-        # Create rental items for equipment
-        if 'items' in data and data['items']:
-            for item_data in data['items']:
-                rental_item = RentalItem.objects.create(
-                    rental_request=rental_request,
-                    inventory_item_id=item_data['inventory_id'],
-                    quantity_requested=item_data['quantity']
-                )
-                qty = int(item_data['quantity'])
-                tx_type = 'issue' if data.get('action') == 'issued' else 'reserve'
-                RentalTransaction.objects.create(
-                    rental_item=rental_item,
-                    transaction_type=tx_type,
-                    quantity=qty,
-                    performed_by=request.user,
-                )
-
-        # Create room rentals
-        if 'rooms' in data and data['rooms']:
-            from .models import Room
-            from .models import RoomRental
-
-            # Check availability of each room
-            for room_data in data['rooms']:
-                room = get_object_or_404(Room, id=room_data['room_id'])
-
-                # Check if room is available at specified time
-                if not room.is_available_for_time(start_date, end_date):
-                    # Get information about conflicting rentals
-                    conflicts = room.get_conflicting_rentals(start_date, end_date)
-                    conflict_info = []
-                    for conflict in conflicts:
-                        user = conflict.rental_request.user
-                        user_name = _("Unknown user")
-
-                        # Try to get name from profile
-                        try:
-                            if hasattr(user, 'profile') and user.profile:
-                                profile = user.profile
-                                if hasattr(profile, 'first_name') and profile.first_name and hasattr(profile, 'last_name') and profile.last_name:
-                                    user_name = f"{profile.first_name} {profile.last_name}"
-                                elif hasattr(profile, 'first_name') and profile.first_name:
-                                    user_name = profile.first_name
-                                elif hasattr(profile, 'last_name') and profile.last_name:
-                                    user_name = profile.last_name
-                            elif hasattr(user, 'first_name') and user.first_name and hasattr(user, 'last_name') and user.last_name:
-                                user_name = f"{user.first_name} {user.last_name}"
-                            elif hasattr(user, 'username') and user.username:
-                                user_name = user.username
-                            elif hasattr(user, 'email') and user.email:
-                                user_name = user.email.split('@')[0]
-                            else:
-                                user_name = _("User #{user_id}").format(user_id=user.id)
-                        except:
-                            user_name = _("User #{user_id}").format(user_id=user.id)
-
-                        project = conflict.rental_request.project_name
-                        status = conflict.rental_request.get_status_display()
-                        conflict_info.append(f"{user_name} ({project}) - {status}")
-
-                    return JsonResponse({
-                        'error': _('Room "{room_name}" is not available for the selected period. '
-                                  'Conflicts: {conflicts}').format(
-                            room_name=room.name,
-                            conflicts=", ".join(conflict_info)
-                        )
-                    }, status=400)
-
-            # If all rooms are available, create rentals
-            for room_data in data['rooms']:
-                RoomRental.objects.create(
-                    rental_request=rental_request,
-                    room_id=room_data['room_id'],
-                    people_count=room_data.get('people_count', 1),
-                    notes=room_data.get('notes', '')
-                )
+        # Check availability and book while the requested items and rooms are locked
+        rental_request, error = create_rental_booking(data, request.user, start_date, end_date)
+        if error:
+            return JsonResponse({'error': error}, status=400)
 
         return JsonResponse({'success': True, 'rental_id': rental_request.id, 'message': _('Rental request created successfully')})
     except Exception as e:
@@ -707,121 +605,10 @@ def api_create_rental(request):
                 'error': _('End time must be after start time')
             }, status=400)
 
-        # Validate availability for equipment items during the requested period
-        if 'items' in data and data['items']:
-            for item_data in data['items']:
-                inventory_item = get_object_or_404(InventoryItem, id=item_data['inventory_id'])
-                requested_qty = int(item_data['quantity'])
-
-                # Use the same logic as api_get_user_inventory to check availability
-                available_qty = get_available_quantity_for_period(inventory_item, start_date, end_date)
-
-                if available_qty < requested_qty:
-                    return JsonResponse({
-                        'error': _('Item "{item_description}" is not available for the selected period. Available: {available}, requested: {requested}').format(
-                            item_description=inventory_item.description,
-                            available=available_qty,
-                            requested=requested_qty
-                        )
-                    }, status=400)
-
-        # Determine rental type
-        rental_type = data.get('rental_type', 'equipment')
-        if 'rooms' in data and data['rooms']:
-            if rental_type == 'equipment':
-                rental_type = 'mixed'
-            elif rental_type == 'room':
-                rental_type = 'room'
-
-        # If all items are available, create the rental
-        rental_request = RentalRequest.objects.create(
-            user_id=data['user_id'],
-            created_by=request.user,
-            project_name=data['project_name'],
-            purpose=data['purpose'],
-            requested_start_date=start_date,
-            requested_end_date=end_date,
-            status=data.get('action', 'draft'),
-            rental_type=rental_type,
-            notes=data.get('notes', '')
-        )
-
-        # Create rental items for equipment
-        if 'items' in data and data['items']:
-            for item_data in data['items']:
-                rental_item = RentalItem.objects.create(
-                    rental_request=rental_request,
-                    inventory_item_id=item_data['inventory_id'],
-                    quantity_requested=item_data['quantity']
-                )
-                qty = int(item_data['quantity'])
-                tx_type = 'issue' if data.get('action') == 'issued' else 'reserve'
-                RentalTransaction.objects.create(
-                    rental_item=rental_item,
-                    transaction_type=tx_type,
-                    quantity=qty,
-                    performed_by=request.user,
-                )
-
-        # Create room rentals
-        if 'rooms' in data and data['rooms']:
-            from .models import Room
-            from .models import RoomRental
-
-            # Check availability of each room
-            for room_data in data['rooms']:
-                room = get_object_or_404(Room, id=room_data['room_id'])
-
-                # Check if room is available at specified time
-                if not room.is_available_for_time(start_date, end_date):
-                    # Get information about conflicting rentals
-                    conflicts = room.get_conflicting_rentals(start_date, end_date)
-                    conflict_info = []
-                    for conflict in conflicts:
-                        user = conflict.rental_request.user
-                        user_name = _("Unknown user")
-
-                        # Try to get name from profile
-                        try:
-                            if hasattr(user, 'profile') and user.profile:
-                                profile = user.profile
-                                if hasattr(profile, 'first_name') and profile.first_name and hasattr(profile, 'last_name') and profile.last_name:
-                                    user_name = f"{profile.first_name} {profile.last_name}"
-                                elif hasattr(profile, 'first_name') and profile.first_name:
-                                    user_name = profile.first_name
-                                elif hasattr(profile, 'last_name') and profile.last_name:
-                                    user_name = profile.last_name
-                            elif hasattr(user, 'first_name') and user.first_name and hasattr(user, 'last_name') and user.last_name:
-                                user_name = f"{user.first_name} {user.last_name}"
-                            elif hasattr(user, 'username') and user.username:
-                                user_name = user.username
-                            elif hasattr(user, 'email') and user.email:
-                                user_name = user.email.split('@')[0]
-                            else:
-                                user_name = _("User #{user_id}").format(user_id=user.id)
-                        except:
-                            user_name = _("User #{user_id}").format(user_id=user.id)
-
-                        project = conflict.rental_request.project_name
-                        status = conflict.rental_request.get_status_display()
-                        conflict_info.append(f"{user_name} ({project}) - {status}")
-
-                    return JsonResponse({
-                        'error': _('Room "{room_name}" is not available for the selected period. '
-                                  'Conflicts: {conflicts}').format(
-                            room_name=room.name,
-                            conflicts=", ".join(conflict_info)
-                        )
-                    }, status=400)
-
-            # If all rooms are available, create rentals
-            for room_data in data['rooms']:
-                RoomRental.objects.create(
-                    rental_request=rental_request,
-                    room_id=room_data['room_id'],
-                    people_count=room_data.get('people_count', 1),
-                    notes=room_data.get('notes', '')
-                )
+        # Check availability and book while the requested items and rooms are locked
+        rental_request, error = create_rental_booking(data, request.user, start_date, end_date)
+        if error:
+            return JsonResponse({'error': error}, status=400)
 
         return JsonResponse({'success': True, 'rental_id': rental_request.id, 'message': _('Rental request created successfully')})
     except Exception as e:
@@ -843,38 +630,231 @@ def get_available_quantity_for_period(item, start_date, end_date):
     Returns:
         int: Available quantity for the specified period
     """
-    total_qty = item.quantity or 0
+    return get_available_quantities_for_period([item], start_date, end_date)[item.id]
+
+
+def get_available_quantities_for_period(items, start_date, end_date):
+    """
+    Calculate available quantities of many items for a time period.
+
+    Reserved (requested minus issued) and issued (issued minus returned)
+    quantities of all overlapping rentals are summed per item in a single
+    aggregated query.
+
+    Args:
+        items: Iterable of InventoryItem instances
+        start_date: Start datetime of the requested period
+        end_date: End datetime of the requested period
+
+    Returns:
+        dict: Available quantity by inventory item ID
+    """
+    items = list(items)
 
     # If no dates provided, use simple calculation (current behavior)
     if not start_date or not end_date:
-        return total_qty - (item.reserved_quantity or 0) - (item.rented_quantity or 0)
+        return {
+            item.id: (item.quantity or 0) - (item.reserved_quantity or 0) - (item.rented_quantity or 0)
+            for item in items
+        }
 
-    # Get all rental items that might conflict with the requested period
-    from .models import RentalItem
-    from .models import RentalRequest
+    from django.db.models import Case
+    from django.db.models import F
+    from django.db.models import IntegerField
+    from django.db.models import Sum
+    from django.db.models import When
 
-    conflicting_rentals = RentalItem.objects.select_related('rental_request').filter(
-        inventory_item=item,
-        rental_request__status__in=['reserved', 'issued'],
+    conflicting = RentalItem.objects.filter(
         # Check for date overlap: requested period overlaps with existing rentals
-        rental_request__requested_start_date__lt=end_date,
-        rental_request__requested_end_date__gt=start_date
+        occupancy_q(start_date, end_date, prefix='rental_request__'),
+        inventory_item_id__in=[item.id for item in items],
+    ).values('inventory_item_id').annotate(
+        conflicting_qty=Sum(
+            Case(
+                # Quantity that's actually reserved (not yet issued)
+                When(
+                    rental_request__status='reserved',
+                    then=F('quantity_requested') - F('quantity_issued'),
+                ),
+                # Quantity that's currently issued and not returned
+                When(
+                    rental_request__status='issued',
+                    then=F('quantity_issued') - F('quantity_returned'),
+                ),
+                default=0,
+                output_field=IntegerField(),
+            )
+        )
+    ).order_by()
+    conflicting_qty = {
+        row['inventory_item_id']: row['conflicting_qty'] or 0 for row in conflicting
+    }
+
+    return {
+        item.id: max(0, (item.quantity or 0) - conflicting_qty.get(item.id, 0))
+        for item in items
+    }
+
+
+def check_items_availability(items_data, start_date, end_date):
+    """
+    Check that requested equipment is available for a period.
+
+    Loads all requested items and their availability with two queries.
+    Quantities requested several times for the same item are added up.
+
+    Args:
+        items_data: List of dicts with 'inventory_id' and 'quantity'
+        start_date: Start datetime of the requested period
+        end_date: End datetime of the requested period
+
+    Returns:
+        str: Error message for the first unavailable item, or None
+
+    Raises:
+        Http404: If an inventory item does not exist
+    """
+    requested = {}
+    for item_data in items_data:
+        inventory_id = int(item_data['inventory_id'])
+        requested[inventory_id] = requested.get(inventory_id, 0) + int(item_data['quantity'])
+
+    inventory_items = InventoryItem.objects.in_bulk(list(requested))
+    for inventory_id in requested:
+        if inventory_id not in inventory_items:
+            get_object_or_404(InventoryItem, id=inventory_id)
+
+    available = get_available_quantities_for_period(inventory_items.values(), start_date, end_date)
+    for inventory_id, requested_qty in requested.items():
+        if available[inventory_id] < requested_qty:
+            return _('Item "{item_description}" is not available for the selected period. Available: {available}, requested: {requested}').format(
+                item_description=inventory_items[inventory_id].description,
+                available=available[inventory_id],
+                requested=requested_qty
+            )
+    return None
+
+
+def room_conflict_error(room, start_date, end_date):
+    """
+    Check that a room is available for a period.
+
+    Args:
+        room: Room instance
+        start_date: Start datetime of the requested period
+        end_date: End datetime of the requested period
+
+    Returns:
+        str: Error message naming the conflicting rentals, or None
+    """
+    if room.is_available_for_time(start_date, end_date):
+        return None
+
+    conflict_info = []
+    for conflict in room.get_conflicting_rentals(start_date, end_date):
+        rental_request = conflict.rental_request
+        conflict_info.append(
+            f"{user_display_name(rental_request.user)} ({rental_request.project_name}) - "
+            f"{rental_request.get_status_display()}"
+        )
+    return _('Room "{room_name}" is not available for the selected period. '
+             'Conflicts: {conflicts}').format(
+        room_name=room.name,
+        conflicts=", ".join(conflict_info)
     )
 
-    # Calculate total conflicting quantity
-    conflicting_qty = 0
-    for rental_item in conflicting_rentals:
-        # For reserved items, count only if the reservation period overlaps
-        if rental_item.rental_request.status == 'reserved':
-            # Count quantity that's actually reserved (not yet issued)
-            reserved_for_this = (rental_item.quantity_requested or 0) - (rental_item.quantity_issued or 0)
-            conflicting_qty += reserved_for_this
-        elif rental_item.rental_request.status == 'issued':
-            # Count quantity that's currently issued and not returned
-            issued_for_this = (rental_item.quantity_issued or 0) - (rental_item.quantity_returned or 0)
-            conflicting_qty += issued_for_this
 
-    return max(0, total_qty - conflicting_qty)
+def create_rental_booking(data, created_by, start_date, end_date):
+    """
+    Create a rental request with its equipment and rooms if they are available.
+
+    Availability is checked and the booking written in one database
+    transaction while the requested inventory items and rooms are locked
+    with SELECT ... FOR UPDATE. Concurrent bookings of the same item or
+    room wait for each other, so the last unit cannot be booked twice,
+    while bookings of other items and rooms proceed in parallel.
+
+    Args:
+        data: Rental data with user_id, project_name, purpose and
+            optional action, rental_type, notes, items and rooms
+        created_by: User creating the rental
+        start_date: Start datetime of the rental
+        end_date: End datetime of the rental
+
+    Returns:
+        tuple: (RentalRequest, None) on success, (None, error message) otherwise
+
+    Raises:
+        Http404: If an inventory item or room does not exist
+    """
+    items_data = data.get('items') or []
+    rooms_data = data.get('rooms') or []
+
+    # Determine rental type
+    rental_type = data.get('rental_type', 'equipment')
+    if rooms_data and rental_type == 'equipment':
+        rental_type = 'mixed'
+
+    with transaction.atomic():
+        # Lock in ID order, so bookings sharing several items cannot deadlock
+        item_ids = sorted({int(item_data['inventory_id']) for item_data in items_data})
+        if item_ids:
+            list(InventoryItem.objects.select_for_update().filter(id__in=item_ids).order_by('id').values_list('id', flat=True))
+        room_ids = sorted({int(room_data['room_id']) for room_data in rooms_data})
+        rooms = {
+            room.id: room
+            for room in Room.objects.select_for_update().filter(id__in=room_ids).order_by('id')
+        } if room_ids else {}
+
+        # Validate availability for equipment items during the requested period
+        if items_data:
+            # Use the same logic as api_get_user_inventory to check availability
+            error = check_items_availability(items_data, start_date, end_date)
+            if error:
+                return None, error
+
+        # Check availability of each room
+        for room_id in room_ids:
+            if room_id not in rooms:
+                get_object_or_404(Room, id=room_id)
+            error = room_conflict_error(rooms[room_id], start_date, end_date)
+            if error:
+                return None, error
+
+        # If everything is available, create the rental
+        rental_request = RentalRequest.objects.create(
+            user_id=data['user_id'],
+            created_by=created_by,
+            project_name=data['project_name'],
+            purpose=data['purpose'],
+            requested_start_date=start_date,
+            requested_end_date=end_date,
+            status=data.get('action', 'draft'),
+            rental_type=rental_type,
+            notes=data.get('notes', '')
+        )
+
+        # Create rental items for equipment with their transactions in bulk
+        tx_type = 'issue' if data.get('action') == 'issued' else 'reserve'
+        book_rental_items(
+            rental_request,
+            [(int(item_data['inventory_id']), int(item_data['quantity'])) for item_data in items_data],
+            tx_type,
+            created_by,
+        )
+
+        # Create room rentals
+        RoomRental.objects.bulk_create([
+            RoomRental(
+                rental_request=rental_request,
+                room_id=room_data['room_id'],
+                people_count=room_data.get('people_count', 1),
+                notes=room_data.get('notes', '')
+            )
+            for room_data in rooms_data
+        ])
+
+    return rental_request, None
 
 
 @login_required
@@ -883,8 +863,9 @@ def api_get_user_stats(request, user_id):
     """
     Get rental statistics for a specific user.
 
-    Returns counts of active, completed, and overdue rentals
-    along with recent rental activities.
+    Returns counts of active and completed rentals from the user's rental
+    statistics, overdue rentals counted at request time and recent rental
+    activities.
 
     Args:
         request: HTTP request object
@@ -893,11 +874,11 @@ def api_get_user_stats(request, user_id):
     Returns:
         JsonResponse: User rental statistics and recent activities
     """
+    from .models import UserRentalStats
     from django.utils import timezone
+
     user = get_object_or_404(OKUser, id=user_id)
-    active_rentals = RentalRequest.objects.filter(user=user, status__in=['reserved', 'issued']).count()
-    completed_rentals = RentalRequest.objects.filter(user=user, status='returned').count()
-    overdue_rentals = RentalRequest.objects.filter(user=user, status='issued', requested_end_date__lt=timezone.now()).count()
+    stats = UserRentalStats.objects.filter(user=user).first() or UserRentalStats(user=user)
     recent_activities = RentalRequest.objects.filter(user=user).order_by('-created_at')[:5]
     activities = [{
         'project_name': r.project_name,
@@ -905,9 +886,12 @@ def api_get_user_stats(request, user_id):
         'status': r.get_status_display(),
     } for r in recent_activities]
     return JsonResponse({
-        'active_rentals': active_rentals,
-        'completed_rentals': completed_rentals,
-        'overdue_rentals': overdue_rentals,
+        'active_rentals': stats.active_count,
+        'completed_rentals': stats.completed_count,
+        # Overdue depends on the time, so it is not taken from the statistics
+        'overdue_rentals': RentalRequest.objects.filter(
+            user=user, status='issued', requested_end_date__lt=timezone.now(),
+        ).count(),
         'recent_activities': activities,
     })
 
@@ -1871,13 +1855,17 @@ def api_reset_rental_system(request):
             # Cancel all active rentals
             from django.utils import timezone
 
+            from .stats import queue_rental_stats
+
             active_rentals = RentalRequest.objects.filter(status__in=['reserved', 'issued'])
-            count = active_rentals.count()
+            rental_request_ids = list(active_rentals.values_list('id', flat=True))
+            count = len(rental_request_ids)
 
             active_rentals.update(
                 status='cancelled',
                 actual_end_date=timezone.now()
             )
+            queue_rental_stats(rental_request_ids=rental_request_ids)
 
             # Reset inventory quantities
             InventoryItem.objects.filter(available_for_rent=True).update(
@@ -1890,6 +1878,10 @@ def api_reset_rental_system(request):
         else:
             return JsonResponse({'error': _('Invalid action')}, status=400)
 
+        # The counter and status updates send no signals
+        from dashboard.cache import invalidate_widget_cache
+        invalidate_widget_cache('inventory')
+
         return JsonResponse({
             'success': True,
             'message': message
@@ -1905,76 +1897,38 @@ def api_get_all_rentals(request):
     """
     Get all rentals with filtering options.
 
-    Returns paginated list of all rentals with optional filtering
-    by status and user search, including summary information.
+    Returns one page of rentals with optional filtering by status, type
+    and user search, including summary information. Pages are addressed
+    by the ``cursor`` of the previous response, which stays fast however
+    long the rental history grows; ``page`` numbers are still accepted.
+    The total is only computed for the first page and may be an estimate.
 
     Args:
         request: HTTP request object with filter and pagination parameters
 
     Returns:
-        JsonResponse: Paginated list of rentals with metadata
+        JsonResponse: Page of rentals with metadata
     """
     try:
-        from .models import RentalRequest
-        from django.core.paginator import Paginator
+        from .listing import PAGE_SIZE
+        from .listing import estimated_count
+        from .listing import filter_rentals
+        from .listing import rental_page
 
         # Get filter parameters
         status = request.GET.get('status', 'all')
         type_filter = request.GET.get('type', 'all')
         user_query = request.GET.get('user', '')
-        page = int(request.GET.get('page', 1))
+        cursor = request.GET.get('cursor', '')
+        page = max(1, int(request.GET.get('page', 1)))
 
-        # Base queryset
-        rentals = RentalRequest.objects.select_related(
-            'user', 'created_by'
-        ).prefetch_related(
-            'items__inventory_item',
-            'room_rentals__room'
-        ).order_by('-created_at')
-
-        # Apply filters
-        if status != 'all':
-            rentals = rentals.filter(status=status)
-
-        if type_filter != 'all':
-            if type_filter == 'equipment':
-                # Only equipment rentals (have items, no rooms)
-                rentals = rentals.filter(items__isnull=False).exclude(room_rentals__isnull=False)
-            elif type_filter == 'room':
-                # Only room rentals (have rooms, no items)
-                rentals = rentals.filter(room_rentals__isnull=False).exclude(items__isnull=False)
-            elif type_filter == 'mixed':
-                # Mixed rentals (have both items and rooms)
-                rentals = rentals.filter(items__isnull=False, room_rentals__isnull=False)
-
-        if user_query:
-            # Safe filtering - only include profile filters if profile exists
-            q_filters = Q(user__email__icontains=user_query)
-            try:
-                q_filters |= Q(user__profile__first_name__icontains=user_query) | Q(user__profile__last_name__icontains=user_query)
-            except:
-                pass  # Skip profile filtering if it causes issues
-            rentals = rentals.filter(q_filters)
-
-        # Paginate
-        paginator = Paginator(rentals.distinct(), 20)
-        page_obj = paginator.get_page(page)
-
-        # PERFORMANCE OPTIMIZATION: Re-fetch with prefetch after pagination
-        # Paginator breaks prefetch_related, so we need to re-apply it
-        rental_ids = [r.id for r in page_obj]
-        optimized_rentals = RentalRequest.objects.filter(
-            id__in=rental_ids
-        ).select_related(
-            'user', 'created_by', 'user__profile', 'created_by__profile'
-        ).prefetch_related(
-            'items__inventory_item', 
-            'room_rentals__room'
-        )
-        
-        # Create dict for quick lookup maintaining page order
-        rentals_dict = {r.id: r for r in optimized_rentals}
-        ordered_rentals = [rentals_dict[rid] for rid in rental_ids if rid in rentals_dict]
+        rentals = filter_rentals(status, type_filter, user_query)
+        try:
+            ordered_rentals, next_cursor = rental_page(
+                rentals, cursor=cursor, offset=(page - 1) * PAGE_SIZE
+            )
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
 
         # Serialize data
         result = []
@@ -1991,21 +1945,6 @@ def api_get_all_rentals(request):
             except:
                 created_by_name = rental.created_by.email if rental.created_by else 'N/A'
 
-            items_summary = []
-            for item in rental.items.all()[:3]:  # Show first 3 items
-                items_summary.append({
-                    'description': item.inventory_item.description or item.inventory_item.inventory_number,
-                    'quantity': item.quantity_requested
-                })
-
-            # Get rooms summary
-            rooms_summary = []
-            for room_rental in rental.room_rentals.all()[:3]:  # Show first 3 rooms
-                rooms_summary.append({
-                    'name': room_rental.room.name,
-                    'people_count': room_rental.people_count
-                })
-
             result.append({
                 'id': rental.id if rental else 0,
                 'project_name': rental.project_name or '',
@@ -2018,20 +1957,28 @@ def api_get_all_rentals(request):
                 'requested_start_date': rental.requested_start_date.isoformat() if rental.requested_start_date else '',
                 'requested_end_date': rental.requested_end_date.isoformat() if rental.requested_end_date else '',
                 'actual_end_date': rental.actual_end_date.isoformat() if rental.actual_end_date else '',
-                'items_count': rental.items.count() if hasattr(rental, 'items') else 0,
-                'rooms_count': rental.room_rentals.count() if hasattr(rental, 'room_rentals') else 0,
-                'items_summary': items_summary or [],
-                'rooms_summary': rooms_summary or []
+                'items_count': rental.items_count,
+                'rooms_count': rental.rooms_count,
+                'items_summary': rental.items_summary,
+                'rooms_summary': rental.rooms_summary
             })
 
-        return JsonResponse({
-            'rentals': result or [],
-            'has_next': page_obj.has_next() if page_obj else False,
-            'has_previous': page_obj.has_previous() if page_obj else False,
-            'current_page': page or 1,
-            'total_pages': paginator.num_pages if paginator else 1,
-            'total_count': paginator.count if paginator else 0
-        })
+        response = {
+            'rentals': result,
+            'has_next': next_cursor is not None,
+            'has_previous': bool(cursor) or page > 1,
+            'next_cursor': next_cursor,
+            'current_page': page,
+        }
+        if not cursor:
+            filtered = status != 'all' or type_filter != 'all' or bool(user_query)
+            total_count, is_estimate = estimated_count(rentals, filtered)
+            response.update({
+                'total_pages': max(1, -(-total_count // PAGE_SIZE)),
+                'total_count': total_count,
+                'total_is_estimate': is_estimate,
+            })
+        return JsonResponse(response)
 
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
@@ -2106,20 +2053,21 @@ def api_inventory_calendar(request):
     Aggregate availability for inventory over a period.
 
     Query params:
-      - mode: 'day' | 'week' (default: day)
+      - mode: 'day' | 'week' | 'month' (default: day)
       - date: ISO date (YYYY-MM-DD), default: today
 
-    For day mode: returns hours 10..18 per item with occupied/available.
+    For day mode: returns hours 10..19 per item with occupied/available.
     For week mode: returns 7 days per item with occupied/available (any overlap in day).
+    For month mode: returns every day of the month of date like week mode.
     """
     try:
-        from datetime import datetime, timedelta
         from django.utils import timezone
         from django.utils.dateparse import parse_date
         from inventory.models import InventoryItem
-        from .models import RentalItem
 
         mode = request.GET.get('mode', 'day')
+        if mode not in ('day', 'week', 'month'):
+            mode = 'day'
         day = parse_date(request.GET.get('date') or '') or timezone.now().date()
 
         # Use values() to avoid deferred fields triggering model __init__ side effects
@@ -2129,118 +2077,21 @@ def api_inventory_calendar(request):
             .values('id', 'inventory_number', 'description')
             .order_by('inventory_number')
         )
-        item_ids = [it['id'] for it in items_list]
-
-        if mode == 'week':
-            start_date = day
-            end_date = day + timedelta(days=6)
-        else:
-            start_date = day
-            end_date = day
-
-        start_dt = timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
-        end_dt = timezone.make_aware(datetime.combine(end_date, datetime.max.time()))
-
-        rentals = (
-            RentalItem.objects.select_related('rental_request')  # avoid selecting inventory_item to prevent model init side effects
-            .filter(
-                rental_request__status__in=['reserved', 'issued'],
-                rental_request__requested_start_date__lte=end_dt,
-                rental_request__requested_end_date__gte=start_dt,
-                inventory_item_id__in=item_ids
-            )
-        )
-
-        item_id_to_rentals = {}
-        for ri in rentals:
-            item_id_to_rentals.setdefault(ri.inventory_item_id, []).append(ri)
+        rows = build_inventory_calendar([it['id'] for it in items_list], mode, day)
 
         result = []
-
-        if mode == 'week':
-            days = [start_date + timedelta(days=i) for i in range(7)]
-            for it in items_list:
-                day_statuses = []
-                conflicts = item_id_to_rentals.get(it['id'], [])
-                for d in days:
-                    # Business day window 10:00..19:00
-                    d_start = timezone.make_aware(datetime.combine(d, datetime.min.time()).replace(hour=10, minute=0))
-                    d_end = timezone.make_aware(datetime.combine(d, datetime.min.time()).replace(hour=19, minute=0))
-                    status = 'available'
-                    has_reserved = False
-                    selected_user = None
-                    selected_req = None
-                    for ri in conflicts:
-                        rs = timezone.localtime(ri.rental_request.requested_start_date)
-                        re = timezone.localtime(ri.rental_request.requested_end_date)
-                        if rs <= d_end and re >= d_start:
-                            # Prefer issued
-                            if ri.rental_request.status == 'issued':
-                                status = 'issued'
-                                selected_req = ri
-                                break
-                            elif ri.rental_request.status == 'reserved':
-                                has_reserved = True
-                                if not selected_req:
-                                    selected_req = ri
-                    if status != 'issued' and has_reserved:
-                        status = 'reserved'
-                    if selected_req:
-                        user = selected_req.rental_request.user
-                        try:
-                            profile = user.profile
-                            full = f"{getattr(profile,'first_name','') or ''} {getattr(profile,'last_name','') or ''}".strip()
-                            selected_user = full or (user.email.split('@')[0] if getattr(user,'email','') else str(user.id))
-                        except Exception:
-                            selected_user = user.email.split('@')[0] if getattr(user,'email','') else str(user.id)
-                    day_statuses.append({'date': d.isoformat(), 'status': status, 'user_name': selected_user})
-
-                result.append({
-                    'id': it['id'],
-                    'inventory_number': it['inventory_number'],
-                    'description': it.get('description') or it['inventory_number'],
-                    'week': day_statuses,
-                })
-        else:
-            # Business hours view 10:00..18:00
-            hours = list(range(10, 20))  # 10..19 inclusive
-            for it in items_list:
-                hour_slots = []
-                conflicts = item_id_to_rentals.get(it['id'], [])
-                for h in hours:
-                    slot_start = timezone.make_aware(datetime.combine(day, datetime.min.time().replace(hour=h, minute=0)))
-                    slot_end = slot_start + timedelta(hours=1)
-                    status = 'available'
-                    info = None
-                    for ri in conflicts:
-                        rs = timezone.localtime(ri.rental_request.requested_start_date)
-                        re = timezone.localtime(ri.rental_request.requested_end_date)
-                        if slot_start < re and slot_end > rs:
-                            status = ri.rental_request.status  # reserved or issued
-                            user = ri.rental_request.user
-                            try:
-                                profile = user.profile
-                                full = f"{getattr(profile,'first_name','') or ''} {getattr(profile,'last_name','') or ''}".strip()
-                                user_name = full or (user.email.split('@')[0] if getattr(user,'email','') else str(user.id))
-                            except Exception:
-                                user_name = user.email.split('@')[0] if getattr(user,'email','') else str(user.id)
-                            info = {
-                                'user_name': user_name,
-                                'status': ri.rental_request.status,
-                                'start': rs.strftime('%d.%m.%Y %H:%M'),
-                                'end': re.strftime('%d.%m.%Y %H:%M'),
-                                'id': ri.rental_request_id,
-                            }
-                            break
-                    hour_slots.append({'time': f"{h:02d}:00", 'status': status, 'info': info})
-
-                result.append({
-                    'id': it['id'],
-                    'inventory_number': it['inventory_number'],
-                    'description': it.get('description') or it['inventory_number'],
-                    'day': day.isoformat(),
-                    'hours': hour_slots,
-                })
+        for it in items_list:
+            entry = {
+                'id': it['id'],
+                'inventory_number': it['inventory_number'],
+                'description': it.get('description') or it['inventory_number'],
+            }
+            if mode == 'day':
+                entry['day'] = day.isoformat()
+                entry['hours'] = rows[it['id']]
+            else:
+                entry[mode] = rows[it['id']]
+            result.append(entry)
 
         return JsonResponse({'success': True, 'mode': mode, 'date': day.isoformat(), 'items': result})
     except Exception as e:
@@ -2427,25 +2278,27 @@ def api_search_inventory_items(request):
                 Q(category__name__icontains=query)
             )
 
-        items = items[:50]  # Increased limit for better search results
+        items = list(items[:50])  # Increased limit for better search results
 
-        result = []
-        for item in items:
-            # Check availability if dates are provided
-            available_quantity = item.quantity
-            if start_date and end_date:
-                try:
-                    start_datetime = parse_datetime(start_date)
-                    end_datetime = parse_datetime(end_date)
+        # Check availability if dates are provided
+        available = {item.id: item.quantity for item in items}
+        if start_date and end_date:
+            try:
+                start_datetime = parse_datetime(start_date)
+                end_datetime = parse_datetime(end_date)
 
-                    if timezone.is_naive(start_datetime):
-                        start_datetime = timezone.make_aware(start_datetime)
-                    if timezone.is_naive(end_datetime):
-                        end_datetime = timezone.make_aware(end_datetime)
+                if timezone.is_naive(start_datetime):
+                    start_datetime = timezone.make_aware(start_datetime)
+                if timezone.is_naive(end_datetime):
+                    end_datetime = timezone.make_aware(end_datetime)
 
-                    available_quantity = get_available_quantity_for_period(item, start_datetime, end_datetime)
-                except:
-                    pass  # If date parsing fails, use original quantity
+                available = get_available_quantities_for_period(items, start_datetime, end_datetime)
+            except:
+                pass  # If date parsing fails, use original quantity
+
+        result = []
+        for item in items:
+            available_quantity = available[item.id]
 
             # Only include items that are available
             if available_quantity > 0:
@@ -2601,8 +2454,9 @@ def api_expire_room_rentals(request):
     """
     Manually trigger expiration of room rentals.
 
-    Executes the management command to expire overdue room rentals
-    and returns statistics about the operation.
+    Expires overdue room rentals like the ``expire_room_rentals``
+    command and returns statistics about the operation. Rentals locked
+    by a booking or a running expiry are skipped instead of waited for.
 
     Args:
         request: HTTP request object
@@ -2614,51 +2468,20 @@ def api_expire_room_rentals(request):
         return JsonResponse({'error': _('Only POST method allowed')}, status=405)
 
     try:
-        from django.core.management import call_command
-        from io import StringIO
-        import json
-
-        # Capture command output
-        out = StringIO()
+        from .expiry import expire_room_rentals
 
-        # Run the command
-        call_command('expire_room_rentals', stdout=out, verbosity=2)
-
-        # Get the output
-        output = out.getvalue()
-        out.close()
-
-        # Parse output to extract statistics
-        lines = output.split('\n')
-        expired_count = 0
-        reserved_expired = 0
-        issued_expired = 0
-
-        for line in lines:
-            if 'Found' in line and 'expired room rentals' in line:
-                try:
-                    expired_count = int(line.split()[1])
-                except:
-                    pass
-            elif 'expired room reservations' in line:
-                try:
-                    reserved_expired = int(line.split()[0])
-                except:
-                    pass
-            elif 'expired room issues' in line:
-                try:
-                    issued_expired = int(line.split()[0])
-                except:
-                    pass
+        expired_rentals = expire_room_rentals()
+        reserved_expired = sum(
+            room_rental.rental_request.status == 'reserved' for room_rental in expired_rentals
+        )
 
         return JsonResponse({
             'success': True,
             'message': _('Automatic expiration of room rentals completed'),
-            'output': output,
             'statistics': {
-                'total_expired': expired_count,
+                'total_expired': len(expired_rentals),
                 'reserved_expired': reserved_expired,
-                'issued_expired': issued_expired
+                'issued_expired': len(expired_rentals) - reserved_expired
             }
         })
 
@@ -2685,8 +2508,6 @@ def api_get_room_schedule(request):
     """
     try:
         from .models import Room
-        from .models import RoomRental
-        from datetime import datetime
         from datetime import timedelta
         from django.utils import timezone
         from django.utils.dateparse import parse_date
@@ -2717,141 +2538,17 @@ def api_get_room_schedule(request):
         else:
             rooms = Room.objects.filter(is_active=True)
 
+        schedules = build_room_schedules(rooms, start_date, end_date)
+
         result = []
         for room in rooms:
-            # Get all room rentals in the specified period
-            # Use __date for date-only comparison, avoiding timezone issues
-            room_rentals = RoomRental.objects.filter(
-                room=room,
-                rental_request__status__in=['reserved', 'issued'],
-                rental_request__requested_start_date__date__lte=end_date,
-                rental_request__requested_end_date__date__gte=start_date
-            ).select_related('rental_request__user')
-
-            # Build schedule by days
-            schedule = []
-            current_date = start_date
-            while current_date <= end_date:
-                # German day names mapping
-                german_days = {
-                    0: 'MO',  # Monday
-                    1: 'DI',  # Tuesday
-                    2: 'MI',  # Wednesday
-                    3: 'DO',  # Thursday
-                    4: 'FR',  # Friday
-                    5: 'SA',  # Saturday
-                    6: 'SO'   # Sunday
-                }
-
-                day_schedule = {
-                    'date': current_date.isoformat(),
-                    'day_name': current_date.strftime('%A'),  # Monday, Tuesday, etc.
-                    'day_short': german_days[current_date.weekday()],  # German abbreviations
-                    'day_number': current_date.day,
-                    'is_today': current_date == timezone.now().date(),
-                    'is_weekend': current_date.weekday() >= 5,  # Saturday and Sunday
-                    'slots': []
-                }
-
-                # Split day into 30-minute slots (10:00-18:00)
-                for hour in range(10, 18):
-                    for minute in [0, 30]:
-                        # Create datetime objects for current day
-                        slot_start = datetime.combine(current_date, datetime.min.time().replace(hour=hour, minute=minute))
-                        slot_end = slot_start + timedelta(minutes=30)
-
-                        # Check for overlaps with rentals
-                        slot_status = 'available'
-                        slot_info = None
-
-                        for rental in room_rentals:
-                            # Get rental dates
-                            rental_start = rental.rental_request.requested_start_date
-                            rental_end = rental.rental_request.requested_end_date
-
-                            # Check overlap using only time (without timezones)
-                            if rental_start and rental_end:
-                                # Convert to local time for comparison
-                                rental_start_local = timezone.localtime(rental_start)
-                                rental_end_local = timezone.localtime(rental_end)
-
-                                # Create datetime objects for comparison
-                                rental_start_time = datetime.combine(
-                                    current_date,
-                                    rental_start_local.time()
-                                )
-                                rental_end_time = datetime.combine(
-                                    current_date,
-                                    rental_end_local.time()
-                                )
-
-                                # Only consider rentals that actually cover this date
-                                rental_covers_day = (
-                                    rental_start_local.date() <= current_date <= rental_end_local.date()
-                                )
-                                if not rental_covers_day:
-                                    continue
-
-                                # Check overlap
-                                if (slot_start < rental_end_time and slot_end > rental_start_time):
-                                    slot_status = 'occupied'
-
-                                    # Safely get user name
-                                    user = rental.rental_request.user
-                                    user_name = _("Unknown user")
-
-                                    # Try to get name from profile (first_name + last_name)
-                                    try:
-                                        if hasattr(user, 'profile') and user.profile:
-                                            profile = user.profile
-                                            if hasattr(profile, 'first_name') and profile.first_name and hasattr(profile, 'last_name') and profile.last_name:
-                                                user_name = f"{profile.first_name} {profile.last_name}"
-                                            elif hasattr(profile, 'first_name') and profile.first_name:
-                                                user_name = profile.first_name
-                                            elif hasattr(profile, 'last_name') and profile.last_name:
-                                                user_name = profile.last_name
-                                        # If profile not found or empty, try other options
-                                        elif hasattr(user, 'first_name') and user.first_name and hasattr(user, 'last_name') and user.last_name:
-                                            user_name = f"{user.first_name} {user.last_name}"
-                                        elif hasattr(user, 'username') and user.username:
-                                            user_name = user.username
-                                        elif hasattr(user, 'email') and user.email:
-                                            user_name = user.email.split('@')[0]  # Take part before @
-                                        else:
-                                            user_name = _("User #{user_id}").format(user_id=user.id)
-                                    except Exception as e:
-                                        # In case of error, use fallback
-                                        if hasattr(user, 'email') and user.email:
-                                            user_name = user.email.split('@')[0]
-                                        else:
-                                            user_name = _("User #{user_id}").format(user_id=user.id)
-
-                                    slot_info = {
-                                        'user_name': user_name,
-                                        'project': rental.rental_request.project_name or _("No project"),
-                                        'status': rental.rental_request.status,
-                                        'people_count': rental.people_count or 1,
-                                        'start_time': rental_start_local.strftime('%H:%M'),
-                                        'end_time': rental_end_local.strftime('%H:%M')
-                                    }
-                                    break
-
-                        day_schedule['slots'].append({
-                            'time': f"{hour:02d}:{minute:02d}",
-                            'status': slot_status,
-                            'info': slot_info
-                        })
-
-                schedule.append(day_schedule)
-                current_date += timedelta(days=1)
-
             result.append({
                 'id': room.id,
                 'name': room.name,
                 'description': room.description,
                 'capacity': room.capacity,
                 'location': room.location,
-                'schedule': schedule
+                'schedule': schedules[room.id]
             })
 
         return JsonResponse({
@@ -3226,9 +2923,12 @@ def api_get_user_inventory_simple(request, user_id):
             Q(category__name__icontains=search_query)
         )
 
+    items = list(inventory_query)
+    available = get_available_quantities_for_period(items, start_date, end_date)
+
     result = []
-    for item in inventory_query:
-        available_qty = get_available_quantity_for_period(item, start_date, end_date)
+    for item in items:
+        available_qty = available[item.id]
         if available_qty > 0:
             result.append({
                 'id': item.id,
@@ -3361,7 +3061,6 @@ def api_get_room_schedule_user(request):
     print(f"🔍 api_get_room_schedule_user ENTRY POINT")
     try:
         print(f"🔍 api_get_room_schedule_user called with params: {request.GET}")
-        from datetime import datetime
         from datetime import timedelta
         from django.utils import timezone
         from django.utils.dateparse import parse_date
@@ -3392,84 +3091,16 @@ def api_get_room_schedule_user(request):
         else:
             rooms = Room.objects.filter(is_active=True)
 
+        schedules = build_room_schedules(rooms, start_date, end_date)
+
         result = []
         for room in rooms:
-            # Get all room rentals in the specified period
-            room_rentals = RoomRental.objects.filter(
-                room=room,
-                rental_request__status__in=['reserved', 'issued'],
-                rental_request__requested_start_date__date__lte=end_date,
-                rental_request__requested_end_date__date__gte=start_date
-            ).select_related('rental_request__user')
-
-            # Build schedule by days
-            schedule = []
-            current_date = start_date
-            while current_date <= end_date:
-                # German day names mapping
-                german_days = {
-                    0: 'MO',  # Monday
-                    1: 'DI',  # Tuesday
-                    2: 'MI',  # Wednesday
-                    3: 'DO',  # Thursday
-                    4: 'FR',  # Friday
-                    5: 'SA',  # Saturday
-                    6: 'SO'   # Sunday
-                }
-
-                day_schedule = {
-                    'date': current_date.isoformat(),
-                    'day_name': current_date.strftime('%A'),
-                    'day_short': german_days[current_date.weekday()],
-                    'day_number': current_date.day,
-                    'is_today': current_date == timezone.now().date(),
-                    'is_weekend': current_date.weekday() >= 5,
-                    'slots': []
-                }
-
-                # Split day into 30-minute slots (10:00-18:00)
-                for hour in range(10, 18):
-                    for minute in [0, 30]:
-                        slot_start = datetime.combine(current_date, datetime.min.time().replace(hour=hour, minute=minute))
-                        slot_start = timezone.make_aware(slot_start)
-                        slot_end = slot_start + timedelta(minutes=30)
-
-                        # Check for overlaps with rentals
-                        slot_status = 'available'
-                        slot_info = None
-
-                        for rental in room_rentals:
-                            rental_start = rental.rental_request.requested_start_date
-                            rental_end = rental.rental_request.requested_end_date
-
-                            # Check if slot overlaps with rental
-                            if (slot_start < rental_end and slot_end > rental_start):
-                                slot_status = 'occupied'
-                                slot_info = {
-                                    'user_name': rental.rental_request.user.get_full_name() or rental.rental_request.user.username,
-                                    'project': rental.rental_request.project_name or 'No project',
-                                    'status': rental.rental_request.status,
-                                    'people_count': rental.people_count or 1,
-                                    'start_time': rental.rental_request.requested_start_date.strftime('%H:%M'),
-                                    'end_time': rental.rental_request.requested_end_date.strftime('%H:%M')
-                                }
-                                break
-
-                        day_schedule['slots'].append({
-                            'time': slot_start.strftime('%H:%M'),
-                            'status': slot_status,
-                            'info': slot_info
-                        })
-
-                schedule.append(day_schedule)
-                current_date += timedelta(days=1)
-
             result.append({
                 'id': room.id,
                 'name': room.name,
                 'capacity': room.capacity,
                 'location': room.location,
-                'schedule': schedule
+                'schedule': schedules[room.id]
             })
 
         print(f"🔍 Returning {len(result)} rooms with schedules")
@@ -3972,60 +3603,49 @@ def api_issue_from_reservation(request):
         except OKUser.DoesNotExist:
             return JsonResponse({'error': _('Invalid user ID')}, status=400)
 
-        # Update rental request - only equipment rentals can be issued
-        rental.status = 'issued'
-        rental.requested_start_date = start_datetime
-        rental.requested_end_date = end_datetime
-        rental.created_by = created_by_user
-        if notes:
-            rental.notes = notes
-        rental.save()
-
-        # Update item quantities if provided
-        if item_quantities:
-            for item_id, quantity in item_quantities.items():
-                try:
-                    rental_item = RentalItem.objects.get(id=item_id, rental_request=rental)
-                    rental_item.quantity_issued = quantity
-                    rental_item.save()
-                except RentalItem.DoesNotExist:
-                    continue
-
-        # Add new items to the rental
+        # Validate new items before changing anything
+        new_quantities = []
         if new_items:
-            from inventory.models import InventoryItem
-            for new_item_data in new_items:
-                try:
-                    inventory_id = new_item_data.get('inventory_id')
-                    quantity = new_item_data.get('quantity', 1)
-
-                    # Get the inventory item
-                    inventory_item = InventoryItem.objects.get(id=inventory_id)
-
-                    # Check availability
-                    available_qty = get_available_quantity_for_period(inventory_item, start_datetime, end_datetime)
-
-                    if available_qty < quantity:
-                        return JsonResponse({
-                            'error': _('Item "{item_description}" is not available for the selected period. Available: {available}, requested: {requested}').format(
-                                item_description=inventory_item.description,
-                                available=available_qty,
-                                requested=quantity
-                            )
-                        }, status=400)
-
-                    # Create new rental item
-                    RentalItem.objects.create(
-                        rental_request=rental,
-                        inventory_item=inventory_item,
-                        quantity_requested=quantity,
-                        quantity_issued=quantity
+            try:
+                new_quantities = [
+                    (int(new_item_data.get('inventory_id')), int(new_item_data.get('quantity', 1)))
+                    for new_item_data in new_items
+                ]
+            except (TypeError, ValueError):
+                return JsonResponse({'error': _('Invalid inventory item ID')}, status=400)
+            new_ids = {inventory_id for inventory_id, quantity in new_quantities}
+            if InventoryItem.objects.filter(id__in=new_ids).count() != len(new_ids):
+                return JsonResponse({'error': _('Invalid inventory item ID')}, status=400)
+
+            error = check_items_availability(
+                [{'inventory_id': inventory_id, 'quantity': quantity} for inventory_id, quantity in new_quantities],
+                start_datetime, end_datetime,
+            )
+            if error:
+                return JsonResponse({'error': error}, status=400)
+
+        with transaction.atomic():
+            # Update rental request - only equipment rentals can be issued
+            rental.status = 'issued'
+            rental.requested_start_date = start_datetime
+            rental.requested_end_date = end_datetime
+            rental.created_by = created_by_user
+            if notes:
+                rental.notes = notes
+            rental.save()
+
+            # Update item quantities if provided
+            if item_quantities:
+                rental_items = list(RentalItem.objects.filter(id__in=list(item_quantities), rental_request=rental))
+                for rental_item in rental_items:
+                    rental_item.quantity_issued = item_quantities.get(
+                        str(rental_item.id), item_quantities.get(rental_item.id)
                     )
+                RentalItem.objects.bulk_update(rental_items, ['quantity_issued'])
 
-                except InventoryItem.DoesNotExist:
-                    return JsonResponse({'error': _('Invalid inventory item ID')}, status=400)
-                except Exception as e:
-                    return JsonResponse({'error': str(e)}, status=400)
+            # Add new items to the rental, issued right away
+            if new_quantities:
+                book_rental_items(rental, new_quantities, None, created_by_user, issued=True)
 
         # Update room rentals if any - only update dates, keep status as reserved
         room_rentals = RoomRental.objects.filter(rental_request=rental)